@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, ValidationError
+from typing import Optional, Dict, Any, List, Union
 import logging
 from datetime import datetime
+import instrumentation
+import resilience
+import http_clients
+import telegram_webhook
+import snapshots
+import events
+import reasons
+import config_watcher
 
 # Data Models
 class ConfigUpdate(BaseModel):
@@ -11,6 +19,9 @@ class ConfigUpdate(BaseModel):
     key: str
     value: str
 
+class ConfigBatch(BaseModel):
+    updates: List[ConfigUpdate]
+
 class ControlCommand(BaseModel):
     command: str # "force_on", "force_off", "set_mode"
     params: Optional[Dict[str, Any]] = None
@@ -37,78 +48,106 @@ def init_api(state, funcs):
 
 @app.get("/status")
 def get_status():
-    if not shared_state:
+    # Nur der veröffentlichte Snapshot wird gelesen: konsistenter Tick, keine Sperre gegenüber der Hauptschleife
+    snapshot = snapshots.get_publisher().latest()
+    if not shared_state or snapshot is None:
         raise HTTPException(status_code=503, detail="System not initialized")
-    
+    sample = snapshot.sample
+
     return {
         "temperatures": {
-            "oben": shared_state.sensors.t_oben,
-            "mittig": shared_state.sensors.t_mittig,
-            "unten": shared_state.sensors.t_unten,
-            "verdampfer": shared_state.sensors.t_verd,
-            "boiler": shared_state.sensors.t_boiler
+            "oben": sample.t_oben,
+            "mittig": sample.t_mittig,
+            "unten": sample.t_unten,
+            "verdampfer": sample.t_verd,
+            "boiler": sample.t_boiler
         },
         "compressor": {
-            "status": "EIN" if shared_state.control.kompressor_ein else "AUS",
-            "runtime_current": str(shared_state.stats.last_runtime).split('.')[0] if shared_state.control.kompressor_ein else "0:00:00",
-            "runtime_today": str(shared_state.stats.total_runtime_today).split('.')[0]
+            "status": "EIN" if sample.kompressor else "AUS",
+            "runtime_current": str(snapshot.current_runtime).split('.')[0] if sample.kompressor else "0:00:00",
+            "runtime_today": str(snapshot.total_runtime_today).split('.')[0]
         },
         "setpoints": {
-            "einschaltpunkt": shared_state.control.aktueller_einschaltpunkt,
-            "ausschaltpunkt": shared_state.control.aktueller_ausschaltpunkt,
-            "sicherheits_temp": shared_state.sicherheits_temp,
-            "verdampfertemperatur": shared_state.verdampfertemperatur
+            "einschaltpunkt": sample.einschaltpunkt,
+            "ausschaltpunkt": sample.ausschaltpunkt,
+            "sicherheits_temp": snapshot.sicherheits_temp,
+            "verdampfertemperatur": snapshot.verdampfertemperatur
         },
         "mode": {
-            "current": shared_state.control.previous_modus,
-            "solar_active": shared_state.control.solar_ueberschuss_aktiv,
-            "holiday_active": shared_state.urlaubsmodus_aktiv,
-            "bath_active": shared_state.bademodus_aktiv
+            "current": snapshot.modus,
+            "solar_active": sample.solar_ueberschuss,
+            "holiday_active": snapshot.urlaubsmodus_aktiv,
+            "bath_active": snapshot.bademodus_aktiv
         },
         "energy": {
-            "battery_power": shared_state.solar.batpower,
-            "soc": shared_state.solar.soc,
-            "feed_in": shared_state.solar.feedinpower
+            "battery_power": sample.batpower,
+            "soc": sample.soc,
+            "feed_in": sample.feedinpower
+        },
+        "blocking": {
+            "code": int(reasons.code_of(snapshot.blocking_reason)),
+            "reason": reasons.render(snapshot.blocking_reason)
         },
         "system": {
-            "exclusion_reason": shared_state.control.ausschluss_grund,
-            "last_update": datetime.now().strftime("%H:%M:%S")
-        }
+            "exclusion_code": int(reasons.code_of(snapshot.ausschluss_grund)),
+            "exclusion_reason": reasons.render(snapshot.ausschluss_grund),
+            "last_update": snapshot.created_at.strftime("%H:%M:%S"),
+            "tick": snapshot.seq
+        },
+        "upstreams": resilience.status_report(),
+        "http": http_clients.get_registry().stats(),
+        "events": {**events.get_bus().stats(), "metrics": events.get_metrics().report()}
+    }
+
+@app.get("/metrics/latency")
+def get_latency_metrics():
+    """Laufzeit-Statistik (p50/p95/p99/max in ms) der instrumentierten Hot-Path-Funktionen."""
+    return {
+        "enabled": instrumentation.ENABLED,
+        "spans": instrumentation.get_latency_report()
     }
 
 @app.post("/config")
-def update_config(config: ConfigUpdate):
+def update_config(config: Union[ConfigBatch, ConfigUpdate]):
+    """Ändert einen oder mehrere Werte: gemeinsam validiert, in config.ini gespeichert und sofort aktiv."""
     if not shared_state:
         raise HTTPException(status_code=503, detail="System not initialized")
-    
-    # Access Pydantic model sections
-    section_obj = getattr(shared_state.config, config.section, None)
-    if not section_obj:
-        raise HTTPException(status_code=404, detail=f"Section {config.section} not found")
-    
-    if not hasattr(section_obj, config.key):
-        raise HTTPException(status_code=404, detail=f"Key {config.key} not found in section {config.section}")
+    items = config.updates if isinstance(config, ConfigBatch) else [config]
+    if not items:
+        raise HTTPException(status_code=400, detail="No updates given")
+    updates: Dict[str, Dict[str, str]] = {}
+    for item in items:
+        updates.setdefault(item.section, {})[item.key] = item.value
 
+    manager = shared_state.config_manager
     try:
-        # Simple type casting based on current value type if possible, otherwise string
-        current_value = getattr(section_obj, config.key)
-        new_value = config.value
-        
-        if isinstance(current_value, bool):
-             new_value = config.value.lower() == 'true'
-        elif isinstance(current_value, int):
-             new_value = int(config.value)
-        elif isinstance(current_value, float):
-             new_value = float(config.value)
-             
-        setattr(section_obj, config.key, new_value)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid value for {config.key}: {str(e)}")
+        old, new = manager.write_updates(updates)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValidationError as e:
+        details = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        raise HTTPException(status_code=400, detail=f"Invalid value: {details}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid value: {e}")
+    except OSError as e:
+        logging.error(f"Config konnte nicht gespeichert werden: {e}")
+        raise HTTPException(status_code=500, detail=f"Could not write config: {e}")
+
+    # Der Watcher hält den neuen Dateistand für aktiv und benachrichtigt die Verbraucher (State, Planung, ...)
+    watcher = config_watcher.get_watcher()
+    if watcher is not None:
+        watcher.apply(old, new)
+    else:
+        shared_state.update_config()
 
-    # Trigger config save/reload not fully implemented yet for INI write-back
-    # shared_state.update_config() # This would reload from file, overwriting changes!
-    # Ideally we should write to file here. For now, in-memory update.
-    return {"status": "success", "message": f"Updated {config.section}.{config.key} to {new_value}"}
+    updated = {f"{section}.{key}": getattr(getattr(new, section), key)
+               for section, keys in updates.items() for key in keys}
+    if len(updated) == 1:
+        name, value = next(iter(updated.items()))
+        message = f"Updated {name} to {value}"
+    else:
+        message = f"Updated {len(updated)} values"
+    return {"status": "success", "message": message, "updated": updated}
 
 @app.post("/control")
 async def control_system(cmd: ControlCommand):
@@ -138,6 +177,24 @@ async def control_system(cmd: ControlCommand):
 
     raise HTTPException(status_code=400, detail="Unknown command")
 
+@app.post(telegram_webhook.WEBHOOK_PATH)
+async def receive_telegram_update(request: Request):
+    """Webhook-Empfänger für Telegram-Updates (nur aktiv, wenn [Telegram] WEBHOOK_URL gesetzt ist)."""
+    inbox = telegram_webhook.get_inbox()
+    if not inbox.active:
+        raise HTTPException(status_code=404, detail="Webhook not active")
+    if not inbox.verify(request.headers.get(telegram_webhook.SECRET_HEADER)):
+        logging.warning("Telegram-Webhook: Anfrage mit ungültigem Secret abgewiesen")
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+    try:
+        update = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(update, dict) or "update_id" not in update:
+        raise HTTPException(status_code=400, detail="Invalid update")
+    inbox.submit(update)
+    return {"ok": True}
+
 @app.get("/history")
 def get_history(hours: int = 24):
     """Get historical data from CSV"""
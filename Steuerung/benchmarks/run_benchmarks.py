@@ -0,0 +1,383 @@
+"""
+Benchmark-Suite für die Hot-Paths der Wärmepumpensteuerung.
+
+Misst Steuerungsschritt, Sensor-Lesen, CSV-Logging, CSV-Header-Reparatur,
+Diagramm-Erstellung, History-API und Langzeit-Analyse und schreibt die
+Ergebnisse als JSON, damit Optimierungen gegen eine Baseline belegt werden können.
+
+Aufruf (aus dem Ordner Steuerung/):
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --compare bench.json
+    python benchmarks/run_benchmarks.py --only run_logic_step,sensors
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+STEUERUNG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, STEUERUNG_DIR)
+
+from simulation import heizungsdaten_generator  # noqa: E402
+from utils import EXPECTED_CSV_HEADER  # noqa: E402
+
+SIMULATED_W1_DIR = os.path.join(STEUERUNG_DIR, "simulated_w1", "devices")
+WP_ANALYSIS_PATH = os.path.join(STEUERUNG_DIR, "..", "Analyse", "wp_analysis.py")
+
+
+# --- Hilfsfunktionen ---
+
+def measure(func, repeat=5, warmup=1):
+    """Führt func wiederholt aus und liefert die Laufzeiten in Sekunden."""
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations, **extra):
+    result = {
+        "runs": len(durations),
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+        "max_s": max(durations),
+    }
+    result.update(extra)
+    return result
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def write_synthetic_csv(path, start, end, interval_s=10, seed=42):
+    """Schreibt eine synthetische heizungsdaten.csv (siehe simulation/heizungsdaten_generator.py)."""
+    return heizungsdaten_generator.generate_csv(path, start, end, interval_s=interval_s, seed=seed)["rows"]
+
+
+def write_csv_of_size(path, size_mb, wrong_header=True):
+    """Erzeugt eine CSV-Datei mit ca. size_mb MB durch Wiederholen eines Datenblocks."""
+    block_path = path + ".block"
+    now = datetime.now().replace(microsecond=0)
+    write_synthetic_csv(block_path, now - timedelta(days=1), now)
+    with open(block_path, "r", encoding="utf-8") as f:
+        f.readline()
+        block = f.read()
+    os.remove(block_path)
+
+    header = list(EXPECTED_CSV_HEADER)
+    if wrong_header:
+        header[-1] = "Prognose"  # Abweichender Header erzwingt den Streaming-Fix
+        header = header[:-2]
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return os.path.getsize(path)
+
+
+class FakeResponse:
+    status = 200
+
+    async def text(self):
+        return ""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Ersetzt die aiohttp-Session: Uploads werden verworfen, damit nur das Rendering gemessen wird."""
+    closed = False
+
+    def post(self, *args, **kwargs):
+        return FakeResponse()
+
+    def get(self, *args, **kwargs):
+        return FakeResponse()
+
+
+def make_state():
+    from config_manager import ConfigManager
+    from state import State
+    config_manager = ConfigManager(os.path.join(tempfile.gettempdir(), "wp_benchmark_missing.ini"))
+    state = State(config_manager)
+    state.config.Telegram.BOT_TOKEN = "benchmark"
+    state.config.Telegram.CHAT_ID = "benchmark"
+    return state
+
+
+# --- Benchmarks ---
+
+def bench_run_logic_step(args, workdir):
+    import main
+    from hardware_mock import MockHardwareManager
+
+    main.hardware_manager = MockHardwareManager()
+    main.hardware_manager.init_gpio()
+    state = make_state()
+    state.config.Telegram.BOT_TOKEN = ""
+    state.sensors.t_oben, state.sensors.t_mittig, state.sensors.t_unten, state.sensors.t_verd = 44.0, 41.0, 38.0, 12.0
+    iterations = 200 if args.quick else 2000
+
+    async def run():
+        for i in range(iterations):
+            # Temperaturen pendeln um die Schaltpunkte, damit EIN/AUS-Pfade durchlaufen werden
+            state.sensors.t_mittig = 38.0 + (i % 100) / 10.0
+            await main.run_logic_step(None, state)
+
+    durations = measure(lambda: asyncio.run(run()), repeat=args.repeat)
+    return summarize(durations, iterations=iterations, per_tick_us=statistics.median(durations) / iterations * 1e6)
+
+
+def bench_sensors(args, workdir):
+    from sensors import SensorManager
+    manager = SensorManager(base_dir=SIMULATED_W1_DIR)
+    iterations = 50 if args.quick else 200
+
+    async def cold():
+        for _ in range(iterations):
+            manager.reset_cache()
+            await manager.get_all_temperatures()
+
+    async def cached():
+        for _ in range(iterations):
+            await manager.get_all_temperatures()
+
+    cold_durations = measure(lambda: asyncio.run(cold()), repeat=args.repeat)
+    cached_durations = measure(lambda: asyncio.run(cached()), repeat=args.repeat)
+    return summarize(
+        cold_durations, iterations=iterations,
+        per_call_cold_us=statistics.median(cold_durations) / iterations * 1e6,
+        per_call_cached_us=statistics.median(cached_durations) / iterations * 1e6,
+    )
+
+
+def bench_log_system_state(args, workdir):
+    import main
+    import snapshots
+    from hardware_mock import MockHardwareManager
+
+    main.hardware_manager = MockHardwareManager()
+    state = make_state()
+    state.sensors.t_oben, state.sensors.t_mittig, state.sensors.t_unten, state.sensors.t_verd = 44.0, 41.0, 38.0, 12.0
+    state.control.previous_modus = "Normalmodus"
+    snapshot = snapshots.capture(state, datetime.now(), nacht=False)
+    iterations = 500 if args.quick else 5000
+
+    async def run():
+        await main.hardware_manager.init_lcd()
+        for _ in range(iterations):
+            await main.log_system_state(snapshot)
+
+    with working_directory(workdir):
+        durations = measure(lambda: asyncio.run(run()), repeat=args.repeat)
+    median = statistics.median(durations)
+    return summarize(durations, iterations=iterations, rows_per_s=iterations / median)
+
+
+def bench_csv_header_fix(args, workdir):
+    from utils import check_and_fix_csv_header
+    size_mb = 32 if args.quick else args.csv_mb
+    path = os.path.join(workdir, "header_fix.csv")
+
+    def fix_broken():
+        write_csv_of_size(path, size_mb, wrong_header=True)
+        start = time.perf_counter()
+        with working_directory(workdir):
+            fixed = check_and_fix_csv_header(path)
+        elapsed = time.perf_counter() - start
+        assert fixed, "Header-Reparatur wurde nicht ausgelöst"
+        return elapsed
+
+    durations = [fix_broken() for _ in range(max(1, args.repeat // 2))]
+    fast_path = measure(lambda: check_and_fix_csv_header(path), repeat=args.repeat)
+    file_size = os.path.getsize(path)
+    os.remove(path)
+    return summarize(
+        durations, size_mb=round(file_size / 1024 / 1024, 1),
+        mb_per_s=file_size / 1024 / 1024 / statistics.median(durations),
+        fast_path_median_s=statistics.median(fast_path),
+    )
+
+
+def bench_temperature_chart(args, workdir):
+    import telegram_charts
+    state = make_state()
+    session = FakeSession()
+    now = datetime.now().replace(microsecond=0)
+    with working_directory(workdir):
+        os.makedirs("csv log", exist_ok=True)
+        write_synthetic_csv(os.path.join("csv log", "heizungsdaten.csv"), now - timedelta(days=8), now + timedelta(minutes=1))
+        results = {}
+        for label, hours in (("6h", 6), ("24h", 24), ("7d", 24 * 7)):
+            durations = measure(
+                lambda: asyncio.run(telegram_charts.get_boiler_temperature_history(session, hours, state, state.config)),
+                repeat=args.repeat,
+            )
+            results[label] = summarize(durations)
+    return results
+
+
+def bench_api_history(args, workdir):
+    import api
+    api.init_api(make_state(), {})
+    months_list = (1,) if args.quick else (1, 6, 12)
+    interval_s = 60 if args.quick else 10
+    now = datetime.now().replace(microsecond=0)
+    results = {}
+    with working_directory(workdir):
+        for months in months_list:
+            rows = write_synthetic_csv("heizungsdaten.csv", now - timedelta(days=30 * months), now, interval_s=interval_s)
+            durations = measure(lambda: api.get_history(hours=months * 30 * 24), repeat=max(1, args.repeat // 2), warmup=0)
+            results[f"{months}m"] = summarize(durations, rows=rows)
+        os.remove("heizungsdaten.csv")
+    return results
+
+
+def bench_wp_analysis(args, workdir):
+    spec = importlib.util.spec_from_file_location("wp_analysis", WP_ANALYSIS_PATH)
+    wp_analysis = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(wp_analysis)
+    days = 30 if args.quick else 365
+    now = datetime.now().replace(microsecond=0)
+    with working_directory(workdir):
+        os.makedirs("Analyse", exist_ok=True)
+        rows = write_synthetic_csv(os.path.join("Analyse", "heizungsdaten.csv"), now - timedelta(days=days), now)
+
+        def run():
+            if os.path.exists(wp_analysis.MERGED_CSV):
+                os.remove(wp_analysis.MERGED_CSV)
+            wp_analysis.main()
+
+        durations = measure(run, repeat=max(1, args.repeat // 2), warmup=0)
+    return summarize(durations, rows=rows, days=days)
+
+
+BENCHMARKS = {
+    "run_logic_step": bench_run_logic_step,
+    "sensors": bench_sensors,
+    "log_system_state": bench_log_system_state,
+    "csv_header_fix": bench_csv_header_fix,
+    "temperature_chart": bench_temperature_chart,
+    "api_history": bench_api_history,
+    "wp_analysis": bench_wp_analysis,
+}
+
+
+# --- Vergleich ---
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and "median_s" in value:
+            flat[prefix + key] = value["median_s"]
+        elif isinstance(value, dict):
+            flat.update(_flatten(value, prefix + key + "."))
+    return flat
+
+
+def compare(current, baseline, max_regression):
+    """Vergleicht Mediane mit einer Baseline. Gibt die Liste der Regressionen zurück."""
+    cur, base = _flatten(current["results"]), _flatten(baseline["results"])
+    regressions = []
+    print(f"{'Benchmark':<36} {'Baseline':>10} {'Aktuell':>10} {'Änderung':>9}")
+    for name in sorted(cur):
+        if name not in base:
+            continue
+        change = (cur[name] - base[name]) / base[name] if base[name] else 0.0
+        marker = " <-- REGRESSION" if change > max_regression else ""
+        print(f"{name:<36} {base[name]:>9.4f}s {cur[name]:>9.4f}s {change:>+8.1%}{marker}")
+        if marker:
+            regressions.append(name)
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=STEUERUNG_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks der WPSteuerung")
+    parser.add_argument("--output", default="benchmark_results.json", help="Zieldatei für die JSON-Ergebnisse")
+    parser.add_argument("--compare", help="Baseline-JSON zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Erlaubte Verschlechterung (0.2 = 20%%)")
+    parser.add_argument("--only", help="Kommagetrennte Liste von Benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--csv-mb", type=int, default=1024, help="Größe der CSV für den Header-Fix-Benchmark")
+    parser.add_argument("--quick", action="store_true", help="Reduzierte Datenmengen (Smoke-Test)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unbekannte Benchmarks: {unknown}")
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": args.quick,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="wp_bench_") as workdir:
+        for name in selected:
+            print(f"▶ {name} ...", flush=True)
+            start = time.perf_counter()
+            try:
+                output["results"][name] = BENCHMARKS[name](args, workdir)
+            except Exception as e:
+                output["results"][name] = {"error": str(e)}
+                print(f"  Fehler: {e}")
+            print(f"  fertig in {time.perf_counter() - start:.1f}s")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(output, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
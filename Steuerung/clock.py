@@ -0,0 +1,78 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import pytz
+
+
+class SystemClock:
+    """Echte Systemzeit (Standard im Betrieb)."""
+
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Virtuelle Uhr für Simulationen: Die Zeit steht still, bis advance() oder sleep()
+    sie weiterschiebt. Naive Zeitstempel (now() ohne tz) werden in local_tz geliefert.
+    """
+
+    def __init__(self, start: datetime, local_tz=None):
+        self.local_tz = local_tz or pytz.timezone("Europe/Berlin")
+        if start.tzinfo is None:
+            start = self.local_tz.localize(start)
+        self._utc = start.astimezone(timezone.utc)
+        self._monotonic = 0.0
+
+    def now(self, tz=None) -> datetime:
+        if tz is None:
+            return self._utc.astimezone(self.local_tz).replace(tzinfo=None)
+        return self._utc.astimezone(tz)
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def advance(self, seconds: float) -> None:
+        self._utc += timedelta(seconds=seconds)
+        self._monotonic += seconds
+
+    async def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+        await asyncio.sleep(0)
+
+
+_clock: Optional[object] = None
+
+
+def set_clock(clock) -> None:
+    """Installiert eine Uhr (z.B. VirtualClock) für alle Logik-Module."""
+    global _clock
+    _clock = clock
+
+
+def reset_clock() -> None:
+    """Stellt wieder auf die Systemzeit um."""
+    set_clock(None)
+
+
+def get_clock():
+    return _clock or SystemClock()
+
+
+def now(tz=None) -> datetime:
+    """Aktuelle Zeit der installierten Uhr (tz=None: naive lokale Zeit)."""
+    return get_clock().now(tz)
+
+
+def monotonic() -> float:
+    if _clock is None:
+        return time.monotonic()
+    return _clock.monotonic()
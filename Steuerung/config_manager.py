@@ -1,7 +1,20 @@
 import configparser
 import logging
-from typing import Optional
-from pydantic import BaseModel, Field, ValidationError
+import os
+import re
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+_HHMM = re.compile(r"^\s*([01]?\d|2[0-3]):[0-5]\d\s*$")
+
+def _check_hhmm(value: str, allow_empty: bool = False) -> str:
+    if allow_empty and not value.strip():
+        return ""
+    if not _HHMM.match(value):
+        raise ValueError(f"Uhrzeit im Format HH:MM erwartet, nicht {value!r}")
+    return value.strip()
 
 class HeizungssteuerungConfig(BaseModel):
     MIN_LAUFZEIT: int = Field(default=15, description="Minimale Laufzeit in Minuten")
@@ -19,9 +32,23 @@ class HeizungssteuerungConfig(BaseModel):
     AUSSCHALTPUNKT: int = Field(default=45)
     UEBERGANGSMODUS_MORGENS_ENDE: str = Field(default="10:00")
     UEBERGANGSMODUS_ABENDS_START: str = Field(default="17:00")
+    WOCHENENDE_NACHTABSENKUNG_START: str = Field(default="", description="Nachtabsenkung Sa/So (leer = wie werktags)")
+    WOCHENENDE_NACHTABSENKUNG_END: str = Field(default="")
+    ZUSAETZLICHE_ABSENKUNGEN: str = Field(default="", description="Weitere Absenkzeiten, z.B. '12:00-14:00; Sa-So 01:00-06:00'")
     API_HOST: str = Field(default="0.0.0.0")
     API_PORT: int = Field(default=8000)
 
+    @field_validator("NACHTABSENKUNG_START", "NACHTABSENKUNG_END",
+                     "UEBERGANGSMODUS_MORGENS_ENDE", "UEBERGANGSMODUS_ABENDS_START")
+    @classmethod
+    def _validate_time(cls, value: str) -> str:
+        return _check_hhmm(value)
+
+    @field_validator("WOCHENENDE_NACHTABSENKUNG_START", "WOCHENENDE_NACHTABSENKUNG_END")
+    @classmethod
+    def _validate_optional_time(cls, value: str) -> str:
+        return _check_hhmm(value, allow_empty=True)
+
 class HealthcheckConfig(BaseModel):
     HEALTHCHECK_URL: str = Field(default="")
     HEALTHCHECK_INTERVAL_MINUTES: int = Field(default=15)
@@ -33,6 +60,8 @@ class SolaxCloudConfig(BaseModel):
 class TelegramConfig(BaseModel):
     BOT_TOKEN: str = Field(default="")
     CHAT_ID: str = Field(default="")
+    WEBHOOK_URL: str = Field(default="")
+    WEBHOOK_SECRET: str = Field(default="")
 
 class UrlaubsmodusConfig(BaseModel):
     URLAUBSABSENKUNG: float = Field(default=6.0)
@@ -44,52 +73,210 @@ class SolarueberschussConfig(BaseModel):
 
 class LoggingConfig(BaseModel):
     ENABLE_FULL_LOG: bool = Field(default=True)
+    ENABLE_INSTRUMENTATION: bool = Field(default=True, description="Laufzeitmessung der Hot-Path-Funktionen (p50/p95/p99)")
 
 class WetterprognoseConfig(BaseModel):
     LATITUDE: float = Field(default=46.7142)
     LONGITUDE: float = Field(default=13.6361)
     TILT: int = Field(default=30)
 
+class WechselrichterConfig(BaseModel):
+    QUELLE: str = Field(default="cloud", description="cloud, modbus oder auto (Modbus mit Cloud als Rückfallebene)")
+    MODBUS_HOST: str = Field(default="")
+    MODBUS_PORT: int = Field(default=502)
+    MODBUS_UNIT_ID: int = Field(default=1)
+    MODBUS_INTERVALL_SEKUNDEN: float = Field(default=5.0)
+
+class PlanungConfig(BaseModel):
+    AKTIV: bool = Field(default=False, description="Vorausschauende Heizplanung nach Strahlungsprognose")
+    INTERVALL_MINUTEN: int = Field(default=15)
+    MIN_STRAHLUNG: float = Field(default=200.0, description="Mindeststrahlung eines PV-Slots in W/m²")
+    VERSCHIEBUNG_STUNDEN: float = Field(default=4.0, description="Heizen aus dem Netz bis zu so vielen Stunden vor einem PV-Slot aufschieben")
+    VERSCHIEBUNG_ABSENKUNG: float = Field(default=3.0, description="Absenkung des Einschaltpunkts während des Aufschiebens in K")
+
 class AppConfig(BaseModel):
     Heizungssteuerung: HeizungssteuerungConfig = Field(default_factory=HeizungssteuerungConfig)
     Healthcheck: HealthcheckConfig = Field(default_factory=HealthcheckConfig)
     SolaxCloud: SolaxCloudConfig = Field(default_factory=SolaxCloudConfig)
+    Wechselrichter: WechselrichterConfig = Field(default_factory=WechselrichterConfig)
     Telegram: TelegramConfig = Field(default_factory=TelegramConfig)
     Urlaubsmodus: UrlaubsmodusConfig = Field(default_factory=UrlaubsmodusConfig)
     Solarueberschuss: SolarueberschussConfig = Field(default_factory=SolarueberschussConfig)
     Logging: LoggingConfig = Field(default_factory=LoggingConfig)
     Wetterprognose: WetterprognoseConfig = Field(default_factory=WetterprognoseConfig)
+    Planung: PlanungConfig = Field(default_factory=PlanungConfig)
 
 class ConfigManager:
     def __init__(self, config_path: str = "config.ini"):
         self.config_path = config_path
         self.config: AppConfig = AppConfig()
+        self.invalid_sections: List[str] = []
+        self._write_lock = threading.Lock()
         self.load_config()
 
-    def load_config(self):
-        """Liest die Config-Datei, validiert sie und lädt sie in das Pydantic Model."""
+    def read_config(self, base: Optional[AppConfig] = None) -> Optional[Tuple[AppConfig, List[str]]]:
+        """
+        Liest und validiert die Config-Datei Sektion für Sektion, ohne die aktive Config zu ändern.
+        Eine ungültige Sektion (Model-Validierung oder check_compiles) behält ihren Stand aus base
+        (Standard: aktive Config); die gültigen Sektionen werden trotzdem übernommen.
+        Gibt (Config, ungültige Sektionen) zurück, None ohne Datei.
+        """
+        base = base if base is not None else self.config
         parser = configparser.ConfigParser()
         parser.optionxform = str  # Behalte Groß-/Kleinschreibung bei (wichtig für Pydantic Models)
+        if not parser.read(self.config_path, encoding="utf-8"):
+            return None
+
+        sections = {}
+        invalid = []
+        for name, field in AppConfig.model_fields.items():
+            if not parser.has_section(name):
+                continue  # fehlende Sektion: Standardwerte
+            try:
+                sections[name] = field.annotation(**dict(parser.items(name)))
+            except ValidationError as e:
+                logging.error(f"Validierungsfehler in Sektion [{name}], behalte bisherige Werte: {e}")
+                sections[name] = getattr(base, name)
+                invalid.append(name)
+        config = AppConfig(**sections)
+        # Sektionen, die validieren, aber nicht kompilieren, einzeln gegen base prüfen und zurücksetzen
+        for name in AppConfig.model_fields:
+            if name in invalid or getattr(config, name) == getattr(base, name):
+                continue
+            try:
+                check_compiles(base.model_copy(update={name: getattr(config, name)}))
+            except ValueError as e:
+                logging.error(f"Sektion [{name}] nicht nutzbar, behalte bisherige Werte: {e}")
+                invalid.append(name)
+        if invalid:
+            config = config.model_copy(update={name: getattr(base, name) for name in invalid})
+        return config, invalid
+
+    def load_config(self):
+        """Liest die Config-Datei, validiert sie und tauscht die aktive Config aus."""
         try:
-            read_files = parser.read(self.config_path)
-            if not read_files:
+            result = self.read_config()
+            if result is None:
                 logging.warning(f"Konfigurationsdatei '{self.config_path}' nicht gefunden. Verwende Standardwerte.")
                 return
+            self.config, self.invalid_sections = result
+            logging.debug(f"Konfiguration aus '{self.config_path}' erfolgreich geladen.")  # Changed to DEBUG to reduce log noise
+        except Exception as e:
+            logging.error(f"Fehler beim Laden der Konfiguration: {e}")
 
-            config_dict = {}
-            for section in parser.sections():
-                config_dict[section] = dict(parser.items(section))
+    def validate_updates(self, updates: Dict[str, Dict[str, str]]) -> AppConfig:
+        """
+        Prüft Änderungen (Sektion -> {Schlüssel: Wert}) gegen die aktive Config und gibt die neue
+        Config zurück, ohne etwas zu übernehmen. KeyError bei unbekannter Sektion/Schlüssel,
+        ValidationError bei ungültigem Wert, ValueError wenn Zeitplan oder Regelparameter nicht kompilieren.
+        """
+        sections = {}
+        for name, values in updates.items():
+            if name not in AppConfig.model_fields:
+                raise KeyError(f"Section {name} not found")
+            current = getattr(self.config, name)
+            for key in values:
+                if key not in type(current).model_fields:
+                    raise KeyError(f"Key {key} not found in section {name}")
+            sections[name] = type(current)(**{**current.model_dump(), **values})
+        new = self.config.model_copy(update=sections)
+        check_compiles(new)
+        return new
 
+    def write_updates(self, updates: Dict[str, Dict[str, str]]) -> Tuple[AppConfig, AppConfig]:
+        """
+        Validiert alle Änderungen gemeinsam, schreibt sie in einem Schritt in die Config-Datei
+        (Kommentare und Reihenfolge bleiben erhalten) und übernimmt sie. Gibt (alt, neu) zurück.
+        """
+        with self._write_lock:
+            old = self.config
+            new = self.validate_updates(updates)
+            values = {name: {key: str(getattr(getattr(new, name), key)) for key in keys}
+                      for name, keys in updates.items()}
             try:
-                self.config = AppConfig(**config_dict)
-                logging.debug(f"Konfiguration aus '{self.config_path}' erfolgreich geladen.")  # Changed to DEBUG to reduce log noise
-            except ValidationError as e:
-                logging.error(f"Validierungsfehler in Config: {e}")
-                # Fallback: Versuche, Sektionen einzeln zu laden oder behalte Defaults
-                # Hier behalten wir die Defaults der fehlgeschlagenen Validierung nicht bei, 
-                # sondern loggen nur. Verbesserte Logik könnte hier partielle Updates machen.
-        except Exception as e:
-            logging.error(f"Fehler beim Laden der Konfiguration: {e}")
+                with open(self.config_path, encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                text = ""
+            write_atomic(self.config_path, patch_ini(text, values))
+            self.config = new
+        logging.info(f"Konfiguration gespeichert: "
+                     f"{', '.join(f'{name}.{key}' for name, keys in values.items() for key in keys)}")
+        return old, new
 
     def get(self):
         return self.config
+
+def check_compiles(config: AppConfig) -> None:
+    """
+    Kompiliert Zeitplan und Regelparameter streng, wie sie der nächste Tick verwenden würde.
+    ValueError, wenn ein Wert zwar validiert, aber nicht nutzbar ist (z.B. Absenkung außerhalb 0..35 K).
+    """
+    # lokal importiert: schedule und control_params importieren dieses Modul
+    import control_params
+    import schedule
+    schedule.ScheduleEngine(schedule.config_key(config), strict=True)
+    control_params.compile_params(config, strict=True)
+
+_KEY_LINE = re.compile(r"^([^\s#;\[][^=:]*?)\s*[=:]")
+
+def patch_ini(text: str, updates: Dict[str, Dict[str, str]]) -> str:
+    """
+    Setzt Werte in einem INI-Text zeilenweise: vorhandene Schlüssel werden an Ort und Stelle ersetzt,
+    fehlende am Ende ihrer Sektion ergänzt, fehlende Sektionen angehängt. Kommentare bleiben stehen.
+    """
+    pending = {name: dict(values) for name, values in updates.items()}
+    lines = text.splitlines()
+    out: List[str] = []
+    section = None
+    skip_continuation = False
+
+    def flush(name):
+        # fehlende Schlüssel vor den Leerzeilen am Sektionsende einfügen
+        missing = pending.get(name) or {}
+        if not missing:
+            return
+        at = len(out)
+        while at > 0 and not out[at - 1].strip():
+            at -= 1
+        out[at:at] = [f"{key} = {value}" for key, value in missing.items()]
+        missing.clear()
+
+    for line in lines:
+        stripped = line.strip()
+        if skip_continuation:
+            if line[:1] in (" ", "\t") and stripped:
+                continue  # mehrzeiliger Altwert
+            skip_continuation = False
+        if stripped.startswith("[") and stripped.endswith("]"):
+            flush(section)
+            section = stripped[1:-1].strip()
+            out.append(line)
+            continue
+        match = _KEY_LINE.match(line)
+        if match and section in pending and match.group(1) in pending[section]:
+            key = match.group(1)
+            out.append(f"{line[:match.end()].rstrip()} {pending[section].pop(key)}")
+            skip_continuation = True
+            continue
+        out.append(line)
+    flush(section)
+
+    for name, missing in pending.items():
+        if missing:
+            if out and out[-1].strip():
+                out.append("")
+            out.append(f"[{name}]")
+            out.extend(f"{key} = {value}" for key, value in missing.items())
+    return "\n".join(out) + "\n"
+
+def write_atomic(path: str, text: str) -> None:
+    """Schreibt über eine temporäre Datei im selben Verzeichnis und ersetzt per rename (nie halb geschrieben)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(path):
+        shutil.copymode(path, tmp)
+    os.replace(tmp, path)
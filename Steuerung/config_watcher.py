@@ -0,0 +1,192 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from typing import Callable, List, Optional, Tuple
+
+DEBOUNCE_S = 0.5            # Editoren schreiben oft in mehreren Schritten
+POLL_INTERVAL_S = 5.0       # Stat-Fallback ohne inotify (nur mtime/Größe, die Datei wird nicht gelesen)
+INOTIFY_RECHECK_S = 300.0   # zusätzlicher Stat-Abgleich, falls ein Ereignis verloren geht
+
+# aus <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimaler inotify-Zugriff über libc (Linux); überwacht das Verzeichnis, damit auch atomar ersetzte Dateien erkannt werden."""
+
+    def __init__(self, directory: str, filename: str, on_change: Callable[[], None]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fehlgeschlagen")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch({directory}) fehlgeschlagen")
+        self.filename = os.fsencode(filename)
+        self.on_change = on_change
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.fd, self._read)
+
+    def _read(self) -> None:
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if name == self.filename:
+                self.on_change()
+
+    def close(self) -> None:
+        self._loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """
+    Lädt config.ini neu, sobald sich die Datei tatsächlich ändert: per inotify, sonst per
+    mtime/Größe-Abgleich. Die Validierung läuft in einem Worker-Thread; danach wird die Config im
+    Event-Loop in einem Schritt getauscht und die Abonnenten (callback(alt, neu)) werden benachrichtigt.
+    """
+
+    def __init__(self, manager, debounce_s: float = DEBOUNCE_S, poll_interval_s: float = POLL_INTERVAL_S):
+        self.manager = manager
+        self.debounce_s = debounce_s
+        self.poll_interval_s = poll_interval_s
+        self.mode: Optional[str] = None  # "inotify" oder "stat"
+        self.reloads = 0
+        self._callbacks: List[Callable] = []
+        self._signature = self.signature()
+        self._changed = asyncio.Event()
+        self._inotify: Optional[_Inotify] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = asyncio.Lock()
+
+    def subscribe(self, callback: Callable) -> None:
+        self._callbacks.append(callback)
+
+    def signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.manager.config_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def mark_current(self) -> None:
+        """Der aktuelle Dateistand ist bereits aktiv (z.B. nach eigenem Schreiben) und löst keinen Reload aus."""
+        self._signature = self.signature()
+
+    def apply(self, old, new) -> None:
+        """
+        Übernimmt eine selbst geschriebene Config (z.B. aus der API): der neue Dateistand gilt als
+        aktiv, die Abonnenten werden ohne erneutes Lesen im Event-Loop benachrichtigt. Threadsicher.
+        """
+        self.mark_current()
+        if self._loop is None or self._loop.is_closed():
+            self._notify(old, new)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._notify(old, new)
+        else:
+            self._loop.call_soon_threadsafe(self._notify, old, new)
+
+    def _notify(self, old, new) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(old, new)
+            except Exception as e:
+                logging.error(f"Fehler bei Config-Abonnent {getattr(callback, '__name__', callback)}: {e}")
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        path = os.path.abspath(self.manager.config_path)
+        try:
+            self._inotify = _Inotify(os.path.dirname(path), os.path.basename(path), self._changed.set)
+            self.mode = "inotify"
+        except (OSError, AttributeError, TypeError) as e:
+            # kein Linux/libc ohne inotify (z.B. Entwicklung unter Windows)
+            logging.info(f"inotify nicht verfügbar ({e}), prüfe config.ini alle {self.poll_interval_s:.0f}s per stat")
+            self.mode = "stat"
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        timeout = INOTIFY_RECHECK_S if self.mode == "inotify" else self.poll_interval_s
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+                await asyncio.sleep(self.debounce_s)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            await self.check()
+
+    async def check(self) -> bool:
+        """Lädt neu, wenn sich mtime/Größe/Inode seit dem letzten Laden geändert haben."""
+        signature = self.signature()
+        if signature is None or signature == self._signature:
+            return False
+        return await self.reload(signature)
+
+    async def reload(self, signature=None) -> bool:
+        async with self._lock:
+            signature = signature or self.signature()
+            try:
+                result = await asyncio.to_thread(self.manager.read_config)
+            except Exception as e:
+                logging.error(f"Fehler beim Laden der Konfiguration: {e}")
+                return False
+            self._signature = signature
+            if result is None:
+                return False
+            new, invalid = result
+            old = self.manager.config
+            self.manager.config, self.manager.invalid_sections = new, invalid
+            self.reloads += 1
+            changed = [name for name in type(new).model_fields if getattr(old, name) != getattr(new, name)]
+            logging.info(f"Konfiguration neu geladen, geänderte Sektionen: {', '.join(changed) or 'keine'}"
+                         + (f", ungültig (unverändert): {', '.join(invalid)}" if invalid else ""))
+        self._notify(old, new)
+        return True
+
+
+_watcher: Optional[ConfigWatcher] = None
+
+
+def get_watcher(manager=None) -> Optional[ConfigWatcher]:
+    """Watcher der Anwendung; wird beim ersten Aufruf mit manager angelegt."""
+    global _watcher
+    if _watcher is None and manager is not None:
+        _watcher = ConfigWatcher(manager)
+    return _watcher
@@ -0,0 +1,107 @@
+import logging
+import math
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from config_manager import (
+    HeizungssteuerungConfig,
+    PlanungConfig,
+    SolarueberschussConfig,
+    UrlaubsmodusConfig,
+)
+
+MAX_REDUCTION = 35.0  # K, wie logic_utils.get_validated_reduction
+
+
+class ControlParams(NamedTuple):
+    """
+    Regelparameter einer Config-Version als fertige Zahlen (Sollwerte, Absenkungen, Mindestzeiten,
+    Solar-Schwellen). Wird einmal je Config kompiliert und pro Tick über den TickContext gereicht.
+    Die Zeitfenster (Nacht, Übergang, Solarfenster) kompiliert schedule.ScheduleEngine.
+    """
+
+    einschaltpunkt: float
+    ausschaltpunkt: float
+    einschaltpunkt_erhoeht: float
+    ausschaltpunkt_erhoeht: float
+    nacht_reduction: float
+    urlaubs_reduction: float
+    night_einschaltpunkt: float
+    verschiebung_absenkung: float
+    sicherheits_temp: float
+    verdampfertemperatur: float
+    verdampfer_restart_temp: float
+    min_laufzeit: timedelta
+    min_pause: timedelta
+    batpower_threshold: float
+    soc_threshold: float
+    feedinpower_threshold: float
+
+    def reduction(self, night: bool, urlaub: bool) -> float:
+        """Gesamtabsenkung der Basis-Sollwerte."""
+        return (self.nacht_reduction if night else 0.0) + (self.urlaubs_reduction if urlaub else 0.0)
+
+
+def _number(section, model, key: str, low: float = -math.inf, high: float = math.inf, strict: bool = False):
+    """Wert aus der Config, wenn er eine endliche Zahl im Bereich ist, sonst der Standardwert des Models (strict: ValueError)."""
+    default = model.model_fields[key].default
+    value = getattr(section, key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or not low <= value <= high:
+        if strict:
+            raise ValueError(f"Ungültiger Wert {key}={value!r} (erlaubt {low}..{high})")
+        if value is not default:
+            logging.warning(f"Ungültiger Wert {key}={value!r}, verwende {default}")
+        return default
+    return value
+
+
+def compile_params(config, strict: bool = False) -> ControlParams:
+    """
+    Liest und prüft alle Regelparameter; fehlende Sektionen oder ungültige Werte ergeben die Standardwerte.
+    Mit strict=True löst ein ungültiger Wert einen ValueError aus (Prüfung vor dem Übernehmen einer Config).
+    """
+    h = getattr(config, "Heizungssteuerung", None)
+    einschaltpunkt = _number(h, HeizungssteuerungConfig, "EINSCHALTPUNKT", strict=strict)
+    nacht_reduction = float(_number(h, HeizungssteuerungConfig, "NACHTABSENKUNG", 0.0, MAX_REDUCTION, strict=strict))
+    solar = getattr(config, "Solarueberschuss", None)
+    return ControlParams(
+        einschaltpunkt=einschaltpunkt,
+        ausschaltpunkt=_number(h, HeizungssteuerungConfig, "AUSSCHALTPUNKT", strict=strict),
+        einschaltpunkt_erhoeht=_number(h, HeizungssteuerungConfig, "EINSCHALTPUNKT_ERHOEHT", strict=strict),
+        ausschaltpunkt_erhoeht=_number(h, HeizungssteuerungConfig, "AUSSCHALTPUNKT_ERHOEHT", strict=strict),
+        nacht_reduction=nacht_reduction,
+        urlaubs_reduction=float(_number(getattr(config, "Urlaubsmodus", None), UrlaubsmodusConfig, "URLAUBSABSENKUNG", 0.0, MAX_REDUCTION, strict=strict)),
+        night_einschaltpunkt=einschaltpunkt - nacht_reduction,
+        verschiebung_absenkung=_number(getattr(config, "Planung", None), PlanungConfig, "VERSCHIEBUNG_ABSENKUNG", 0.0, MAX_REDUCTION, strict=strict),
+        sicherheits_temp=_number(h, HeizungssteuerungConfig, "SICHERHEITS_TEMP", strict=strict),
+        verdampfertemperatur=_number(h, HeizungssteuerungConfig, "VERDAMPFERTEMPERATUR", strict=strict),
+        verdampfer_restart_temp=_number(h, HeizungssteuerungConfig, "VERDAMPFER_RESTART_TEMP", strict=strict),
+        min_laufzeit=timedelta(minutes=_number(h, HeizungssteuerungConfig, "MIN_LAUFZEIT", 0, strict=strict)),
+        min_pause=timedelta(minutes=_number(h, HeizungssteuerungConfig, "MIN_PAUSE", 0, strict=strict)),
+        batpower_threshold=_number(solar, SolarueberschussConfig, "BATPOWER_THRESHOLD", strict=strict),
+        soc_threshold=_number(solar, SolarueberschussConfig, "SOC_THRESHOLD", strict=strict),
+        feedinpower_threshold=_number(solar, SolarueberschussConfig, "FEEDINPOWER_THRESHOLD", strict=strict),
+    )
+
+
+_config = None
+_params: Optional[ControlParams] = None
+
+
+def get_params(config) -> ControlParams:
+    """
+    ControlParams zur Config (kompiliert nur bei neuem Config-Objekt). Die Config wird bei Änderungen
+    ersetzt (config_watcher, API) und nicht verändert, daher genügt der Identitätsvergleich.
+    """
+    global _config, _params
+    if config is not _config:
+        _params = compile_params(config)
+        _config = config
+    return _params
+
+
+def current(state, ctx=None) -> ControlParams:
+    """Parameter des laufenden Ticks, ohne TickContext die der aktiven Config."""
+    if ctx is not None and ctx.params is not None:
+        return ctx.params
+    return get_params(state.config)
@@ -0,0 +1,212 @@
+"""
+Reiner Entscheidungskern der Regelung: (Eingaben, Parameter, vorheriger Zustand) -> (Ergebnis, neuer Zustand).
+
+Ohne async, Logging, Telegram oder State-Objekt. control_logic und safety_logic nutzen die
+Einzelschritte im Betrieb; decide() setzt sie in der Reihenfolge von main.run_tick zusammen und
+kann so ohne Uhr und Hardware beliebig viele Samples hintereinander auswerten
+(siehe simulation/replay.py). Druckschalter und Kompressor-Verifizierung gehören nicht dazu.
+"""
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+from control_params import ControlParams
+from logic_utils import is_valid_temperature
+from reasons import Block, Reason
+from schedule import ScheduleFlags
+
+_ZERO = timedelta()
+
+
+class Setpoints(NamedTuple):
+    modus: str
+    einschaltpunkt: float
+    ausschaltpunkt: float
+    regelfuehler: Optional[float]
+    solar_ueberschuss_aktiv: bool
+
+
+class Inputs(NamedTuple):
+    """Messwerte und Zeitflags eines Ticks."""
+
+    now: datetime                   # lokale Zeit (naiv oder mit tzinfo, aber einheitlich)
+    t_oben: Optional[float]
+    t_unten: Optional[float]
+    t_mittig: Optional[float]
+    t_verd: Optional[float]
+    batpower: Optional[float]
+    soc: Optional[float]
+    feedinpower: Optional[float]
+    flags: ScheduleFlags
+    urlaub: bool = False
+    bademodus: bool = False
+    plan: Optional[object] = None   # planner.PlanStatus
+
+
+class ControllerState(NamedTuple):
+    """Was die Regelung von Tick zu Tick mitnimmt."""
+
+    kompressor_ein: bool = False
+    last_on: Optional[datetime] = None
+    last_off: Optional[datetime] = None
+    verdampfer_blocked: bool = False
+    blocking: Optional[Reason] = None
+
+
+class Decision(NamedTuple):
+    kompressor_ein: bool
+    setpoints: Optional[Setpoints]  # None bei Sensor-/Sicherheitssperre
+    blocking: Optional[Reason]
+    switched: int                   # +1 eingeschaltet, -1 ausgeschaltet, 0 unverändert
+
+
+def solar_surplus(batpower, soc, feedinpower, p: ControlParams) -> bool:
+    bat_p = batpower if batpower is not None else 0.0
+    soc_v = soc if soc is not None else 0.0
+    feed_p = feedinpower if feedinpower is not None else 0.0
+    return bat_p > p.batpower_threshold or (soc_v >= p.soc_threshold and feed_p > p.feedinpower_threshold)
+
+
+def pv_live(batpower, feedinpower) -> bool:
+    """Die Anlage erzeugt gerade Überschuss (Akku lädt oder es wird eingespeist), ohne Daten: nein."""
+    return (batpower is not None and batpower > 0) or (feedinpower is not None and feedinpower > 0)
+
+
+def plan_boost(plan, live: bool) -> bool:
+    """Geplanter PV-Slot gilt nur bei tatsächlichem Überschuss, sonst würde nach Prognose aus dem Netz geladen."""
+    return plan is not None and plan.boost and live
+
+
+def setpoints(t_unten, t_mittig, solar: bool, night: bool, transition: bool, p: ControlParams,
+              urlaub: bool = False, bademodus: bool = False, plan=None, live: bool = False) -> Setpoints:
+    """Modus, Sollwerte und Regelfühler. live: aktueller PV-Überschuss (pv_live) für geplante Slots."""
+    total_reduction = p.reduction(night, urlaub)
+    # Frostschutz: im Übergangsmodus fällt die Temperatur unter den Nacht-Sollwert
+    is_critical_frost = bool(t_mittig) and t_mittig <= p.night_einschaltpunkt
+
+    if bademodus:
+        modus, aus, ein, regel = "Bademodus", p.ausschaltpunkt_erhoeht, p.ausschaltpunkt_erhoeht - 4, t_unten
+    elif solar:
+        modus, aus, ein, regel = "Solarüberschuss", p.ausschaltpunkt_erhoeht, p.einschaltpunkt_erhoeht, t_unten
+    elif plan_boost(plan, live):
+        # Geplanter PV-Slot: Speicher auf erhöhte Sollwerte laden, solange die Prognose Sonne verspricht
+        modus, aus, ein, regel = "PV-Planung", p.ausschaltpunkt_erhoeht, p.einschaltpunkt_erhoeht, t_mittig
+    else:
+        if transition:
+            modus = "Übergangsmodus (Frostschutz)" if is_critical_frost else "Übergangsmodus"
+        else:
+            modus = "Nachtmodus" if night else "Normalmodus"
+        aus, ein, regel = p.ausschaltpunkt - total_reduction, p.einschaltpunkt - total_reduction, t_mittig
+
+    if plan is not None and plan.defer and not bademodus and not solar and not is_critical_frost:
+        # PV-Slot steht bevor: Einschalten aus dem Netz aufschieben
+        ein -= p.verschiebung_absenkung
+        modus += " (PV-Slot ab " + plan.next_slot.strftime("%H:%M") + ")"
+    return Setpoints(modus, ein, aus, regel, solar)
+
+
+def sensor_errors(t_oben, t_unten) -> Optional[str]:
+    errors = []
+    if not is_valid_temperature(t_oben): errors.append(f"T_Oben invalid: {t_oben}")
+    if not is_valid_temperature(t_unten): errors.append(f"T_Unten invalid: {t_unten}")
+    return ", ".join(errors) if errors else None
+
+
+def safety_block(t_oben, t_unten, t_verd, verdampfer_blocked: bool, p: ControlParams) -> Tuple[Optional[Reason], bool]:
+    """Sicherheitstemperatur und Verdampfer (mit Hysterese): (Sperrgrund oder None, verdampfer_blocked)."""
+    safety_temp = p.sicherheits_temp
+    if (t_oben is not None and t_oben >= safety_temp) or (t_unten is not None and t_unten >= safety_temp):
+        return Reason(Block.SAFETY_TEMP, limit=safety_temp), verdampfer_blocked
+    if not is_valid_temperature(t_verd, min_temp=-20.0, max_temp=50.0):
+        return Reason(Block.EVAPORATOR_INVALID, value=t_verd), verdampfer_blocked
+    if t_verd < p.verdampfertemperatur or (verdampfer_blocked and t_verd < p.verdampfer_restart_temp):
+        if verdampfer_blocked:
+            return Reason(Block.EVAPORATOR_COLD, value=t_verd, limit=p.verdampfer_restart_temp, waiting=True), True
+        return Reason(Block.EVAPORATOR_COLD, value=t_verd, limit=p.verdampfertemperatur), True
+    return None, False
+
+
+# off_step/on_step: None = nichts zu tun (Sperrgrund bleibt), sonst (schalten, Sperrgrund)
+
+def off_step(kompressor_ein: bool, regelfuehler, ausschaltpunkt, since_on: timedelta, min_laufzeit: timedelta):
+    if not kompressor_ein or regelfuehler is None or regelfuehler < ausschaltpunkt:
+        return None
+    if since_on >= min_laufzeit:
+        return True, None
+    return False, Reason(Block.MIN_RUNTIME, remaining=min_laufzeit - since_on)
+
+
+def on_step(kompressor_ein: bool, regelfuehler, einschaltpunkt, ausschaltpunkt, t_oben,
+            since_off: Optional[timedelta], min_pause: timedelta, solar_hold: bool, night_einschaltpunkt):
+    """
+    solar_hold: Übergangsmodus ohne Solarüberschuss/Bademodus/PV-Slot; dann wird nur eingeschaltet,
+    wenn der Speicher unter den Nacht-Sollwert fällt. since_off ist None ohne bisheriges Ausschalten.
+    """
+    if kompressor_ein or regelfuehler is None or regelfuehler > einschaltpunkt:
+        return None
+    solar_ok = not (solar_hold and regelfuehler > night_einschaltpunkt)
+    pause_ok = since_off is None or since_off >= min_pause
+    if solar_ok and pause_ok:
+        if regelfuehler >= ausschaltpunkt or (t_oben is not None and t_oben >= ausschaltpunkt):
+            return False, Reason(Block.TARGET_REACHED)
+        return True, None
+    if not pause_ok:
+        return False, Reason(Block.MIN_PAUSE, remaining=min_pause - since_off)
+    return False, Reason(Block.SOLAR_WINDOW)
+
+
+def mode_switch_off(kompressor_ein: bool, solar: bool, bademodus: bool, t_oben, t_mittig, target,
+                    since_on: timedelta, min_laufzeit: timedelta) -> Optional[bool]:
+    """Ausschalten nach Moduswechsel: None = kein Anlass, False = Mindestlaufzeit fehlt, True = aus."""
+    reached = (t_oben is not None and t_oben >= target) or (t_mittig is not None and t_mittig >= target)
+    if not kompressor_ein or solar or bademodus or not reached:
+        return None
+    return since_on >= min_laufzeit
+
+
+def _since(now: datetime, then: Optional[datetime]) -> timedelta:
+    return now - then if then is not None else _ZERO
+
+
+def decide(inputs: Inputs, p: ControlParams, prev: ControllerState) -> Tuple[Decision, ControllerState]:
+    """Ein Tick der Regelung wie in main.run_tick (Sensoren/Sicherheit, Sollwerte, Aus, Ein, Moduswechsel)."""
+    now = inputs.now
+    on, last_on, last_off, blocked, blocking = prev
+
+    detail = sensor_errors(inputs.t_oben, inputs.t_unten)
+    if detail is not None:
+        reason = Reason(Block.SENSOR, detail=detail)
+    else:
+        reason, blocked = safety_block(inputs.t_oben, inputs.t_unten, inputs.t_verd, blocked, p)
+    if reason is not None:
+        state = ControllerState(False, last_on, now if on else last_off, blocked, reason)
+        return Decision(False, None, reason, -1 if on else 0), state
+
+    solar = solar_surplus(inputs.batpower, inputs.soc, inputs.feedinpower, p)
+    plan = inputs.plan
+    live = pv_live(inputs.batpower, inputs.feedinpower)
+    boost = plan_boost(plan, live)
+    sp = setpoints(inputs.t_unten, inputs.t_mittig, solar, inputs.flags.night, inputs.flags.transition, p,
+                   inputs.urlaub, inputs.bademodus, plan, live)
+    was_on = on
+
+    step = off_step(on, sp.regelfuehler, sp.ausschaltpunkt, _since(now, last_on), p.min_laufzeit)
+    if step is not None:
+        switch, blocking = step
+        if switch:
+            on, last_off = False, now
+
+    solar_hold = inputs.flags.transition and not solar and not inputs.bademodus and not boost
+    since_off = now - last_off if last_off is not None else None
+    step = on_step(on, sp.regelfuehler, sp.einschaltpunkt, sp.ausschaltpunkt, inputs.t_oben,
+                   since_off, p.min_pause, solar_hold, p.night_einschaltpunkt)
+    if step is not None:
+        switch, blocking = step
+        if switch:
+            on, last_on = True, now
+
+    if mode_switch_off(on, solar, inputs.bademodus, inputs.t_oben, inputs.t_mittig, sp.ausschaltpunkt,
+                       _since(now, last_on), p.min_laufzeit):
+        on, last_off = False, now
+
+    switched = 0 if on == was_on else (1 if on else -1)
+    return Decision(on, sp, blocking, switched), ControllerState(on, last_on, last_off, blocked, blocking)
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from reasons import Block, Reason
+
+QUEUE_SIZE = 100  # je Abonnent; bei Überlauf wird das älteste Ereignis verworfen
+
+
+# --- Ereignisse (werden nur bei Zustandswechseln erzeugt) ---
+
+class CompressorStarted(NamedTuple):
+    at: datetime
+    t_verd: Optional[float]
+    t_unten: Optional[float]
+
+
+class CompressorStopped(NamedTuple):
+    at: datetime
+    runtime: Optional[timedelta]  # None, wenn der Kompressor nicht lief (erzwungenes AUS)
+
+
+class ModeChanged(NamedTuple):
+    at: datetime
+    previous: Optional[str]
+    current: str
+
+
+class BlockingReasonChanged(NamedTuple):
+    at: datetime
+    previous: Block
+    code: Block              # Block.NONE = nicht mehr blockiert
+    reason: Optional[Reason]  # Code mit Parametern (Text über reasons.render)
+
+
+class SensorFault(NamedTuple):
+    at: datetime
+    active: bool          # False = Sensoren wieder in Ordnung
+    detail: str
+
+
+class PressureFault(NamedTuple):
+    at: datetime
+    active: bool          # False = Druckschalter wieder OK
+
+
+class CompressorStuck(NamedTuple):
+    at: datetime
+    context: str          # Situation, in der das Ausschalten fehlschlug (darf leer sein)
+
+
+class CompressorNotRunning(NamedTuple):
+    at: datetime
+    detail: str           # fehlgeschlagene Prüfungen der Laufverifizierung
+    count: int            # Fehlversuche in Folge
+
+
+class EventMetrics:
+    """Zähler aus den Zustandsereignissen (für /status): Takte, Laufzeit, Moduswechsel und Störungen."""
+
+    def __init__(self):
+        self.starts = 0
+        self.runtime = timedelta()
+        self.modes: Counter = Counter()
+        self.faults: Counter = Counter()
+        self.active_faults = set()
+
+    def __call__(self, event) -> None:
+        if isinstance(event, CompressorStarted):
+            self.starts += 1
+        elif isinstance(event, CompressorStopped):
+            if event.runtime is not None:
+                self.runtime += event.runtime
+        elif isinstance(event, ModeChanged):
+            self.modes[event.current] += 1
+        elif isinstance(event, (SensorFault, PressureFault)):
+            name = type(event).__name__
+            if event.active and name not in self.active_faults:
+                self.faults[name] += 1
+                self.active_faults.add(name)
+            elif not event.active:
+                self.active_faults.discard(name)
+        else:
+            self.faults[type(event).__name__] += 1
+
+    def report(self) -> Dict:
+        return {
+            "compressor_starts": self.starts,
+            "runtime_minutes": round(self.runtime.total_seconds() / 60, 1),
+            "mode_changes": dict(self.modes),
+            "faults": dict(self.faults),
+            "active_faults": sorted(self.active_faults),
+        }
+
+
+METRIC_EVENTS = (CompressorStarted, CompressorStopped, ModeChanged, SensorFault, PressureFault,
+                 CompressorStuck, CompressorNotRunning)
+
+
+class _Subscriber:
+    def __init__(self, name: str, types: Tuple[type, ...], handler: Callable, queue_size: int):
+        self.name = name
+        self.types = types
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    async def run(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                result = self.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logging.error(f"Ereignis-Abonnent '{self.name}' fehlgeschlagen bei {type(event).__name__}: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class EventBus:
+    """
+    Interner Publish/Subscribe-Kanal für Zustandswechsel. Erzeuger rufen emit() einmal pro Wechsel auf
+    und kennen die Empfänger nicht.
+
+    - inline=True: der Handler läuft direkt in emit(); nur für kurze, nicht blockierende Handler
+      (Zähler, Einreihen in die Telegram-Warteschlange).
+    - sonst: eigene Warteschlange und eigener Task je Abonnent; ein langsamer Abonnent bremst
+      weder den Steuerungs-Tick noch die anderen Abonnenten.
+    """
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.counts: Counter = Counter()
+        self._inline: Dict[type, List[Tuple[str, Callable]]] = {}
+        self._queued: List[_Subscriber] = []
+
+    def subscribe(self, event_types, handler: Callable, name: Optional[str] = None, inline: bool = False) -> None:
+        types = (event_types,) if isinstance(event_types, type) else tuple(event_types)
+        name = name or getattr(handler, "__name__", "abonnent")
+        if inline:
+            for event_type in types:
+                self._inline.setdefault(event_type, []).append((name, handler))
+        else:
+            self._queued.append(_Subscriber(name, types, handler, self.queue_size))
+
+    def emit(self, event) -> None:
+        event_type = type(event)
+        self.counts[event_type.__name__] += 1
+        for name, handler in self._inline.get(event_type, ()):
+            try:
+                handler(event)
+            except Exception as e:
+                logging.error(f"Ereignis-Abonnent '{name}' fehlgeschlagen bei {event_type.__name__}: {e}")
+        for sub in self._queued:
+            if event_type not in sub.types:
+                continue
+            if sub.queue.full():
+                sub.queue.get_nowait()
+                sub.queue.task_done()
+                sub.dropped += 1
+            sub.queue.put_nowait(event)
+            if sub.task is None or sub.task.done():
+                try:
+                    sub.task = asyncio.get_running_loop().create_task(sub.run())
+                except RuntimeError:
+                    pass  # keine laufende Ereignisschleife: Zustellung beim nächsten emit() aus dem Loop
+
+    async def drain(self) -> None:
+        """Wartet, bis alle eingereihten Ereignisse zugestellt sind (Tests, Herunterfahren)."""
+        for sub in self._queued:
+            if sub.task is not None:
+                await sub.queue.join()
+
+    async def stop(self) -> None:
+        for sub in self._queued:
+            if sub.task is not None:
+                sub.task.cancel()
+                try:
+                    await sub.task
+                except asyncio.CancelledError:
+                    pass
+                sub.task = None
+
+    def stats(self) -> Dict:
+        """Anzahl je Ereignistyp und verworfene Ereignisse je Abonnent (für /status)."""
+        return {
+            "emitted": dict(self.counts),
+            "dropped": {sub.name: sub.dropped for sub in self._queued if sub.dropped},
+        }
+
+
+_bus: Optional[EventBus] = None
+_metrics: Optional[EventMetrics] = None
+
+
+def get_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
+
+
+def get_metrics() -> EventMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = EventMetrics()
+    return _metrics
+
+
+def emit(event) -> None:
+    get_bus().emit(event)
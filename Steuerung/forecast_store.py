@@ -0,0 +1,151 @@
+import bisect
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FORECAST_STORE_FILE = "sonnen_prognose_hourly.npz"
+MAX_HOURS = 72     # forecast_days=3
+MAX_ISSUES = 28    # 7 Tage bei einem Abruf alle 6 h
+HOUR = timedelta(hours=1)
+
+
+class ForecastSeries:
+    """
+    Stündliche Strahlungsprognose eines Abrufs. Wert i ist die mittlere Strahlung (W/m²)
+    der Stunde [start + i h, start + (i+1) h); Zeiten sind naive Lokalzeit.
+    Die Präfixsummen erlauben Summen über beliebige Zeiträume in O(1).
+    """
+
+    __slots__ = ("issued", "start", "values", "cumulative", "sun")
+
+    def __init__(self, issued: datetime, start: datetime, values, sun: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.issued = issued
+        self.start = start
+        self.values = np.asarray(values, dtype=np.float32)
+        self.cumulative = np.concatenate(([0.0], np.cumsum(self.values, dtype=np.float64)))  # Wh/m²
+        self.sun = sun or {}  # "YYYY-MM-DD" -> (Sonnenaufgang, Sonnenuntergang) als "HH:MM"
+
+    @property
+    def end(self) -> datetime:
+        return self.start + len(self.values) * HOUR
+
+    def _integral(self, t: datetime) -> float:
+        """Einstrahlung (Wh/m²) von start bis t; innerhalb einer Stunde linear interpoliert."""
+        hours = (t - self.start).total_seconds() / 3600.0
+        if hours <= 0:
+            return 0.0
+        if hours >= len(self.values):
+            return float(self.cumulative[-1])
+        k = int(hours)
+        return float(self.cumulative[k] + (hours - k) * self.values[k])
+
+    def expected_radiation(self, now: datetime, hours: float) -> float:
+        """Erwartete Einstrahlung in Wh/m² von now bis now + hours."""
+        now = now.replace(tzinfo=None)
+        return self._integral(now + timedelta(hours=hours)) - self._integral(now)
+
+    def day_total(self, day: date) -> Optional[float]:
+        """
+        Tagessumme in kWh/m². Wie bisher zählt eine Stunde zu dem Tag, auf den ihr Ende fällt
+        (Open-Meteo-Zeitstempel), damit die Werte mit sonnen_prognose.csv vergleichbar bleiben.
+        """
+        midnight = datetime.combine(day, datetime.min.time())
+        first = int((midnight - self.start) / HOUR) - 1
+        lo, hi = max(first, 0), min(first + 24, len(self.values))
+        if hi <= lo:
+            return None
+        return float(self.cumulative[hi] - self.cumulative[lo]) / 1000.0
+
+    def hourly(self) -> List[Tuple[datetime, float]]:
+        """(Stundenbeginn, W/m²) für die Heizplanung."""
+        return [(self.start + i * HOUR, float(v)) for i, v in enumerate(self.values)]
+
+
+class ForecastStore:
+    """
+    Die letzten MAX_ISSUES Prognosen, sortiert nach Abrufzeit, als kompakte Arrays in einer
+    .npz-Datei persistiert (atomar per Umbenennen), damit nach einem Neustart nicht sofort
+    neu abgefragt werden muss.
+    """
+
+    def __init__(self, path: str = FORECAST_STORE_FILE, max_issues: int = MAX_ISSUES):
+        self.path = path
+        self.max_issues = max_issues
+        self.series: List[ForecastSeries] = []
+        self.load()
+
+    def add(self, series: ForecastSeries, persist: bool = True) -> None:
+        issued = [s.issued for s in self.series]
+        self.series.insert(bisect.bisect_right(issued, series.issued), series)
+        del self.series[:-self.max_issues]
+        if persist:
+            self.save()
+
+    def latest(self) -> Optional[ForecastSeries]:
+        return self.series[-1] if self.series else None
+
+    def at(self, issued: datetime) -> Optional[ForecastSeries]:
+        """Prognose, die zum Zeitpunkt 'issued' aktuell war."""
+        idx = bisect.bisect_right([s.issued for s in self.series], issued.replace(tzinfo=None)) - 1
+        return self.series[idx] if idx >= 0 else None
+
+    def expected_radiation(self, now: datetime, hours: float) -> Optional[float]:
+        """Erwartete Einstrahlung (Wh/m²) der nächsten 'hours' Stunden laut neuester Prognose."""
+        latest = self.latest()
+        return latest.expected_radiation(now, hours) if latest else None
+
+    def save(self) -> None:
+        n = len(self.series)
+        values = np.full((n, MAX_HOURS), np.nan, dtype=np.float32)
+        lengths = np.zeros(n, dtype=np.int16)
+        sun = np.full((n, 3, 3), "", dtype="U10")
+        for i, s in enumerate(self.series):
+            count = min(len(s.values), MAX_HOURS)
+            values[i, :count] = s.values[:count]
+            lengths[i] = count
+            for j, (day, (sunrise, sunset)) in enumerate(sorted(s.sun.items())[:3]):
+                sun[i, j] = (day, sunrise or "", sunset or "")
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    issued=np.array([s.issued for s in self.series], dtype="datetime64[s]"),
+                    start=np.array([s.start for s in self.series], dtype="datetime64[s]"),
+                    values=values, lengths=lengths, sun=sun,
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Fehler beim Speichern des Prognose-Speichers {self.path}: {e}")
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                series = []
+                for i in range(len(data["issued"])):
+                    sun = {str(day): (str(sr) or None, str(ss) or None) for day, sr, ss in data["sun"][i] if day}
+                    series.append(ForecastSeries(
+                        data["issued"][i].astype(datetime), data["start"][i].astype(datetime),
+                        data["values"][i, :data["lengths"][i]], sun,
+                    ))
+            self.series = series[-self.max_issues:]
+            logging.info(f"Prognose-Speicher geladen: {len(self.series)} Abrufe aus {self.path}")
+        except Exception as e:
+            logging.error(f"Fehler beim Laden des Prognose-Speichers {self.path}: {e}")
+            self.series = []
+
+
+_store: Optional[ForecastStore] = None
+
+
+def get_store() -> ForecastStore:
+    """Gemeinsamer Prognose-Speicher (wird beim ersten Zugriff von der Platte geladen)."""
+    global _store
+    if _store is None:
+        _store = ForecastStore()
+    return _store
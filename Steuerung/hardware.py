@@ -5,7 +5,7 @@ from hardware_interface import HardwareInterface
 try:
     import RPi.GPIO as GPIO
     from RPLCD.i2c import CharLCD
-except ImportError:
+except (ImportError, RuntimeError):  # RuntimeError: RPi.GPIO installiert, aber kein Raspberry Pi
     logging.warning("RPi.GPIO oder RPLCD nicht verfügbar. Mocking wird aktiviert (falls nicht auf Raspberry Pi).")
     # Simple Mock classes would go here or be handled by conditional imports
     GPIO = None
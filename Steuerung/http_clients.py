@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import ssl
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+import aiohttp
+from aiohttp.resolver import AsyncResolver
+
+DNS_CACHE_TTL_S = 300
+FALLBACK_NAMESERVERS = ["8.8.8.8", "1.1.1.1"]
+
+
+class ClientProfile(NamedTuple):
+    limit: int = 20               # Verbindungen insgesamt
+    limit_per_host: int = 4       # je Upstream-Host
+    keepalive_timeout: float = 60.0
+
+
+# "default": Solax, Open-Meteo, Telegram-Versand, Healthchecks.
+# "telegram_poll": eigener Pool für getUpdates (hält eine Verbindung bis zu 60 s offen).
+PROFILES: Dict[str, ClientProfile] = {
+    "default": ClientProfile(),
+    "telegram_poll": ClientProfile(limit=2, limit_per_host=1, keepalive_timeout=90.0),
+}
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _shared_ssl_context() -> ssl.SSLContext:
+    """Ein SSL-Kontext für alle Connectoren (CA-Zertifikate nur einmal laden)."""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def _make_resolver():
+    try:
+        return AsyncResolver(nameservers=FALLBACK_NAMESERVERS)
+    except RuntimeError:  # aiodns nicht installiert
+        logging.warning("aiodns nicht installiert, verwende Standard-DNS-Resolver.")
+    except Exception as e:
+        logging.warning(f"Fehler beim Initialisieren des DNS-Resolvers: {e}, verwende Standard.")
+    return None
+
+
+def _counter(stats: Counter, key: str):
+    async def on_event(session, trace_config_ctx, params):
+        stats[key] += 1
+    return on_event
+
+
+def _trace_config(stats: Counter) -> aiohttp.TraceConfig:
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_counter(stats, "requests"))
+    trace.on_connection_create_end.append(_counter(stats, "connections_new"))
+    trace.on_connection_reuseconn.append(_counter(stats, "connections_reused"))
+    trace.on_dns_cache_hit.append(_counter(stats, "dns_cache_hits"))
+    trace.on_dns_cache_miss.append(_counter(stats, "dns_cache_misses"))
+    return trace
+
+
+def create_session(profile: ClientProfile = PROFILES["default"], stats: Optional[Counter] = None) -> aiohttp.ClientSession:
+    """Neue Session mit DNS-Cache, Keep-Alive und gemeinsamem SSL-Kontext (muss in der Ereignisschleife laufen)."""
+    resolver = _make_resolver()
+    connector = aiohttp.TCPConnector(
+        limit=profile.limit,
+        limit_per_host=profile.limit_per_host,
+        keepalive_timeout=profile.keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL_S,
+        ssl=_shared_ssl_context(),
+        **({"resolver": resolver} if resolver is not None else {}),
+    )
+    trace_configs = [_trace_config(stats)] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+
+
+class HttpClientRegistry:
+    """
+    Gemeinsame HTTP-Sessions der Anwendung, je Profil eine (lazy angelegt). Statt pro Aufruf oder
+    Modul eigene Sessions zu öffnen, teilen sich alle Upstreams die Verbindungspools; DNS-Auflösung
+    und TLS-Handshake fallen nur beim ersten Request bzw. nach Ablauf von Keep-Alive/TTL an.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, ClientProfile]] = None):
+        self.profiles = dict(PROFILES if profiles is None else profiles)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._stats: Dict[str, Counter] = {}
+
+    def get(self, name: str = "default") -> aiohttp.ClientSession:
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            stats = self._stats.setdefault(name, Counter())
+            session = self._sessions[name] = create_session(self.profiles.get(name, self.profiles["default"]), stats)
+        return session
+
+    def stats(self) -> Dict[str, Dict]:
+        """Zähler je Session (für /status): Requests, neue/wiederverwendete Verbindungen, DNS-Cache."""
+        report = {}
+        for name, counter in sorted(self._stats.items()):
+            new, reused = counter["connections_new"], counter["connections_reused"]
+            report[name] = {
+                **{k: counter[k] for k in ("requests", "connections_new", "connections_reused", "dns_cache_hits", "dns_cache_misses")},
+                "reuse_ratio": round(reused / (new + reused), 3) if new + reused else None,
+            }
+        return report
+
+    async def close(self) -> None:
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+        if sessions:
+            # SSL-Verbindungen brauchen einen Moment zum sauberen Schließen
+            await asyncio.sleep(0.25)
+
+
+_registry: Optional[HttpClientRegistry] = None
+
+
+def get_registry() -> HttpClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry()
+    return _registry
@@ -0,0 +1,148 @@
+import asyncio
+import functools
+import time
+from typing import Dict, List, Optional
+
+# Globaler Schalter: Ist die Messung deaktiviert, ruft der Wrapper die Funktion
+# direkt auf (ein Attribut-Lookup Overhead, keine Zeitmessung, kein Speichern).
+ENABLED = True
+
+# Anzahl der Messwerte pro Span (Ring-Puffer). 512 Werte à 10s-Tick ≈ 85 Minuten.
+RESERVOIR_SIZE = 512
+
+
+class LatencyReservoir:
+    """Ring-Puffer fester Größe für Laufzeiten (in Nanosekunden) eines Spans."""
+
+    __slots__ = ("samples", "index", "count", "errors")
+
+    def __init__(self, size: int = RESERVOIR_SIZE):
+        self.samples: List[int] = [0] * size
+        self.index = 0
+        self.count = 0
+        self.errors = 0
+
+    def add(self, duration_ns: int) -> None:
+        self.samples[self.index] = duration_ns
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+
+    def values(self) -> List[int]:
+        """Gibt die aktuell im Puffer gehaltenen Werte zurück."""
+        if self.count < len(self.samples):
+            return self.samples[:self.count]
+        return list(self.samples)
+
+    def summary(self) -> Dict[str, float]:
+        """Berechnet p50/p95/p99/max (in Millisekunden) über das aktuelle Fenster."""
+        values = sorted(self.values())
+        if not values:
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "errors": self.errors}
+
+        def pct(p):
+            idx = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+            return values[idx] / 1e6
+
+        return {
+            "count": self.count,
+            "p50_ms": round(pct(50), 3),
+            "p95_ms": round(pct(95), 3),
+            "p99_ms": round(pct(99), 3),
+            "max_ms": round(values[-1] / 1e6, 3),
+            "errors": self.errors,
+        }
+
+
+_reservoirs: Dict[str, LatencyReservoir] = {}
+
+
+def _get_reservoir(name: str) -> LatencyReservoir:
+    reservoir = _reservoirs.get(name)
+    if reservoir is None:
+        reservoir = _reservoirs[name] = LatencyReservoir()
+    return reservoir
+
+
+def record(name: str, duration_ns: int, failed: bool = False) -> None:
+    """Speichert einen Messwert für einen Span (auch für manuelle Messungen nutzbar)."""
+    reservoir = _get_reservoir(name)
+    reservoir.add(duration_ns)
+    if failed:
+        reservoir.errors += 1
+
+
+def instrument(name: Optional[str] = None):
+    """
+    Decorator zur Laufzeitmessung von sync- und async-Funktionen mit time.perf_counter_ns.
+
+    Args:
+        name: Name des Spans (Standard: Funktionsname).
+    """
+    def decorator(func):
+        span = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    record(span, time.perf_counter_ns() - start, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record(span, time.perf_counter_ns() - start, failed)
+        return sync_wrapper
+
+    return decorator
+
+
+def set_enabled(enabled: bool) -> None:
+    """Aktiviert oder deaktiviert die Laufzeitmessung zur Laufzeit."""
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def reset() -> None:
+    """Verwirft alle gesammelten Messwerte."""
+    _reservoirs.clear()
+
+
+def get_latency_report() -> Dict[str, Dict[str, float]]:
+    """Liefert die Latenz-Statistik aller Spans, sortiert nach p95 (absteigend)."""
+    report = {span: reservoir.summary() for span, reservoir in _reservoirs.items()}
+    return dict(sorted(report.items(), key=lambda item: item[1]["p95_ms"], reverse=True))
+
+
+def format_latency_report(report: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """Formatiert den Latenz-Report für Telegram (Markdown)."""
+    if report is None:
+        report = get_latency_report()
+    if not report:
+        status = "aktiv" if ENABLED else "deaktiviert"
+        return f"⏱️ *Latenzen*\nNoch keine Messwerte vorhanden (Messung {status})."
+
+    lines = ["⏱️ *Latenzen* (ms, p50/p95/p99/max)", "```"]
+    for span, stats in report.items():
+        lines.append(
+            f"{span[:22]:<22} {stats['p50_ms']:>7.1f} {stats['p95_ms']:>7.1f} "
+            f"{stats['p99_ms']:>7.1f} {stats['max_ms']:>7.1f} n={stats['count']}"
+        )
+    lines.append("```")
+    return "\n".join(lines)
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import struct
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pytz
+
+import clock
+
+# Solax X1/X3-Hybrid G4, Input-Register (Funktionscode 0x04)
+REG_BLOCK_START = 0x0000
+REG_BLOCK_COUNT = 0x4C
+REG_GRID_POWER = 0x02        # int16, W (AC-Leistung Wechselrichter)
+REG_POWER_DC1 = 0x0A         # uint16, W
+REG_POWER_DC2 = 0x0B         # uint16, W
+REG_BAT_POWER = 0x16         # int16, W (positiv = Laden)
+REG_SOC = 0x1C               # uint16, %
+REG_FEEDIN_POWER = 0x46      # int32 (LSW zuerst), W (positiv = Einspeisung)
+REG_CONSUME_ENERGY = 0x4A    # uint32 (LSW zuerst), 0.01 kWh
+
+FUNC_READ_INPUT_REGISTERS = 0x04
+
+
+class ModbusError(Exception):
+    pass
+
+
+def decode_registers(regs: List[int]) -> Dict:
+    """Register-Block -> Dict mit denselben Schlüsseln wie die Solax-Cloud-API."""
+    def s16(i):
+        return regs[i] - 0x10000 if regs[i] >= 0x8000 else regs[i]
+
+    def u32(i):
+        return regs[i] | (regs[i + 1] << 16)
+
+    def s32(i):
+        value = u32(i)
+        return value - 0x100000000 if value >= 0x80000000 else value
+
+    return {
+        "acpower": s16(REG_GRID_POWER),
+        "powerdc1": regs[REG_POWER_DC1],
+        "powerdc2": regs[REG_POWER_DC2],
+        "batPower": s16(REG_BAT_POWER),
+        "soc": regs[REG_SOC],
+        "feedinpower": s32(REG_FEEDIN_POWER),
+        "consumeenergy": u32(REG_CONSUME_ENERGY) / 100.0,
+    }
+
+
+def encode_registers(values: Dict) -> List[int]:
+    """Gegenstück zu decode_registers (für den Simulator)."""
+    regs = [0] * REG_BLOCK_COUNT
+
+    def put32(i, value):
+        value &= 0xFFFFFFFF
+        regs[i], regs[i + 1] = value & 0xFFFF, value >> 16
+
+    regs[REG_GRID_POWER] = int(values.get("acpower", 0)) & 0xFFFF
+    regs[REG_POWER_DC1] = int(values.get("powerdc1", 0)) & 0xFFFF
+    regs[REG_POWER_DC2] = int(values.get("powerdc2", 0)) & 0xFFFF
+    regs[REG_BAT_POWER] = int(values.get("batPower", 0)) & 0xFFFF
+    regs[REG_SOC] = int(values.get("soc", 0)) & 0xFFFF
+    put32(REG_FEEDIN_POWER, int(values.get("feedinpower", 0)))
+    put32(REG_CONSUME_ENERGY, int(round(values.get("consumeenergy", 0) * 100)))
+    return regs
+
+
+class ModbusTcpClient:
+    """Minimaler asynchroner Modbus/TCP-Client (nur Input-Register lesen), hält die Verbindung offen."""
+
+    def __init__(self, host: str, port: int = 502, unit_id: int = 1, timeout: float = 3.0):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._transaction_id = 0
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+        self._reader = self._writer = None
+
+    async def read_input_registers(self, address: int, count: int) -> List[int]:
+        async with self._lock:
+            try:
+                await self._connect()
+                self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+                pdu = struct.pack(">BHH", FUNC_READ_INPUT_REGISTERS, address, count)
+                self._writer.write(struct.pack(">HHHB", self._transaction_id, 0, len(pdu) + 1, self.unit_id) + pdu)
+                await self._writer.drain()
+
+                header = await asyncio.wait_for(self._reader.readexactly(7), self.timeout)
+                transaction_id, _, length, _ = struct.unpack(">HHHB", header)
+                body = await asyncio.wait_for(self._reader.readexactly(length - 1), self.timeout)
+                if transaction_id != self._transaction_id:
+                    raise ModbusError(f"Falsche Transaktions-ID {transaction_id} (erwartet {self._transaction_id})")
+                if body[0] & 0x80:
+                    raise ModbusError(f"Modbus-Exception {body[1]} für Funktion {body[0] & 0x7F}")
+                byte_count = body[1]
+                if byte_count != 2 * count:
+                    raise ModbusError(f"Unerwartete Antwortlänge {byte_count} (erwartet {2 * count})")
+                return list(struct.unpack(f">{count}H", body[2:2 + byte_count]))
+            except Exception:
+                await self.close()
+                raise
+
+
+class InverterDataSource(ABC):
+    """
+    Schnittstelle für Wechselrichter-Datenquellen. read() aktualisiert state.solar
+    (last_api_data, last_api_call) und gibt die Daten zurück, bei Fehlern None.
+    """
+
+    name = "basis"
+    max_age = timedelta(minutes=5)  # so lange gelten die gelesenen Daten als aktuell
+
+    @abstractmethod
+    async def read(self, session, state) -> Optional[Dict]:
+        """Liest die aktuellen Daten der Quelle."""
+
+
+class CloudSource(InverterDataSource):
+    """SolaxCloud (bisheriges Verhalten, Abruf über solax.fetch_solax_cloud)."""
+
+    name = "cloud"
+
+    def __init__(self, fetch: Callable[..., Awaitable[Optional[Dict]]]):
+        self._fetch = fetch
+
+    async def read(self, session, state) -> Optional[Dict]:
+        return await self._fetch(session, state)
+
+
+class ModbusTcpSource(InverterDataSource):
+    """Wechselrichter direkt im LAN per Modbus/TCP (Sekunden statt Minuten Verzögerung, ohne Internet)."""
+
+    name = "modbus"
+
+    def __init__(self, host: str, port: int = 502, unit_id: int = 1, interval_s: float = 5.0, timeout: float = 3.0):
+        self.client = ModbusTcpClient(host, port, unit_id, timeout)
+        self.max_age = timedelta(seconds=interval_s)
+
+    async def read(self, session, state) -> Optional[Dict]:
+        try:
+            regs = await self.client.read_input_registers(REG_BLOCK_START, REG_BLOCK_COUNT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ModbusError) as e:
+            logging.error(f"Modbus-Abfrage {self.client.host}:{self.client.port} fehlgeschlagen: {e}")
+            return None
+        data = decode_registers(regs)
+        state.solar.last_api_data = data
+        state.solar.last_api_call = clock.now(pytz.timezone("Europe/Berlin"))
+        return data
+
+
+class FallbackChain:
+    """
+    Fragt die Quellen der Reihe nach ab. Eine fehlgeschlagene Quelle wird für retry_after
+    Sekunden übersprungen; danach wird sie wieder zuerst versucht.
+    """
+
+    def __init__(self, sources: List[InverterDataSource], retry_after: float = 60.0):
+        self.sources = sources
+        self.retry_after = retry_after
+        self.active: Optional[InverterDataSource] = None
+        self._down_until: Dict[str, float] = {}
+
+    async def read(self, session, state) -> Optional[Dict]:
+        now = clock.monotonic()
+        for source in self.sources:
+            if self._down_until.get(source.name, 0) > now:
+                continue
+            data = await source.read(session, state)
+            if data is not None:
+                if self.active is not source:
+                    if self.active is not None:
+                        logging.warning(f"Wechselrichter-Datenquelle: {self.active.name} -> {source.name}")
+                    self.active = source
+                return data
+            if len(self.sources) > 1:
+                self._down_until[source.name] = now + self.retry_after
+        return None
+
+    @property
+    def max_age(self) -> timedelta:
+        return self.active.max_age if self.active else InverterDataSource.max_age
+
+
+_chain: Optional[FallbackChain] = None
+_chain_key = None
+
+
+def get_source_chain(config, cloud_fetch: Callable[..., Awaitable[Optional[Dict]]]) -> FallbackChain:
+    """
+    Baut die Quellenkette aus [Wechselrichter] (neu nur bei Config-Änderung):
+    QUELLE = cloud | modbus | auto (Modbus mit Cloud als Rückfallebene).
+    """
+    global _chain, _chain_key
+    cfg = getattr(config, "Wechselrichter", None)
+    quelle = cfg.QUELLE.lower() if cfg is not None and isinstance(cfg.QUELLE, str) else "cloud"
+    key = (quelle, cfg.MODBUS_HOST, cfg.MODBUS_PORT, cfg.MODBUS_UNIT_ID, cfg.MODBUS_INTERVALL_SEKUNDEN) if quelle != "cloud" else (quelle,)
+    if _chain is None or key != _chain_key:
+        sources: List[InverterDataSource] = []
+        if quelle in ("modbus", "auto"):
+            if cfg.MODBUS_HOST:
+                sources.append(ModbusTcpSource(cfg.MODBUS_HOST, cfg.MODBUS_PORT, cfg.MODBUS_UNIT_ID, cfg.MODBUS_INTERVALL_SEKUNDEN))
+            else:
+                logging.error("Wechselrichter: QUELLE=modbus/auto, aber MODBUS_HOST fehlt - verwende Cloud")
+        if quelle != "modbus" or not sources:
+            sources.append(CloudSource(cloud_fetch))
+        _chain, _chain_key = FallbackChain(sources), key
+        logging.info(f"Wechselrichter-Datenquellen: {', '.join(s.name for s in sources)}")
+    return _chain
@@ -1,85 +1,33 @@
 import logging
 import sys
-import asyncio
-import aiohttp
 from logging.handlers import RotatingFileHandler
 
+from telegram_queue import get_outbox
+
 class TelegramHandler(logging.Handler):
-    def __init__(self, bot_token, chat_id, session=None, level=logging.NOTSET):
+    """
+    Leitet Log-Meldungen an die Telegram-Ausgangswarteschlange weiter. Mehrere Meldungen
+    kurz hintereinander werden dort zu einer Sammelnachricht zusammengefasst.
+    """
+
+    # Meldungen des Versandwegs selbst nicht erneut versenden (Rückkopplung bei Netzwerkfehlern)
+    IGNORED_MODULES = ("telegram_api", "telegram_queue")
+
+    def __init__(self, bot_token, chat_id, level=logging.NOTSET):
         super().__init__(level)
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.session = session
-        self.queue = asyncio.Queue()
-        self.task = None
-        self.loop = None
-        self._loop_owner = False
-
-    async def send_message(self, message):
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = {
-            "chat_id": self.chat_id,
-            "text": message
-        }
-        
-        # Session Handling: If session is provided use it, otherwise create one-off
-        if self.session and not self.session.closed:
-             try:
-                async with self.session.post(url, json=payload, timeout=20) as response:
-                    if response.status == 200:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logging.error(f"Fehler beim Senden an Telegram: {response.status} - {error_text}")
-                        return False
-             except Exception as e:
-                 logging.error(f"Telegram Senden Fehler: {e}")
-                 return False
-        else:
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.post(url, json=payload, timeout=20) as response:
-                        if response.status == 200:
-                            return True
-                        # ... error handling ...
-                        return False
-                except Exception:
-                    return False
 
     def emit(self, record):
+        if record.module in self.IGNORED_MODULES:
+            return
         try:
-            msg = self.format(record)
-            if self.loop is None:
-                try:
-                    self.loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    return
-
-            if self.loop.is_closed():
-                return
-
-            self.queue.put_nowait(msg)
-
-            if not self.task or self.task.done():
-                self.task = self.loop.create_task(self.process_queue())
+            get_outbox().add_log(self.chat_id, self.format(record), self.bot_token)
         except Exception:
             self.handleError(record)
 
-    async def process_queue(self):
-        while not self.queue.empty():
-            try:
-                msg = await self.queue.get()
-                await self.send_message(msg)
-                self.queue.task_done()
-            except Exception:
-                pass
-    
-    def close(self):
-        if self.task and not self.task.done():
-            self.task.cancel()
-        super().close()
 
-def setup_logging(enable_full_log=True, telegram_config=None, session=None):
+def setup_logging(enable_full_log=True, telegram_config=None):
     """
     Richtet das Logging ein.
     telegram_config: Objekt mit BOT_TOKEN und CHAT_ID oder None
@@ -128,8 +76,7 @@ def setup_logging(enable_full_log=True, telegram_config=None, session=None):
     if telegram_config and telegram_config.BOT_TOKEN and telegram_config.CHAT_ID:
         tg_handler = TelegramHandler(
             telegram_config.BOT_TOKEN, 
-            telegram_config.CHAT_ID, 
-            session=session,
+            telegram_config.CHAT_ID,
             level=logging.WARNING
         )
         tg_handler.setFormatter(logging.Formatter("%(message)s"))
@@ -3,6 +3,7 @@ import math
 from datetime import datetime, timedelta
 from typing import Optional
 from utils import safe_timedelta
+import clock
 
 def is_valid_temperature(temp: Optional[float], min_temp: float = -50.0, max_temp: float = 150.0) -> bool:
     """Prüft, ob ein Temperaturwert gültig ist."""
@@ -12,22 +13,25 @@ def is_valid_temperature(temp: Optional[float], min_temp: float = -50.0, max_tem
     if temp < min_temp or temp > max_temp: return False
     return True
 
-def check_log_throttle(state, attribute_name: str, interval_minutes: float = 5.0) -> bool:
+def check_log_throttle(state, attribute_name: str, interval_minutes: float = 5.0, ctx=None) -> bool:
     """Prüft, ob eine Log-Nachricht gesendet werden soll (Throttling)."""
     last_time = getattr(state, attribute_name, None)
-    now = datetime.now(state.local_tz)
+    now = ctx.now if ctx else clock.now(state.local_tz)
     if last_time is None or safe_timedelta(now, last_time, state.local_tz) > timedelta(minutes=interval_minutes):
         setattr(state, attribute_name, now)
         return True
     return False
 
-def is_nighttime(config):
+def is_nighttime(config, ctx=None):
     """Prüft, ob es Nachtzeit ist, mit korrekter Behandlung von Mitternacht."""
     try:
+        if ctx:
+            return ctx.flags.night
+
         start_str = config.Heizungssteuerung.NACHTABSENKUNG_START
         end_str = config.Heizungssteuerung.NACHTABSENKUNG_END
         
-        now = datetime.now().time()
+        now = clock.now().time()
         start = datetime.strptime(start_str, "%H:%M").time()
         end = datetime.strptime(end_str, "%H:%M").time()
         
@@ -39,9 +43,11 @@ def is_nighttime(config):
         logging.error(f"Fehler bei is_nighttime: {e}")
         return False
 
-def is_solar_window(config, state):
+def is_solar_window(config, state, ctx=None):
     """Prüft, ob die aktuelle Uhrzeit im Solarfenster nach der Nachtabsenkung liegt."""
-    now = datetime.now(state.local_tz)
+    if ctx:
+        return ctx.flags.solar_window
+    now = clock.now(state.local_tz)
     try:
         end_time_str = config.Heizungssteuerung.NACHTABSENKUNG_END
         end_hour, end_minute = map(int, end_time_str.split(':'))
@@ -58,10 +64,13 @@ def is_solar_window(config, state):
         logging.error(f"Fehler in is_solar_window: {e}")
         return False
 
-def ist_uebergangsmodus_aktiv(state):
+def ist_uebergangsmodus_aktiv(state, ctx=None):
     """Prüft, ob aktuell der Übergangsmodus (morgens oder abends) aktiv ist."""
     try:
-        now_time = datetime.now(state.local_tz).time()
+        if ctx:
+            return ctx.flags.transition
+
+        now_time = clock.now(state.local_tz).time()
         
         cfg = state.config.Heizungssteuerung
         def parse_t(s): return datetime.strptime(s, "%H:%M").time()
@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import logging
 import threading
 import signal
@@ -7,7 +8,7 @@ import uvicorn
 import aiohttp
 import aiofiles
 import os
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
 
 # Modules
@@ -22,19 +23,30 @@ from solax import get_solax_data
 import control_logic
 from telegram_handler import telegram_task
 from telegram_ui import send_welcome_message
-from telegram_api import start_healthcheck_task, send_telegram_message, create_robust_aiohttp_session
+from telegram_api import start_healthcheck_task, send_telegram_message
+import http_clients
+import telegram_queue
+import state_checkpoint
+import snapshots
+import events
+import reasons
+import config_watcher
+import schedule
 from telegram_charts import get_boiler_temperature_history, get_runtime_bar_chart
 from vpn_manager import check_vpn_status
 from api import app, init_api
-from utils import safe_timedelta, HEIZUNGSDATEN_CSV
-from weather_forecast import get_solar_forecast
-from logic_utils import is_nighttime, is_solar_window
+from utils import safe_timedelta, HEIZUNGSDATEN_CSV, EXPECTED_CSV_HEADER
+from weather_forecast import get_solar_forecast, get_hourly_forecast, get_cached_forecast
+import clock
+import instrumentation
+from instrumentation import instrument
 
 # Global objects
 config_manager = ConfigManager()
 state = None
 sensor_manager = None
 hardware_manager = None
+lcd_faults = {}  # Ereignistyp -> Störungstext für die 4. LCD-Zeile (vom Ereignis-Abonnenten gepflegt)
 stop_event = threading.Event()
 
 def handle_exit(signum, frame):
@@ -42,11 +54,11 @@ def handle_exit(signum, frame):
     stop_event.set()
     sys.exit(0)
 
-async def set_kompressor_status(state, status, force=False, t_boiler_oben=None):
+async def set_kompressor_status(state, status, force=False, t_boiler_oben=None, ctx=None):
     """
     Schaltet den Kompressor und aktualisiert den State sowie Statistiken.
     """
-    now = datetime.now(state.local_tz)
+    now = ctx.now if ctx else clock.now(state.local_tz)
     was_ein = state.control.kompressor_ein
 
     if status:
@@ -66,6 +78,8 @@ async def set_kompressor_status(state, status, force=False, t_boiler_oben=None):
         state.kompressor_verification_start_t_unten = state.sensors.t_unten
         state.kompressor_verification_last_check = None
         logging.info(f"Kompressor EIN - Verifizierung gestartet (t_verd={state.sensors.t_verd}, t_unten={state.sensors.t_unten})")
+        if not was_ein:
+            events.emit(events.CompressorStarted(now, state.sensors.t_verd, state.sensors.t_unten))
         
         return True
     else:
@@ -84,7 +98,10 @@ async def set_kompressor_status(state, status, force=False, t_boiler_oben=None):
             state.stats.last_completed_cycle = now
             logging.info(f"Kompressor AUS. Laufzeit: {elapsed}")
         else:
+            elapsed = None
             logging.info("Kompressor AUS")
+        if was_ein:
+            events.emit(events.CompressorStopped(now, elapsed))
             
         return True
 
@@ -108,6 +125,13 @@ def run_api():
     except Exception as e:
         logging.error(f"Fehler beim Starten der API: {e}")
 
+def on_config_changed(old, new):
+    """Abonnent des config_watcher: State und abgeleitete Caches auf die neue Config umstellen."""
+    state.config = new
+    schedule.get_engine(new)  # Zeitleiste sofort neu kompilieren statt im nächsten Tick
+    if old.Logging.ENABLE_INSTRUMENTATION != new.Logging.ENABLE_INSTRUMENTATION:
+        instrumentation.set_enabled(new.Logging.ENABLE_INSTRUMENTATION)
+
 async def setup_application():
     """Initialisiert Konfiguration, Hardware, Sensoren und API."""
     global state, sensor_manager, hardware_manager
@@ -122,13 +146,23 @@ async def setup_application():
     # 3. Logging setup
     setup_logging(enable_full_log=True, telegram_config=state.config.Telegram)
     logging.info("Starten der Wärmepumpensteuerung (Refactored)...")
+    instrumentation.set_enabled(state.config.Logging.ENABLE_INSTRUMENTATION)
+
+    # Zustand vor dem Neustart übernehmen (vor dem ersten Steuerungs-Tick)
+    state_checkpoint.get_checkpoint().load(state, clock.now(state.local_tz))
+    register_event_subscribers(events.get_bus(), state)
+
+    # Config-Änderungen werden per inotify (Fallback: stat) erkannt und im Hintergrund validiert
+    watcher = config_watcher.get_watcher(config_manager)
+    watcher.subscribe(on_config_changed)
+    await watcher.start()
 
     # 4. Hardware & Sensors init
     try:
         import RPi.GPIO
         hardware_manager = HardwareManager()
         logging.info("Using real hardware (Raspberry Pi detected)")
-    except ImportError:
+    except (ImportError, RuntimeError):
         hardware_manager = MockHardwareManager()
         logging.info("Using mock hardware (non-Raspberry Pi platform)")
     
@@ -146,8 +180,9 @@ async def setup_application():
     api_thread.start()
     
     # 6. Session & Tasks
-    session = create_robust_aiohttp_session()
+    session = http_clients.get_registry().get()
     state.session = session
+    telegram_queue.get_outbox().start(session, default_token=state.config.Telegram.BOT_TOKEN)
     
     
     # 6. CSV Header Check (Once at startup)
@@ -176,16 +211,10 @@ async def setup_application():
     asyncio.create_task(telegram_task(
         read_temperature_func=sensor_manager.read_temperature,
         sensor_ids=sensor_manager.sensor_ids,
-        kompressor_status_func=lambda: state.control.kompressor_ein,
-        current_runtime_func=lambda: state.stats.current_runtime,
-        total_runtime_func=lambda: state.stats.total_runtime_today + state.stats.current_runtime,
         config=state.config,
-        get_solax_data_func=get_solax_data,
         state=state,
         get_temperature_history_func=get_boiler_temperature_history,
         get_runtime_bar_chart_func=get_runtime_bar_chart,
-        is_nighttime_func=control_logic.is_nighttime,
-        is_solar_window_func=control_logic.is_solar_window
     ))
     
     # Start Healthcheck Task
@@ -218,6 +247,7 @@ def handle_day_transition(state, now):
         state.stats.last_completed_cycle = None
         state.stats.last_day = current_date
 
+@instrument()
 async def update_system_data(session, state):
     """Liest Sensoren und PV-Daten."""
     # 1. Sensoren lesen
@@ -234,99 +264,149 @@ async def update_system_data(session, state):
         state.solar.batpower = state.solar.last_api_data.get("batPower", 0)
         state.solar.soc = state.solar.last_api_data.get("soc", 0)
 
-async def check_periodic_tasks(session, state, last_vpn_check):
+@instrument()
+async def check_periodic_tasks(session, state, last_vpn_check, ctx=None):
     """Führt zeitgesteuerte Hintergrundaufgaben aus."""
-    now_dt = datetime.now()
-    now_local = datetime.now(state.local_tz)
+    now_local = ctx.now if ctx else clock.now(state.local_tz)
+    now_dt = now_local.replace(tzinfo=None)
     
     # 1. VPN Check (alle 60s)
     if (now_dt - last_vpn_check).total_seconds() >= 60:
         await check_vpn_status(state)
         last_vpn_check = now_dt
     
-    # 2. Solar Forecast (alle 6h)
+    # 2. Solar Forecast (alle 6h; nach Neustart zuerst aus dem Prognose-Speicher)
+    if state.last_forecast_update is None:
+        cached = get_cached_forecast(now_local)
+        if cached:
+            issued, forecast = cached
+            apply_forecast(state, forecast, state.local_tz.localize(issued))
+            logging.info(f"Solarprognose vom {issued:%d.%m. %H:%M} aus dem Speicher übernommen")
     if state.last_forecast_update is None or (now_local - state.last_forecast_update).total_seconds() >= 6 * 3600:
-        rad_today, rad_tomorrow, sr_today, ss_today, sr_tomorrow, ss_tomorrow = await get_solar_forecast(session, state.config)
-        if rad_today is not None:
-            state.solar.forecast_today = rad_today
-            state.solar.forecast_tomorrow = rad_tomorrow
-            state.solar.sunrise_today = sr_today
-            state.solar.sunset_today = ss_today
-            state.sunrise_tomorrow = sr_tomorrow
-            state.sunset_tomorrow = ss_tomorrow
-            state.last_forecast_update = now_local
-            
+        forecast = await get_solar_forecast(session, state.config)
+        if forecast[0] is not None:
+            apply_forecast(state, forecast, now_local)
+
+    # 3. Vorausschauende Heizplanung (alle INTERVALL_MINUTEN, Abfrage jeden Tick)
+    if ctx is not None:
+        update_heating_plan(state, ctx)
+
     return last_vpn_check
 
-async def check_and_send_alerts(session, state):
-    """Prüft auf Änderungen im blocking_reason und sendet sofortige Telegram-Alarme (einmalig)."""
+def apply_forecast(state, forecast, updated_at):
+    """Übernimmt die Werte von get_solar_forecast in den State."""
+    rad_today, rad_tomorrow, sr_today, ss_today, sr_tomorrow, ss_tomorrow = forecast
+    state.solar.forecast_today = rad_today
+    state.solar.forecast_tomorrow = rad_tomorrow
+    state.solar.sunrise_today = sr_today
+    state.solar.sunset_today = ss_today
+    state.solar.sunrise_tomorrow = sr_tomorrow
+    state.solar.sunset_tomorrow = ss_tomorrow
+    state.last_forecast_update = updated_at
+
+def update_heating_plan(state, ctx):
+    """Lernt aus den Kompressorzyklen, plant die PV-Slots neu und setzt ctx.plan."""
+    cfg = state.config.Planung
+    planner = state.planner
+    planner.observe(ctx.now_naive, state.control.kompressor_ein, state.sensors.t_mittig)
+    if not cfg.AKTIV:
+        return
+    try:
+        if planner.needs_replan(ctx.now, cfg.INTERVALL_MINUTEN):
+            planner.plan(ctx.now, get_hourly_forecast(), state.sensors.t_mittig,
+                         ctx.params.ausschaltpunkt_erhoeht, cfg.MIN_STRAHLUNG)
+        ctx.plan = planner.status(ctx.now, cfg.VERSCHIEBUNG_STUNDEN)
+    except Exception as e:
+        logging.error(f"Fehler bei der Heizplanung: {e}")
+
+@instrument()
+async def check_and_send_alerts(session, state, ctx=None):
+    """Meldet einen Wechsel des Sperrgrund-Codes als BlockingReasonChanged (Alarm sendet der Abonnent)."""
     current_blocking = state.control.blocking_reason
-    
-    # Normalisierung: Dynamische Teile (Zeiten, Temperaturen) entfernen
-    # Beispiel: "Min. Pause (noch 1m 10s)" -> "Min. Pause"
-    # Beispiel: "Verdampfer zu kalt (5.0°C < 6°C)" -> "Verdampfer zu kalt"
-    # Beispiel: "Sensorfehler: T_Oben invalid" -> "Sensorfehler"
-    import re
-    def normalize(text):
-        if not text: return ""
-        # 1. Alles in Klammern entfernen (Zeiten, Werte)
-        res = re.sub(r'\(.*?\)', '', text)
-        # 2. Alles nach Doppelpunkt entfernen (Details)
-        res = res.split(':')[0]
-        return res.strip()
-
-    current_type = normalize(current_blocking)
-    last_type = getattr(state.control, 'last_alert_type', "")
-    
-    if current_type != last_type:
-        if current_type:
-            # Filtere bekannte Infos, die keine Alarme sein sollen
-            is_solar = "Solarfenster" in current_type
-            is_zieltemp = "Zieltemp" in current_type
-            
-            if not is_solar and not is_zieltemp:
-                emoji = "⚠️"
-                if any(x in current_type for x in ["Fehler", "Sicherheit", "🚨"]):
-                    emoji = "🚨"
-                elif any(x in current_type for x in ["Pause", "Mindestlaufzeit"]):
-                    emoji = "⏳"
-                
-                # Wir schicken die VOLLE Nachricht (inkl. Details/Zeit) beim ersten Mal
-                msg = f"{emoji} *Kompressor blockiert:* {current_blocking}"
-                logging.info(f"Sende Einmal-Alarm: {current_type} (Voll: {current_blocking})")
-                await control_logic.send_telegram_message(
-                    session, state.config.Telegram.CHAT_ID, msg, state.config.Telegram.BOT_TOKEN, parse_mode="Markdown"
-                )
-        
-        state.control.last_alert_type = current_type
+    current_code = reasons.code_of(current_blocking)
+    last_code = state.control.last_alert_code
+
+    if current_code != last_code:
+        now = ctx.now if ctx else clock.now(state.local_tz)
+        events.emit(events.BlockingReasonChanged(now, last_code, current_code, current_blocking))
+        state.control.last_alert_code = current_code
     
     # Der technische Statuswechsel wird weiterhin für andere Zwecke geloggt/gespeichert
     state.control.last_blocking_reason = current_blocking
 
-async def run_logic_step(session, state):
+def register_event_subscribers(bus, state):
+    """Abonnenten der Zustandsereignisse (Telegram-Alarme, Ereignis-Metriken, LCD-Störungszeile)."""
+
+    def send(msg, priority):
+        telegram_queue.enqueue_telegram_message(
+            state.config.Telegram.CHAT_ID, msg, state.config.Telegram.BOT_TOKEN, priority=priority)
+
+    def send_blocking_alert(event):
+        # Einmal-Alarm je neuem Sperrgrund; Codes ohne Eintrag in reasons.ALERTS sind reine Info
+        emoji = reasons.ALERTS.get(event.code)
+        if emoji is None:
+            return
+        # Wir schicken die VOLLE Nachricht (inkl. Details/Zeit) beim ersten Mal
+        text = reasons.render(event.reason)
+        msg = f"{emoji} *Kompressor blockiert:* {text}"
+        logging.info(f"Sende Einmal-Alarm: {event.code.name} (Voll: {text})")
+        telegram_queue.enqueue_telegram_message(
+            state.config.Telegram.CHAT_ID, msg, state.config.Telegram.BOT_TOKEN,
+            priority=telegram_queue.PRIORITY_ALERT, parse_mode="Markdown"
+        )
+
+    def send_fault_message(event):
+        # Beginn von Sensor-/Druckstörungen meldet bereits der Sperrgrund-Alarm; hier nur die Entwarnung
+        if isinstance(event, events.CompressorStuck):
+            send(f"🚨 KRITISCHER FEHLER: Kompressor bleibt {event.context} eingeschaltet!", telegram_queue.PRIORITY_CRITICAL)
+        elif isinstance(event, events.CompressorNotRunning):
+            send(f"⚠️ Wärmepumpe läuft möglicherweise NICHT:\n{event.detail}\nFehler #{event.count}", telegram_queue.PRIORITY_ALERT)
+        elif not event.active:
+            what = "Sensoren wieder in Ordnung" if isinstance(event, events.SensorFault) else "Druckschalter wieder OK"
+            send(f"✅ {what}", telegram_queue.PRIORITY_ALERT)
+
+    def show_fault_on_lcd(event):
+        name = type(event).__name__
+        if event.active:
+            lcd_faults[name] = "Sensorfehler!" if isinstance(event, events.SensorFault) else "Druckfehler!"
+        else:
+            lcd_faults.pop(name, None)
+
+    bus.subscribe(events.BlockingReasonChanged, send_blocking_alert, inline=True)
+    bus.subscribe((events.SensorFault, events.PressureFault, events.CompressorStuck, events.CompressorNotRunning),
+                  send_fault_message, inline=True)
+    bus.subscribe(events.METRIC_EVENTS, events.get_metrics(), name="metriken", inline=True)
+    bus.subscribe((events.SensorFault, events.PressureFault), show_fault_on_lcd, inline=True)
+
+@instrument()
+async def run_logic_step(session, state, ctx=None):
     """Führt einen Schritt der Steuerungslogik aus."""
+    if ctx is None:
+        ctx = schedule.tick_context(state.local_tz, state.config)
+    set_status = functools.partial(set_kompressor_status, ctx=ctx)
+
     # 1. Druckschalter & Config
     if not await control_logic.check_pressure_and_config(
-        session, state, handle_pressure_check, set_kompressor_status, state.update_config, lambda: "hash"
+        session, state, handle_pressure_check, set_status, state.update_config, lambda: "hash", ctx=ctx
     ):
         pass
 
     # 2. Kompressor-Verifizierung
     if state.control.kompressor_ein:
-        is_running, error_msg = await control_logic.verify_compressor_running(state, session, state.sensors.t_verd, state.sensors.t_unten)
+        is_running, error_msg = await control_logic.verify_compressor_running(state, session, state.sensors.t_verd, state.sensors.t_unten, ctx=ctx)
         if not is_running and state.kompressor_verification_error_count >= 2:
             logging.error(f"Kompressor-Verifizierung fehlgeschlagen (2x): {error_msg} - Schalte aus!")
-            await set_kompressor_status(state, False, force=True)
-            state.control.ausschluss_grund = "Kompressor läuft nicht (Verifizierung fehlgeschlagen)"
-            state.stats.last_compressor_off_time = datetime.now(state.local_tz) + timedelta(minutes=10)
+            await set_status(state, False, force=True)
+            state.control.ausschluss_grund = reasons.Reason(reasons.Block.VERIFICATION_FAILED)
+            state.stats.last_compressor_off_time = ctx.now + timedelta(minutes=10)
 
     # 3. Sensoren & Safety
-    if await control_logic.check_sensors_and_safety(session, state, state.sensors.t_oben, state.sensors.t_unten, state.sensors.t_mittig, state.sensors.t_verd, set_kompressor_status):
-        result = await control_logic.determine_mode_and_setpoints(state, state.sensors.t_unten, state.sensors.t_mittig)
+    if await control_logic.check_sensors_and_safety(session, state, state.sensors.t_oben, state.sensors.t_unten, state.sensors.t_mittig, state.sensors.t_verd, set_status, ctx=ctx):
+        result = await control_logic.determine_mode_and_setpoints(state, state.sensors.t_unten, state.sensors.t_mittig, ctx=ctx)
         state.control.aktueller_einschaltpunkt = result["einschaltpunkt"]
         state.control.aktueller_ausschaltpunkt = result["ausschaltpunkt"]
         state.control.solar_ueberschuss_aktiv = result["solar_ueberschuss_aktiv"]
-        state.last_solar_window_status = control_logic.is_solar_window(state.config, state)
+        state.last_solar_window_status = control_logic.is_solar_window(state.config, state, ctx)
         
         regelfuehler = result["regelfuehler"]
         
@@ -338,21 +418,23 @@ async def run_logic_step(session, state):
         else:
             state.control.active_rule_sensor = "Unknown"
 
-        await control_logic.handle_compressor_off(state, session, regelfuehler, state.control.aktueller_ausschaltpunkt, state.min_laufzeit, state.sensors.t_oben, set_kompressor_status)
-        await control_logic.handle_compressor_on(state, session, regelfuehler, state.control.aktueller_einschaltpunkt, state.control.aktueller_ausschaltpunkt, state.min_laufzeit, state.min_pause, state.last_solar_window_status, state.sensors.t_oben, set_kompressor_status)
-        await control_logic.handle_mode_switch(state, session, state.sensors.t_oben, state.sensors.t_mittig, set_kompressor_status)
+        await control_logic.handle_compressor_off(state, session, regelfuehler, state.control.aktueller_ausschaltpunkt, ctx.params.min_laufzeit, state.sensors.t_oben, set_status, ctx=ctx)
+        await control_logic.handle_compressor_on(state, session, regelfuehler, state.control.aktueller_einschaltpunkt, state.control.aktueller_ausschaltpunkt, ctx.params.min_laufzeit, ctx.params.min_pause, state.last_solar_window_status, state.sensors.t_oben, set_status, ctx=ctx)
+        await control_logic.handle_mode_switch(state, session, state.sensors.t_oben, state.sensors.t_mittig, set_status, ctx=ctx)
         
         # 4. Sofort-Alarme prüfen
-        await check_and_send_alerts(session, state)
+        await check_and_send_alerts(session, state, ctx)
 
-async def log_system_state(state):
-    """Schreibt CSV-Log und aktualisiert LCD."""
+@instrument()
+async def log_system_state(snapshot):
+    """Schreibt CSV-Log und aktualisiert LCD (aus dem Snapshot des Ticks)."""
     # 1. LCD Update
+    sample = snapshot.sample
     hardware_manager.write_lcd(
-        f"Oben:{state.sensors.t_oben if state.sensors.t_oben else 'Err':.1f} Unt:{state.sensors.t_unten if state.sensors.t_unten else 'Err':.1f}",
-        f"Mit :{state.sensors.t_mittig if state.sensors.t_mittig else 'Err':.1f} Verd:{state.sensors.t_verd if state.sensors.t_verd else 'Err':.0f}",
-        f"Ziel:{state.control.aktueller_einschaltpunkt:.0f}/{state.control.aktueller_ausschaltpunkt:.0f} {'ON' if state.control.kompressor_ein else 'OFF'}",
-        f"{state.control.previous_modus[:10] if state.control.previous_modus else ''} {state.solar.soc if state.solar.soc else 0}%"
+        f"Oben:{sample.t_oben if sample.t_oben else 'Err':.1f} Unt:{sample.t_unten if sample.t_unten else 'Err':.1f}",
+        f"Mit :{sample.t_mittig if sample.t_mittig else 'Err':.1f} Verd:{sample.t_verd if sample.t_verd else 'Err':.0f}",
+        f"Ziel:{sample.einschaltpunkt:.0f}/{sample.ausschaltpunkt:.0f} {'ON' if sample.kompressor else 'OFF'}",
+        next(iter(lcd_faults.values()), None) or f"{snapshot.modus[:10] if snapshot.modus else ''} {sample.soc if sample.soc else 0}%"
     )
 
     # 2. CSV Logging
@@ -367,34 +449,35 @@ async def log_system_state(state):
                 await f.write(",".join(EXPECTED_CSV_HEADER) + "\n")
         # Optimization: Header check removed from loop (done at startup)
 
-        # Power Source
-        power_source = "Netz"
-        if state.solar.feedinpower and state.solar.feedinpower > 0: power_source = "Solar"
-        elif state.solar.batpower and state.solar.batpower > 0: power_source = "Batterie"
-
-        def fmt_csv(val): return str(val) if val is not None else "N/A"
-        solax = state.solar.last_api_data or {}
-        
-        csv_line = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            fmt_csv(state.sensors.t_oben), fmt_csv(state.sensors.t_unten), fmt_csv(state.sensors.t_mittig),
-            fmt_csv(state.sensors.t_boiler), fmt_csv(state.sensors.t_verd),
-            "1" if state.control.kompressor_ein else "0",
-            fmt_csv(solax.get("acpower", 0)), fmt_csv(state.solar.feedinpower),
-            fmt_csv(state.solar.batpower), fmt_csv(state.solar.soc),
-            fmt_csv(solax.get("powerdc1", 0)), fmt_csv(solax.get("powerdc2", 0)),
-            fmt_csv(solax.get("consumeenergy", 0)),
-            fmt_csv(state.control.aktueller_einschaltpunkt), fmt_csv(state.control.aktueller_ausschaltpunkt),
-            "1" if state.control.solar_ueberschuss_aktiv else "0",
-            "1" if control_logic.is_nighttime(state.config) else "0",
-            power_source, fmt_csv(state.solar.forecast_tomorrow)
-        ]
-        
         async with aiofiles.open(csv_file, mode="a", encoding="utf-8") as f:
-            await f.write(",".join(csv_line) + "\n")
+            await f.write(sample.csv_line() + "\n")
     except Exception as e:
         logging.error(f"Fehler beim Schreiben der CSV: {e}")
 
+async def run_tick(session, state, last_vpn_check, write_log=True):
+    """Ein Durchlauf der Hauptschleife (auch von simulation/time_warp.py genutzt)."""
+    # Zeitbasis einmal pro Tick bestimmen und durch die Logik reichen
+    ctx = schedule.tick_context(state.local_tz, state.config)
+    now = ctx.now
+
+    # Tageswechsel und Laufzeit
+    handle_day_transition(state, now)
+    if state.control.kompressor_ein and state.stats.last_compressor_on_time:
+        state.stats.current_runtime = safe_timedelta(now, state.stats.last_compressor_on_time, state.local_tz)
+    else:
+        state.stats.current_runtime = timedelta()
+
+    # Daten-Update & Periodische Tasks
+    await update_system_data(session, state)
+    last_vpn_check = await check_periodic_tasks(session, state, last_vpn_check, ctx)
+
+    # Logik, Snapshot veröffentlichen (API, Telegram lesen nur diesen), Logging
+    await run_logic_step(session, state, ctx)
+    snapshot = snapshots.get_publisher().update(state, now, control_logic.is_nighttime(state.config, ctx))
+    if write_log:
+        await log_system_state(snapshot)
+    return last_vpn_check
+
 async def main_loop():
     session = await setup_application()
     
@@ -406,27 +489,12 @@ async def main_loop():
         except Exception as e:
             logging.error(f"Failed to send startup message: {e}")
 
-    last_vpn_check = datetime.now() - timedelta(minutes=1)
+    last_vpn_check = clock.now() - timedelta(minutes=1)
     
     try:
         while not stop_event.is_set():
-            now = datetime.now(state.local_tz)
-            
-            # Tageswechsel und Laufzeit
-            handle_day_transition(state, now)
-            if state.control.kompressor_ein and state.stats.last_compressor_on_time:
-                state.stats.current_runtime = safe_timedelta(now, state.stats.last_compressor_on_time, state.local_tz)
-            else:
-                state.stats.current_runtime = timedelta()
-            
-            # Daten-Update & Periodische Tasks
-            await update_system_data(session, state)
-            last_vpn_check = await check_periodic_tasks(session, state, last_vpn_check)
-            
-            # Logik & Logging
-            await run_logic_step(session, state)
-            await log_system_state(state)
-            
+            last_vpn_check = await run_tick(session, state, last_vpn_check)
+            state_checkpoint.get_checkpoint().maybe_save(state, clock.now(state.local_tz))
             await asyncio.sleep(10)
 
     except asyncio.CancelledError:
@@ -435,8 +503,13 @@ async def main_loop():
         logging.critical(f"Unbehandelter Fehler in Main Loop: {e}", exc_info=True)
     finally:
         logging.info("Shutting down...")
+        state_checkpoint.get_checkpoint().maybe_save(state, clock.now(state.local_tz), force=True)
         if hardware_manager: hardware_manager.cleanup()
-        await session.close()
+        if config_watcher.get_watcher() is not None:
+            await config_watcher.get_watcher().stop()
+        await events.get_bus().stop()
+        await telegram_queue.get_outbox().stop()
+        await http_clients.get_registry().close()
 
 
 if __name__ == "__main__":
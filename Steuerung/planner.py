@@ -0,0 +1,109 @@
+import bisect
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Startwerte bis genug Zyklen beobachtet wurden
+DEFAULT_HEAT_RATE_KPH = 6.0
+DEFAULT_LOSS_RATE_KPH = 0.8
+EWMA_ALPHA = 0.2
+MIN_CYCLE_HOURS = 0.1
+
+
+class PlanStatus(NamedTuple):
+    boost: bool                    # aktuelle Stunde ist ein geplanter PV-Slot
+    defer: bool                    # PV-Slot steht bevor -> Heizen aus dem Netz aufschieben
+    next_slot: Optional[datetime]  # Beginn des nächsten geplanten Slots
+
+
+INACTIVE = PlanStatus(False, False, None)
+
+
+class HeatingPlanner:
+    """
+    Vorausschauende Heizplanung auf Basis der stündlichen Strahlungsprognose.
+
+    Lernt Aufheizrate und Wärmeverlust des Speichers aus den Kompressorzyklen, schätzt den
+    Heizbedarf der nächsten 24 h und legt diese Stunden in die strahlungsstärksten Slots.
+    Die Planung ist O(n log n) für n <= 24 Slots und wird nur alle INTERVALL_MINUTEN neu
+    berechnet; die Abfrage pro Tick (status) ist O(log n).
+    """
+
+    def __init__(self):
+        self.heat_rate_kph = DEFAULT_HEAT_RATE_KPH
+        self.loss_rate_kph = DEFAULT_LOSS_RATE_KPH
+        self.cycles_observed = 0
+        self.slots: List[datetime] = []
+        self.last_plan_time: Optional[datetime] = None
+        self._last_on: Optional[bool] = None
+        self._phase_start: Optional[Tuple[datetime, float]] = None
+
+    # --- Lernen ---
+
+    def observe(self, now: datetime, kompressor_ein: bool, t_mittig: Optional[float]) -> None:
+        """Wird jeden Tick aufgerufen; wertet Ein-/Aus-Phasen beim Umschalten aus."""
+        if t_mittig is None:
+            return
+        if self._last_on is not None and kompressor_ein != self._last_on and self._phase_start:
+            start_time, start_temp = self._phase_start
+            hours = (now - start_time).total_seconds() / 3600.0
+            if hours >= MIN_CYCLE_HOURS:
+                if self._last_on:
+                    rate = (t_mittig - start_temp) / hours
+                    if rate > 0:
+                        self.heat_rate_kph += EWMA_ALPHA * (rate - self.heat_rate_kph)
+                        self.cycles_observed += 1
+                else:
+                    loss = (start_temp - t_mittig) / hours
+                    if loss > 0:
+                        self.loss_rate_kph += EWMA_ALPHA * (loss - self.loss_rate_kph)
+        if self._last_on is None or kompressor_ein != self._last_on:
+            self._phase_start = (now, t_mittig)
+        self._last_on = kompressor_ein
+
+    # --- Planung ---
+
+    def needs_replan(self, now: datetime, interval_minutes: float) -> bool:
+        return self.last_plan_time is None or now - self.last_plan_time >= timedelta(minutes=interval_minutes)
+
+    def plan(self, now: datetime, hourly: Sequence[Tuple[datetime, float]], t_mittig: Optional[float],
+             target_temp: float, min_radiation: float) -> List[datetime]:
+        """
+        Wählt die PV-Slots der nächsten 24 h.
+
+        Args:
+            hourly: (Slot-Beginn, mittlere Strahlung W/m²), naive Lokalzeit.
+            target_temp: Temperatur, bis zu der in PV-Slots geheizt wird (erhöhter Ausschaltpunkt).
+        """
+        now_naive = now.replace(tzinfo=None)
+        hour_start = now_naive.replace(minute=0, second=0, microsecond=0)
+        horizon_end = hour_start + timedelta(hours=24)
+        candidates = [(start, rad) for start, rad in hourly
+                      if hour_start <= start < horizon_end and rad >= min_radiation]
+
+        deficit = max(0.0, target_temp - t_mittig) if t_mittig is not None else 0.0
+        needed_k = self.loss_rate_kph * 24 + deficit
+        hours_needed = min(len(candidates), math.ceil(needed_k / max(self.heat_rate_kph, 0.5)))
+
+        best = sorted(candidates, key=lambda c: c[1], reverse=True)[:hours_needed]
+        slots = sorted(start for start, _ in best)
+        changed = slots != self.slots
+        self.slots = slots
+        self.last_plan_time = now
+        (logging.info if changed else logging.debug)(
+            f"PV-Planung: {len(self.slots)} Slots ({hours_needed}h Bedarf, Aufheizrate {self.heat_rate_kph:.1f} K/h, "
+            f"Verlust {self.loss_rate_kph:.2f} K/h): {', '.join(s.strftime('%H:%M') for s in self.slots) or '-'}"
+        )
+        return self.slots
+
+    def status(self, now: datetime, defer_hours: float) -> PlanStatus:
+        """Planstatus für den aktuellen Zeitpunkt."""
+        if not self.slots:
+            return INACTIVE
+        now_naive = now.replace(tzinfo=None)
+        idx = bisect.bisect_right(self.slots, now_naive)
+        boost = idx > 0 and now_naive < self.slots[idx - 1] + timedelta(hours=1)
+        next_slot = self.slots[idx] if idx < len(self.slots) else None
+        defer = not boost and next_slot is not None and next_slot - now_naive <= timedelta(hours=defer_hours)
+        return PlanStatus(boost, defer, next_slot)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from enum import IntEnum
+from typing import NamedTuple, Optional
+
+
+class Block(IntEnum):
+    """Warum der Kompressor nicht läuft bzw. nicht schaltet (stabile Zahlenwerte für API und Auswertungen)."""
+
+    NONE = 0
+    PRESSURE = 1            # Druckschalter meldet Fehler
+    SENSOR = 2              # Boiler-Sensor liefert keinen gültigen Wert
+    SAFETY_TEMP = 3         # Sicherheitstemperatur erreicht
+    EVAPORATOR_INVALID = 4  # Verdampfersensor ungültig
+    EVAPORATOR_COLD = 5     # Verdampfer zu kalt (inkl. Hysterese bis zur Wiedereinschalttemperatur)
+    MIN_RUNTIME = 6         # Abschalten erst nach der Mindestlaufzeit
+    TARGET_REACHED = 7      # Ausschaltpunkt schon erreicht
+    MIN_PAUSE = 8           # Mindestpause seit dem letzten Lauf
+    SOLAR_WINDOW = 9        # Übergangszeit ohne PV-Überschuss
+    VERIFICATION_FAILED = 10  # Kompressor läuft trotz Ansteuerung nicht
+
+
+# Kurzbezeichnung je Code (Statistik, Simulation, Alarm-Log)
+LABELS = {
+    Block.NONE: "",
+    Block.PRESSURE: "Druckschalter-Fehler",
+    Block.SENSOR: "Sensorfehler",
+    Block.SAFETY_TEMP: "Sicherheitstemp",
+    Block.EVAPORATOR_INVALID: "Verdampfer ungültig",
+    Block.EVAPORATOR_COLD: "Verdampfer zu kalt",
+    Block.MIN_RUNTIME: "Warte auf Mindestlaufzeit",
+    Block.TARGET_REACHED: "Zieltemp erreicht",
+    Block.MIN_PAUSE: "Min. Pause",
+    Block.SOLAR_WINDOW: "Solarfenster",
+    Block.VERIFICATION_FAILED: "Kompressor läuft nicht",
+}
+
+# Einmal-Alarm bei Wechsel auf diesen Code (Emoji); fehlende Codes sind reine Info
+ALERTS = {
+    Block.PRESSURE: "🚨",
+    Block.SENSOR: "🚨",
+    Block.SAFETY_TEMP: "🚨",
+    Block.EVAPORATOR_INVALID: "⚠️",
+    Block.EVAPORATOR_COLD: "⚠️",
+    Block.MIN_RUNTIME: "⏳",
+    Block.MIN_PAUSE: "⏳",
+    Block.VERIFICATION_FAILED: "🚨",
+}
+
+
+def _minutes_seconds(remaining: Optional[timedelta]):
+    total = max(0, int(remaining.total_seconds())) if remaining is not None else 0
+    return total // 60, total % 60
+
+
+class Reason(NamedTuple):
+    """
+    Code plus Parameter eines Sperrgrunds. Der Text entsteht erst bei der Anzeige (str()),
+    Vergleiche und Alarme arbeiten nur mit dem Code.
+    """
+
+    code: Block
+    value: Optional[float] = None        # Messwert, z.B. Verdampfertemperatur
+    limit: Optional[float] = None        # Grenzwert
+    remaining: Optional[timedelta] = None
+    detail: str = ""
+    waiting: bool = False                # Hysterese: wartet auf den Wiedereinschaltwert
+
+    @property
+    def label(self) -> str:
+        return LABELS[self.code]
+
+    def text(self) -> str:
+        code = self.code
+        if code == Block.SENSOR:
+            return f"Sensorfehler: {self.detail}" if self.detail else "Sensor-Fehler"
+        if code == Block.SAFETY_TEMP:
+            return f"Sicherheitstemp (>= {self.limit}°C)"
+        if code == Block.EVAPORATOR_COLD:
+            if self.waiting:
+                return f"Verdampfer zu kalt ({self.value:.1f}°C, warte auf >{self.limit}°C)"
+            return f"Verdampfer zu kalt ({self.value:.1f}°C < {self.limit}°C)"
+        if code == Block.MIN_RUNTIME:
+            return f"Warte auf Mindestlaufzeit (noch {_minutes_seconds(self.remaining)[0]}m)"
+        if code == Block.MIN_PAUSE:
+            minutes, seconds = _minutes_seconds(self.remaining)
+            return f"Min. Pause (noch {minutes}m {seconds}s)"
+        if code == Block.SOLAR_WINDOW:
+            return "Solarfenster (kein Überschuss)"
+        if code == Block.VERIFICATION_FAILED:
+            return "Kompressor läuft nicht (Verifizierung fehlgeschlagen)"
+        return self.label
+
+    __str__ = text
+
+
+def code_of(reason: Optional[Reason]) -> Block:
+    return reason.code if reason is not None else Block.NONE
+
+
+def render(reason: Optional[Reason]) -> Optional[str]:
+    """Text für Anzeige/API; None, wenn nichts blockiert."""
+    return reason.text() if reason is not None else None
@@ -0,0 +1,109 @@
+import logging
+import random
+from typing import Dict, Optional
+
+import clock
+
+PROBE_TIMEOUT_S = 120.0  # länger als der längste Aufruf (Telegram-Long-Poll: 70 s)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, jitter: float = 0.2) -> float:
+    """Exponentielle Wartezeit base * 2^(attempt-1), begrenzt auf maximum, mit ±jitter Streuung."""
+    delay = min(maximum, base * (2 ** max(attempt - 1, 0)))
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+class CircuitBreaker:
+    """
+    Schutzschalter je Upstream (closed / open / half-open).
+
+    Nach failure_threshold aufeinanderfolgenden Fehlern öffnet er: Aufrufe schlagen sofort fehl,
+    statt im Steuerungs-Tick auf Timeouts und Retries zu warten. Nach einer (mit jeder erneuten
+    Öffnung exponentiell wachsenden, gestreuten) Wartezeit wird genau ein Probe-Aufruf
+    durchgelassen; Erfolg schließt ihn wieder, Fehler öffnet ihn erneut. Meldet die Probe nach
+    probe_timeout kein Ergebnis (z.B. abgebrochen per CancelledError), darf eine neue Probe laufen.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_delay: float = 10.0, max_delay: float = 600.0, jitter: float = 0.2,
+                 probe_timeout: float = PROBE_TIMEOUT_S):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.consecutive_opens = 0
+        self.open_until = 0.0
+        self.probe_until = 0.0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        """True, wenn ein Aufruf stattfinden darf."""
+        if self.state == CLOSED:
+            return True
+        now = clock.monotonic()
+        if self.state == OPEN and now >= self.open_until:
+            logging.info(f"Circuit Breaker '{self.name}': half-open, Probe-Aufruf")
+        elif self.state == HALF_OPEN and now >= self.probe_until:
+            logging.warning(f"Circuit Breaker '{self.name}': Probe ohne Ergebnis nach {self.probe_timeout:.0f}s, neuer Probe-Aufruf")
+        else:
+            self.rejected += 1
+            return False
+        self.state = HALF_OPEN
+        self.probe_until = now + self.probe_timeout
+        return True
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logging.info(f"Circuit Breaker '{self.name}': wieder geschlossen")
+        self.state = CLOSED
+        self.failures = 0
+        self.consecutive_opens = 0
+
+    def record_failure(self, error=None) -> None:
+        self.failures += 1
+        self.last_error = (str(error) or type(error).__name__) if error is not None else None
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.consecutive_opens += 1
+            delay = backoff_delay(self.consecutive_opens, self.base_delay, self.max_delay, self.jitter)
+            self.open_until = clock.monotonic() + delay
+            if self.state != OPEN:
+                logging.warning(f"Circuit Breaker '{self.name}': offen für {delay:.0f}s nach {self.failures} Fehlern ({self.last_error})")
+            self.state = OPEN
+
+    def snapshot(self) -> Dict:
+        retry_in = max(0.0, self.open_until - clock.monotonic()) if self.state == OPEN else 0.0
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in_s": round(retry_in, 1),
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Liefert den Schutzschalter für einen Upstream (wird beim ersten Zugriff angelegt)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+    return breaker
+
+
+def status_report() -> Dict[str, Dict]:
+    """Zustand aller Schutzschalter (für /status)."""
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
+
+
+def reset() -> None:
+    _breakers.clear()
@@ -1,84 +1,58 @@
 import logging
-import asyncio
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional, Callable
-from telegram_api import send_telegram_message
-from logic_utils import is_valid_temperature, check_log_throttle
+from logic_utils import check_log_throttle
 from utils import safe_timedelta
+import clock
+import control_params
+import decision
+import events
+from reasons import Block, Reason
 
 async def handle_critical_compressor_error(session, state, error_context: str):
     """Behandelt kritische Fehler beim Kompressor-Ausschalten."""
-    msg = f"🚨 KRITISCHER FEHLER: Kompressor bleibt {error_context} eingeschaltet!"
     logging.critical(f"Kritischer Fehler: Kompressor konnte {error_context} nicht ausgeschaltet werden!")
-    asyncio.create_task(send_telegram_message(
-        session, state.config.Telegram.CHAT_ID, msg, state.config.Telegram.BOT_TOKEN))
+    events.emit(events.CompressorStuck(clock.now(state.local_tz), error_context))
 
-async def check_for_sensor_errors(session, state, t_boiler_oben, t_boiler_unten):
+async def check_for_sensor_errors(session, state, t_boiler_oben, t_boiler_unten, ctx=None):
     """Prüft auf Sensorfehler."""
-    errors = []
-    if not is_valid_temperature(t_boiler_oben): errors.append(f"T_Oben invalid: {t_boiler_oben}")
-    if not is_valid_temperature(t_boiler_unten): errors.append(f"T_Unten invalid: {t_boiler_unten}")
+    error_msg = decision.sensor_errors(t_boiler_oben, t_boiler_unten)
     
-    if errors:
-        error_msg = ", ".join(errors)
-        state.control.blocking_reason = f"Sensorfehler: {error_msg}"
-        if check_log_throttle(state, "last_sensor_error_time"):
+    if error_msg:
+        state.control.blocking_reason = Reason(Block.SENSOR, detail=error_msg)
+        if getattr(state, "last_sensor_error_time", None) is None:
+            events.emit(events.SensorFault(ctx.now if ctx else clock.now(state.local_tz), True, error_msg))
+        if check_log_throttle(state, "last_sensor_error_time", ctx=ctx):
             logging.error(f"Sensorfehler: {error_msg}")
         return False
     # print("DEBUG: No sensor errors")
+    if getattr(state, "last_sensor_error_time", None) is not None:
+        events.emit(events.SensorFault(ctx.now if ctx else clock.now(state.local_tz), False, ""))
     state.last_sensor_error_time = None
     return True
 
-async def check_sensors_and_safety(session, state, t_oben, t_unten, t_mittig, t_verd, set_kompressor_status_func: Callable):
+async def check_sensors_and_safety(session, state, t_oben, t_unten, t_mittig, t_verd, set_kompressor_status_func: Callable, ctx=None):
     """Sicherheitsabschaltung und Sensorprüfung."""
     state.sensors.t_oben, state.sensors.t_unten, state.sensors.t_mittig, state.sensors.t_verd = t_oben, t_unten, t_mittig, t_verd
     state.sensors.t_boiler = (t_oben + t_unten) / 2 if t_oben is not None and t_unten is not None else None
     
-    if not await check_for_sensor_errors(session, state, t_oben, t_unten):
-        state.control.ausschluss_grund = "Sensorfehler"
-        state.control.blocking_reason = "Sensor-Fehler"
+    if not await check_for_sensor_errors(session, state, t_oben, t_unten, ctx=ctx):
+        state.control.ausschluss_grund = state.control.blocking_reason
         if state.control.kompressor_ein: await set_kompressor_status_func(state, False, force=True)
         return False
 
-    safety_temp = state.config.Heizungssteuerung.SICHERHEITS_TEMP
-    if (t_oben is not None and t_oben >= safety_temp) or (t_unten is not None and t_unten >= safety_temp):
-        state.control.ausschluss_grund = f"Übertemperatur (>= {safety_temp} Grad)"
-        state.control.blocking_reason = f"Sicherheitstemp (>= {safety_temp}°C)"
-        if state.control.kompressor_ein: await set_kompressor_status_func(state, False, force=True)
-        return False
-
-    if not is_valid_temperature(t_verd, min_temp=-20.0, max_temp=50.0):
-        state.control.ausschluss_grund = "Verdampfertemperatur ungültig"
-        state.control.blocking_reason = "Verdampfer ungültig"
-        if state.control.kompressor_ein: await set_kompressor_status_func(state, False, force=True)
-        return False
-    
-    verd_limit = state.config.Heizungssteuerung.VERDAMPFERTEMPERATUR
-    restart_temp = state.config.Heizungssteuerung.VERDAMPFER_RESTART_TEMP
-    
-    # Logic for evaporator hysteresis
+    # Sicherheitstemperatur und Verdampfer (mit Hysterese)
     already_blocked = getattr(state, 'verdampfer_blocked', False)
-    too_cold = t_verd < verd_limit
-    recovering = already_blocked and t_verd < restart_temp
-    
-    if too_cold or recovering:
-        state.verdampfer_blocked = True
-        if already_blocked:
-            state.control.ausschluss_grund = f"Verdampfer: Warten auf Erwärmung ({t_verd:.1f} Grad < {restart_temp} Grad)"
-            state.control.blocking_reason = f"Verdampfer zu kalt ({t_verd:.1f}°C, warte auf >{restart_temp}°C)"
-        else:
-            state.control.ausschluss_grund = f"Verdampfertemperatur zu niedrig ({t_verd:.1f} Grad < {verd_limit} Grad)"
-            state.control.blocking_reason = f"Verdampfer zu kalt ({t_verd:.1f}°C < {verd_limit}°C)"
-        
+    reason, state.verdampfer_blocked = decision.safety_block(t_oben, t_unten, t_verd, already_blocked, control_params.current(state, ctx))
+    if reason is not None:
+        state.control.ausschluss_grund = state.control.blocking_reason = reason
         if state.control.kompressor_ein: await set_kompressor_status_func(state, False, force=True)
         return False
-    
-    state.verdampfer_blocked = False
     return True
 
-async def verify_compressor_running(state, session, current_t_verd, current_t_unten, verification_delay_minutes=10):
+async def verify_compressor_running(state, session, current_t_verd, current_t_unten, verification_delay_minutes=10, ctx=None):
     """Verifiziert den Lauf des Kompressors über Temperaturänderungen."""
-    now = datetime.now(state.local_tz)
+    now = ctx.now if ctx else clock.now(state.local_tz)
     if not state.control.kompressor_ein or state.kompressor_verification_start_time is None:
         state.kompressor_verification_start_time = None
         return True, None
@@ -114,7 +88,5 @@ async def verify_compressor_running(state, session, current_t_verd, current_t_un
     if not unten_ok: error_parts.append(f"Unterer Fühler: nur {unten_delta:.1f}°C Änderung (Soll: >0.2°C)")
     
     error_msg = "⚠️ Wärmepumpe läuft möglicherweise NICHT:\n" + "\n".join(error_parts)
-    if state.bot_token:
-        # Cast to string to prevent MagicMock serialization errors in telegram_api
-        asyncio.create_task(send_telegram_message(session, state.config.Telegram.CHAT_ID, f"{error_msg}\nFehler #{state.kompressor_verification_error_count}", state.config.Telegram.BOT_TOKEN))
+    events.emit(events.CompressorNotRunning(now, "\n".join(error_parts), state.kompressor_verification_error_count))
     return False, error_msg
@@ -0,0 +1,109 @@
+import math
+import struct
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+POWER_SOURCES = ("Netz", "Solar", "Batterie")
+
+_EPOCH = datetime(1970, 1, 1)
+_NAN = float("nan")
+
+
+def _fmt(value) -> str:
+    return str(value) if value is not None else "N/A"
+
+
+def _flag(value: bool) -> str:
+    return "1" if value else "0"
+
+
+class TickSample(NamedTuple):
+    """
+    Messwerte eines Steuerungs-Ticks in der Spaltenreihenfolge von utils.EXPECTED_CSV_HEADER.
+    Unveränderlich und ohne __dict__ (ein Tupel), daher billig zu kopieren und in Puffern zu halten.
+    """
+
+    timestamp: datetime             # lokale Zeit ohne tzinfo
+    t_oben: Optional[float]
+    t_unten: Optional[float]
+    t_mittig: Optional[float]
+    t_boiler: Optional[float]
+    t_verd: Optional[float]
+    kompressor: bool
+    acpower: Optional[float]
+    feedinpower: Optional[float]
+    batpower: Optional[float]
+    soc: Optional[float]
+    powerdc1: Optional[float]
+    powerdc2: Optional[float]
+    consumeenergy: Optional[float]
+    einschaltpunkt: Optional[float]
+    ausschaltpunkt: Optional[float]
+    solar_ueberschuss: bool
+    nacht: bool
+    power_source: str
+    prognose_morgen: Optional[float]
+
+    @classmethod
+    def from_state(cls, state, timestamp: datetime, nacht: bool) -> "TickSample":
+        sensors, solar, control = state.sensors, state.solar, state.control
+        solax = solar.last_api_data or {}
+        power_source = "Netz"
+        if solar.feedinpower and solar.feedinpower > 0:
+            power_source = "Solar"
+        elif solar.batpower and solar.batpower > 0:
+            power_source = "Batterie"
+        return cls(
+            timestamp.replace(tzinfo=None, microsecond=0),
+            sensors.t_oben, sensors.t_unten, sensors.t_mittig, sensors.t_boiler, sensors.t_verd,
+            bool(control.kompressor_ein),
+            solax.get("acpower", 0), solar.feedinpower, solar.batpower, solar.soc,
+            solax.get("powerdc1", 0), solax.get("powerdc2", 0), solax.get("consumeenergy", 0),
+            control.aktueller_einschaltpunkt, control.aktueller_ausschaltpunkt,
+            bool(control.solar_ueberschuss_aktiv), bool(nacht), power_source, solar.forecast_tomorrow,
+        )
+
+    def csv_line(self) -> str:
+        """Eine Zeile für heizungsdaten.csv (ohne Zeilenumbruch)."""
+        return ",".join((
+            self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            _fmt(self.t_oben), _fmt(self.t_unten), _fmt(self.t_mittig), _fmt(self.t_boiler), _fmt(self.t_verd),
+            _flag(self.kompressor),
+            _fmt(self.acpower), _fmt(self.feedinpower), _fmt(self.batpower), _fmt(self.soc),
+            _fmt(self.powerdc1), _fmt(self.powerdc2), _fmt(self.consumeenergy),
+            _fmt(self.einschaltpunkt), _fmt(self.ausschaltpunkt),
+            _flag(self.solar_ueberschuss), _flag(self.nacht),
+            self.power_source, _fmt(self.prognose_morgen),
+        ))
+
+    def pack(self) -> bytes:
+        """Binärform fester Länge (RECORD_SIZE Bytes); fehlende Werte als NaN."""
+        flags = (self.kompressor << 0) | (self.solar_ueberschuss << 1) | (self.nacht << 2)
+        source = POWER_SOURCES.index(self.power_source) if self.power_source in POWER_SOURCES else 0
+        return _RECORD.pack(
+            (self.timestamp - _EPOCH).total_seconds(),
+            *(_NAN if self[i] is None else float(self[i]) for i in _FLOAT_FIELDS),
+            flags, source,
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "TickSample":
+        seconds, *rest = _RECORD.unpack(data)
+        floats = [None if math.isnan(v) else v for v in rest[:len(_FLOAT_FIELDS)]]
+        flags, source = rest[len(_FLOAT_FIELDS):]
+        values = [None] * len(cls._fields)
+        values[0] = _EPOCH + timedelta(seconds=seconds)
+        for index, value in zip(_FLOAT_FIELDS, floats):
+            values[index] = value
+        values[cls._fields.index("kompressor")] = bool(flags & 1)
+        values[cls._fields.index("solar_ueberschuss")] = bool(flags & 2)
+        values[cls._fields.index("nacht")] = bool(flags & 4)
+        values[cls._fields.index("power_source")] = POWER_SOURCES[source]
+        return cls(*values)
+
+
+_NON_FLOAT = ("timestamp", "kompressor", "solar_ueberschuss", "nacht", "power_source")
+_FLOAT_FIELDS = tuple(i for i, name in enumerate(TickSample._fields) if name not in _NON_FLOAT)
+# Zeitstempel (s seit 1970, lokal), Messwerte als float32, Flags, Stromquelle
+_RECORD = struct.Struct(f"<d{len(_FLOAT_FIELDS)}fBB")
+RECORD_SIZE = _RECORD.size
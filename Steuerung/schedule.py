@@ -0,0 +1,244 @@
+import bisect
+import logging
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import List, NamedTuple, Optional, Tuple
+
+import clock
+import control_params
+from config_manager import HeizungssteuerungConfig
+
+# Zeitfenster sind inklusive Endzeitpunkt (wie die bisherigen <=-Vergleiche)
+END_EPSILON = timedelta(microseconds=1)
+SOLAR_WINDOW = timedelta(hours=2)
+
+WEEKDAYS = {"mo": 0, "di": 1, "mi": 2, "do": 3, "fr": 4, "sa": 5, "so": 6}
+
+
+class ScheduleFlags(NamedTuple):
+    night: bool
+    transition: bool
+    solar_window: bool
+
+
+class TimeWindow(NamedTuple):
+    start: dtime
+    end: dtime
+    weekdays: frozenset
+
+
+def _parse_hhmm(value: str) -> dtime:
+    hours, minutes = value.strip().split(":")
+    return dtime(int(hours), int(minutes))
+
+
+def _parse_time(name: str, value, strict: bool = False) -> dtime:
+    """HH:MM aus der Config; ein ungültiger Wert wird geloggt und durch den Standardwert ersetzt (strict: ValueError)."""
+    try:
+        return _parse_hhmm(value)
+    except (ValueError, AttributeError) as e:
+        if strict:
+            raise ValueError(f"Ungültige Uhrzeit {name}={value!r}") from e
+        default = HeizungssteuerungConfig.model_fields[name].default
+        logging.error(f"Ungültige Uhrzeit {name}={value!r} ({e}), verwende {default}")
+        return _parse_hhmm(default)
+
+
+def _parse_weekdays(spec: str) -> frozenset:
+    """'Mo-Fr', 'Sa,So' oder 'Mi' -> Menge der Wochentage (0 = Montag)."""
+    days = set()
+    for part in spec.lower().split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = (WEEKDAYS[p.strip()[:2]] for p in part.split("-"))
+            day = first
+            while True:
+                days.add(day)
+                if day == last:
+                    break
+                day = (day + 1) % 7
+        elif part:
+            days.add(WEEKDAYS[part[:2]])
+    return frozenset(days)
+
+
+def parse_extra_windows(value: str, strict: bool = False) -> List[TimeWindow]:
+    """
+    Parst zusätzliche Absenkzeiten, z.B. "12:00-14:00; Sa-So 01:00-06:00".
+    Ohne Wochentage gilt ein Fenster täglich. Ungültige Einträge werden übersprungen (strict: ValueError).
+    """
+    windows = []
+    for entry in (value or "").replace(";", "\n").splitlines():
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            days_spec, _, times = entry.rpartition(" ")
+            start, end = times.split("-")
+            weekdays = _parse_weekdays(days_spec) if days_spec else frozenset(range(7))
+            windows.append(TimeWindow(_parse_hhmm(start), _parse_hhmm(end), weekdays))
+        except (ValueError, KeyError) as e:
+            if strict:
+                raise ValueError(f"Ungültiges Zeitfenster '{entry}' in ZUSAETZLICHE_ABSENKUNGEN") from e
+            logging.error(f"Ungültiges Zeitfenster '{entry}' in ZUSAETZLICHE_ABSENKUNGEN: {e}")
+    return windows
+
+
+def _in_window(start: dtime, end: dtime, t: dtime) -> bool:
+    if start <= end:
+        return start <= t <= end
+    return start <= t or t <= end  # geht über Mitternacht
+
+
+class DayProfile:
+    """Zeitfenster eines Tages (Werktag oder Wochenende)."""
+
+    __slots__ = ("nacht_start", "nacht_ende", "uebergang_morgens_ende", "uebergang_abends_start")
+
+    def __init__(self, nacht_start: dtime, nacht_ende: dtime, uebergang_morgens_ende: dtime, uebergang_abends_start: dtime):
+        self.nacht_start = nacht_start
+        self.nacht_ende = nacht_ende
+        self.uebergang_morgens_ende = uebergang_morgens_ende
+        self.uebergang_abends_start = uebergang_abends_start
+
+    def is_night(self, t: dtime) -> bool:
+        return _in_window(self.nacht_start, self.nacht_ende, t)
+
+    def is_transition(self, t: dtime) -> bool:
+        morgens = self.nacht_ende <= t <= self.uebergang_morgens_ende
+        abends = self.uebergang_abends_start <= t <= self.nacht_start
+        return morgens or abends
+
+    def boundaries(self):
+        return (self.nacht_start, self.nacht_ende, self.uebergang_morgens_ende, self.uebergang_abends_start)
+
+
+def config_key(config) -> Tuple:
+    """Alle Config-Werte, von denen die Zeitleiste abhängt."""
+    cfg = config.Heizungssteuerung
+
+    def optional(name):
+        value = getattr(cfg, name, "")
+        return value.strip() if isinstance(value, str) else ""
+
+    return (
+        cfg.NACHTABSENKUNG_START, cfg.NACHTABSENKUNG_END,
+        cfg.UEBERGANGSMODUS_MORGENS_ENDE, cfg.UEBERGANGSMODUS_ABENDS_START,
+        optional("WOCHENENDE_NACHTABSENKUNG_START"), optional("WOCHENENDE_NACHTABSENKUNG_END"),
+        optional("ZUSAETZLICHE_ABSENKUNGEN"),
+    )
+
+
+class ScheduleEngine:
+    """
+    Kompiliert die Zeitfenster der Config in eine sortierte Zeitleiste (heute und morgen)
+    mit konstanten Flags je Abschnitt. Abfrage per bisect in O(log n); neu berechnet
+    wird nur bei Config-Änderung oder Datumswechsel. Ungültige Zeiten ergeben die Standardwerte,
+    mit strict=True einen ValueError (Prüfung vor dem Übernehmen einer Config).
+    """
+
+    def __init__(self, key: Tuple, strict: bool = False):
+        nacht_start, nacht_ende, u_m_ende, u_a_start, we_start, we_ende, extra = key
+        self.key = key
+        u_m_ende = _parse_time("UEBERGANGSMODUS_MORGENS_ENDE", u_m_ende, strict)
+        u_a_start = _parse_time("UEBERGANGSMODUS_ABENDS_START", u_a_start, strict)
+        self.weekday_profile = DayProfile(_parse_time("NACHTABSENKUNG_START", nacht_start, strict),
+                                          _parse_time("NACHTABSENKUNG_END", nacht_ende, strict), u_m_ende, u_a_start)
+        self.weekend_profile = self.weekday_profile
+        if we_start and we_ende:
+            try:
+                self.weekend_profile = DayProfile(_parse_hhmm(we_start), _parse_hhmm(we_ende), u_m_ende, u_a_start)
+            except ValueError as e:
+                if strict:
+                    raise ValueError(f"Ungültige Wochenend-Nachtabsenkung {we_start!r}-{we_ende!r}") from e
+                logging.error(f"Ungültige Wochenend-Nachtabsenkung {we_start!r}-{we_ende!r} ({e}), verwende Werktagszeiten")
+        self.extra_windows = parse_extra_windows(extra, strict)
+        self._day = None
+        self._starts: List[datetime] = []
+        self._flags: List[ScheduleFlags] = []
+
+    def _profile(self, day) -> DayProfile:
+        return self.weekend_profile if day.weekday() >= 5 else self.weekday_profile
+
+    def _flags_at(self, moment: datetime) -> ScheduleFlags:
+        t = moment.time()
+        profile = self._profile(moment)
+        night = profile.is_night(t) or any(
+            moment.weekday() in w.weekdays and _in_window(w.start, w.end, t) for w in self.extra_windows
+        )
+        nacht_ende = datetime.combine(moment.date(), profile.nacht_ende)
+        solar = nacht_ende <= moment < nacht_ende + SOLAR_WINDOW
+        return ScheduleFlags(night, profile.is_transition(t), solar)
+
+    def _compile(self, day) -> None:
+        points = set()
+        for offset in (0, 1):
+            d = day + timedelta(days=offset)
+            points.add(datetime.combine(d, dtime(0, 0)))
+            profile = self._profile(d)
+            times = list(profile.boundaries()) + [w.start for w in self.extra_windows] + [w.end for w in self.extra_windows]
+            for t in times:
+                start = datetime.combine(d, t)
+                points.add(start)
+                points.add(start + END_EPSILON)
+            solar_start = datetime.combine(d, profile.nacht_ende)
+            points.add(solar_start + SOLAR_WINDOW)
+        self._starts = sorted(points)
+        self._flags = [self._flags_at(p) for p in self._starts]
+        self._day = day
+
+    def lookup(self, now: datetime) -> ScheduleFlags:
+        """Flags für den Zeitpunkt now (naiv oder mit tzinfo, Lokalzeit)."""
+        local = now.replace(tzinfo=None)
+        if self._day != local.date():
+            self._compile(local.date())
+        idx = bisect.bisect_right(self._starts, local) - 1
+        return self._flags[idx]
+
+    def timeline(self) -> List[Tuple[datetime, ScheduleFlags]]:
+        """Zusammengefasste Zeitleiste (nur Abschnitte mit Flag-Wechsel), z.B. für Statusanzeigen."""
+        merged = []
+        for start, flags in zip(self._starts, self._flags):
+            if not merged or merged[-1][1] != flags:
+                merged.append((start, flags))
+        return merged
+
+
+_engine: Optional[ScheduleEngine] = None
+
+
+def get_engine(config) -> ScheduleEngine:
+    """Liefert die ScheduleEngine zur aktuellen Config (neu kompiliert nur bei Änderungen)."""
+    global _engine
+    key = config_key(config)
+    if _engine is None or _engine.key != key:
+        _engine = ScheduleEngine(key)
+    return _engine
+
+
+class TickContext:
+    """
+    Zeitbasis eines Steuerungs-Ticks. Wird einmal pro Tick erzeugt und durch die Logik
+    gereicht, statt in jeder Funktion erneut now() aufzurufen und "HH:MM" zu parsen.
+    """
+
+    __slots__ = ("now", "local_time", "monotonic", "flags", "plan", "params")
+
+    def __init__(self, now: datetime, monotonic: float, flags, plan=None, params=None):
+        self.now = now
+        self.local_time = now.time()
+        self.monotonic = monotonic
+        self.flags = flags  # ScheduleFlags (night, transition, solar_window)
+        self.plan = plan    # planner.PlanStatus oder None (Planung inaktiv)
+        self.params = params  # control_params.ControlParams der Config bei Tick-Beginn
+
+    @property
+    def now_naive(self) -> datetime:
+        return self.now.replace(tzinfo=None)
+
+
+def tick_context(local_tz, config) -> TickContext:
+    """Erzeugt den TickContext für den aktuellen Zeitpunkt der installierten Uhr."""
+    current = clock.now(local_tz)
+    return TickContext(current, clock.monotonic(), get_engine(config).lookup(current),
+                       params=control_params.get_params(config))
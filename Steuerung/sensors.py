@@ -3,6 +3,7 @@ import logging
 import os
 from datetime import datetime, timedelta
 import pytz
+import clock
 from typing import Optional, Dict, Tuple
 
 class SensorManager:
@@ -65,7 +66,7 @@ class SensorManager:
             logging.error(f"Unbekannter Sensor-Key: {sensor_key}")
             return None
 
-        now = datetime.now(pytz.timezone("Europe/Berlin"))
+        now = clock.now(pytz.timezone("Europe/Berlin"))
         
         # Cache prüfen
         if sensor_id in self.last_sensor_readings:
@@ -0,0 +1,440 @@
+"""
+Generator für synthetische heizungsdaten.csv (Last- und Skalierungstests).
+
+Erzeugt Monate bis Jahre an 10s-Samples im EXPECTED_CSV_HEADER-Format. Ein einfaches
+physikalisches Speichermodell (Aufheizrate, Wärmeverlust, Zapfungen) wird mit den
+Regeln aus control_logic gesteuert: Hysterese Ein-/Ausschaltpunkt, Mindestlaufzeit,
+Mindestpause, Nachtabsenkung, Übergangsmodus und Solarüberschuss (erhöhte Sollwerte).
+
+Optional werden realistische Defekte eingestreut, wie sie fix_csv.py behandelt:
+Header-Zeilen mitten in der Datei, 19-spaltige Altzeilen (ohne Prognose_Morgen)
+und "N/A"-Werte (Sensor-/API-Ausfälle).
+
+Die Simulation arbeitet ereignisbasiert (NumPy-Suche nach dem nächsten Schaltpunkt),
+die CSV-Zeilen werden vollständig vektorisiert als Byte-Matrix geschrieben.
+
+Aufruf (aus dem Ordner Steuerung/):
+    python simulation/heizungsdaten_generator.py --years 5 --output "csv log/heizungsdaten_5y.csv"
+    python simulation/heizungsdaten_generator.py --days 30 --corrupt --output test.csv
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config_manager import AppConfig, ConfigManager  # noqa: E402
+from utils import EXPECTED_CSV_HEADER  # noqa: E402
+
+# --- Modellparameter ---
+HEAT_RATE_KPH = 6.5           # Aufheizrate Mitte bei 10°C Verdampfer [K/h]
+HEAT_RATE_PER_K_VERD = 0.12   # Zusätzliche Aufheizrate je K Verdampfertemperatur
+STANDING_LOSS_KPH = 0.35      # Stillstandsverlust [K/h]
+DRAW_MORNING_KPH = 5.0        # Zapfung morgens (Spitze) [K/h]
+DRAW_EVENING_KPH = 3.0        # Zapfung abends (Spitze) [K/h]
+OBEN_OFFSET = (2.0, 1.0)      # T_Oben - T_Mittig (aus, ein)
+UNTEN_OFFSET = (4.0, 1.5)     # T_Mittig - T_Unten (aus, ein)
+VERD_DROP_ON = 3.0            # Verdampfer kühlt im Betrieb um ca. 3 K ab
+PV_PEAK_W = 8000.0
+HOUSE_BASE_W = 280.0
+COMPRESSOR_W = 550.0
+BATTERY_WH = 10000.0
+BATTERY_MAX_W = 3000.0
+
+CHUNK_DAYS = 30
+SEARCH_WINDOW = 2160          # Startfenster der Schaltpunktsuche (6h bei 10s)
+
+
+class CorruptionSettings:
+    """Steuert Art und Häufigkeit der eingestreuten Datenfehler."""
+
+    def __init__(self, header_per_million_rows=2.0, legacy_days=14.0, na_per_million_rows=200.0, na_burst_rows=6):
+        self.header_per_million_rows = header_per_million_rows
+        self.legacy_days = legacy_days
+        self.na_per_million_rows = na_per_million_rows
+        self.na_burst_rows = na_burst_rows
+
+
+# --- Byte-Kodierung (Lookup-Tabellen mit NUL-Padding) ---
+
+def _lut(strings):
+    width = max(len(s) for s in strings)
+    arr = np.array([s.encode() for s in strings], dtype=f"S{width}")
+    return arr.view(np.uint8).reshape(len(strings), width)
+
+
+_TEMP_LUT = _lut([f"{v / 10:.1f}" for v in range(-500, 1501)] + ["N/A"])   # -50.0 .. 150.0
+_TEMP_NA = len(_TEMP_LUT) - 1
+_POWER_LUT = _lut([str(v) for v in range(-30000, 30001)] + ["N/A"])        # -30000 .. 30000 W
+_POWER_NA = len(_POWER_LUT) - 1
+_INT_LUT = _lut([str(v) for v in range(0, 100000)])                          # 0 .. 99999
+_FORECAST_LUT = _lut([f"{v / 100:.2f}" for v in range(0, 3001)])             # 0.00 .. 30.00
+_FLAG_LUT = _lut(["0", "1"])
+_SOURCE_LUT = _lut(["Netz", "Solar", "Batterie"])
+_DIGIT_LUT = _lut([f".{d}" for d in range(10)])
+
+
+def _temp_idx(values):
+    missing = np.isnan(values)
+    idx = np.clip(np.rint(np.where(missing, 0.0, values) * 10), -500, 1500).astype(np.int64) + 500
+    idx[missing] = _TEMP_NA
+    return idx
+
+
+def _power_idx(values):
+    missing = np.isnan(values)
+    idx = np.clip(np.rint(np.where(missing, 0.0, values)), -30000, 30000).astype(np.int64) + 30000
+    idx[missing] = _POWER_NA
+    return idx
+
+
+def _parse_hhmm(value):
+    hours, minutes = map(int, value.split(":"))
+    return hours * 60 + minutes
+
+
+def _encode_rows(timestamps, fields):
+    """
+    Baut die CSV-Zeilen als uint8-Matrix (Zeilen x max. Breite) und liefert
+    (matrix, Position des letzten Trennzeichens). NUL-Bytes werden beim Schreiben entfernt.
+    Felder mit dem Zusatz joined=True werden ohne Komma an das vorherige Feld angehängt.
+    """
+    n = len(timestamps)
+    width = 19 + sum(field[0].shape[1] + 1 for field in fields) + 1
+    mat = np.zeros((n, width), dtype=np.uint8)
+    mat[:, :19] = timestamps.astype("S19").view(np.uint8).reshape(n, 19)
+    mat[:, 10] = ord(" ")
+    pos = 19
+    last_sep = pos
+    for lut, idx, *joined in fields:
+        if not (joined and joined[0]):
+            last_sep = pos
+            mat[:, pos] = ord(",")
+            pos += 1
+        mat[:, pos:pos + lut.shape[1]] = lut[idx]
+        pos += lut.shape[1]
+    mat[:, pos] = ord("\n")
+    return mat, last_sep
+
+
+def _write_rows(f, mat):
+    buf = mat.ravel()
+    buf[buf != 0].tofile(f)
+
+
+# --- Simulation ---
+
+def evaporator_air_temperature(day_of_year, hour):
+    """Ansaugluft des Verdampfers (Keller/Technikraum): gedämpfter Jahres- und Tagesgang."""
+    return 16.0 + 6.0 * np.sin(2 * np.pi * (day_of_year - 110) / 365.0) + 2.0 * np.sin(2 * np.pi * (hour - 9.0) / 24.0)
+
+
+class _CarryState:
+    """Zustand, der zwischen zwei Chunks weitergegeben wird."""
+
+    def __init__(self, t_mittig, soc, consume_kwh):
+        self.t_mittig = t_mittig
+        self.kompressor_ein = False
+        self.since_switch = 10 ** 9
+        self.soc = soc
+        self.consume_kwh = consume_kwh
+
+
+def _schedule_masks(minute_of_day, cfg):
+    n_start = _parse_hhmm(cfg.NACHTABSENKUNG_START)
+    n_end = _parse_hhmm(cfg.NACHTABSENKUNG_END)
+    u_m_end = _parse_hhmm(cfg.UEBERGANGSMODUS_MORGENS_ENDE)
+    u_a_start = _parse_hhmm(cfg.UEBERGANGSMODUS_ABENDS_START)
+    m = minute_of_day
+    if n_start <= n_end:
+        night = (m >= n_start) & (m <= n_end)
+    else:
+        night = (m >= n_start) | (m <= n_end)
+    transition = ((m >= n_end) & (m <= u_m_end)) | ((m >= u_a_start) & (m <= n_start))
+    return night, transition
+
+
+def _simulate_switching(carry, heat, loss, on_thr, off_thr, ctrl_off_idle, ctrl_off_run, start_ok, run_ok, safety_limit, min_run, min_pause):
+    """Ereignisbasierte Hysterese-Simulation; liefert T_Mittig und Kompressorstatus je Sample."""
+    n = len(heat)
+    H = np.concatenate(([0.0], np.cumsum(heat)))
+    L = np.concatenate(([0.0], np.cumsum(loss)))
+    temps = np.empty(n)
+    status = np.zeros(n, dtype=bool)
+    i = 0
+    t0 = carry.t_mittig
+    on = carry.kompressor_ein
+    since = carry.since_switch
+    while i < n:
+        wait = max(0, (min_run if on else min_pause) - since)
+        found = None
+        start, window = i, SEARCH_WINDOW
+        while found is None and start < n:
+            end = min(n, start + window)
+            if on:
+                traj = t0 + (H[start:end] - H[i]) - (L[start:end] - L[i])
+                cond = (traj + ctrl_off_run[start:end] >= off_thr[start:end]) | (traj + OBEN_OFFSET[1] >= safety_limit) \
+                    | ~run_ok[start:end]
+            else:
+                traj = t0 - (L[start:end] - L[i])
+                cond = (traj + ctrl_off_idle[start:end] <= on_thr[start:end]) & start_ok[start:end] \
+                    & (traj + OBEN_OFFSET[0] < off_thr[start:end])
+            blocked = i + wait - start
+            if blocked > 0:
+                cond[:blocked] = False
+            k = int(np.argmax(cond))
+            if cond[k]:
+                found = start + k
+            else:
+                start, window = end, window * 2
+        seg_end = n if found is None else found
+        if on:
+            temps[i:seg_end] = t0 + (H[i:seg_end] - H[i]) - (L[i:seg_end] - L[i])
+            t_next = t0 + (H[seg_end] - H[i]) - (L[seg_end] - L[i])
+        else:
+            temps[i:seg_end] = t0 - (L[i:seg_end] - L[i])
+            t_next = t0 - (L[seg_end] - L[i])
+        status[i:seg_end] = on
+        if found is None:
+            since += n - i
+        else:
+            on = not on
+            since = 0
+        t0 = t_next
+        i = seg_end
+    carry.t_mittig, carry.kompressor_ein, carry.since_switch = t0, on, since
+    return temps, status
+
+
+def _battery_hourly(carry, surplus_hourly):
+    """Stündliches Batteriemodell (SOC in %, Leistung > 0 = Laden)."""
+    soc = carry.soc
+    bat = np.empty(len(surplus_hourly))
+    socs = np.empty(len(surplus_hourly))
+    for h, surplus in enumerate(surplus_hourly):
+        if surplus > 0:
+            power = min(surplus, BATTERY_MAX_W, (100.0 - soc) / 100.0 * BATTERY_WH)
+        else:
+            power = -min(-surplus, BATTERY_MAX_W, max(0.0, soc - 10.0) / 100.0 * BATTERY_WH)
+        soc = min(100.0, max(10.0, soc + power / BATTERY_WH * 100.0))
+        bat[h] = power
+        socs[h] = soc
+    carry.soc = soc
+    return bat, socs
+
+
+def _simulate_chunk(rng, start, rows, interval_s, config, carry):
+    cfg = config.Heizungssteuerung
+    sol = config.Solarueberschuss
+    timestamps = np.datetime64(start.replace(microsecond=0), "s") + np.arange(rows, dtype=np.int64) * interval_s
+    seconds_of_day = (timestamps - timestamps.astype("datetime64[D]")).astype(np.int64)
+    hour = seconds_of_day / 3600.0
+    day_index = (timestamps.astype("datetime64[D]") - timestamps[0].astype("datetime64[D]")).astype(np.int64)
+    doy = (timestamps.astype("datetime64[D]") - timestamps.astype("datetime64[Y]")).astype(np.int64)
+    n_days = int(day_index[-1]) + 2
+    dt_h = interval_s / 3600.0
+
+    # Tageszufall: Wolken, Zapfmenge, Temperaturabweichung
+    cloud_day = rng.beta(2.0, 1.3, n_days)
+    draw_day = rng.uniform(0.5, 1.5, n_days)
+    ambient_day = rng.normal(0.0, 1.5, n_days)
+
+    ambient = evaporator_air_temperature(doy, hour) + ambient_day[day_index]
+    day_length = 12.0 + 4.0 * np.sin(2 * np.pi * (doy - 80) / 365.0)
+    sunrise = 12.5 - day_length / 2
+    sun = np.clip(np.sin(np.pi * (hour - sunrise) / day_length), 0.0, None) * ((hour > sunrise) & (hour < sunrise + day_length))
+    season = 0.55 + 0.45 * np.sin(2 * np.pi * (doy - 80) / 365.0)
+    pv = PV_PEAK_W * sun ** 1.2 * season * (0.25 + 0.75 * cloud_day[day_index]) * rng.uniform(0.9, 1.0, rows)
+    house = HOUSE_BASE_W + 150.0 * np.sin(2 * np.pi * hour / 24.0) ** 2 + rng.exponential(40.0, rows)
+
+    # Batterie/Einspeisung stündlich ohne Kompressor (Basis für die Solarüberschuss-Entscheidung)
+    hours_total = int(np.ceil(rows * dt_h)) + 1
+    hour_idx = (np.arange(rows) * dt_h).astype(np.int64)
+    surplus_h = np.bincount(hour_idx, weights=pv - house, minlength=hours_total) / np.maximum(np.bincount(hour_idx, minlength=hours_total), 1)
+    bat_h, soc_h = _battery_hourly(carry, surplus_h)
+    batpower = bat_h[hour_idx]
+    soc = soc_h[hour_idx]
+    feedin_pre = pv - house - batpower
+    solar = (batpower > sol.BATPOWER_THRESHOLD) | ((soc >= sol.SOC_THRESHOLD) & (feedin_pre > sol.FEEDINPOWER_THRESHOLD))
+
+    # Zeitfenster und Sollwerte wie determine_mode_and_setpoints
+    night, transition = _schedule_masks(seconds_of_day // 60, cfg)
+    reduction = float(cfg.NACHTABSENKUNG)
+    ein = np.where(solar, float(cfg.EINSCHALTPUNKT_ERHOEHT), cfg.EINSCHALTPUNKT - reduction * night)
+    aus = np.where(solar, float(cfg.AUSSCHALTPUNKT_ERHOEHT), cfg.AUSSCHALTPUNKT - reduction * night)
+    # Übergangsmodus ohne Überschuss: Start nur bei Frostschutz (Regelfühler <= Nacht-Einschaltpunkt)
+    on_thr = np.where(transition & ~solar, np.minimum(ein, cfg.EINSCHALTPUNKT - reduction), ein)
+    ctrl_off_idle = np.where(solar, -UNTEN_OFFSET[0], 0.0)
+    ctrl_off_run = np.where(solar, -UNTEN_OFFSET[1], 0.0)
+    # Verdampfer: Start erst ab Restart-Temperatur, Abschaltung wenn er im Betrieb zu kalt wird
+    start_ok = ambient - 1.0 >= cfg.VERDAMPFER_RESTART_TEMP
+    run_ok = ambient - 1.0 - VERD_DROP_ON >= cfg.VERDAMPFERTEMPERATUR
+
+    heat_kph = np.maximum(3.0, HEAT_RATE_KPH + HEAT_RATE_PER_K_VERD * (ambient - 10.0))
+    draws = draw_day[day_index] * (
+        DRAW_MORNING_KPH * np.exp(-0.5 * ((hour - 7.0) / 0.5) ** 2)
+        + DRAW_EVENING_KPH * np.exp(-0.5 * ((hour - 19.5) / 1.0) ** 2)
+    )
+    loss = (STANDING_LOSS_KPH + draws) * dt_h
+    heat = heat_kph * dt_h
+
+    t_mittig, on = _simulate_switching(
+        carry, heat, loss, on_thr, aus, ctrl_off_idle, ctrl_off_run, start_ok, run_ok,
+        float(cfg.SICHERHEITS_TEMP), int(cfg.MIN_LAUFZEIT * 60 / interval_s), int(cfg.MIN_PAUSE * 60 / interval_s),
+    )
+
+    noise = rng.normal(0.0, 0.06, (4, rows))
+    t_oben = t_mittig + np.where(on, OBEN_OFFSET[1], OBEN_OFFSET[0]) + noise[0]
+    t_unten = t_mittig - np.where(on, UNTEN_OFFSET[1], UNTEN_OFFSET[0]) + noise[1]
+    t_mittig = t_mittig + noise[2]
+    t_verd = ambient - 1.0 - VERD_DROP_ON * on + noise[3]
+    t_boiler = (t_oben + t_unten) / 2
+
+    load = house + COMPRESSOR_W * on
+    feedin = pv - load - batpower
+    consume = carry.consume_kwh + np.cumsum(np.clip(-feedin, 0, None)) * dt_h / 1000.0
+    carry.consume_kwh = float(consume[-1])
+    source = np.where(feedin > 0, 1, np.where(batpower > 0, 2, 0))
+    forecast_tomorrow = (season * (0.25 + 0.75 * cloud_day[np.minimum(day_index + 1, n_days - 1)]) * day_length * 0.45).clip(0, 30)
+
+    return {
+        "timestamps": timestamps,
+        "T_Oben": t_oben, "T_Unten": t_unten, "T_Mittig": t_mittig, "T_Boiler": t_boiler, "T_Verd": t_verd,
+        "Kompressor": on, "ACPower": pv, "FeedinPower": feedin, "BatPower": batpower, "SOC": soc,
+        "PowerDC1": pv * 0.55, "PowerDC2": pv * 0.45, "ConsumeEnergy": consume,
+        "Einschaltpunkt": ein, "Ausschaltpunkt": aus, "Solarüberschuss": solar, "Urlaubsmodus": night,
+        "PowerSource": source, "Prognose_Morgen": forecast_tomorrow,
+    }
+
+
+def _apply_na(rng, data, rows, corruption):
+    """Setzt Sensor- bzw. API-Ausfälle als NaN (werden als "N/A" geschrieben)."""
+    bursts = rng.poisson(corruption.na_per_million_rows * rows / 1e6)
+    if not bursts:
+        return 0
+    starts = rng.integers(0, rows, bursts)
+    columns = ["T_Oben", "T_Unten", "T_Mittig", "T_Verd", "FeedinPower", "BatPower"]
+    for s, col in zip(starts, rng.choice(columns, bursts)):
+        data[col] = data[col].astype(float, copy=False)
+        data[col][s:s + corruption.na_burst_rows] = np.nan
+    return int(bursts)
+
+
+def _chunk_fields(data):
+    energy = np.clip(data["ConsumeEnergy"], 0, 99999.9)
+    energy_int = energy.astype(np.int64)
+    energy_dec = np.clip(np.rint((energy - energy_int) * 10), 0, 9).astype(np.int64)
+    return [
+        (_TEMP_LUT, _temp_idx(data["T_Oben"])),
+        (_TEMP_LUT, _temp_idx(data["T_Unten"])),
+        (_TEMP_LUT, _temp_idx(data["T_Mittig"])),
+        (_TEMP_LUT, _temp_idx(data["T_Boiler"])),
+        (_TEMP_LUT, _temp_idx(data["T_Verd"])),
+        (_FLAG_LUT, data["Kompressor"].astype(np.int64)),
+        (_POWER_LUT, _power_idx(data["ACPower"])),
+        (_POWER_LUT, _power_idx(data["FeedinPower"])),
+        (_POWER_LUT, _power_idx(data["BatPower"])),
+        (_INT_LUT, np.clip(np.rint(data["SOC"]), 0, 100).astype(np.int64)),
+        (_POWER_LUT, _power_idx(data["PowerDC1"])),
+        (_POWER_LUT, _power_idx(data["PowerDC2"])),
+        (_INT_LUT, energy_int), (_DIGIT_LUT, energy_dec, True),
+        (_TEMP_LUT, _temp_idx(data["Einschaltpunkt"])),
+        (_TEMP_LUT, _temp_idx(data["Ausschaltpunkt"])),
+        (_FLAG_LUT, data["Solarüberschuss"].astype(np.int64)),
+        (_FLAG_LUT, data["Urlaubsmodus"].astype(np.int64)),
+        (_SOURCE_LUT, data["PowerSource"]),
+        (_FORECAST_LUT, np.rint(data["Prognose_Morgen"] * 100).astype(np.int64)),
+    ]
+
+
+def generate_csv(path, start, end, interval_s=10, seed=42, config=None, corruption=None, progress=False):
+    """
+    Schreibt synthetische Daten von start bis end (exklusive) nach path.
+
+    Args:
+        config: AppConfig (Standard: Defaults aus config_manager).
+        corruption: CorruptionSettings oder None für saubere Daten.
+    Returns:
+        dict mit Zeilen-/Schalt-/Fehlerstatistik.
+    """
+    config = config or AppConfig()
+    rng = np.random.default_rng(seed)
+    carry = _CarryState(t_mittig=float(config.Heizungssteuerung.EINSCHALTPUNKT), soc=50.0, consume_kwh=1000.0)
+    total_rows = int((end - start).total_seconds() // interval_s)
+    chunk_rows = max(1, int(CHUNK_DAYS * 86400 // interval_s))
+    legacy_until = np.datetime64(start + timedelta(days=corruption.legacy_days), "s") if corruption else None
+    header_line = (",".join(EXPECTED_CSV_HEADER) + "\n").encode("utf-8")
+    stats = {"rows": 0, "compressor_starts": 0, "legacy_rows": 0, "mid_file_headers": 0, "na_bursts": 0}
+    last_on = False
+
+    with open(path, "wb") as f:
+        f.write(header_line)
+        for offset in range(0, total_rows, chunk_rows):
+            rows = min(chunk_rows, total_rows - offset)
+            data = _simulate_chunk(rng, start + timedelta(seconds=offset * interval_s), rows, interval_s, config, carry)
+            on = data["Kompressor"]
+            stats["compressor_starts"] += int(np.count_nonzero(on[1:] & ~on[:-1])) + int(on[0] and not last_on)
+            last_on = bool(on[-1])
+
+            if corruption:
+                stats["na_bursts"] += _apply_na(rng, data, rows, corruption)
+
+            mat, last_sep = _encode_rows(data["timestamps"], _chunk_fields(data))
+            split_points = []
+            if corruption:
+                legacy = data["timestamps"] < legacy_until
+                if legacy.any():
+                    mat[legacy, last_sep:] = 0
+                    mat[legacy, last_sep] = ord("\n")
+                    stats["legacy_rows"] += int(legacy.sum())
+                n_headers = rng.poisson(corruption.header_per_million_rows * rows / 1e6)
+                split_points = sorted(rng.integers(1, rows, n_headers).tolist()) if rows > 1 else []
+            prev = 0
+            for point in split_points:
+                _write_rows(f, mat[prev:point])
+                f.write(header_line)
+                prev = point
+            _write_rows(f, mat[prev:])
+            stats["mid_file_headers"] += len(split_points)
+            stats["rows"] += rows
+            if progress:
+                print(f"  {stats['rows'] / total_rows:6.1%}  {stats['rows']:>10} Zeilen", flush=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetische heizungsdaten.csv erzeugen")
+    parser.add_argument("--output", default=os.path.join("csv log", "heizungsdaten_synthetisch.csv"))
+    parser.add_argument("--start", default="2021-01-01", help="Startdatum (YYYY-MM-DD)")
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument("--days", type=float)
+    span.add_argument("--years", type=float)
+    parser.add_argument("--interval", type=int, default=10, help="Abtastintervall in Sekunden")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", help="config.ini für Sollwerte/Zeitfenster (Standard: Defaults)")
+    parser.add_argument("--corrupt", action="store_true", help="Header mitten in der Datei, 19-Spalten-Zeilen und N/A einstreuen")
+    args = parser.parse_args(argv)
+
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    days = args.days if args.days is not None else (args.years or 1.0) * 365
+    config = ConfigManager(args.config).get() if args.config else None
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    stats = generate_csv(args.output, start, start + timedelta(days=days), args.interval, args.seed, config,
+                         CorruptionSettings() if args.corrupt else None, progress=True)
+    elapsed = time.perf_counter() - t0
+    size_mb = os.path.getsize(args.output) / 1024 / 1024
+    print(f"{stats['rows']} Zeilen ({size_mb:.0f} MB) in {elapsed:.1f}s -> {args.output}")
+    print(f"Kompressorstarts: {stats['compressor_starts']}, Altzeilen: {stats['legacy_rows']}, "
+          f"Header mitten in Datei: {stats['mid_file_headers']}, N/A-Ausfälle: {stats['na_bursts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Modbus/TCP-Simulator eines Solax-Hybrid-Wechselrichters (Input-Register, Funktionscode 0x04).
+
+Ersatz für den echten Wechselrichter in Tests und am Schreibtisch: Die Steuerung wird mit
+[Wechselrichter] QUELLE = modbus, MODBUS_HOST = 127.0.0.1, MODBUS_PORT = 5020 darauf gerichtet.
+
+Aufruf (aus dem Ordner Steuerung/):
+    python simulation/modbus_simulator.py --port 5020 --batpower 800 --soc 96 --feedin 700
+"""
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import sys
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from inverter_sources import FUNC_READ_INPUT_REGISTERS, encode_registers  # noqa: E402
+
+EXC_ILLEGAL_FUNCTION = 0x01
+EXC_ILLEGAL_ADDRESS = 0x02
+
+
+class ModbusSimulator:
+    """Beantwortet Leseanfragen aus einem Registerabbild, das per set_values() geändert werden kann."""
+
+    def __init__(self, values: Optional[Dict] = None, unit_id: int = 1):
+        self.unit_id = unit_id
+        self.registers = encode_registers(values or {})
+        self.requests = 0
+        self.online = True  # False: Verbindungen werden sofort geschlossen (Ausfall simulieren)
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    def set_values(self, values: Dict) -> None:
+        self.registers = encode_registers(values)
+
+    def _response(self, transaction_id: int, unit_id: int, pdu: bytes) -> bytes:
+        return struct.pack(">HHHB", transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+    def handle_request(self, transaction_id: int, unit_id: int, pdu: bytes) -> bytes:
+        function = pdu[0]
+        if function != FUNC_READ_INPUT_REGISTERS:
+            return self._response(transaction_id, unit_id, bytes([function | 0x80, EXC_ILLEGAL_FUNCTION]))
+        address, count = struct.unpack(">HH", pdu[1:5])
+        if count < 1 or count > 125 or address + count > len(self.registers):
+            return self._response(transaction_id, unit_id, bytes([function | 0x80, EXC_ILLEGAL_ADDRESS]))
+        data = struct.pack(f">{count}H", *self.registers[address:address + count])
+        return self._response(transaction_id, unit_id, bytes([function, 2 * count]) + data)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, _, length, unit_id = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                if not self.online:
+                    break
+                self.requests += 1
+                writer.write(self.handle_request(transaction_id, unit_id, pdu))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Startet den Server; gibt den tatsächlichen Port zurück (port=0: frei gewählt)."""
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve_forever(args) -> None:
+    simulator = ModbusSimulator({
+        "acpower": args.acpower, "powerdc1": args.pv, "powerdc2": 0, "batPower": args.batpower,
+        "soc": args.soc, "feedinpower": args.feedin, "consumeenergy": 0.0,
+    })
+    port = await simulator.start(args.host, args.port)
+    logging.info(f"Modbus-Simulator läuft auf {args.host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Modbus/TCP-Simulator eines Solax-Wechselrichters")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--pv", type=int, default=3000, help="PV-Leistung DC1 in W")
+    parser.add_argument("--acpower", type=int, default=2800)
+    parser.add_argument("--batpower", type=int, default=0)
+    parser.add_argument("--soc", type=int, default=80)
+    parser.add_argument("--feedin", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,153 @@
+"""
+Was-wäre-wenn-Auswertung einer geloggten heizungsdaten.csv mit dem Entscheidungskern (decision.decide).
+
+Jede Zeile des Logs wird mit den Parametern einer (geänderten) Config durch den Kern geschickt;
+verglichen wird mit dem geloggten Kompressorstatus. Temperaturen und Solax-Werte werden so
+abgespielt, wie sie geloggt wurden: es gibt keine thermische Rückkopplung der simulierten
+Schaltungen (dafür time_warp.py). Die Kennzahlen zeigen daher vor allem, wann und warum die
+Regelung mit anderen Sollwerten/Schwellen anders entschieden hätte.
+
+Aufruf (aus dem Ordner Steuerung/):
+    python simulation/replay.py "csv log/heizungsdaten.csv"
+    python simulation/replay.py "csv log/heizungsdaten.csv" --start 2024-01-01 --end 2024-04-01 \\
+        --set Heizungssteuerung.EINSCHALTPUNKT=40 --set Solarueberschuss.BATPOWER_THRESHOLD=400
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import control_params  # noqa: E402
+import decision  # noqa: E402
+import schedule  # noqa: E402
+from config_manager import ConfigManager  # noqa: E402
+
+COLUMNS = ["T_Oben", "T_Unten", "T_Mittig", "T_Verd", "BatPower", "SOC", "FeedinPower", "Kompressor"]
+MAX_GAP = timedelta(minutes=5)   # längere Lücken im Log zählen nicht als Laufzeit
+
+
+def load_samples(csv_path, start=None, end=None, interval_s=None) -> pd.DataFrame:
+    """Liest die benötigten Spalten (N/A, doppelte Header und kaputte Zeilen werden übersprungen)."""
+    df = pd.read_csv(csv_path, usecols=lambda c: c in ["Zeitstempel"] + COLUMNS,
+                     na_values=["N/A"], on_bad_lines="skip", low_memory=False)
+    df["Zeitstempel"] = pd.to_datetime(df["Zeitstempel"], errors="coerce")
+    for col in COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else float("nan")
+    df = df.dropna(subset=["Zeitstempel"]).sort_values("Zeitstempel")
+    if start is not None:
+        df = df[df["Zeitstempel"] >= start]
+    if end is not None:
+        df = df[df["Zeitstempel"] < end]
+    if interval_s:
+        # ausdünnen: erste Zeile je Intervall
+        df = df.groupby(df["Zeitstempel"].dt.floor(f"{int(interval_s)}s"), sort=False).head(1)
+    if df.empty:
+        raise ValueError(f"Keine verwertbaren Daten in {csv_path}")
+    return df
+
+
+def _column(df, col):
+    return df[col].astype(object).where(df[col].notna(), None).tolist()
+
+
+def run_replay(samples: pd.DataFrame, config) -> dict:
+    """
+    Spielt die Samples durch den Entscheidungskern.
+
+    Returns:
+        dict mit Kennzahlen der Simulation und (logged_*) des Logs sowie der Übereinstimmung.
+    """
+    wall_start = time.perf_counter()
+    params = control_params.compile_params(config)
+    engine = schedule.ScheduleEngine(schedule.config_key(config))
+    times = samples["Zeitstempel"].dt.to_pydatetime().tolist()
+    t_oben, t_unten, t_mittig, t_verd, batpower, soc, feedinpower, logged = (_column(samples, c) for c in COLUMNS)
+
+    state = decision.ControllerState()
+    starts = logged_starts = agree = compared = 0
+    runtime = logged_runtime = timedelta()
+    modes, blocking = Counter(), Counter()
+    last_logged = None
+    for i, now in enumerate(times):
+        inputs = decision.Inputs(now, t_oben[i], t_unten[i], t_mittig[i], t_verd[i],
+                                 batpower[i], soc[i], feedinpower[i], engine.lookup(now))
+        result, state = decision.decide(inputs, params, state)
+        dt = min(times[i + 1] - now, MAX_GAP) if i + 1 < len(times) else timedelta()
+
+        starts += result.switched == 1
+        if result.kompressor_ein:
+            runtime += dt
+        modes[result.setpoints.modus if result.setpoints else "Sperre"] += 1
+        if result.blocking is not None:
+            blocking[result.blocking.label] += 1
+
+        if logged[i] is not None:
+            on = logged[i] >= 1
+            logged_starts += on and last_logged is False
+            if on:
+                logged_runtime += dt
+            compared += 1
+            agree += on == result.kompressor_ein
+            last_logged = on
+
+    hours = (times[-1] - times[0]).total_seconds() / 3600
+    return {
+        "samples": len(times),
+        "from": times[0].isoformat(sep=" "),
+        "to": times[-1].isoformat(sep=" "),
+        "simulated_hours": round(hours, 2),
+        "compressor_starts": starts,
+        "runtime_hours": round(runtime.total_seconds() / 3600, 2),
+        "logged_compressor_starts": logged_starts,
+        "logged_runtime_hours": round(logged_runtime.total_seconds() / 3600, 2),
+        "agreement": round(agree / compared, 4) if compared else None,
+        "mode_share": {mode: round(n / len(times), 3) for mode, n in modes.most_common()},
+        "blocking_samples": dict(blocking.most_common()),
+        "wall_seconds": round(time.perf_counter() - wall_start, 2),
+    }
+
+
+def parse_overrides(items) -> dict:
+    """["Sektion.SCHLÜSSEL=Wert", ...] -> {Sektion: {SCHLÜSSEL: Wert}}"""
+    updates = {}
+    for item in items or []:
+        name, sep, value = item.partition("=")
+        section, dot, key = name.strip().partition(".")
+        if not sep or not dot:
+            raise ValueError(f"Erwartet Sektion.SCHLÜSSEL=Wert: {item}")
+        updates.setdefault(section, {})[key] = value.strip()
+    return updates
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="heizungsdaten.csv mit geänderten Parametern neu auswerten")
+    parser.add_argument("csv", help="geloggte heizungsdaten.csv")
+    parser.add_argument("--config", default="config.ini", help="Basis-Konfiguration (fehlt sie, gelten die Defaults)")
+    parser.add_argument("--set", action="append", metavar="SEKTION.SCHLÜSSEL=WERT", help="Wert überschreiben (mehrfach möglich)")
+    parser.add_argument("--start", help="ab Datum (YYYY-MM-DD)")
+    parser.add_argument("--end", help="bis Datum (YYYY-MM-DD, exklusive)")
+    parser.add_argument("--interval", type=int, help="auf ein Sample je N Sekunden ausdünnen")
+    parser.add_argument("--output", help="Ergebnis als JSON speichern")
+    args = parser.parse_args(argv)
+
+    config = ConfigManager(args.config).validate_updates(parse_overrides(args.set))
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else None
+    result = run_replay(load_samples(args.csv, start, end, args.interval), config)
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"{result['samples']} Samples ({result['simulated_hours'] / 24:.1f} Tage) in {result['wall_seconds']:.1f}s ausgewertet")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main_cli()
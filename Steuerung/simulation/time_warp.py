@@ -0,0 +1,319 @@
+"""
+Zeitraffer-Simulation der kompletten Steuerung (headless).
+
+Die Hauptschleife aus main.py (run_tick) läuft gegen eine virtuelle Uhr (clock.VirtualClock).
+Ein thermisches Modell von Speicher und Verdampfer reagiert auf den MockHardwareManager
+und liefert die Sensorwerte; Solax- und Prognosedaten werden aus einer heizungsdaten.csv
+abgespielt (Standard: synthetisch mit heizungsdaten_generator.py erzeugt).
+Telegram, VPN und API werden nicht angesprochen; Alarme werden nur gesammelt.
+
+Aufruf (aus dem Ordner Steuerung/):
+    python simulation/time_warp.py --days 7
+    python simulation/time_warp.py --days 14 --config richtige_config.ini --csv-log sim.csv
+    python simulation/time_warp.py --days 7 --replay "csv log/heizungsdaten.csv" --start 2024-06-01
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import clock  # noqa: E402
+import events  # noqa: E402
+import instrumentation  # noqa: E402
+import main  # noqa: E402
+import telegram_queue  # noqa: E402
+from config_manager import ConfigManager  # noqa: E402
+from hardware_mock import MockHardwareManager  # noqa: E402
+from simulation import heizungsdaten_generator as generator  # noqa: E402
+from state import State  # noqa: E402
+
+SOLAX_REFRESH = timedelta(minutes=5)   # wie der Cache in solax.get_solax_data
+VERD_TAU_S = 180.0                     # Zeitkonstante Verdampfer
+STRAT_TAU_S = 600.0                    # Zeitkonstante Schichtung
+
+
+class TankModel:
+    """Speicher- und Verdampfermodell (gleiche Parameter wie heizungsdaten_generator)."""
+
+    def __init__(self, t_mittig=42.0, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.t_mittig = t_mittig
+        self.t_verd = None
+        self.oben_offset = generator.OBEN_OFFSET[0]
+        self.unten_offset = generator.UNTEN_OFFSET[0]
+        self._draw_day = None
+        self._draw_factor = 1.0
+
+    def step(self, now, dt_s, kompressor_ein):
+        hour = now.hour + now.minute / 60.0 + now.second / 3600.0
+        air = generator.evaporator_air_temperature(now.timetuple().tm_yday - 1, hour)
+        if self._draw_day != now.date():
+            self._draw_day = now.date()
+            self._draw_factor = self.rng.uniform(0.5, 1.5)
+
+        draws = self._draw_factor * (
+            generator.DRAW_MORNING_KPH * math.exp(-0.5 * ((hour - 7.0) / 0.5) ** 2)
+            + generator.DRAW_EVENING_KPH * math.exp(-0.5 * ((hour - 19.5) / 1.0) ** 2)
+        )
+        rate = -(generator.STANDING_LOSS_KPH + draws)
+        if kompressor_ein:
+            rate += max(3.0, generator.HEAT_RATE_KPH + generator.HEAT_RATE_PER_K_VERD * (air - 10.0))
+        self.t_mittig += rate * dt_s / 3600.0
+
+        verd_target = air - 1.0 - (generator.VERD_DROP_ON if kompressor_ein else 0.0)
+        if self.t_verd is None:
+            self.t_verd = verd_target
+        self.t_verd += (verd_target - self.t_verd) * (1 - math.exp(-dt_s / VERD_TAU_S))
+
+        idx = 1 if kompressor_ein else 0
+        k = 1 - math.exp(-dt_s / STRAT_TAU_S)
+        self.oben_offset += (generator.OBEN_OFFSET[idx] - self.oben_offset) * k
+        self.unten_offset += (generator.UNTEN_OFFSET[idx] - self.unten_offset) * k
+
+    def readings(self):
+        noise = self.rng.normal(0.0, 0.03, 4)
+        return {
+            "oben": round(self.t_mittig + self.oben_offset + noise[0], 2),
+            "mittig": round(self.t_mittig + noise[1], 2),
+            "unten": round(self.t_mittig - self.unten_offset + noise[2], 2),
+            "verd": round(self.t_verd + noise[3], 2),
+        }
+
+
+class SimulatedSensors:
+    """Ersatz für SensorManager: liefert die Werte des TankModel."""
+
+    def __init__(self, model):
+        self.model = model
+        self.sensor_ids = {"oben": "sim-oben", "mittig": "sim-mittig", "unten": "sim-unten", "verd": "sim-verd"}
+
+    async def get_all_temperatures(self):
+        return self.model.readings()
+
+    async def read_temperature(self, sensor_key):
+        return self.model.readings().get(sensor_key)
+
+
+class SolaxReplay:
+    """Spielt Solax-Werte und Prognose aus einer heizungsdaten.csv ab (Zeitpunkt über die virtuelle Uhr)."""
+
+    COLUMNS = ["ACPower", "FeedinPower", "BatPower", "SOC", "PowerDC1", "PowerDC2", "ConsumeEnergy", "Prognose_Morgen"]
+
+    def __init__(self, csv_path):
+        df = pd.read_csv(csv_path, usecols=lambda c: c in ["Zeitstempel"] + self.COLUMNS,
+                         na_values=["N/A"], on_bad_lines="skip", low_memory=False)
+        df["Zeitstempel"] = pd.to_datetime(df["Zeitstempel"], errors="coerce")
+        for col in self.COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+            else:
+                df[col] = np.nan
+        df = df.dropna(subset=["Zeitstempel"]).sort_values("Zeitstempel")
+        if df.empty:
+            raise ValueError(f"Keine verwertbaren Daten in {csv_path}")
+        self.times = df["Zeitstempel"].to_numpy().astype("datetime64[s]")
+        self.values = {col: df[col].to_numpy() for col in self.COLUMNS}
+        dc = np.nan_to_num(self.values["PowerDC1"]) + np.nan_to_num(self.values["PowerDC2"])
+        # PV-Leistung auf 0..1000 W/m² normiert dient als (perfekte) stündliche Strahlungsprognose
+        self.radiation = dc / dc.max() * 1000.0 if dc.max() > 0 else dc
+
+    def _index(self, now_naive):
+        idx = int(np.searchsorted(self.times, np.datetime64(now_naive, "s"), side="right")) - 1
+        return min(max(idx, 0), len(self.times) - 1)
+
+    def _value(self, col, idx, default=0):
+        value = self.values[col][idx]
+        return default if np.isnan(value) else float(value)
+
+    async def get_solax_data(self, session, state):
+        now = clock.now(state.local_tz)
+        if state.solar.last_api_call and now - state.solar.last_api_call < SOLAX_REFRESH:
+            return state.solar.last_api_data
+        idx = self._index(now.replace(tzinfo=None))
+        state.solar.last_api_data = {
+            "acpower": self._value("ACPower", idx),
+            "feedinpower": self._value("FeedinPower", idx),
+            "batPower": self._value("BatPower", idx),
+            "soc": self._value("SOC", idx),
+            "powerdc1": self._value("PowerDC1", idx),
+            "powerdc2": self._value("PowerDC2", idx),
+            "consumeenergy": self._value("ConsumeEnergy", idx),
+        }
+        state.solar.last_api_call = now
+        return state.solar.last_api_data
+
+    async def get_solar_forecast(self, session, config=None):
+        now = clock.now()
+        tomorrow = self._value("Prognose_Morgen", self._index(now), None)
+        today = self._value("Prognose_Morgen", self._index(now - timedelta(days=1)), tomorrow)
+        return today, tomorrow, "07:00", "17:00", "07:00", "17:00"
+
+    def get_hourly_forecast(self):
+        """Stündliche Mittelwerte der nächsten 48 h ab der aktuellen Stunde."""
+        start = clock.now().replace(minute=0, second=0, microsecond=0)
+        slots = [start + timedelta(hours=h) for h in range(49)]
+        bounds = np.searchsorted(self.times, np.array(slots, dtype="datetime64[s]"))
+        hourly = []
+        for slot, lo, hi in zip(slots, bounds[:-1], bounds[1:]):
+            if hi > lo:
+                hourly.append((slot, float(self.radiation[lo:hi].mean())))
+        return hourly
+
+
+class SimulationRecorder:
+    """Sammelt Kennzahlen pro Tick und die (nicht versendeten) Telegram-Nachrichten."""
+
+    def __init__(self):
+        self.ticks = 0
+        self.compressor_starts = 0
+        self.runtime_s = 0.0
+        self.runtime_per_day = defaultdict(float)
+        self.modes = Counter()
+        self.blocking_reasons = Counter()
+        self.messages = []
+        self.t_mittig_min = math.inf
+        self.t_mittig_max = -math.inf
+        self._last_on = False
+
+    def enqueue_telegram_message(self, chat_id, message, bot_token=None, *args, **kwargs):
+        self.messages.append((clock.now().isoformat(sep=" ", timespec="seconds"), message))
+        return True
+
+    def record(self, state, now, dt_s):
+        self.ticks += 1
+        on = state.control.kompressor_ein
+        if on and not self._last_on:
+            self.compressor_starts += 1
+        if on:
+            self.runtime_s += dt_s
+            self.runtime_per_day[now.date().isoformat()] += dt_s
+        self._last_on = on
+        self.modes[state.control.previous_modus] += 1
+        if state.control.blocking_reason:
+            self.blocking_reasons[state.control.blocking_reason.label] += 1
+        if state.sensors.t_mittig is not None:
+            self.t_mittig_min = min(self.t_mittig_min, state.sensors.t_mittig)
+            self.t_mittig_max = max(self.t_mittig_max, state.sensors.t_mittig)
+
+    def summary(self, tick_s):
+        return {
+            "ticks": self.ticks,
+            "simulated_hours": round(self.ticks * tick_s / 3600, 2),
+            "compressor_starts": self.compressor_starts,
+            "runtime_hours": round(self.runtime_s / 3600, 2),
+            "runtime_hours_per_day": {day: round(s / 3600, 2) for day, s in sorted(self.runtime_per_day.items())},
+            "t_mittig_min": round(self.t_mittig_min, 2),
+            "t_mittig_max": round(self.t_mittig_max, 2),
+            "mode_share": {mode: round(n / max(self.ticks, 1), 3) for mode, n in self.modes.most_common()},
+            "blocking_ticks": dict(self.blocking_reasons.most_common()),
+            "telegram_messages": len(self.messages),
+        }
+
+
+async def _noop_async(*args, **kwargs):
+    return None
+
+
+async def run_simulation(start, days, config_path="config.ini", tick_s=10, replay_csv=None, csv_log=None, seed=0):
+    """
+    Simuliert 'days' Tage ab 'start' (naive lokale Zeit) mit der echten Steuerungslogik.
+
+    Returns:
+        dict mit Kennzahlen (Starts, Laufzeiten, Modusanteile, Blockierungen, Rechenzeit).
+    """
+    virtual_clock = clock.VirtualClock(start)
+    clock.set_clock(virtual_clock)
+    recorder = SimulationRecorder()
+    wall_start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            config_manager = ConfigManager(config_path)
+            if replay_csv is None:
+                tmp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+                replay_csv = os.path.join(tmp_dir, "replay.csv")
+                generator.generate_csv(replay_csv, start - timedelta(days=1), start + timedelta(days=days + 1),
+                                       interval_s=60, seed=seed, config=config_manager.get())
+            replay = SolaxReplay(replay_csv)
+
+            state = State(config_manager)
+            # Konfiguration bleibt während der Simulation fest (State hat __slots__, daher auf Klassenebene)
+            stack.enter_context(patch.object(State, "update_config", lambda self: None))
+            model = TankModel(t_mittig=float(state.config.Heizungssteuerung.EINSCHALTPUNKT) + 1.0, seed=seed)
+            hardware = MockHardwareManager()
+            hardware.init_gpio()
+            await hardware.init_lcd()
+
+            stack.enter_context(patch.object(main, "sensor_manager", SimulatedSensors(model)))
+            stack.enter_context(patch.object(main, "hardware_manager", hardware))
+            stack.enter_context(patch.object(main, "get_solax_data", replay.get_solax_data))
+            stack.enter_context(patch.object(main, "get_solar_forecast", replay.get_solar_forecast))
+            stack.enter_context(patch.object(main, "get_hourly_forecast", replay.get_hourly_forecast))
+            stack.enter_context(patch.object(main, "get_cached_forecast", lambda now: None))
+            stack.enter_context(patch.object(main, "check_vpn_status", _noop_async))
+            stack.enter_context(patch.object(telegram_queue, "enqueue_telegram_message", recorder.enqueue_telegram_message))
+            bus = events.EventBus()
+            stack.enter_context(patch.object(events, "_bus", bus))
+            main.register_event_subscribers(bus, state)
+            if csv_log:
+                stack.enter_context(patch.object(main, "HEIZUNGSDATEN_CSV", csv_log))
+            instrumentation_was = instrumentation.ENABLED
+            instrumentation.set_enabled(False)
+            stack.callback(instrumentation.set_enabled, instrumentation_was)
+
+            model.step(virtual_clock.now(), 0, False)
+            last_vpn_check = virtual_clock.now()
+            for _ in range(int(days * 86400 // tick_s)):
+                last_vpn_check = await main.run_tick(None, state, last_vpn_check, write_log=bool(csv_log))
+                now = virtual_clock.now()
+                recorder.record(state, now, tick_s)
+                model.step(now, tick_s, hardware.get_compressor_state())
+                await virtual_clock.sleep(tick_s)
+    finally:
+        clock.reset_clock()
+
+    result = recorder.summary(tick_s)
+    result["wall_seconds"] = round(time.perf_counter() - wall_start, 2)
+    result["messages"] = recorder.messages[-20:]
+    return result
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Zeitraffer-Simulation der Wärmepumpensteuerung")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--start", default="2024-03-01", help="Startdatum (YYYY-MM-DD)")
+    parser.add_argument("--config", default="config.ini", help="Konfigurationsdatei (fehlt sie, gelten die Defaults)")
+    parser.add_argument("--tick", type=int, default=10, help="Takt der Hauptschleife in Sekunden")
+    parser.add_argument("--replay", help="heizungsdaten.csv mit Solax-/Prognosewerten (Standard: synthetisch)")
+    parser.add_argument("--csv-log", help="Simuliertes CSV-Log schreiben (langsamer)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Ergebnis als JSON speichern")
+    parser.add_argument("--verbose", action="store_true", help="Logausgaben der Steuerung anzeigen")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    result = asyncio.run(run_simulation(start, args.days, args.config, args.tick, args.replay, args.csv_log, args.seed))
+
+    print(json.dumps({k: v for k, v in result.items() if k != "messages"}, indent=2, ensure_ascii=False))
+    print(f"{result['simulated_hours'] / 24:.1f} Tage simuliert in {result['wall_seconds']:.1f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from reasons import Reason
+from samples import TickSample
+
+
+class StateSnapshot(NamedTuple):
+    """
+    Unveränderlicher Stand nach einem Steuerungs-Tick. Messwerte, Sollwerte und Flags liegen in
+    sample (TickSample), dazu Modus, Blockierung, Laufzeiten und die Anzeigewerte der Prognose.
+    """
+
+    seq: int
+    created_at: datetime
+    sample: TickSample
+    modus: Optional[str]
+    blocking_reason: Optional[Reason]
+    ausschluss_grund: Optional[Reason]
+    active_rule_sensor: Optional[str]
+    urlaubsmodus_aktiv: bool
+    bademodus_aktiv: bool
+    current_runtime: timedelta
+    total_runtime_today: timedelta
+    last_compressor_on_time: Optional[datetime]
+    last_compressor_off_time: Optional[datetime]
+    sicherheits_temp: Optional[float]
+    verdampfertemperatur: Optional[float]
+    forecast_today: Optional[float]
+    sunrise_today: Optional[str]
+    sunset_today: Optional[str]
+    solar_updated_at: Optional[datetime]
+    vpn_ip: Optional[str]
+
+
+def capture(state, now: datetime, nacht: bool, seq: int = 0) -> StateSnapshot:
+    """Kopiert die relevanten Werte aus dem (veränderlichen) State; läuft in der Ereignisschleife."""
+    control, stats, solar = state.control, state.stats, state.solar
+    return StateSnapshot(
+        seq, now, TickSample.from_state(state, now, nacht),
+        control.previous_modus, control.blocking_reason, control.ausschluss_grund, control.active_rule_sensor,
+        state.urlaubsmodus_aktiv, state.bademodus_aktiv,
+        stats.current_runtime, stats.total_runtime_today,
+        stats.last_compressor_on_time, stats.last_compressor_off_time,
+        state.sicherheits_temp, state.verdampfertemperatur,
+        solar.forecast_today, solar.sunrise_today, solar.sunset_today, solar.last_api_call, state.vpn_ip,
+    )
+
+
+_VOLATILE = ("seq", "created_at", "timestamp", "current_runtime")
+
+
+def changes(old: Optional[StateSnapshot], new: StateSnapshot) -> Dict[str, Tuple]:
+    """Geänderte Felder (name -> (alt, neu)) zweier Snapshots, ohne Zeitstempel und laufende Laufzeit."""
+    result = {}
+    pairs = (
+        (StateSnapshot._fields, old, new),
+        (TickSample._fields, old.sample if old else None, new.sample),
+    )
+    for fields, before, after in pairs:
+        for index, name in enumerate(fields):
+            if name in _VOLATILE or name == "sample":
+                continue
+            value = after[index]
+            previous = before[index] if before is not None else None
+            if before is None or previous != value:
+                result[name] = (previous, value)
+    return result
+
+
+class SnapshotPublisher:
+    """
+    Hält den zuletzt veröffentlichten Snapshot. Die Hauptschleife ersetzt nur die Referenz; Leser
+    (API-Thread, Telegram, LCD, CSV) sehen so immer einen vollständigen Tick und brauchen keine Sperre.
+    """
+
+    def __init__(self):
+        self._current: Optional[StateSnapshot] = None
+        self.seq = 0
+
+    def update(self, state, now: datetime, nacht: bool) -> StateSnapshot:
+        self.seq += 1
+        snapshot = capture(state, now, nacht, self.seq)
+        self._current = snapshot
+        return snapshot
+
+    def latest(self) -> Optional[StateSnapshot]:
+        return self._current
+
+
+_publisher: Optional[SnapshotPublisher] = None
+
+
+def get_publisher() -> SnapshotPublisher:
+    global _publisher
+    if _publisher is None:
+        _publisher = SnapshotPublisher()
+    return _publisher
@@ -2,59 +2,166 @@ import logging
 import asyncio
 import aiohttp
 from datetime import datetime, timedelta
+from typing import Optional
 import pytz
 import pandas as pd
+from instrumentation import instrument
+import clock
+import upstream_cache
+import resilience
+from inverter_sources import get_source_chain
 
 API_URL = "https://global.solaxcloud.com/proxyApp/proxy/api/getRealtimeInfo.do"
 
+CACHE_DURATION = timedelta(minutes=5)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 5.0
+STATS_LOG_INTERVAL = timedelta(hours=1)
+
+# Felder der Cloud-Antwort, die Steuerung, Telegram und CSV tatsächlich lesen (die Antwort hat ~30)
+SOLAX_FIELDS = ("acpower", "feedinpower", "batPower", "soc", "powerdc1", "powerdc2", "consumeenergy", "utcDateTime")
+
+
+def compact_result(result: Optional[dict]) -> Optional[dict]:
+    """Reduziert die Cloud-Antwort auf SOLAX_FIELDS, bevor sie im State gehalten wird."""
+    if not result:
+        return result
+    return {key: result[key] for key in SOLAX_FIELDS if key in result}
+
+
+class SolaxDataService:
+    """
+    Single-Flight-Zugriff auf die Solax-Daten für Hauptschleife, Telegram und API.
+
+    - Ist der 5-Minuten-Cache abgelaufen, löst nur der erste Aufrufer einen Cloud-Abruf aus;
+      alle weiteren warten auf denselben Abruf (coalesced).
+    - Nicht-Steuerungs-Aufrufer (control=False) bekommen sofort die letzten Daten
+      (stale-while-revalidate), die Aktualisierung läuft im Hintergrund.
+    """
+
+    def __init__(self):
+        self.max_age = CACHE_DURATION  # hängt von der zuletzt erfolgreichen Datenquelle ab
+        self._inflight: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0}
+        self._last_stats_log: Optional[datetime] = None
+
+    def _is_fresh(self, state, local_tz) -> bool:
+        # Stelle sicher, dass state.solar.last_api_call zeitzonenbewusst ist
+        if state.solar.last_api_call and state.solar.last_api_call.tzinfo is None:
+            state.solar.last_api_call = local_tz.localize(state.solar.last_api_call)
+        now = clock.now(local_tz)
+        return bool(state.solar.last_api_call) and (now - state.solar.last_api_call) < self.max_age
+
+    async def get(self, session, state, control: bool = True):
+        if self._is_fresh(state, pytz.timezone("Europe/Berlin")):
+            self.stats["hits"] += 1
+            return state.solar.last_api_data
+
+        if not control and state.solar.last_api_data:
+            self.stats["stale"] += 1
+            self._start_refresh(session, state)
+            return state.solar.last_api_data
+
+        if self._inflight is not None and not self._inflight.done():
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+        # shield: bricht ein Aufrufer ab (z.B. Telegram-Timeout), läuft der Abruf für die anderen weiter
+        return await asyncio.shield(self._start_refresh(session, state))
+
+    def _start_refresh(self, session, state) -> asyncio.Task:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._refresh(session, state))
+        return self._inflight
+
+    async def _refresh(self, session, state):
+        try:
+            chain = get_source_chain(getattr(state, "config", None), lambda s, st: fetch_solax_cloud(s, st))
+            data = await chain.read(session, state)
+            self.max_age = chain.max_age
+            return data
+        except Exception as e:
+            logging.error(f"Fehler beim Abruf der Solax-Daten: {e}")
+            return None
+        finally:
+            self._log_stats()
+
+    def _log_stats(self) -> None:
+        now = clock.now()
+        if self._last_stats_log is None or now - self._last_stats_log >= STATS_LOG_INTERVAL:
+            s = self.stats
+            logging.info(f"Solax-Datenservice: {s['hits']} Hits, {s['misses']} Misses, {s['coalesced']} zusammengefasst, {s['stale']} veraltet ausgeliefert")
+            self._last_stats_log = now
+
+
+_service = SolaxDataService()
+
+
+def get_service() -> SolaxDataService:
+    return _service
+
+
 async def get_solax_data(session, state):
-    local_tz = pytz.timezone("Europe/Berlin")
-    now = datetime.now(local_tz)
+    """Solax-Daten für die Steuerung; wartet bei abgelaufenem Cache auf den (gemeinsamen) Abruf."""
+    return await _service.get(session, state, control=True)
 
-    # Stelle sicher, dass state.solar.last_api_call zeitzonenbewusst ist
-    if state.solar.last_api_call and state.solar.last_api_call.tzinfo is None:
-        state.solar.last_api_call = local_tz.localize(state.solar.last_api_call)
 
-    if state.solar.last_api_call and (now - state.solar.last_api_call) < timedelta(minutes=5):
-        return state.solar.last_api_data
+async def get_solax_data_nonblocking(session, state):
+    """Für Telegram/API: liefert sofort die letzten Daten und aktualisiert im Hintergrund."""
+    return await _service.get(session, state, control=False)
 
+
+@instrument("solax_api")
+async def fetch_solax_cloud(session, state):
+    """Ruft die Solax-Cloud ab (mit Wiederholungen) und aktualisiert state.solar."""
+    local_tz = pytz.timezone("Europe/Berlin")
+
+    # Config access via state.config
+    token_id = state.config.SolaxCloud.TOKEN_ID
+    sn = state.config.SolaxCloud.SN
+    if not token_id or not sn:
+        logging.warning("Solax Config fehlt (Token/SN)")
+        return None
+
+    breaker = resilience.get_breaker("solax")
     max_retries = 3
-    retry_delay = 5
-    for attempt in range(max_retries):
+    for attempt in range(1, max_retries + 1):
+        if not breaker.allow():
+            # Cloud gilt als nicht erreichbar: sofort zurück, statt den Steuerungs-Tick zu blockieren
+            logging.debug("Solax-Abruf übersprungen (Circuit Breaker offen)")
+            return None
         try:
-            # Config access via state.config
-            token_id = state.config.SolaxCloud.TOKEN_ID
-            sn = state.config.SolaxCloud.SN
-            
-            if not token_id or not sn:
-                logging.warning("Solax Config fehlt (Token/SN)")
-                return None
-
             params = {"tokenId": token_id, "sn": sn}
-            async with session.get(API_URL, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                response.raise_for_status()
-                data = await response.json()
-                if data.get("success"):
-                    state.solar.last_api_data = data.get("result")
-                    state.solar.last_api_call = now
-                    return state.solar.last_api_data
-                else:
-                    logging.error(f"API-Fehler: {data.get('exception', 'Unbekannter Fehler')}")
-                    return None
-        except aiohttp.ClientError as e:
-            logging.error(f"Fehler bei der API-Anfrage (Versuch {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+            entry = await upstream_cache.get_cache().fetch_json(
+                session, "solax", API_URL, params, validate=lambda d: bool(d.get("success")))
+            breaker.record_success()
+            data = entry.data
+            if data.get("success"):
+                state.solar.last_api_data = compact_result(data.get("result"))
+                state.solar.last_api_call = datetime.fromtimestamp(entry.fetched_at, local_tz)
+                return state.solar.last_api_data
+            else:
+                logging.error(f"API-Fehler: {data.get('exception', 'Unbekannter Fehler')}")
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure(e)
+            logging.error(f"Fehler bei der API-Anfrage (Versuch {attempt}/{max_retries}): {e}")
+            if attempt < max_retries and breaker.state == resilience.CLOSED:
+                await asyncio.sleep(resilience.backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY))
             else:
                 logging.error("Maximale Wiederholungen erreicht, verwende Fallback-Daten.")
                 return None
+        except Exception as e:
+            breaker.record_failure(e)
+            logging.error(f"Unerwarteter Fehler bei der Solax-Abfrage: {e}")
+            return None
     return None
 
 async def fetch_solax_data(session, state):
     """
     Holt die aktuellen Solax-Daten und gibt sie mit Fallback-Werten zurück.
     """
-    now = datetime.now(pytz.timezone("Europe/Berlin"))
+    now = clock.now(pytz.timezone("Europe/Berlin"))
     
     fallback_data = {
         "acpower": 0,
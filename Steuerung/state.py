@@ -1,11 +1,15 @@
 import asyncio
-import logging
-import hashlib
 import pytz
 from datetime import datetime, timedelta
 from typing import Optional, Dict
+import clock
+import control_params
+from planner import HeatingPlanner
+from reasons import Block, Reason
 
 class SensorsState:
+    __slots__ = ("t_oben", "t_unten", "t_mittig", "t_verd", "t_boiler", "last_readings")
+
     def __init__(self):
         self.t_oben: Optional[float] = None
         self.t_unten: Optional[float] = None
@@ -15,6 +19,9 @@ class SensorsState:
         self.last_readings: Dict = {}
 
 class SolarState:
+    __slots__ = ("acpower", "feedinpower", "batpower", "soc", "consumeenergy", "last_api_call", "last_api_data",
+                 "forecast_today", "forecast_tomorrow", "sunrise_today", "sunset_today", "sunrise_tomorrow", "sunset_tomorrow")
+
     def __init__(self):
         self.acpower: Optional[float] = None
         self.feedinpower: Optional[float] = None
@@ -22,17 +29,24 @@ class SolarState:
         self.soc: Optional[float] = None
         self.consumeenergy: Optional[float] = None
         self.last_api_call: Optional[datetime] = None
-        self.last_api_data: Optional[dict] = None
+        self.last_api_data: Optional[dict] = None  # nur die Felder aus solax.SOLAX_FIELDS
         self.forecast_today: Optional[float] = None
         self.forecast_tomorrow: Optional[float] = None
         self.sunrise_today: Optional[str] = None
         self.sunset_today: Optional[str] = None
+        self.sunrise_tomorrow: Optional[str] = None
+        self.sunset_tomorrow: Optional[str] = None
 
 class ControlState:
+    __slots__ = ("kompressor_ein", "solar_ueberschuss_aktiv", "ausschluss_grund", "previous_modus",
+                 "aktueller_ausschaltpunkt", "aktueller_einschaltpunkt", "pressure_error_sent", "last_pressure_state",
+                 "current_pause_reason", "active_rule_sensor", "blocking_reason", "last_blocking_reason",
+                 "last_alert_code")
+
     def __init__(self, config):
         self.kompressor_ein: bool = False
         self.solar_ueberschuss_aktiv: bool = False
-        self.ausschluss_grund: Optional[str] = None
+        self.ausschluss_grund: Optional[Reason] = None
         self.previous_modus: Optional[str] = None
         self.aktueller_ausschaltpunkt = config.Heizungssteuerung.AUSSCHALTPUNKT
         self.aktueller_einschaltpunkt = config.Heizungssteuerung.EINSCHALTPUNKT
@@ -40,10 +54,14 @@ class ControlState:
         self.last_pressure_state: Optional[bool] = None
         self.current_pause_reason: Optional[str] = None
         self.active_rule_sensor: Optional[str] = None
-        self.blocking_reason: Optional[str] = None  # Current blocking reason
-        self.last_blocking_reason: Optional[str] = None  # For change detection
+        self.blocking_reason: Optional[Reason] = None  # Current blocking reason (Code + Parameter)
+        self.last_blocking_reason: Optional[Reason] = None  # For change detection
+        self.last_alert_code: Block = Block.NONE  # zuletzt gemeldeter Code (main.check_and_send_alerts)
 
 class StatsState:
+    __slots__ = ("current_runtime", "last_runtime", "total_runtime_today", "last_day", "start_time",
+                 "last_compressor_on_time", "last_compressor_off_time", "last_completed_cycle")
+
     def __init__(self, now):
         self.current_runtime = timedelta()
         self.last_runtime = timedelta()
@@ -55,11 +73,25 @@ class StatsState:
         self.last_completed_cycle: Optional[datetime] = None
 
 class State:
+    # Feste Attributliste: kein __dict__ je Instanz, Tippfehler bei Zuweisungen fallen sofort auf
+    __slots__ = (
+        "config_manager", "config", "local_tz", "sensors", "solar", "control", "stats",
+        "urlaubsmodus_aktiv", "urlaubsmodus_start", "urlaubsmodus_ende", "bademodus_aktiv",
+        "awaiting_urlaub_duration", "awaiting_custom_duration",
+        "gpio_lock", "session", "last_forecast_update", "vpn_ip",
+        "last_healthcheck_ping", "last_solar_window_status", "planner",
+        "kompressor_verification_start_time", "kompressor_verification_start_t_verd",
+        "kompressor_verification_start_t_unten", "kompressor_verification_failed",
+        "kompressor_verification_error_count", "kompressor_verification_last_check",
+        "verdampfer_blocked", "last_sensor_error_time", "last_pressure_error_time",
+        "log_min_laufzeit_off", "log_mode_switch_min_laufzeit", "_last_config_check",
+    )
+
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.config = config_manager.get()
         self.local_tz = pytz.timezone("Europe/Berlin")
-        now = datetime.now(self.local_tz)
+        now = clock.now(self.local_tz)
 
         # Sub-States
         self.sensors = SensorsState()
@@ -82,6 +114,7 @@ class State:
         self.vpn_ip: Optional[str] = None
         self.last_healthcheck_ping: Optional[datetime] = None
         self.last_solar_window_status: bool = False
+        self.planner = HeatingPlanner()  # Vorausschauende Heizplanung (Sektion [Planung])
 
         # --- Compressor Verification ---
         self.kompressor_verification_start_time: Optional[datetime] = None
@@ -95,45 +128,52 @@ class State:
         self.verdampfer_blocked: bool = False
         self.last_sensor_error_time: Optional[datetime] = None
         self.last_pressure_error_time: Optional[datetime] = None
+        # Zeitstempel für logic_utils.check_log_throttle
+        self.log_min_laufzeit_off: Optional[datetime] = None
+        self.log_mode_switch_min_laufzeit: Optional[datetime] = None
         self._last_config_check: Optional[datetime] = now # Initialize with current time
-        self.last_config_hash: Optional[str] = None
 
     # --- Properties representing Config Values ---
+    @property
+    def params(self):
+        """Kompilierte Regelparameter der aktiven Config (control_params.ControlParams)."""
+        return control_params.get_params(self.config)
+
     @property
     def sicherheits_temp(self):
-        return self.config.Heizungssteuerung.SICHERHEITS_TEMP
+        return self.params.sicherheits_temp
 
     @property
     def verdampfertemperatur(self):
-        return self.config.Heizungssteuerung.VERDAMPFERTEMPERATUR
+        return self.params.verdampfertemperatur
     
     @property
     def verdampfer_restart_temp(self):
-        return self.config.Heizungssteuerung.VERDAMPFER_RESTART_TEMP
+        return self.params.verdampfer_restart_temp
     
     @property
     def min_laufzeit(self):
-        return timedelta(minutes=self.config.Heizungssteuerung.MIN_LAUFZEIT)
+        return self.params.min_laufzeit
     
     @property
     def min_pause(self):
-        return timedelta(minutes=self.config.Heizungssteuerung.MIN_PAUSE)
+        return self.params.min_pause
 
     @property
     def einschaltpunkt_erhoeht(self):
-        return self.config.Heizungssteuerung.EINSCHALTPUNKT_ERHOEHT
+        return self.params.einschaltpunkt_erhoeht
 
     @property
     def ausschaltpunkt_erhoeht(self):
-        return self.config.Heizungssteuerung.AUSSCHALTPUNKT_ERHOEHT
+        return self.params.ausschaltpunkt_erhoeht
     
     @property
     def basis_einschaltpunkt(self):
-        return self.config.Heizungssteuerung.EINSCHALTPUNKT
+        return self.params.einschaltpunkt
 
     @property
     def basis_ausschaltpunkt(self):
-        return self.config.Heizungssteuerung.AUSSCHALTPUNKT
+        return self.params.ausschaltpunkt
 
     @property
     def bot_token(self):
@@ -152,17 +192,5 @@ class State:
         return float(self.config.Healthcheck.HEALTHCHECK_INTERVAL_MINUTES)
     
     def update_config(self):
-        """Reload config only if file has changed (detected via MD5 hash)."""
-        try:
-            with open(self.config_manager.config_path, 'rb') as f:
-                new_hash = hashlib.md5(f.read()).hexdigest()
-            
-            if new_hash != self.last_config_hash:
-                logging.info(f"Config file changed (hash mismatch), reloading...")
-                self.config_manager.load_config()
-                self.config = self.config_manager.get()
-                self.last_config_hash = new_hash
-            else:
-                logging.debug("Config file unchanged (hash match), skipping reload")
-        except Exception as e:
-            logging.error(f"Error checking config hash: {e}")
+        """Übernimmt die aktive Config des ConfigManagers (neu geladen wird sie vom config_watcher)."""
+        self.config = self.config_manager.get()
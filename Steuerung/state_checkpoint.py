@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import clock
+
+CHECKPOINT_FILE = "wp_state.json"
+SCHEMA_VERSION = 1
+PERIODIC_SAVE_S = 300.0  # auch ohne Änderung alle 5 Minuten (aktualisiert saved_at)
+
+
+def _dt(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def capture(state) -> Dict:
+    """Die Teile des States, die einen Neustart überleben sollen (ohne saved_at)."""
+    stats, solar, planner = state.stats, state.solar, state.planner
+    return {
+        "stats": {
+            "last_day": stats.last_day.isoformat() if stats.last_day else None,
+            "total_runtime_today_s": round(stats.total_runtime_today.total_seconds(), 1),
+            "last_runtime_s": round(stats.last_runtime.total_seconds(), 1),
+            "kompressor_ein": bool(state.control.kompressor_ein),
+            "last_compressor_on_time": _dt(stats.last_compressor_on_time),
+            "last_compressor_off_time": _dt(stats.last_compressor_off_time),
+            "last_completed_cycle": _dt(stats.last_completed_cycle),
+        },
+        "modes": {
+            "urlaubsmodus_aktiv": state.urlaubsmodus_aktiv,
+            "urlaubsmodus_start": _dt(state.urlaubsmodus_start),
+            "urlaubsmodus_ende": _dt(state.urlaubsmodus_ende),
+            "bademodus_aktiv": state.bademodus_aktiv,
+        },
+        "safety": {
+            "verdampfer_blocked": state.verdampfer_blocked,
+            "verification_failed": state.kompressor_verification_failed,
+            "verification_error_count": state.kompressor_verification_error_count,
+        },
+        "forecast": {
+            "updated_at": _dt(state.last_forecast_update),
+            "today": solar.forecast_today,
+            "tomorrow": solar.forecast_tomorrow,
+            "sunrise_today": solar.sunrise_today,
+            "sunset_today": solar.sunset_today,
+        },
+        "planner": {
+            "heat_rate_kph": planner.heat_rate_kph,
+            "loss_rate_kph": planner.loss_rate_kph,
+            "cycles_observed": planner.cycles_observed,
+        },
+    }
+
+
+def restore(state, data: Dict, now: datetime) -> None:
+    """
+    Übernimmt einen Checkpoint in einen frisch angelegten State. Der Kompressor ist nach dem Start
+    immer aus: lief er beim Speichern, zählt die Laufzeit bis saved_at zum Tag, und die
+    Mindestpause beginnt jetzt.
+    """
+    saved_at = _parse_dt(data.get("saved_at"))
+    stats = data.get("stats", {})
+    if stats.get("last_day") == now.date().isoformat():
+        state.stats.total_runtime_today = timedelta(seconds=stats.get("total_runtime_today_s", 0))
+        state.stats.last_completed_cycle = _parse_dt(stats.get("last_completed_cycle"))
+    state.stats.last_runtime = timedelta(seconds=stats.get("last_runtime_s", 0))
+    state.stats.last_compressor_on_time = _parse_dt(stats.get("last_compressor_on_time"))
+    state.stats.last_compressor_off_time = _parse_dt(stats.get("last_compressor_off_time"))
+    if stats.get("kompressor_ein") and state.stats.last_compressor_on_time and saved_at:
+        if saved_at.date() == now.date():
+            start = max(state.stats.last_compressor_on_time, saved_at.replace(hour=0, minute=0, second=0, microsecond=0))
+            state.stats.total_runtime_today += max(timedelta(), saved_at - start)
+        state.stats.last_compressor_off_time = now
+        logging.warning("Kompressor lief vor dem Neustart - Mindestpause beginnt ab jetzt")
+
+    modes = data.get("modes", {})
+    state.urlaubsmodus_aktiv = bool(modes.get("urlaubsmodus_aktiv", False))
+    state.urlaubsmodus_start = _parse_dt(modes.get("urlaubsmodus_start"))
+    state.urlaubsmodus_ende = _parse_dt(modes.get("urlaubsmodus_ende"))
+    state.bademodus_aktiv = bool(modes.get("bademodus_aktiv", False))
+
+    safety = data.get("safety", {})
+    state.verdampfer_blocked = bool(safety.get("verdampfer_blocked", False))
+    state.kompressor_verification_failed = bool(safety.get("verification_failed", False))
+    state.kompressor_verification_error_count = int(safety.get("verification_error_count", 0))
+
+    forecast = data.get("forecast", {})
+    if forecast.get("updated_at") and forecast.get("today") is not None:
+        state.last_forecast_update = _parse_dt(forecast["updated_at"])
+        state.solar.forecast_today = forecast.get("today")
+        state.solar.forecast_tomorrow = forecast.get("tomorrow")
+        state.solar.sunrise_today = forecast.get("sunrise_today")
+        state.solar.sunset_today = forecast.get("sunset_today")
+
+    planner = data.get("planner", {})
+    if planner:
+        state.planner.heat_rate_kph = planner.get("heat_rate_kph", state.planner.heat_rate_kph)
+        state.planner.loss_rate_kph = planner.get("loss_rate_kph", state.planner.loss_rate_kph)
+        state.planner.cycles_observed = planner.get("cycles_observed", state.planner.cycles_observed)
+
+
+class StateCheckpoint:
+    """Schreibt den Checkpoint bei Änderung und periodisch (atomar: temporäre Datei + os.replace)."""
+
+    def __init__(self, path: str = CHECKPOINT_FILE, periodic_s: float = PERIODIC_SAVE_S):
+        self.path = path
+        self.periodic_s = periodic_s
+        self.writes = 0
+        self._last_payload: Optional[Dict] = None
+        self._next_periodic = 0.0
+
+    def load(self, state, now: datetime) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            version = data.get("version")
+            if version != SCHEMA_VERSION:
+                logging.warning(f"State-Checkpoint mit Version {version} ignoriert (erwartet {SCHEMA_VERSION})")
+                return False
+            restore(state, data, now)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logging.error(f"State-Checkpoint konnte nicht geladen werden: {e}")
+            return False
+        self._last_payload = capture(state)
+        logging.info(f"State-Checkpoint vom {data.get('saved_at')} wiederhergestellt")
+        return True
+
+    def maybe_save(self, state, now: datetime, force: bool = False) -> bool:
+        """Speichert, wenn sich die Daten geändert haben, PERIODIC_SAVE_S vergangen ist oder force gesetzt ist."""
+        payload = capture(state)
+        if not force and payload == self._last_payload and clock.monotonic() < self._next_periodic:
+            return False
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": SCHEMA_VERSION, "saved_at": now.isoformat(), **payload}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.error(f"State-Checkpoint konnte nicht gespeichert werden: {e}")
+            return False
+        self._last_payload = payload
+        self._next_periodic = clock.monotonic() + self.periodic_s
+        self.writes += 1
+        return True
+
+
+_checkpoint: Optional[StateCheckpoint] = None
+
+
+def get_checkpoint() -> StateCheckpoint:
+    global _checkpoint
+    if _checkpoint is None:
+        _checkpoint = StateCheckpoint()
+    return _checkpoint
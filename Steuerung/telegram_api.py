@@ -1,22 +1,17 @@
 import aiohttp
 import asyncio
 import logging
-import socket
-from aiohttp.resolver import AsyncResolver
+from instrumentation import instrument
+import resilience
+import http_clients
+
+MAX_RETRY_DELAY = 60.0
 
 def create_robust_aiohttp_session():
-    """Hilfsfunktion zum Erstellen einer robusten aiohttp-Session mit DNS-Fallback."""
-    try:
-        resolver = AsyncResolver(nameservers=["8.8.8.8", "1.1.1.1"])
-        connector = aiohttp.TCPConnector(resolver=resolver, limit_per_host=10)
-    except RuntimeError: # aiodns not installed
-        logging.warning("aiodns nicht installiert, verwende Standard-DNS-Resolver.")
-        connector = aiohttp.TCPConnector(limit_per_host=10)
-    except Exception as e:
-        logging.warning(f"Fehler beim Initialisieren des DNS-Resolvers: {e}, verwende Standard.")
-        connector = aiohttp.TCPConnector(limit_per_host=10)
-    return aiohttp.ClientSession(connector=connector)
+    """Eigenständige Session mit DNS-Fallback und DNS-Cache (für Skripte/Tests; die Anwendung nutzt http_clients.get_registry())."""
+    return http_clients.create_session()
 
+@instrument("telegram_send")
 async def send_telegram_message(session, chat_id, message, bot_token, reply_markup=None, retries=3, retry_delay=5,
                                 parse_mode=None):
     """Sendet eine Nachricht über Telegram mit Fehlerbehandlung und Retries."""
@@ -41,16 +36,20 @@ async def send_telegram_message(session, chat_id, message, bot_token, reply_mark
         else:
             payload["reply_markup"] = reply_markup
 
-    # Fallback for tests or when session is not provided
+    # Ohne übergebene Session die gemeinsame Session der Anwendung verwenden
     if session is None:
-        async with create_robust_aiohttp_session() as temp_session:
-            return await send_telegram_message(temp_session, chat_id, message, bot_token, reply_markup, retries, retry_delay, parse_mode)
+        session = http_clients.get_registry().get()
 
     # Log removed: blocking socket.getaddrinfo was here
 
-    for attempt in range(retries):
+    breaker = resilience.get_breaker("telegram_send")
+    for attempt in range(1, retries + 1):
+        if not breaker.allow():
+            logging.debug(f"Telegram-Versand übersprungen (Circuit Breaker offen): {message[:50]}")
+            return False
         try:
             async with session.post(url, json=payload, timeout=20) as response:
+                breaker.record_success()
                 if response.status == 200:
                     logging.info(f"Telegram-Nachricht gesendet: {message[:100]}...")
                     return True
@@ -59,31 +58,18 @@ async def send_telegram_message(session, chat_id, message, bot_token, reply_mark
                     logging.error(f"Fehler beim Senden der Telegram-Nachricht (Status {response.status}): {error_text}")
                     logging.debug(f"Fehlgeschlagene Nachricht: '{message}' (Länge={len(message)})")
                     return False
-        except (aiohttp.ClientConnectionError, OSError) as e:
-            if attempt == retries:
-                logging.error(f"Netzwerkfehler beim Senden der Telegram-Nachricht (Versuch {attempt}/{retries}): {e}")
-            else:
-                logging.debug(f"Netzwerkfehler beim Senden der Telegram-Nachricht (Versuch {attempt}/{retries}): {e}")
-            if attempt < retries:
-                backoff = retry_delay * (2 ** (attempt - 1))
-                logging.debug(f"Warte {backoff} Sekunden vor dem nächsten Versuch...")
+        except (aiohttp.ClientConnectionError, OSError, asyncio.TimeoutError) as e:
+            breaker.record_failure(e)
+            reason = "Timeout" if isinstance(e, asyncio.TimeoutError) else f"Netzwerkfehler: {e}"
+            if attempt < retries and breaker.state == resilience.CLOSED:
+                backoff = resilience.backoff_delay(attempt, retry_delay, MAX_RETRY_DELAY)
+                logging.debug(f"{reason} beim Senden der Telegram-Nachricht (Versuch {attempt}/{retries}), warte {backoff:.1f}s")
                 await asyncio.sleep(backoff)
             else:
-                logging.error("Alle Versuche fehlgeschlagen (Netzwerkfehler).")
-                return False
-        except asyncio.TimeoutError:
-            if attempt == retries:
-                logging.error(f"Timeout beim Senden der Telegram-Nachricht (Versuch {attempt}/{retries})")
-            else:
-                logging.debug(f"Timeout beim Senden der Telegram-Nachricht (Versuch {attempt}/{retries})")
-            if attempt < retries:
-                backoff = retry_delay * (2 ** (attempt - 1))
-                logging.debug(f"Warte {backoff} Sekunden vor dem nächsten Versuch...")
-                await asyncio.sleep(backoff)
-            else:
-                logging.error("Alle Versuche fehlgeschlagen (Timeout).")
+                logging.error(f"Telegram-Nachricht nicht gesendet ({reason}, Versuch {attempt}/{retries})")
                 return False
         except Exception as e:
+            breaker.record_failure(e)
             logging.error(f"Unerwarteter Fehler beim Senden der Telegram-Nachricht: {e}", exc_info=True)
             logging.debug(f"Fehlgeschlagene Nachricht: '{message}' (Länge={len(message)})")
             return False
@@ -98,9 +84,13 @@ async def get_telegram_updates(session, bot_token, offset=None, retries=3, retry
 
     # Log removed: blocking socket.getaddrinfo was here
 
+    breaker = resilience.get_breaker("telegram_updates")
     for attempt in range(1, retries + 1):
+        if not breaker.allow():
+            return None
         try:
             async with session.get(url, params=params, timeout=70) as response:
+                breaker.record_success()
                 if response.status == 200:
                     data = await response.json()
                     updates = data.get("result", [])
@@ -109,29 +99,51 @@ async def get_telegram_updates(session, bot_token, offset=None, retries=3, retry
                     error_text = await response.text()
                     logging.error(f"Fehler beim Abrufen von Telegram-Updates: Status {response.status}, Details: {error_text}")
                     return None
-        except (aiohttp.ClientConnectionError, OSError) as e:
-            logging.debug(f"Netzwerkfehler beim Abrufen von Telegram-Updates (Versuch {attempt}/{retries}): {e}")
-            if attempt < retries:
-                backoff = retry_delay * (2 ** (attempt - 1))
-                logging.debug(f"Warte {backoff} Sekunden vor dem nächsten Versuch...")
+        except (aiohttp.ClientConnectionError, OSError, asyncio.TimeoutError) as e:
+            breaker.record_failure(e)
+            timeout = isinstance(e, asyncio.TimeoutError)
+            logging.debug(f"{'Timeout' if timeout else f'Netzwerkfehler: {e}'} beim Abrufen von Telegram-Updates (Versuch {attempt}/{retries})")
+            if attempt < retries and breaker.state == resilience.CLOSED:
+                backoff = resilience.backoff_delay(attempt, retry_delay, MAX_RETRY_DELAY)
+                logging.debug(f"Warte {backoff:.1f} Sekunden vor dem nächsten Versuch...")
                 await asyncio.sleep(backoff)
+            elif timeout:
+                logging.debug("Alle Versuche fehlgeschlagen (Timeout).")
+                return []
             else:
                 logging.warning("Alle Versuche fehlgeschlagen (Netzwerkfehler).", extra={'rate_limit': True})
                 return None
-        except asyncio.TimeoutError:
-            logging.debug(f"Timeout beim Abrufen von Telegram-Updates (Versuch {attempt}/{retries})")
-            if attempt < retries:
-                backoff = retry_delay * (2 ** (attempt - 1))
-                logging.debug(f"Warte {backoff} Sekunden vor dem nächsten Versuch...")
-                await asyncio.sleep(backoff)
-            else:
-                logging.debug("Alle Versuche fehlgeschlagen (Timeout).")
-                return []
         except Exception as e:
+            breaker.record_failure(e)
             logging.error(f"Unerwarteter Fehler beim Abrufen von Telegram-Updates: {e}", exc_info=True)
             return None
     return None
 
+async def _call_bot_api(session, bot_token, method, payload=None):
+    """Einfacher Bot-API-Aufruf ohne Retries; gibt das 'result'-Feld zurück oder None."""
+    url = f"https://api.telegram.org/bot{bot_token}/{method}"
+    try:
+        async with session.post(url, json=payload or {}, timeout=20) as response:
+            data = await response.json(content_type=None)
+            if response.status == 200 and data.get("ok"):
+                return data.get("result")
+            logging.error(f"Telegram {method} fehlgeschlagen (Status {response.status}): {data.get('description')}")
+    except (aiohttp.ClientError, OSError, asyncio.TimeoutError, ValueError) as e:
+        logging.error(f"Telegram {method} fehlgeschlagen: {e}")
+    return None
+
+async def set_telegram_webhook(session, bot_token, url, secret_token):
+    """Registriert den Webhook; Telegram schickt das Secret im Header X-Telegram-Bot-Api-Secret-Token mit."""
+    payload = {"url": url, "secret_token": secret_token, "allowed_updates": ["message"], "max_connections": 5}
+    return await _call_bot_api(session, bot_token, "setWebhook", payload) is not None
+
+async def delete_telegram_webhook(session, bot_token):
+    """Entfernt den Webhook (Voraussetzung für getUpdates); wartende Updates bleiben erhalten."""
+    return await _call_bot_api(session, bot_token, "deleteWebhook", {"drop_pending_updates": False}) is not None
+
+async def get_telegram_webhook_info(session, bot_token):
+    return await _call_bot_api(session, bot_token, "getWebhookInfo")
+
 async def _send_healthcheck_ping(session: aiohttp.ClientSession, url: str) -> bool:
     """Sendet einen einzelnen Ping. Gibt True bei Erfolg zurück."""
     try:
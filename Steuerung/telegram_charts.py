@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import io
@@ -10,6 +11,87 @@ from aiohttp import FormData
 from telegram_api import send_telegram_message
 from utils import check_and_fix_csv_header, backup_csv, EXPECTED_CSV_HEADER, HEIZUNGSDATEN_CSV
 
+# pyplot hält globalen Zustand: immer nur ein Diagramm gleichzeitig zeichnen
+_render_lock = asyncio.Lock()
+
+def _render_temperature_chart(df, hours, time_ago, now, y_min, y_max):
+    """Zeichnet das Temperaturdiagramm (synchron, läuft in einem Worker-Thread)."""
+    color_map = {
+        "Direkter PV-Strom": "green",
+        "Solar": "green",
+        "Strom aus der Batterie": "yellow",
+        "Batterie": "yellow",
+        "Strom vom Netz": "red",
+        "Netz": "red",
+        "Keine aktive Energiequelle": "blue",
+        "Unbekannt": "gray"
+    }
+    plt.figure(figsize=(12, 6))
+    shown_labels = set()
+    if "Kompressor" in df.columns and "PowerSource" in df.columns:
+        # Support both old format (EIN/AUS) and new format (1/0)
+        df["Kompressor"] = df["Kompressor"].astype(str).map({
+            "EIN": True, "AUS": False, 
+            "1": True, "0": False,
+            "1.0": True, "0.0": False
+        }).fillna(False)
+        for source, color in color_map.items():
+            mask = (df["PowerSource"] == source) & df["Kompressor"]
+            if mask.any():
+                label = f"Kompressor EIN ({source})"
+                if label not in shown_labels:
+                    plt.fill_between(df["Zeitstempel"], y_min, y_max, where=mask, color=color, alpha=0.3, label=label)
+                    shown_labels.add(label)
+                else:
+                    plt.fill_between(df["Zeitstempel"], y_min, y_max, where=mask, color=color, alpha=0.3)
+    for col, color, linestyle in [
+        ("T_Oben", "blue", "-"),
+        ("T_Unten", "red", "-"),
+        ("T_Mittig", "purple", "-"),
+        ("T_Verd", "gray", "--")
+    ]:
+        if col in df.columns and df[col].notna().any():
+            plt.plot(df["Zeitstempel"], df[col], label=col, color=color, linestyle=linestyle, linewidth=1.2)
+    if "Einschaltpunkt" in df.columns:
+        df["Einschaltpunkt"] = pd.to_numeric(df["Einschaltpunkt"], errors="coerce").ffill()
+        plt.plot(df["Zeitstempel"], df["Einschaltpunkt"], label="Einschaltpunkt (historisch)", linestyle="--", color="green")
+    if "Ausschaltpunkt" in df.columns:
+        df["Ausschaltpunkt"] = pd.to_numeric(df["Ausschaltpunkt"], errors="coerce").ffill()
+        plt.plot(df["Zeitstempel"], df["Ausschaltpunkt"], label="Ausschaltpunkt (historisch)", linestyle="--", color="orange")
+    plt.xlim(time_ago, now)
+    plt.ylim(y_min, y_max)
+    plt.xlabel("Zeit")
+    plt.ylabel("Temperatur (°C)")
+    plt.title(f"Boiler-Temperaturverlauf – Letzte {hours} Stunden")
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.xticks(rotation=45)
+    plt.legend(loc="lower left")
+    plt.tight_layout()
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+    buf.seek(0)
+    plt.close()
+    return buf
+
+def _render_runtime_chart(file_path, days):
+    """Liest die CSV und zeichnet das Laufzeit-Balkendiagramm (synchron, im Worker-Thread)."""
+    df = pd.read_csv(file_path, parse_dates=["Zeitstempel"])
+    df = df.tail(1000)
+    df["Date"] = df["Zeitstempel"].dt.date
+    df["Kompressor"] = df["Kompressor"].astype(str).map({"EIN": True, "AUS": False, "1": True, "0": False}).fillna(False)
+    runtime_by_date = df[df["Kompressor"]].groupby("Date").size() * (10 / 60)
+    plt.figure(figsize=(10, 5))
+    runtime_by_date.plot(kind="bar")
+    plt.xlabel("Datum")
+    plt.ylabel("Laufzeit (Minuten)")
+    plt.title(f"Kompressor Laufzeit ({days} Tage)")
+    plt.tight_layout()
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=100)
+    buf.seek(0)
+    plt.close()
+    return buf
+
 async def get_boiler_temperature_history(session, hours, state, config):
     """Erstellt und sendet ein Diagramm mit Temperaturverlauf, historischen Sollwerten, Grenzwerten und Kompressorstatus."""
     try:
@@ -148,61 +230,8 @@ async def get_boiler_temperature_history(session, hours, state, config):
         max_temp = df[temp_columns].max().max()
         y_min = max(0, min_temp - 2) if pd.notna(min_temp) else 0
         y_max = max_temp + 5 if pd.notna(max_temp) else 60
-        color_map = {
-            "Direkter PV-Strom": "green",
-            "Solar": "green",
-            "Strom aus der Batterie": "yellow",
-            "Batterie": "yellow",
-            "Strom vom Netz": "red",
-            "Netz": "red",
-            "Keine aktive Energiequelle": "blue",
-            "Unbekannt": "gray"
-        }
-        plt.figure(figsize=(12, 6))
-        shown_labels = set()
-        if "Kompressor" in df.columns and "PowerSource" in df.columns:
-            # Support both old format (EIN/AUS) and new format (1/0)
-            df["Kompressor"] = df["Kompressor"].astype(str).map({
-                "EIN": True, "AUS": False, 
-                "1": True, "0": False,
-                "1.0": True, "0.0": False
-            }).fillna(False)
-            for source, color in color_map.items():
-                mask = (df["PowerSource"] == source) & df["Kompressor"]
-                if mask.any():
-                    label = f"Kompressor EIN ({source})"
-                    if label not in shown_labels:
-                        plt.fill_between(df["Zeitstempel"], y_min, y_max, where=mask, color=color, alpha=0.3, label=label)
-                        shown_labels.add(label)
-                    else:
-                        plt.fill_between(df["Zeitstempel"], y_min, y_max, where=mask, color=color, alpha=0.3)
-        for col, color, linestyle in [
-            ("T_Oben", "blue", "-"),
-            ("T_Unten", "red", "-"),
-            ("T_Mittig", "purple", "-"),
-            ("T_Verd", "gray", "--")
-        ]:
-            if col in df.columns and df[col].notna().any():
-                plt.plot(df["Zeitstempel"], df[col], label=col, color=color, linestyle=linestyle, linewidth=1.2)
-        if "Einschaltpunkt" in df.columns:
-            df["Einschaltpunkt"] = pd.to_numeric(df["Einschaltpunkt"], errors="coerce").ffill()
-            plt.plot(df["Zeitstempel"], df["Einschaltpunkt"], label="Einschaltpunkt (historisch)", linestyle="--", color="green")
-        if "Ausschaltpunkt" in df.columns:
-            df["Ausschaltpunkt"] = pd.to_numeric(df["Ausschaltpunkt"], errors="coerce").ffill()
-            plt.plot(df["Zeitstempel"], df["Ausschaltpunkt"], label="Ausschaltpunkt (historisch)", linestyle="--", color="orange")
-        plt.xlim(time_ago, now)
-        plt.ylim(y_min, y_max)
-        plt.xlabel("Zeit")
-        plt.ylabel("Temperatur (°C)")
-        plt.title(f"Boiler-Temperaturverlauf – Letzte {hours} Stunden")
-        plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-        plt.xticks(rotation=45)
-        plt.legend(loc="lower left")
-        plt.tight_layout()
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", dpi=100, bbox_inches="tight")
-        buf.seek(0)
-        plt.close()
+        async with _render_lock:
+            buf = await asyncio.to_thread(_render_temperature_chart, df, hours, time_ago, now, y_min, y_max)
         url = f"https://api.telegram.org/bot{state.bot_token}/sendPhoto"
         form = FormData()
         form.add_field("chat_id", state.chat_id)
@@ -234,21 +263,8 @@ async def get_runtime_bar_chart(session, days=7, state=None):
         if not os.path.exists(file_path):
              await send_telegram_message(session, state.chat_id, "Laufzeit-Daten nicht verfügbar (CSV fehlt).", state.bot_token)
              return
-        df = pd.read_csv(file_path, parse_dates=["Zeitstempel"])
-        df = df.tail(1000)
-        df["Date"] = df["Zeitstempel"].dt.date
-        df["Kompressor"] = df["Kompressor"].astype(str).map({"EIN": True, "AUS": False, "1": True, "0": False}).fillna(False)
-        runtime_by_date = df[df["Kompressor"]].groupby("Date").size() * (10 / 60)
-        plt.figure(figsize=(10, 5))
-        runtime_by_date.plot(kind="bar")
-        plt.xlabel("Datum")
-        plt.ylabel("Laufzeit (Minuten)")
-        plt.title(f"Kompressor Laufzeit ({days} Tage)")
-        plt.tight_layout()
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", dpi=100)
-        buf.seek(0)
-        plt.close()
+        async with _render_lock:
+            buf = await asyncio.to_thread(_render_runtime_chart, file_path, days)
         url = f"https://api.telegram.org/bot{state.bot_token}/sendPhoto"
         form = FormData()
         form.add_field("chat_id", state.chat_id)
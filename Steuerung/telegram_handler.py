@@ -4,15 +4,25 @@ import logging
 import pytz
 import os
 import io
+import time
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
 from utils import safe_timedelta
+import clock
+import forecast_store
+import resilience
+import http_clients
+import telegram_webhook
+import snapshots
+from telegram_router import TelegramRouter, Command
 
 # New Modules
 from telegram_api import (
-    create_robust_aiohttp_session, 
     send_telegram_message, 
     get_telegram_updates,
+    set_telegram_webhook,
+    delete_telegram_webhook,
+    get_telegram_webhook_info,
     start_healthcheck_task
 )
 from telegram_ui import (
@@ -28,6 +38,7 @@ from telegram_charts import (
     get_boiler_temperature_history, 
     get_runtime_bar_chart
 )
+from instrumentation import format_latency_report
 
 async def aktivere_bademodus(session, chat_id, bot_token, state):
     """Aktiviert den Bademodus."""
@@ -61,7 +72,7 @@ async def aktivere_urlaubsmodus(session, chat_id, bot_token, config, state):
 async def set_urlaubsmodus_duration(session, chat_id, bot_token, config, state, duration_text):
     """Setzt die Urlaubsmodus-Dauer basierend auf der Auswahl."""
     try:
-        # text is already lowercased in process_telegram_messages_async
+        # text is already lowercased in build_router's in_dialog
         if duration_text == "❌ abbrechen":
             keyboard = get_keyboard(state)
             await send_telegram_message(session, chat_id, "❌ Urlaubsmodus-Aktivierung abgebrochen.", bot_token, reply_markup=keyboard)
@@ -90,7 +101,7 @@ async def set_urlaubsmodus_duration(session, chat_id, bot_token, config, state,
                 return
 
         local_tz = pytz.timezone("Europe/Berlin")
-        now = datetime.now(local_tz)
+        now = clock.now(local_tz)
         state.urlaubsmodus_aktiv = True
         state.urlaubsmodus_start = now
         state.urlaubsmodus_ende = now + timedelta(days=duration_days)
@@ -110,7 +121,7 @@ async def handle_custom_duration(session, chat_id, bot_token, config, state, mes
         if message_text in ["🌴 benutzerdefiniert", "❌ abbrechen", "🌴 1 tag", "🌴 3 tage", "🌴 7 tage", "🌴 14 tage"]: return
         duration_days = int(message_text.strip())
         local_tz = pytz.timezone("Europe/Berlin")
-        now = datetime.now(local_tz)
+        now = clock.now(local_tz)
         state.urlaubsmodus_aktiv = True
         state.urlaubsmodus_start = now
         state.urlaubsmodus_ende = now + timedelta(days=duration_days)
@@ -132,16 +143,16 @@ async def send_temperature_telegram(session, t_boiler_oben, t_boiler_unten, t_bo
     keyboard = get_keyboard(state)
     return await send_telegram_message(session, chat_id, message, bot_token, reply_markup=keyboard)
 
-async def send_status_telegram(session, t_oben, t_unten, t_mittig, t_verd, kompressor_status, current_runtime, total_runtime, config, get_solax_data_func, chat_id, bot_token, state, is_nighttime_func=None, is_solar_window_func=None):
-    """Sendet den aktuellen Systemstatus über Telegram."""
-    solax_data = await get_solax_data_func(session, state) or {"feedinpower": 0, "batPower": 0, "soc": 0}
-    feedinpower = solax_data.get("feedinpower", 0)
-    bat_power = solax_data.get("batPower", 0)
+async def send_status_telegram(session, snapshot, config, chat_id, bot_token, state):
+    """Sendet den Systemstatus des zuletzt veröffentlichten Snapshots über Telegram."""
+    sample = snapshot.sample
+    feedinpower = sample.feedinpower or 0
+    bat_power = sample.batpower or 0
+    current_runtime = snapshot.current_runtime
+    total_runtime = snapshot.total_runtime_today + snapshot.current_runtime
 
-    nacht_reduction = int(config.Heizungssteuerung.NACHTABSENKUNG) if is_nighttime_func and is_nighttime_func(config) and not state.bademodus_aktiv else 0
-    
     # Mode mapping for icons
-    mode_name = state.control.previous_modus or "Normal"
+    mode_name = snapshot.modus or "Normal"
     if "Bademodus" in mode_name: mode_str = "🛁 " + mode_name
     elif "Urlaub" in mode_name: mode_str = "🌴 " + mode_name
     elif "Solar" in mode_name: mode_str = "☀️ " + mode_name
@@ -151,37 +162,40 @@ async def send_status_telegram(session, t_oben, t_unten, t_mittig, t_verd, kompr
     else: mode_str = mode_name
 
     # Additional Details calculation
-    t_soll_ein = state.control.aktueller_einschaltpunkt
-    t_soll_aus = state.control.aktueller_ausschaltpunkt
-    vpn_ip = state.vpn_ip if state.vpn_ip else "N/A"
+    t_soll_ein = sample.einschaltpunkt
+    t_soll_aus = sample.ausschaltpunkt
+    vpn_ip = snapshot.vpn_ip if snapshot.vpn_ip else "N/A"
     
     # Forecast formatting
     forecast_text = "N/A"
-    if state.solar.forecast_today is not None:
-        today_val = f"{state.solar.forecast_today:.1f}"
-        tomorrow_val = f"{state.solar.forecast_tomorrow:.1f}" if state.solar.forecast_tomorrow is not None else "??"
-        sunrise = state.solar.sunrise_today if state.solar.sunrise_today else "??"
-        sunset = state.solar.sunset_today if state.solar.sunset_today else "??"
+    if snapshot.forecast_today is not None:
+        today_val = f"{snapshot.forecast_today:.1f}"
+        tomorrow_val = f"{sample.prognose_morgen:.1f}" if sample.prognose_morgen is not None else "??"
+        sunrise = snapshot.sunrise_today if snapshot.sunrise_today else "??"
+        sunset = snapshot.sunset_today if snapshot.sunset_today else "??"
         forecast_text = f"Heute: {today_val}kWh | Morgen: {tomorrow_val}kWh\n☀️ {sunrise} - 🌙 {sunset}"
+        next_hours = forecast_store.get_store().expected_radiation(clock.now(), 3)
+        if next_hours is not None:
+            forecast_text += f"\n⏭️ Nächste 3h: {next_hours / 1000:.2f}kWh"
         
     # Active Sensor
-    active_sensor = state.control.active_rule_sensor if state.control.active_rule_sensor else "Automatisch"
+    active_sensor = snapshot.active_rule_sensor if snapshot.active_rule_sensor else "Automatisch"
 
     # Status Message Definition
     status_lines = [
         "📊 *SYSTEMSTATUS*",
         "",
         "🌡️ *Temperaturen*",
-        f"Oben: {fmt_temp(t_oben)} | Mittig: {fmt_temp(t_mittig)}",
-        f"Unten: {fmt_temp(t_unten)} | Verd: {fmt_temp(t_verd)}",
+        f"Oben: {fmt_temp(sample.t_oben)} | Mittig: {fmt_temp(sample.t_mittig)}",
+        f"Unten: {fmt_temp(sample.t_unten)} | Verd: {fmt_temp(sample.t_verd)}",
         "",
         "🛠️ *Kompressor*",
-        f"Status: *{'EIN' if kompressor_status else 'AUS'}*",
+        f"Status: *{'EIN' if sample.kompressor else 'AUS'}*",
     ]
     
     # Add blocking reason if compressor is off and reason exists
-    if not kompressor_status and state.control.blocking_reason:
-        status_lines.append(f"🚫 Blockiert: {state.control.blocking_reason}")
+    if not sample.kompressor and snapshot.blocking_reason:
+        status_lines.append(f"🚫 Blockiert: {snapshot.blocking_reason}")
     
     status_lines.extend([
         f"Laufzeit: {format_time(current_runtime)} (Heute: {format_time(total_runtime)})",
@@ -192,12 +206,18 @@ async def send_status_telegram(session, t_oben, t_unten, t_mittig, t_verd, kompr
         "",
         "⚡ *Energie*",
         f"Netz: {feedinpower:.0f}W | Akku: {bat_power:.0f}W",
-        f"PV: {solax_data.get('acpower', 0):.0f}W | SOC: {solax_data.get('soc', 0)}%",
+        f"PV: {sample.acpower or 0:.0f}W | SOC: {sample.soc or 0}%",
         "",
         "ℹ️ *Infos*",
         f"Modus: {mode_str}",
         f"VPN IP: `{vpn_ip}`",
-        f"Update: {datetime.now().strftime('%H:%M:%S')}",
+        f"Update: {snapshot.created_at.strftime('%H:%M:%S')}",
+    ])
+    # Gestörte Verbindungen (Circuit Breaker nicht geschlossen)
+    for name, breaker in resilience.status_report().items():
+        if breaker["state"] != resilience.CLOSED:
+            status_lines.append(f"🔌 {escape_markdown(name)}: {escape_markdown(breaker['state'])} (Retry in {breaker['retry_in_s']:.0f}s)")
+    status_lines.extend([
         "",
         "🌤️ *Prognose*",
         forecast_text
@@ -207,57 +227,129 @@ async def send_status_telegram(session, t_oben, t_unten, t_mittig, t_verd, kompr
     keyboard = get_keyboard(state)
     return await send_telegram_message(session, chat_id, message, bot_token, reply_markup=keyboard, parse_mode="Markdown")
 
-async def process_telegram_messages_async(session, t_boiler_oben, t_boiler_unten, t_boiler_mittig, t_verd, updates, last_update_id, kompressor_status, aktuelle_laufzeit, gesamtlaufzeit, chat_id, bot_token, config, get_solax_data_func, state, get_temperature_history_func, get_runtime_bar_chart_func, is_nighttime_func, is_solar_window_func):
-    """Verarbeitet eingehende Telegram-Nachrichten asynchron."""
-    if not updates: return last_update_id
-    for update in updates:
-        message = update.get('message', {})
-        text = message.get('text', "").strip().lower()
-        if not text: continue
-        
+async def send_latency_report_telegram(session, chat_id, bot_token, state):
+    """Sendet die gemessenen Laufzeiten (p50/p95/p99/max) der Hot-Path-Funktionen."""
+    keyboard = get_keyboard(state)
+    return await send_telegram_message(session, chat_id, format_latency_report(), bot_token, reply_markup=keyboard, parse_mode="Markdown")
+
+def build_router(read_temperature_func, config, state):
+    """Befehlstabelle des Bots. Jeder Befehl nennt die Daten, die er braucht; nur diese werden geladen."""
+
+    async def snapshot(session):
+        # Stand des letzten Ticks; vor dem ersten Tick eine Momentaufnahme des States
+        latest = snapshots.get_publisher().latest()
+        if latest is None:
+            latest = snapshots.capture(state, clock.now(state.local_tz), nacht=False)
+        return latest
+
+    async def temperatures(session):
+        # Werte der Hauptschleife (alle 10 s aktualisiert); Sensor nur lesen, solange noch keiner vorliegt
+        sample = (await snapshot(session)).sample
+        values = []
+        for name, value in (("oben", sample.t_oben), ("unten", sample.t_unten), ("mittig", sample.t_mittig), ("verd", sample.t_verd)):
+            values.append(value if value is not None else await read_temperature_func(name))
+        return tuple(values)
+
+    async def in_dialog(ctx):
+        text = ctx.text.lower()
+        if state.awaiting_custom_duration:
+            await handle_custom_duration(ctx.session, state.chat_id, state.bot_token, config, state, text)
+        elif state.awaiting_urlaub_duration:
+            await set_urlaubsmodus_duration(ctx.session, state.chat_id, state.bot_token, config, state, text)
+        else:
+            return False
+        return True
+
+    async def on_error(ctx, e):
+        await send_telegram_message(ctx.session, state.chat_id, f"❌ Fehler bei der Verarbeitung: {str(e)}", state.bot_token)
+
+    router = TelegramRouter(
+        {"temperatures": temperatures, "snapshot": snapshot},
+        fallback=Command(lambda ctx: send_unknown_command_message(ctx.session, state.chat_id, state.bot_token, state)),
+        pre_dispatch=in_dialog,
+        on_error=on_error,
+    )
+    router.register("temperaturen", lambda ctx: send_temperature_telegram(
+        ctx.session, *ctx.data["temperatures"], state.chat_id, state.bot_token, state), needs=("temperatures",))
+    router.register("status", lambda ctx: send_status_telegram(
+        ctx.session, ctx.data["snapshot"], config, state.chat_id, state.bot_token, state), needs=("snapshot",))
+    router.register("urlaub", lambda ctx: aktivere_urlaubsmodus(ctx.session, state.chat_id, state.bot_token, config, state))
+    router.register("urlaub ende", lambda ctx: deaktivere_urlaubsmodus(ctx.session, state.chat_id, state.bot_token, config, state))
+    router.register("bademodus", lambda ctx: aktivere_bademodus(ctx.session, state.chat_id, state.bot_token, state))
+    router.register("bademodus aus", lambda ctx: deaktivere_bademodus(ctx.session, state.chat_id, state.bot_token, state))
+    router.register("verlauf 6h", lambda ctx: get_boiler_temperature_history(ctx.session, 6, state, config), heavy=True)
+    router.register("verlauf 24h", lambda ctx: get_boiler_temperature_history(ctx.session, 24, state, config), heavy=True)
+    router.register("laufzeiten", lambda ctx: get_runtime_bar_chart(ctx.session, days=7, state=state), heavy=True)
+    router.register("latenz", lambda ctx: send_latency_report_telegram(ctx.session, state.chat_id, state.bot_token, state))
+    router.register(("hilfe", "start"), lambda ctx: send_help_message(ctx.session, state.chat_id, state.bot_token, state))
+    return router
+
+async def telegram_task(read_temperature_func, sensor_ids, config, state, get_temperature_history_func, get_runtime_bar_chart_func):
+    """
+    Telegram-Task zur Verarbeitung von Nachrichten. Mit [Telegram] WEBHOOK_URL/WEBHOOK_SECRET kommen
+    Updates per Webhook über die API; ist der Webhook nicht einzurichten oder meldet Telegram
+    Zustellfehler, wird für POLLING_FALLBACK_S per getUpdates abgefragt.
+    """
+    last_update_id = None
+    inbox = telegram_webhook.get_inbox()
+    webhook_retry_at = 0.0
+    next_health_check = 0.0
+    polling_checked = False
+
+    router = build_router(read_temperature_func, config, state)
+
+    # Sessions der Anwendung; getUpdates hält eine Verbindung bis zu 60 s und hat deshalb einen eigenen Pool
+    registry = http_clients.get_registry()
+    session = registry.get()
+
+    while True:
+        updates = None
         try:
-            if state.awaiting_custom_duration: await handle_custom_duration(session, chat_id, bot_token, config, state, text)
-            elif state.awaiting_urlaub_duration: await set_urlaubsmodus_duration(session, chat_id, bot_token, config, state, text)
-            elif "temperaturen" in text: await send_temperature_telegram(session, t_boiler_oben, t_boiler_unten, t_boiler_mittig, t_verd, chat_id, bot_token, state)
-            elif "status" in text:
-                await send_status_telegram(session, t_boiler_oben, t_boiler_unten, t_boiler_mittig, t_verd, kompressor_status, aktuelle_laufzeit, gesamtlaufzeit, config, get_solax_data_func, chat_id, bot_token, state, is_nighttime_func, is_solar_window_func)
-            elif "urlaub" in text:
-                if "ende" in text:
-                    await deaktivere_urlaubsmodus(session, chat_id, bot_token, config, state)
+            if not state.bot_token or not state.chat_id:
+                await asyncio.sleep(60); continue
+            tg = getattr(state, "config", config).Telegram
+            want_webhook = bool(tg.WEBHOOK_URL)
+
+            if want_webhook and not inbox.active and time.monotonic() >= webhook_retry_at:
+                if not telegram_webhook.valid_secret(tg.WEBHOOK_SECRET):
+                    logging.error("Telegram-Webhook: WEBHOOK_SECRET fehlt oder ungültig - verwende Polling")
+                    webhook_retry_at = time.monotonic() + telegram_webhook.POLLING_FALLBACK_S
                 else:
-                    await aktivere_urlaubsmodus(session, chat_id, bot_token, config, state)
-            elif "bademodus" in text:
-                if "aus" in text:
-                    await deaktivere_bademodus(session, chat_id, bot_token, state)
+                    inbox.activate(tg.WEBHOOK_SECRET)
+                    if await set_telegram_webhook(session, state.bot_token, tg.WEBHOOK_URL, tg.WEBHOOK_SECRET):
+                        logging.info(f"Telegram-Webhook aktiv: {tg.WEBHOOK_URL}")
+                        next_health_check = time.monotonic() + telegram_webhook.HEALTH_CHECK_INTERVAL_S
+                    else:
+                        inbox.deactivate()
+                        webhook_retry_at = time.monotonic() + telegram_webhook.POLLING_FALLBACK_S
+                        logging.warning("Telegram-Webhook konnte nicht eingerichtet werden - verwende Polling")
+                    polling_checked = False
+
+            if inbox.active:
+                unhealthy = not want_webhook
+                if not unhealthy and time.monotonic() >= next_health_check:
+                    next_health_check = time.monotonic() + telegram_webhook.HEALTH_CHECK_INTERVAL_S
+                    info = await get_telegram_webhook_info(session, state.bot_token)
+                    if telegram_webhook.webhook_unhealthy(info):
+                        logging.warning(f"Telegram-Webhook gestört ({(info or {}).get('last_error_message')}) - wechsle zu Polling")
+                        webhook_retry_at = time.monotonic() + telegram_webhook.POLLING_FALLBACK_S
+                        unhealthy = True
+                if unhealthy:
+                    inbox.deactivate()
                 else:
-                    await aktivere_bademodus(session, chat_id, bot_token, state)
-            elif "verlauf 6h" in text: await get_boiler_temperature_history(session, 6, state, config)
-            elif "verlauf 24h" in text: await get_boiler_temperature_history(session, 24, state, config)
-            elif "laufzeiten" in text: await get_runtime_bar_chart(session, days=7, state=state)
-            elif "hilfe" in text: await send_help_message(session, chat_id, bot_token, state)
-            else: await send_unknown_command_message(session, chat_id, bot_token, state)
-        except Exception as e:
-            logging.error(f"Fehler bei der Verarbeitung von '{text}': {e}", exc_info=True)
-            await send_telegram_message(session, chat_id, f"❌ Fehler bei der Verarbeitung: {str(e)}", bot_token)
-        last_update_id = update['update_id'] + 1
-    return last_update_id
+                    updates = await inbox.get_batch(timeout=max(1.0, next_health_check - time.monotonic()))
+            else:
+                if not polling_checked:
+                    # Ein noch registrierter Webhook blockiert getUpdates (HTTP 409)
+                    polling_checked = await delete_telegram_webhook(session, state.bot_token)
+                updates = await get_telegram_updates(registry.get("telegram_poll"), state.bot_token, last_update_id)
 
-async def telegram_task(read_temperature_func, sensor_ids, kompressor_status_func, current_runtime_func, total_runtime_func, config, get_solax_data_func, state, get_temperature_history_func, get_runtime_bar_chart_func, is_nighttime_func, is_solar_window_func):
-    """Telegram-Task zur Verarbeitung von Nachrichten."""
-    last_update_id = None
-    async with create_robust_aiohttp_session() as session:
-        while True:
-            try:
-                if not state.bot_token or not state.chat_id:
-                    await asyncio.sleep(60); continue
-                updates = await get_telegram_updates(session, state.bot_token, last_update_id)
-                if updates is not None:
-                    t_boiler_oben = await read_temperature_func("oben")
-                    t_boiler_unten = await read_temperature_func("unten")
-                    t_boiler_mittig = await read_temperature_func("mittig")
-                    t_verd = await read_temperature_func("verd")
-                    
-                    last_update_id = await process_telegram_messages_async(session, t_boiler_oben, t_boiler_unten, t_boiler_mittig, t_verd, updates, last_update_id, kompressor_status_func(), current_runtime_func(), total_runtime_func(), state.chat_id, state.bot_token, config, get_solax_data_func, state, get_boiler_temperature_history, get_runtime_bar_chart, is_nighttime_func, is_solar_window_func)
-            except Exception as e:
-                logging.error(f"Error in telegram_task: {e}")
+            if updates:
+                last_update_id = await router.dispatch_updates(session, updates, last_update_id)
+        except asyncio.CancelledError:
+            inbox.deactivate()
+            raise
+        except Exception as e:
+            logging.error(f"Error in telegram_task: {e}")
+        if updates is None and not inbox.active:
             await asyncio.sleep(5)
@@ -0,0 +1,294 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import clock
+import resilience
+import telegram_api
+
+PRIORITY_CRITICAL = 0   # wird bis zum erfolgreichen Versand auf der Platte gehalten
+PRIORITY_ALERT = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOG = 3
+
+MAX_QUEUE = 100
+CHAT_INTERVAL_S = 1.0        # Telegram: höchstens ~1 Nachricht pro Sekunde und Chat
+DEDUPE_WINDOW_S = 600.0      # identische Nachricht an denselben Chat höchstens alle 10 Minuten
+DIGEST_DELAY_S = 30.0        # WARNING-Logs so lange sammeln, dann eine Sammelnachricht
+MAX_CRITICAL_ATTEMPTS = 20
+RETRY_BASE_DELAY = 10.0
+RETRY_MAX_DELAY = 300.0
+OUTBOX_FILE = "telegram_outbox.json"
+
+
+class OutboundMessage:
+    __slots__ = ("chat_id", "text", "bot_token", "priority", "parse_mode", "reply_markup", "attempts", "not_before")
+
+    def __init__(self, chat_id, text: str, bot_token: Optional[str], priority: int = PRIORITY_NORMAL,
+                 parse_mode: Optional[str] = None, reply_markup=None):
+        self.chat_id = str(chat_id)
+        self.text = str(text)
+        self.bot_token = bot_token
+        self.priority = priority
+        self.parse_mode = parse_mode
+        self.reply_markup = reply_markup
+        self.attempts = 0
+        self.not_before = 0.0
+
+    def to_dict(self) -> Dict:
+        return {"chat_id": self.chat_id, "text": self.text, "parse_mode": self.parse_mode}
+
+
+class OutboundQueue:
+    """
+    Zentrale Ausgangswarteschlange für Telegram-Nachrichten.
+
+    Aufrufer reihen nur ein (enqueue/add_log) und kehren sofort zurück; ein einzelner Worker
+    versendet nach Priorität unter Einhaltung des Abstands je Chat. Ist die Warteschlange voll,
+    wird die Nachricht mit der niedrigsten Priorität verworfen. Kritische Alarme werden bis zum
+    Versand in einer Datei gehalten und nach einem Neustart erneut eingereiht.
+    """
+
+    def __init__(self, max_size: int = MAX_QUEUE, chat_interval: float = CHAT_INTERVAL_S,
+                 dedupe_window: float = DEDUPE_WINDOW_S, digest_delay: float = DIGEST_DELAY_S,
+                 persist_path: Optional[str] = None):
+        self.max_size = max_size
+        self.chat_interval = chat_interval
+        self.dedupe_window = dedupe_window
+        self.digest_delay = digest_delay
+        self.persist_path = persist_path
+        self.session = None
+        self.default_token: Optional[str] = None
+        self.stats = Counter()
+        self._heap: List[Tuple[int, int, OutboundMessage]] = []
+        self._seq = itertools.count()
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._digest: Dict[Tuple[str, Optional[str]], Counter] = {}
+        self._digest_due: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Optional[OutboundMessage] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    # --- Einreihen -------------------------------------------------------------
+
+    def enqueue(self, chat_id, text, bot_token=None, priority: int = PRIORITY_NORMAL,
+                parse_mode: Optional[str] = None, reply_markup=None, dedupe: bool = True) -> bool:
+        """Reiht eine Nachricht ein. False, wenn sie als Duplikat oder wegen voller Warteschlange verworfen wurde."""
+        if not chat_id or not (bot_token or self.default_token):
+            return False
+        msg = OutboundMessage(chat_id, text, bot_token, priority, parse_mode, reply_markup)
+        if dedupe and self._is_duplicate(msg):
+            self.stats["deduped"] += 1
+            logging.debug(f"Telegram-Duplikat verworfen: {msg.text[:50]}")
+            return False
+        if len(self._heap) >= self.max_size:
+            worst = max(self._heap, key=lambda item: (item[0], item[1]))
+            if worst[0] <= priority:
+                self.stats["dropped"] += 1
+                return False
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self.stats["dropped"] += 1
+        heapq.heappush(self._heap, (priority, next(self._seq), msg))
+        self.stats["enqueued"] += 1
+        if priority == PRIORITY_CRITICAL:
+            self._persist()
+        self._wakeup.set()
+        return True
+
+    def add_log(self, chat_id, text: str, bot_token=None) -> None:
+        """
+        Sammelt eine Log-Meldung für die nächste Sammelnachricht (gleiche Zeilen werden gezählt).
+        Threadsicher: aus anderen Threads (API-Server, asyncio.to_thread) wird in den Event-Loop übergeben.
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                try:
+                    loop.call_soon_threadsafe(self._add_log, chat_id, text, bot_token)
+                    return
+                except RuntimeError:
+                    pass  # Loop wurde inzwischen geschlossen, kein Worker mehr aktiv
+        self._add_log(chat_id, text, bot_token)
+
+    def _add_log(self, chat_id, text: str, bot_token) -> None:
+        self._digest.setdefault((str(chat_id), bot_token), Counter())[str(text)] += 1
+        if self._digest_due is None:
+            self._digest_due = clock.monotonic() + self.digest_delay
+        self._wakeup.set()
+
+    def flush_digest(self) -> None:
+        """Reiht die gesammelten Log-Meldungen als je eine Nachricht pro Chat ein."""
+        digest, self._digest, self._digest_due = self._digest, {}, None
+        for (chat_id, bot_token), lines in digest.items():
+            entries = [line if count == 1 else f"{line} (×{count})" for line, count in lines.items()]
+            if len(entries) == 1:
+                text = entries[0]
+            else:
+                text = f"⚠️ {sum(lines.values())} Warnungen:\n" + "\n".join(f"• {e}" for e in entries)
+            self.enqueue(chat_id, text, bot_token, priority=PRIORITY_LOG)
+
+    def _is_duplicate(self, msg: OutboundMessage) -> bool:
+        now = clock.monotonic()
+        key = (msg.chat_id, msg.text)
+        last = self._recent.get(key)
+        if len(self._recent) > 500:
+            self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+        if last is not None and now - last < self.dedupe_window:
+            return True
+        self._recent[key] = now
+        return False
+
+    # --- Versand ---------------------------------------------------------------
+
+    def _pop_ready(self) -> Tuple[Optional[OutboundMessage], Optional[float]]:
+        """Nächste versandbereite Nachricht (höchste Priorität) oder die Wartezeit bis dahin."""
+        now = clock.monotonic()
+        wait = None
+        for item in sorted(self._heap):
+            msg = item[2]
+            ready_at = max(msg.not_before, self._last_sent.get(msg.chat_id, -self.chat_interval) + self.chat_interval)
+            if ready_at <= now:
+                self._heap.remove(item)
+                heapq.heapify(self._heap)
+                return msg, None
+            wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return None, wait
+
+    async def _send(self, msg: OutboundMessage) -> None:
+        msg.attempts += 1
+        self._last_sent[msg.chat_id] = clock.monotonic()
+        self._inflight = msg
+        try:
+            ok = await telegram_api.send_telegram_message(
+                self.session, msg.chat_id, msg.text, msg.bot_token or self.default_token,
+                reply_markup=msg.reply_markup, parse_mode=msg.parse_mode)
+        except Exception as e:
+            logging.error(f"Fehler beim Versand aus der Telegram-Warteschlange: {e}")
+            ok = False
+        finally:
+            self._inflight = None
+        if ok:
+            self.stats["sent"] += 1
+            if msg.priority == PRIORITY_CRITICAL:
+                self._persist()
+        elif msg.priority == PRIORITY_CRITICAL and msg.attempts < MAX_CRITICAL_ATTEMPTS:
+            msg.not_before = clock.monotonic() + resilience.backoff_delay(msg.attempts, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+            heapq.heappush(self._heap, (msg.priority, next(self._seq), msg))
+            self.stats["retried"] += 1
+        else:
+            self.stats["failed"] += 1
+            if msg.priority == PRIORITY_CRITICAL:
+                self._persist()
+
+    async def drain_once(self) -> Optional[float]:
+        """Versendet höchstens eine Nachricht; gibt die Wartezeit bis zur nächsten zurück (None: nichts zu tun)."""
+        if self._digest_due is not None and clock.monotonic() >= self._digest_due:
+            self.flush_digest()
+        msg, wait = self._pop_ready()
+        if msg is not None:
+            await self._send(msg)
+            return 0.0
+        if self._digest_due is not None:
+            digest_wait = max(0.0, self._digest_due - clock.monotonic())
+            wait = digest_wait if wait is None else min(wait, digest_wait)
+        return wait
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                wait = await self.drain_once()
+            except Exception as e:
+                logging.error(f"Fehler in der Telegram-Warteschlange: {e}")
+                wait = 1.0
+            if wait == 0.0:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, session, default_token: Optional[str] = None, persist_path: Optional[str] = OUTBOX_FILE) -> None:
+        """Startet den Worker und reiht nicht versandte kritische Alarme aus der Datei erneut ein."""
+        self.session = session
+        self.default_token = default_token
+        self.persist_path = persist_path
+        self._loop = asyncio.get_running_loop()
+        self._load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Hält den Worker an; offene kritische Alarme bleiben in der Datei."""
+        self._persist()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Persistenz ------------------------------------------------------------
+
+    def _persist(self) -> None:
+        if not self.persist_path:
+            return
+        messages = ([self._inflight] if self._inflight else []) + [item[2] for item in sorted(self._heap)]
+        pending = [m.to_dict() for m in messages if m.priority == PRIORITY_CRITICAL]
+        try:
+            if not pending:
+                if os.path.exists(self.persist_path):
+                    os.remove(self.persist_path)
+                return
+            tmp = f"{self.persist_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "messages": pending}, f, ensure_ascii=False)
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            logging.error(f"Telegram-Warteschlange konnte nicht gespeichert werden: {e}")
+
+    def _load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, encoding="utf-8") as f:
+                messages = json.load(f).get("messages", [])
+        except (OSError, ValueError) as e:
+            logging.error(f"Telegram-Warteschlange konnte nicht geladen werden: {e}")
+            return
+        for m in messages:
+            self.enqueue(m["chat_id"], m["text"], None, PRIORITY_CRITICAL, m.get("parse_mode"), dedupe=False)
+        if messages:
+            logging.info(f"{len(messages)} nicht versandte kritische Telegram-Alarme erneut eingereiht")
+
+
+_outbox: Optional[OutboundQueue] = None
+
+
+def get_outbox() -> OutboundQueue:
+    global _outbox
+    if _outbox is None:
+        _outbox = OutboundQueue()
+    return _outbox
+
+
+def enqueue_telegram_message(chat_id, message, bot_token=None, priority: int = PRIORITY_NORMAL,
+                             parse_mode: Optional[str] = None, reply_markup=None) -> bool:
+    """Reiht eine Nachricht in die zentrale Warteschlange ein und kehrt sofort zurück."""
+    return get_outbox().enqueue(chat_id, message, bot_token, priority, parse_mode, reply_markup)
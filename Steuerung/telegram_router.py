@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+MAX_HEAVY_PER_USER = 1  # gleichzeitig laufende Diagramme je Nutzer
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_command(text: str) -> str:
+    """'📊 Status' / '/status' / 'STATUS ' -> 'status' (Emojis, Satzzeichen, @botname und Mehrfach-Leerzeichen entfernt)."""
+    text = (text or "").strip().lower()
+    if text.startswith("/"):
+        text = text.split("@", 1)[0]
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+class Command(NamedTuple):
+    handler: Callable[..., Awaitable]
+    needs: Tuple[str, ...] = ()   # Namen der Datenquellen, die vor dem Aufruf geladen werden
+    heavy: bool = False           # läuft nebenläufig (Diagramme), begrenzt je Nutzer
+
+
+class CommandContext:
+    """Daten eines Aufrufs: Eingabetext plus die vom Befehl angeforderten Werte (je Update höchstens einmal geladen)."""
+
+    def __init__(self, router: "TelegramRouter", session, user_id, text: str, key: str):
+        self.session = session
+        self.user_id = user_id
+        self.text = text
+        self.key = key
+        self.data: Dict[str, object] = {}
+        self._router = router
+
+    async def load(self, needs: Tuple[str, ...]) -> None:
+        for name in needs:
+            if name not in self.data:
+                self.data[name] = await self._router.providers[name](self.session)
+
+
+class TelegramRouter:
+    """
+    Tabellengesteuerte Befehlsverteilung: normalisierter Text -> Command, Auflösung per Dict-Zugriff.
+
+    Leichte Befehle laufen in Eingangsreihenfolge. Schwere Befehle (heavy=True) laufen als eigene
+    Tasks, damit z.B. 'Status' nicht hinter 'Verlauf 24h' wartet; je Nutzer höchstens
+    max_heavy_per_user gleichzeitig, und eine identische, noch laufende Anfrage wird nicht
+    ein zweites Mal gestartet.
+    """
+
+    def __init__(self, providers: Dict[str, Callable[..., Awaitable]], fallback: Optional[Command] = None,
+                 pre_dispatch: Optional[Callable[..., Awaitable[bool]]] = None,
+                 on_error: Optional[Callable[..., Awaitable]] = None,
+                 max_heavy_per_user: int = MAX_HEAVY_PER_USER):
+        self.providers = providers
+        self.commands: Dict[str, Command] = {}
+        self.fallback = fallback
+        self.pre_dispatch = pre_dispatch
+        self.on_error = on_error
+        self.max_heavy_per_user = max_heavy_per_user
+        self.stats = {"dispatched": 0, "deduplicated": 0, "unknown": 0}
+        self._limits: Dict[object, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def register(self, names, handler, needs: Tuple[str, ...] = (), heavy: bool = False) -> None:
+        for name in ([names] if isinstance(names, str) else names):
+            key = normalize_command(name)
+            if key in self.commands:
+                raise ValueError(f"Befehl '{key}' doppelt registriert")
+            unknown = [n for n in needs if n not in self.providers]
+            if unknown:
+                raise ValueError(f"Befehl '{key}': unbekannte Datenquellen {unknown}")
+            self.commands[key] = Command(handler, tuple(needs), heavy)
+
+    def resolve(self, text: str) -> Tuple[str, Optional[Command]]:
+        key = normalize_command(text)
+        return key, self.commands.get(key)
+
+    async def dispatch(self, session, update: Dict) -> None:
+        message = update.get("message") or {}
+        text = (message.get("text") or "").strip()
+        if not text:
+            return
+        user_id = (message.get("from") or {}).get("id") or (message.get("chat") or {}).get("id")
+        key, command = self.resolve(text)
+        ctx = CommandContext(self, session, user_id, text, key)
+
+        # Laufende Dialoge (z.B. Urlaubsdauer) haben Vorrang vor der Befehlstabelle
+        if self.pre_dispatch is not None and await self.pre_dispatch(ctx):
+            return
+        if command is None:
+            self.stats["unknown"] += 1
+            command = self.fallback
+            if command is None:
+                return
+        self.stats["dispatched"] += 1
+        if not command.heavy:
+            await self._run(command, ctx)
+            return
+
+        # Alle Antworten gehen an denselben Chat: ein laufendes Diagramm deckt auch die Wiederholung ab
+        running = self._inflight.get(key)
+        if running is not None and not running.done():
+            self.stats["deduplicated"] += 1
+            logging.info(f"Telegram: '{key}' wird bereits erstellt, Anfrage von {user_id} ignoriert")
+            return
+        task = asyncio.create_task(self._run_limited(command, ctx))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+
+    async def _run_limited(self, command: Command, ctx: CommandContext) -> None:
+        limit = self._limits.setdefault(ctx.user_id, asyncio.Semaphore(self.max_heavy_per_user))
+        async with limit:
+            await self._run(command, ctx)
+
+    async def _run(self, command: Command, ctx: CommandContext) -> None:
+        try:
+            await ctx.load(command.needs)
+            await command.handler(ctx)
+        except Exception as e:
+            logging.error(f"Fehler bei der Verarbeitung von '{ctx.text}': {e}", exc_info=True)
+            if self.on_error is not None:
+                await self.on_error(ctx, e)
+
+    async def dispatch_updates(self, session, updates, last_update_id):
+        """Verarbeitet eine Liste von Updates; gibt die nächste erwartete update_id zurück."""
+        for update in updates or []:
+            await self.dispatch(session, update)
+            last_update_id = update["update_id"] + 1
+        return last_update_id
+
+    async def wait_idle(self) -> None:
+        """Wartet auf alle laufenden schweren Befehle (Tests, Herunterfahren)."""
+        tasks = [t for t in self._inflight.values() if not t.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
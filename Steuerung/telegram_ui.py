@@ -58,6 +58,7 @@ async def send_help_message(session, chat_id, bot_token, state):
         "⏱️ *Laufzeiten*: Balkendiagramm der letzten 7 Tage.\n"
         "🌴 *Urlaub*: Aktiviert/Deaktiviert Urlaubsabsenkung.\n"
         "🛁 *Bademodus*: Erhöht WW-Sollwert temporär.\n"
+        "⏱️ *Latenz*: Laufzeiten der Steuerungsschritte (p50/p95/p99).\n"
         "🆘 *Hilfe*: Zeigt diese Nachricht."
     )
     keyboard = get_keyboard(state)
@@ -0,0 +1,109 @@
+import asyncio
+import hmac
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+WEBHOOK_PATH = "/telegram/webhook"
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+HEALTH_CHECK_INTERVAL_S = 600.0   # so oft getWebhookInfo prüfen
+POLLING_FALLBACK_S = 1800.0       # nach einer Störung so lange per getUpdates abfragen
+MAX_PENDING = 100
+
+# Telegram erlaubt 1-256 Zeichen A-Z, a-z, 0-9, _ und -
+_SECRET_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+
+def valid_secret(secret: Optional[str]) -> bool:
+    return bool(secret) and _SECRET_PATTERN.fullmatch(secret) is not None
+
+
+def webhook_unhealthy(info: Optional[Dict], now_ts: Optional[float] = None,
+                      window_s: float = HEALTH_CHECK_INTERVAL_S) -> bool:
+    """True, wenn Telegram Updates nicht zustellen kann (Fehler im letzten Prüfintervall und Rückstau)."""
+    if info is None:
+        return False  # Bot-API nicht erreichbar: kein Hinweis auf einen defekten Webhook
+    if not info.get("url"):
+        return True
+    now_ts = time.time() if now_ts is None else now_ts
+    last_error = info.get("last_error_date") or 0
+    return now_ts - last_error < window_s and info.get("pending_update_count", 0) > 0
+
+
+class WebhookInbox:
+    """
+    Übergabe der per Webhook empfangenen Updates vom API-Thread (uvicorn) an die Ereignisschleife
+    des Telegram-Tasks. Telegram wiederholt Zustellungen bei Timeouts, daher werden bereits
+    gesehene update_ids verworfen.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self.secret: Optional[str] = None
+        self.received = 0
+        self.rejected = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._seen = deque(maxlen=500)
+
+    @property
+    def active(self) -> bool:
+        return self._loop is not None
+
+    def activate(self, secret: str) -> None:
+        """Im Telegram-Task aufrufen: bindet die Inbox an dessen Ereignisschleife."""
+        self.secret = secret
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_pending)
+
+    def deactivate(self) -> None:
+        self._loop = None
+        self.secret = None
+
+    def verify(self, token: Optional[str]) -> bool:
+        ok = bool(self.secret) and token is not None and hmac.compare_digest(token.encode(), self.secret.encode())
+        if not ok:
+            self.rejected += 1
+        return ok
+
+    def submit(self, update: Dict) -> bool:
+        """Threadsicher; False, wenn der Webhook-Betrieb nicht aktiv ist."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        loop.call_soon_threadsafe(self._put, update)
+        return True
+
+    def _put(self, update: Dict) -> None:
+        update_id = update.get("update_id")
+        if update_id in self._seen:
+            return
+        self._seen.append(update_id)
+        try:
+            self._queue.put_nowait(update)
+            self.received += 1
+        except asyncio.QueueFull:
+            logging.warning(f"Telegram-Webhook: Rückstau, Update {update_id} verworfen")
+
+    async def get_batch(self, timeout: float) -> List[Dict]:
+        """Wartet bis zu timeout Sekunden auf Updates und liefert alle bereits vorliegenden."""
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+
+_inbox: Optional[WebhookInbox] = None
+
+
+def get_inbox() -> WebhookInbox:
+    global _inbox
+    if _inbox is None:
+        _inbox = WebhookInbox()
+    return _inbox
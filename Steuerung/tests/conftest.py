@@ -1,5 +1,6 @@
 import sys
 import os
+from datetime import datetime
 from unittest.mock import MagicMock
 import pytest
 
@@ -30,6 +31,46 @@ sys.modules["RPLCD.i2c"] = mock_rplcd
 # Mock w1thermsensor (just in case)
 sys.modules["w1thermsensor"] = MagicMock()
 
+import clock
+from config_manager import AppConfig
+from state import State
+
+
+class StaticConfigManager:
+    """ConfigManager ohne Datei: liefert immer die Standard-Config."""
+
+    def __init__(self):
+        self.config = AppConfig()
+
+    def get(self):
+        return self.config
+
+
+@pytest.fixture
+def make_state():
+    """Erzeugt State-Objekte mit Standard-Config."""
+    return lambda: State(StaticConfigManager())
+
+
+@pytest.fixture
+def virtual_clock(request):
+    """Installiert eine VirtualClock; Startzeit per VIRTUAL_CLOCK_START im Testmodul, sonst 07.06.2024 12:00."""
+    vc = clock.VirtualClock(getattr(request.module, "VIRTUAL_CLOCK_START", datetime(2024, 6, 7, 12, 0)))
+    clock.set_clock(vc)
+    yield vc
+    clock.reset_clock()
+
+
+@pytest.fixture
+def set_time():
+    """Stellt die Uhr auf einen festen Zeitpunkt (VirtualClock); auch mehrfach je Test."""
+    def install(moment):
+        vc = clock.VirtualClock(moment)
+        clock.set_clock(vc)
+        return vc
+    yield install
+    clock.reset_clock()
+
 @pytest.fixture
 def mock_aioresponse():
     """Fixture to mock aiohttp responses if needed."""
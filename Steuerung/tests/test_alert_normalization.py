@@ -1,42 +1,54 @@
 import pytest
+import pytz
+from datetime import timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
-from main import check_and_send_alerts
+import events
+from main import check_and_send_alerts, register_event_subscribers
+from reasons import Block, Reason
 
 @pytest.mark.asyncio
 async def test_check_and_send_alerts_normalization():
-    """Verifies that dynamic blocking reasons only trigger a single notification."""
+    """Verifies that blocking reasons with changing parameters only trigger a single notification."""
     state = MagicMock()
-    state.control.blocking_reason = "Min. Pause (noch 2m 00s)"
-    state.control.last_alert_type = ""
+    state.control.blocking_reason = Reason(Block.MIN_PAUSE, remaining=timedelta(minutes=2))
+    state.control.last_alert_code = Block.NONE
+    state.local_tz = pytz.timezone("Europe/Berlin")
     state.config.Telegram.CHAT_ID = "123"
     state.config.Telegram.BOT_TOKEN = "abc"
     
     session = AsyncMock()
+    bus = events.EventBus()
+    register_event_subscribers(bus, state)
     
-    with patch('control_logic.send_telegram_message', new_callable=AsyncMock) as mock_send:
+    with patch.object(events, '_bus', bus), patch('telegram_queue.enqueue_telegram_message') as mock_send:
         # 1. Initial notification
         await check_and_send_alerts(session, state)
         assert mock_send.call_count == 1
-        assert "Min. Pause (noch 2m 00s)" in mock_send.call_args[0][2]
+        assert "Min. Pause (noch 2m 0s)" in mock_send.call_args[0][1]
         
         # 2. Same reason, different time -> Should NOT notify
-        state.control.blocking_reason = "Min. Pause (noch 1m 45s)"
+        state.control.blocking_reason = Reason(Block.MIN_PAUSE, remaining=timedelta(minutes=1, seconds=45))
         await check_and_send_alerts(session, state)
         assert mock_send.call_count == 1
         
         # 3. Different reason -> Should notify
-        state.control.blocking_reason = "Verdampfer zu kalt (5.5°C < 6°C)"
+        state.control.blocking_reason = Reason(Block.EVAPORATOR_COLD, value=5.5, limit=6)
         await check_and_send_alerts(session, state)
         assert mock_send.call_count == 2
-        assert "Verdampfer zu kalt" in mock_send.call_args[0][2]
+        assert "Verdampfer zu kalt (5.5°C < 6°C)" in mock_send.call_args[0][1]
         
-        # 4. Same reason, different temp -> Should NOT notify
-        state.control.blocking_reason = "Verdampfer zu kalt (5.2°C < 6°C)"
+        # 4. Same reason, different temp (and hysteresis phase) -> Should NOT notify
+        state.control.blocking_reason = Reason(Block.EVAPORATOR_COLD, value=5.2, limit=9, waiting=True)
+        await check_and_send_alerts(session, state)
+        assert mock_send.call_count == 2
+
+        # 5. Info codes (solar window, target reached) are no alarms
+        state.control.blocking_reason = Reason(Block.SOLAR_WINDOW)
         await check_and_send_alerts(session, state)
         assert mock_send.call_count == 2
         
-        # 5. Clearance -> No notification (we only notify for blocks)
+        # 6. Clearance -> No notification (we only notify for blocks)
         state.control.blocking_reason = None
         await check_and_send_alerts(session, state)
         assert mock_send.call_count == 2
-        assert state.control.last_alert_type == ""
+        assert state.control.last_alert_code == Block.NONE
@@ -0,0 +1,71 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+import pytz
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import clock
+import logic_utils
+import schedule
+
+
+VIRTUAL_CLOCK_START = datetime(2024, 3, 30, 23, 0, 0)  # vor der Umstellung auf Sommerzeit
+
+
+def test_virtual_clock_advances_only_explicitly(virtual_clock):
+    tz = pytz.timezone("Europe/Berlin")
+    assert clock.now(tz) == tz.localize(datetime(2024, 3, 30, 23, 0, 0))
+    assert clock.now(tz) == clock.now(tz)
+    virtual_clock.advance(3600)
+    assert clock.now() == datetime(2024, 3, 31, 0, 0, 0)
+    assert clock.monotonic() == 3600
+
+
+def test_virtual_clock_handles_dst_switch(virtual_clock):
+    # 31.03.2024 02:00 -> 03:00 (Sommerzeit): 4h Echtzeit ab 23:00 ergeben 04:00 Ortszeit
+    virtual_clock.advance(4 * 3600)
+    assert clock.now() == datetime(2024, 3, 31, 4, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_virtual_sleep_does_not_block(virtual_clock):
+    await clock.get_clock().sleep(600)
+    assert clock.now() == datetime(2024, 3, 30, 23, 10, 0)
+
+
+def test_logic_uses_installed_clock(virtual_clock):
+    config = type("C", (), {})()
+    config.Heizungssteuerung = type("H", (), {"NACHTABSENKUNG_START": "22:00", "NACHTABSENKUNG_END": "06:00"})()
+    assert logic_utils.is_nighttime(config) is True
+    virtual_clock.advance(10 * 3600)
+    assert logic_utils.is_nighttime(config) is False
+
+
+def test_clock_has_no_app_imports():
+    # clock ist die unterste Schicht; TickContext liegt in schedule
+    import ast
+    with open(clock.__file__, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imported = {alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names}
+    assert imported <= {"asyncio", "time", "pytz"}
+
+
+@pytest.mark.parametrize("start,end", [("22:00", "06:00"), ("19:30", "08:00"), ("01:00", "05:00")])
+def test_tick_context_matches_legacy_schedule_checks(virtual_clock, start, end):
+    tz = pytz.timezone("Europe/Berlin")
+    config = type("C", (), {})()
+    config.Heizungssteuerung = type("H", (), {
+        "NACHTABSENKUNG_START": start, "NACHTABSENKUNG_END": end,
+        "UEBERGANGSMODUS_MORGENS_ENDE": "10:00", "UEBERGANGSMODUS_ABENDS_START": "17:00",
+    })()
+    state = type("S", (), {"local_tz": tz, "config": config})()
+
+    for _ in range(24 * 4):
+        virtual_clock.advance(15 * 60)
+        ctx = schedule.tick_context(tz, config)
+        assert logic_utils.is_nighttime(config, ctx) == logic_utils.is_nighttime(config)
+        assert logic_utils.ist_uebergangsmodus_aktiv(state, ctx) == logic_utils.ist_uebergangsmodus_aktiv(state)
+        assert logic_utils.is_solar_window(config, state, ctx) == logic_utils.is_solar_window(config, state)
+
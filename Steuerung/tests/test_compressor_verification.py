@@ -34,7 +34,7 @@ def mock_state():
     return state
 
 @pytest.mark.asyncio
-async def test_verification_delayed_default_10_min(mock_state):
+async def test_verification_delayed_default_10_min(mock_state, set_time):
     """
     Test that verification is skipped (returns True) if time < 10 minutes (new default).
     """
@@ -46,24 +46,18 @@ async def test_verification_delayed_default_10_min(mock_state):
     mock_state.kompressor_verification_start_t_verd = 10.0
     mock_state.kompressor_verification_start_t_unten = 30.0
     
-    with pytest.MonkeyPatch.context() as m:
-        class MockDateTime(datetime):
-            @classmethod
-            def now(cls, tz=None):
-                return now
-        # Must patch where it's USED: safety_logic imports datetime
-        m.setattr("safety_logic.datetime", MockDateTime)
-        
-        # Should return True because elapsed time (9m) < default delay (10m)
-        is_running, error_msg = await verify_compressor_running(
-            mock_state, None, current_t_verd=8.0, current_t_unten=30.0
-        )
-        
-        assert is_running is True
-        assert error_msg is None
+    set_time(now)
+
+    # Should return True because elapsed time (9m) < default delay (10m)
+    is_running, error_msg = await verify_compressor_running(
+        mock_state, None, current_t_verd=8.0, current_t_unten=30.0
+    )
+
+    assert is_running is True
+    assert error_msg is None
 
 @pytest.mark.asyncio
-async def test_verification_success_cold_start(mock_state):
+async def test_verification_success_cold_start(mock_state, set_time):
     """
     Test "Cold Start / Restart" scenario.
     Start T_Verd is low (< 15), Current T_Verd is low (< 12), and did not rise significantly.
@@ -76,22 +70,17 @@ async def test_verification_success_cold_start(mock_state):
     mock_state.kompressor_verification_start_t_verd = 5.0  # Cold start
     mock_state.kompressor_verification_start_t_unten = 30.0
     
-    with pytest.MonkeyPatch.context() as m:
-         class MockDateTime(datetime):
-            @classmethod
-            def now(cls, tz=None):
-                return now
-         m.setattr("safety_logic.datetime", MockDateTime)
-         
-         is_running, error_msg = await verify_compressor_running(
-            mock_state, None, current_t_verd=5.2, current_t_unten=30.5
-        )
-         
-         assert is_running is True
-         assert error_msg is None
+    set_time(now)
+
+    is_running, error_msg = await verify_compressor_running(
+        mock_state, None, current_t_verd=5.2, current_t_unten=30.5
+    )
+
+    assert is_running is True
+    assert error_msg is None
 
 @pytest.mark.asyncio
-async def test_verification_success_normal_drop(mock_state):
+async def test_verification_success_normal_drop(mock_state, set_time):
     """
     Test standard success case: significant temperature drop.
     """
@@ -102,23 +91,18 @@ async def test_verification_success_normal_drop(mock_state):
     mock_state.kompressor_verification_start_t_verd = 20.0
     mock_state.kompressor_verification_start_t_unten = 30.0
     
-    with pytest.MonkeyPatch.context() as m:
-         class MockDateTime(datetime):
-            @classmethod
-            def now(cls, tz=None):
-                return now
-         m.setattr("safety_logic.datetime", MockDateTime)
-         
-         # Drop 2.0 deg (20 -> 18) > 1.5 threshold
-         is_running, error_msg = await verify_compressor_running(
-            mock_state, None, current_t_verd=18.0, current_t_unten=30.3
-        )
-         
-         assert is_running is True
-         assert error_msg is None
+    set_time(now)
+
+    # Drop 2.0 deg (20 -> 18) > 1.5 threshold
+    is_running, error_msg = await verify_compressor_running(
+        mock_state, None, current_t_verd=18.0, current_t_unten=30.3
+    )
+
+    assert is_running is True
+    assert error_msg is None
 
 @pytest.mark.asyncio
-async def test_verification_failure(mock_state):
+async def test_verification_failure(mock_state, set_time):
     """
     Test failure: not cold enough, no drop.
     """
@@ -129,17 +113,12 @@ async def test_verification_failure(mock_state):
     mock_state.kompressor_verification_start_t_verd = 20.0 # Warm start
     mock_state.kompressor_verification_start_t_unten = 30.0
     
-    with pytest.MonkeyPatch.context() as m:
-         class MockDateTime(datetime):
-             @classmethod
-             def now(cls, tz=None):
-                 return now
-         m.setattr("safety_logic.datetime", MockDateTime)
+    set_time(now)
+
+    # No drop (20 -> 20), not cold start (< 15)
+    is_running, error_msg = await verify_compressor_running(
+        mock_state, None, current_t_verd=20.0, current_t_unten=30.3
+    )
 
-         # No drop (20 -> 20), not cold start (< 15)
-         is_running, error_msg = await verify_compressor_running(
-            mock_state, None, current_t_verd=20.0, current_t_unten=30.3
-        )
-         
-         assert is_running is False
-         assert "Verdampfer: nur 0.0°C Abfall" in error_msg
+    assert is_running is False
+    assert "Verdampfer: nur 0.0°C Abfall" in error_msg
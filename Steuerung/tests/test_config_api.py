@@ -0,0 +1,112 @@
+import pytest
+import sys
+import os
+import asyncio
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import api
+import config_watcher
+from config_manager import ConfigManager, patch_ini
+from config_watcher import ConfigWatcher
+from state import State
+
+CONFIG = """# Hauptkonfiguration
+[Heizungssteuerung]
+# Schaltpunkte in °C
+EINSCHALTPUNKT = 40
+AUSSCHALTPUNKT = 45
+
+[Telegram]
+CHAT_ID = 1
+"""
+
+
+def test_patch_ini_keeps_comments_and_order():
+    text = patch_ini(CONFIG, {
+        "Heizungssteuerung": {"AUSSCHALTPUNKT": "47", "TEMP_OFFSET": "2"},
+        "Planung": {"AKTIV": "True"},
+    })
+    assert text == (
+        "# Hauptkonfiguration\n"
+        "[Heizungssteuerung]\n"
+        "# Schaltpunkte in °C\n"
+        "EINSCHALTPUNKT = 40\n"
+        "AUSSCHALTPUNKT = 47\n"
+        "TEMP_OFFSET = 2\n"
+        "\n"
+        "[Telegram]\n"
+        "CHAT_ID = 1\n"
+        "\n"
+        "[Planung]\n"
+        "AKTIV = True\n"
+    )
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    path = tmp_path / "config.ini"
+    path.write_text(CONFIG, encoding="utf-8")
+    manager = ConfigManager(str(path))
+    state = State(manager)
+    watcher = ConfigWatcher(manager)
+    seen = []
+    watcher.subscribe(lambda old, new: seen.append(new))
+    watcher.subscribe(lambda old, new: setattr(state, "config", new))
+    monkeypatch.setattr(api, "shared_state", state)
+    monkeypatch.setattr(config_watcher, "_watcher", watcher)
+    return path, manager, state, watcher, seen
+
+
+def test_batch_update_is_persisted_and_applied(setup):
+    path, manager, state, watcher, seen = setup
+    client = TestClient(api.app)
+    response = client.post("/config", json={"updates": [
+        {"section": "Heizungssteuerung", "key": "EINSCHALTPUNKT", "value": "38"},
+        {"section": "Telegram", "key": "CHAT_ID", "value": "42"},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["updated"] == {"Heizungssteuerung.EINSCHALTPUNKT": 38, "Telegram.CHAT_ID": "42"}
+
+    # ein Schreibvorgang, Kommentare bleiben, Verbraucher sehen die neue Config sofort
+    text = path.read_text(encoding="utf-8")
+    assert "# Schaltpunkte in °C\nEINSCHALTPUNKT = 38\n" in text and "CHAT_ID = 42" in text
+    assert not os.path.exists(f"{path}.tmp")
+    assert len(seen) == 1 and state.config.Heizungssteuerung.EINSCHALTPUNKT == 38
+    # der eigene Schreibvorgang löst keinen erneuten Reload aus
+    assert asyncio.run(watcher.check()) is False
+    # ein späteres Neuladen aus der Datei liefert denselben Stand
+    assert ConfigManager(str(path)).get() == manager.get()
+
+
+def test_single_update_keeps_old_response(setup):
+    path, manager, state, watcher, seen = setup
+    response = TestClient(api.app).post("/config", json={"section": "Heizungssteuerung", "key": "AUSSCHALTPUNKT", "value": "48"})
+    assert response.json()["message"] == "Updated Heizungssteuerung.AUSSCHALTPUNKT to 48"
+    assert "AUSSCHALTPUNKT = 48" in path.read_text(encoding="utf-8")
+
+
+def test_invalid_batch_changes_nothing(setup):
+    path, manager, state, watcher, seen = setup
+    client = TestClient(api.app)
+    response = client.post("/config", json={"updates": [
+        {"section": "Telegram", "key": "CHAT_ID", "value": "42"},
+        {"section": "Heizungssteuerung", "key": "EINSCHALTPUNKT", "value": "warm"},
+    ]})
+    assert response.status_code == 400
+    assert client.post("/config", json={"section": "Heizungssteuerung", "key": "GIBTS_NICHT", "value": "1"}).status_code == 404
+    assert path.read_text(encoding="utf-8") == CONFIG
+    assert seen == [] and manager.get().Telegram.CHAT_ID == "1"
+
+
+def test_values_that_do_not_compile_are_rejected(setup):
+    path, manager, state, watcher, seen = setup
+    client = TestClient(api.app)
+    for key, value in [("NACHTABSENKUNG_START", "22.00"), ("NACHTABSENKUNG", "50"),
+                       ("ZUSAETZLICHE_ABSENKUNGEN", "12:00-25:00")]:
+        response = client.post("/config", json={"section": "Heizungssteuerung", "key": key, "value": value})
+        assert response.status_code == 400, key
+    assert path.read_text(encoding="utf-8") == CONFIG
+    assert seen == []
@@ -0,0 +1,97 @@
+import pytest
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config_watcher
+from config_manager import ConfigManager
+from config_watcher import ConfigWatcher
+
+CONFIG = """[Heizungssteuerung]
+EINSCHALTPUNKT = {ein}
+AUSSCHALTPUNKT = 45
+
+[Telegram]
+CHAT_ID = {chat}
+"""
+
+
+def write(path, ein=40, chat="1"):
+    path.write_text(CONFIG.format(ein=ein, chat=chat), encoding="utf-8")
+
+
+def test_invalid_section_keeps_previous_values(tmp_path):
+    path = tmp_path / "config.ini"
+    write(path, ein=40, chat="1")
+    manager = ConfigManager(str(path))
+    assert manager.get().Heizungssteuerung.EINSCHALTPUNKT == 40
+
+    write(path, ein="warm", chat="2")
+    manager.load_config()
+    # Die ungültige Sektion bleibt beim alten Stand, die gültige wird übernommen
+    assert manager.get().Heizungssteuerung.EINSCHALTPUNKT == 40
+    assert manager.get().Telegram.CHAT_ID == "2"
+    assert manager.invalid_sections == ["Heizungssteuerung"]
+
+
+async def wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "Zeitüberschreitung"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+async def test_watcher_swaps_config_and_notifies(tmp_path, monkeypatch, inotify):
+    if not inotify:
+        def unavailable(*args, **kwargs):
+            raise OSError("kein inotify")
+        monkeypatch.setattr(config_watcher, "_Inotify", unavailable)
+    path = tmp_path / "config.ini"
+    write(path, ein=40)
+    manager = ConfigManager(str(path))
+    watcher = ConfigWatcher(manager, debounce_s=0.05, poll_interval_s=0.05)
+    seen = []
+    watcher.subscribe(lambda old, new: seen.append((old.Heizungssteuerung.EINSCHALTPUNKT, new.Heizungssteuerung.EINSCHALTPUNKT)))
+    await watcher.start()
+    try:
+        assert watcher.mode == ("inotify" if inotify else "stat")
+        await asyncio.sleep(0.1)
+        assert seen == []  # ohne Änderung kein Reload
+
+        # atomar ersetzen, wie es Editoren und die API tun
+        tmp = tmp_path / "config.ini.tmp"
+        tmp.write_text(CONFIG.format(ein=38, chat="1"), encoding="utf-8")
+        os.replace(tmp, path)
+        await wait_for(lambda: seen)
+        assert seen == [(40, 38)]
+        assert manager.get().Heizungssteuerung.EINSCHALTPUNKT == 38
+
+        # Eigenes Schreiben, das bereits aktiv ist, löst keinen Reload aus
+        write(path, ein=38, chat="1")
+        watcher.mark_current()
+        await asyncio.sleep(0.2)
+        assert watcher.reloads == 1
+    finally:
+        await watcher.stop()
+
+
+async def test_reload_keeps_only_the_section_that_does_not_compile(tmp_path):
+    path = tmp_path / "config.ini"
+    write(path, ein=40, chat="1")
+    manager = ConfigManager(str(path))
+    watcher = ConfigWatcher(manager)
+
+    # zwei Sektionen geändert; ZUSAETZLICHE_ABSENKUNGEN validiert als Text, kompiliert aber nicht
+    path.write_text(CONFIG.format(ein=38, chat="2").replace(
+        "AUSSCHALTPUNKT = 45", "AUSSCHALTPUNKT = 45\nZUSAETZLICHE_ABSENKUNGEN = 12:00-25:00"), encoding="utf-8")
+    assert await watcher.reload() is True
+    assert manager.get().Telegram.CHAT_ID == "2"
+    assert manager.get().Heizungssteuerung.EINSCHALTPUNKT == 40
+    assert manager.invalid_sections == ["Heizungssteuerung"]
+
+    write(path, ein=38, chat="2")
+    assert await watcher.check() is True
+    assert manager.get().Heizungssteuerung.EINSCHALTPUNKT == 38 and manager.invalid_sections == []
@@ -10,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from control_logic import determine_mode_and_setpoints, check_pressure_and_config
 import configparser
+from reasons import Block
 
 @pytest.fixture
 def mock_state():
@@ -195,7 +196,7 @@ async def test_check_pressure_and_config_only_pressure(mock_state):
     # calc_hash.assert_called_once() # Hashes logic removed/simplified
 
 @pytest.mark.asyncio
-async def test_determine_mode_none_solar_values(mock_state):
+async def test_determine_mode_none_solar_values(mock_state, set_time):
     """Test handling of None values for solar data (API failure)."""
     # Setup state with None values
     mock_state.solar.batpower = None
@@ -208,15 +209,13 @@ async def test_determine_mode_none_solar_values(mock_state):
     # Mock time to 12:00 (Normalmodus, outside night/transition)
     fixed_time = datetime(2023, 1, 1, 12, 0, 0, tzinfo=mock_state.local_tz)
     
-    with patch('logic_utils.datetime') as mock_dt:
-        mock_dt.now.return_value = fixed_time
-        # Re-apply side effects if needed, or just relying on now() is enough for determine_mode
-        
-        # These should proceed without error
-        result = await determine_mode_and_setpoints(mock_state, 40.0, 45.0)
-        
-        assert mock_state.control.solar_ueberschuss_aktiv is False
-        assert result['modus'] == "Normalmodus"
+    set_time(fixed_time)
+
+    # These should proceed without error
+    result = await determine_mode_and_setpoints(mock_state, 40.0, 45.0)
+
+    assert mock_state.control.solar_ueberschuss_aktiv is False
+    assert result['modus'] == "Normalmodus"
 
 @pytest.mark.asyncio
 async def test_determine_mode_transition_frostschutz(mock_state):
@@ -264,4 +263,5 @@ async def test_handle_compressor_on_prevents_immediate_off(mock_state):
     
     assert result is False
     set_kompressor_status.assert_not_called()
-    assert mock_state.control.blocking_reason == "Zieltemp erreicht"
+    assert mock_state.control.blocking_reason.code == Block.TARGET_REACHED
+    assert str(mock_state.control.blocking_reason) == "Zieltemp erreicht"
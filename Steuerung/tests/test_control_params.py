@@ -0,0 +1,51 @@
+import pytest
+import sys
+import os
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import schedule
+import control_params
+from config_manager import AppConfig
+from control_params import compile_params, get_params
+
+
+def make_config(**heizung):
+    config = AppConfig()
+    return config.model_copy(update={"Heizungssteuerung": config.Heizungssteuerung.model_copy(update=heizung)})
+
+
+def test_compiles_plain_values_once_per_config():
+    config = make_config(EINSCHALTPUNKT=40, NACHTABSENKUNG=5.0, MIN_LAUFZEIT=15)
+    params = get_params(config)
+    assert params.night_einschaltpunkt == 35.0
+    assert params.min_laufzeit == timedelta(minutes=15)
+    assert params.reduction(night=True, urlaub=False) == 5.0
+    assert params.reduction(night=True, urlaub=True) == 5.0 + config.Urlaubsmodus.URLAUBSABSENKUNG
+    # gleiche Config -> dasselbe Objekt, neue Config -> neu kompiliert
+    assert get_params(config) is params
+    assert get_params(make_config(EINSCHALTPUNKT=41)).einschaltpunkt == 41
+
+
+def test_invalid_values_fall_back_to_defaults():
+    config = MagicMock()
+    config.Heizungssteuerung.NACHTABSENKUNG = 50.0   # außerhalb 0..35
+    config.Heizungssteuerung.SICHERHEITS_TEMP = float("nan")
+    config.Heizungssteuerung.EINSCHALTPUNKT = 40
+    params = compile_params(config)
+    defaults = compile_params(AppConfig())
+    assert params.nacht_reduction == 0.0
+    assert params.sicherheits_temp == defaults.sicherheits_temp
+    assert params.einschaltpunkt == 40
+    assert params.min_pause == defaults.min_pause  # MagicMock ist keine Zahl
+
+
+def test_tick_keeps_params_of_its_config():
+    config = make_config(EINSCHALTPUNKT=40)
+    state = type("S", (), {"config": config})()
+    ctx = schedule.tick_context(None, config)
+    state.config = make_config(EINSCHALTPUNKT=44)  # z.B. Reload mitten im Tick
+    assert control_params.current(state, ctx).einschaltpunkt == 40
+    assert control_params.current(state).einschaltpunkt == 44
@@ -7,6 +7,8 @@ import os
 import asyncio
 import configparser
 
+import clock
+
 # Ensure we can import from parent directory
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -125,101 +127,92 @@ async def run_simulation_scenario(scenario_name, steps, config):
     async def mock_send_telegram(session, chat_id, message, token, parse_mode=None):
         pass
 
-    # CRITICAL: Patch datetime in ALL modules that use it for time logic
-    with patch('control_logic.datetime') as mock_dt_ctrl, \
-         patch('logic_utils.datetime') as mock_dt_utils, \
-         patch('safety_logic.datetime') as mock_dt_safety, \
-         patch('control_logic.is_nighttime') as mock_is_night, \
-         patch('control_logic.is_solar_window') as mock_is_solar, \
-         patch('telegram_api.send_telegram_message', side_effect=mock_send_telegram):
-        
-        # Setup mocks to return consistent simulation time
-        def get_current_time(tz=None):
-            return current_sim_time.replace(tzinfo=tz if tz else None)
-            
-        mock_dt_ctrl.now.side_effect = get_current_time
-        mock_dt_utils.now.side_effect = get_current_time
-        mock_dt_safety.now.side_effect = get_current_time
-        
-        # Ensure strptime works (needed by logic_utils)
-        mock_dt_utils.strptime.side_effect = datetime.strptime
-        mock_dt_ctrl.strptime.side_effect = datetime.strptime
-
-        def update_mocks(sim_time):
-            t = sim_time.time()
-            night_start = datetime.strptime(config["Heizungssteuerung"].get("NACHTABSENKUNG_START", "22:00"), "%H:%M").time()
-            night_end = datetime.strptime(config["Heizungssteuerung"].get("NACHTABSENKUNG_END", "06:00"), "%H:%M").time()
+    # Simulationszeit über die virtuelle Uhr; Nacht/Solarfenster bleiben gemockt
+    sim_clock = clock.VirtualClock(local_tz.localize(start_date))
+    clock.set_clock(sim_clock)
+    try:
+        with patch('control_logic.is_nighttime') as mock_is_night, \
+             patch('control_logic.is_solar_window') as mock_is_solar, \
+             patch('telegram_api.send_telegram_message', side_effect=mock_send_telegram):
+
+            def update_mocks(sim_time):
+                t = sim_time.time()
+                night_start = datetime.strptime(config["Heizungssteuerung"].get("NACHTABSENKUNG_START", "22:00"), "%H:%M").time()
+                night_end = datetime.strptime(config["Heizungssteuerung"].get("NACHTABSENKUNG_END", "06:00"), "%H:%M").time()
             
-            if night_start <= night_end:
-                mock_is_night.return_value = (night_start <= t <= night_end)
-            else:
-                mock_is_night.return_value = (night_start <= t or t <= night_end)
+                if night_start <= night_end:
+                    mock_is_night.return_value = (night_start <= t <= night_end)
+                else:
+                    mock_is_night.return_value = (night_start <= t or t <= night_end)
             
-            mock_is_solar.return_value = (time(8,0) <= t < time(18,0))
+                mock_is_solar.return_value = (time(8,0) <= t < time(18,0))
 
-        for step in steps:
-            hour, minute, t_mittig, t_unten, bat_power, soc, desc = step[:7]
-            t_oben = step[7] if len(step) > 7 else t_mittig 
-            t_verd = step[8] if len(step) > 8 else 10.0
+            for step in steps:
+                hour, minute, t_mittig, t_unten, bat_power, soc, desc = step[:7]
+                t_oben = step[7] if len(step) > 7 else t_mittig 
+                t_verd = step[8] if len(step) > 8 else 10.0
             
-            current_sim_time = local_tz.localize(start_date.replace(hour=hour, minute=minute))
-            update_mocks(current_sim_time)
+                current_sim_time = local_tz.localize(start_date.replace(hour=hour, minute=minute))
+                sim_clock.advance((current_sim_time - sim_clock.now(local_tz)).total_seconds())
+                update_mocks(current_sim_time)
             
-            mock_state.solar.batpower = bat_power
-            mock_state.solar.soc = soc
-            mock_state.sensors.t_verd = t_verd # Optional but good
+                mock_state.solar.batpower = bat_power
+                mock_state.solar.soc = soc
+                mock_state.sensors.t_verd = t_verd # Optional but good
             
-            setpoints = await determine_mode_and_setpoints(mock_state, t_unten, t_mittig)
+                setpoints = await determine_mode_and_setpoints(mock_state, t_unten, t_mittig)
             
-            safety_ok = await check_sensors_and_safety(
-                None, mock_state, t_oben=t_oben, t_unten=t_unten, t_mittig=t_mittig, t_verd=t_verd, 
-                set_kompressor_status_func=mock_set_kompressor
-            )
+                safety_ok = await check_sensors_and_safety(
+                    None, mock_state, t_oben=t_oben, t_unten=t_unten, t_mittig=t_mittig, t_verd=t_verd, 
+                    set_kompressor_status_func=mock_set_kompressor
+                )
             
-            if safety_ok:
-                min_run = timedelta(minutes=int(config["Heizungssteuerung"]["MIN_LAUFZEIT"]))
-                min_pause = timedelta(minutes=int(config["Heizungssteuerung"]["MIN_PAUSE"]))
+                if safety_ok:
+                    min_run = timedelta(minutes=int(config["Heizungssteuerung"]["MIN_LAUFZEIT"]))
+                    min_pause = timedelta(minutes=int(config["Heizungssteuerung"]["MIN_PAUSE"]))
                 
-                if mock_state.control.kompressor_ein:
-                    await handle_compressor_off(
-                        mock_state, None, setpoints['regelfuehler'], setpoints['ausschaltpunkt'], 
-                        min_run, t_oben, mock_set_kompressor
-                    )
-                else:
-                    await handle_compressor_on(
-                        mock_state, None, setpoints['regelfuehler'], setpoints['einschaltpunkt'], 
-                        setpoints['ausschaltpunkt'], min_run, min_pause, 
-                        mock_is_solar.return_value, t_oben, mock_set_kompressor
-                    )
+                    if mock_state.control.kompressor_ein:
+                        await handle_compressor_off(
+                            mock_state, None, setpoints['regelfuehler'], setpoints['ausschaltpunkt'], 
+                            min_run, t_oben, mock_set_kompressor
+                        )
+                    else:
+                        await handle_compressor_on(
+                            mock_state, None, setpoints['regelfuehler'], setpoints['einschaltpunkt'], 
+                            setpoints['ausschaltpunkt'], min_run, min_pause, 
+                            mock_is_solar.return_value, t_oben, mock_set_kompressor
+                        )
             
-            time_str = current_sim_time.strftime("%H:%M")
-            comp_str = "AN" if mock_state.control.kompressor_ein else "AUS"
-            solar_str = f"{bat_power}W"
-            temp_str = f"{t_oben}/{t_mittig}/{t_unten}"
-            regel_str = f"{setpoints['regelfuehler']}"
-            ein_str = f"{setpoints['einschaltpunkt']}"
-            aus_str = f"{setpoints['ausschaltpunkt']}"
+                time_str = current_sim_time.strftime("%H:%M")
+                comp_str = "AN" if mock_state.control.kompressor_ein else "AUS"
+                solar_str = f"{bat_power}W"
+                temp_str = f"{t_oben}/{t_mittig}/{t_unten}"
+                regel_str = f"{setpoints['regelfuehler']}"
+                ein_str = f"{setpoints['einschaltpunkt']}"
+                aus_str = f"{setpoints['ausschaltpunkt']}"
             
-            # Validation logic
-            t = current_sim_time.time()
-            is_transition = ((time(8,0) <= t <= time(10,0)) or (time(18,0) <= t <= time(19,30)))
-            has_solar = bat_power > 600 or (soc >= 95 and False) # Simplified
+                # Validation logic
+                t = current_sim_time.time()
+                is_transition = ((time(8,0) <= t <= time(10,0)) or (time(18,0) <= t <= time(19,30)))
+                has_solar = bat_power > 600 or (soc >= 95 and False) # Simplified
             
-            validation_suffix = ""
-            if is_transition and not has_solar and t_mittig < setpoints['einschaltpunkt']:
-                night_setpoint = float(config["Heizungssteuerung"].get("EINSCHALTPUNKT", 43)) - float(config["Heizungssteuerung"].get("NACHTABSENKUNG", 5.0))
-                if t_mittig <= night_setpoint:
-                    if not mock_state.control.kompressor_ein:
-                        error_msg = f"BUG: Kompressor AUS trotz kritischer Kälte ({t_mittig} <= {night_setpoint})"
-                        print(error_msg)
-                        raise AssertionError(error_msg)
-                    validation_suffix = f" [KORREKT: AN wegen Kälte]"
-                elif mock_state.control.kompressor_ein:
-                    # Should be off unless was already running and min_run not met
-                    # Simplified for this specific test case
-                    pass
-
-            print(f"{time_str:<10} | {setpoints['modus']:<20} | {temp_str:<12} | {regel_str:<6} | {ein_str:<4} | {aus_str:<4} | {t_verd:<6.1f} | {solar_str:<8} | {comp_str:<10} | {desc}{validation_suffix}")
+                validation_suffix = ""
+                if is_transition and not has_solar and t_mittig < setpoints['einschaltpunkt']:
+                    night_setpoint = float(config["Heizungssteuerung"].get("EINSCHALTPUNKT", 43)) - float(config["Heizungssteuerung"].get("NACHTABSENKUNG", 5.0))
+                    if t_mittig <= night_setpoint:
+                        if not mock_state.control.kompressor_ein:
+                            error_msg = f"BUG: Kompressor AUS trotz kritischer Kälte ({t_mittig} <= {night_setpoint})"
+                            print(error_msg)
+                            raise AssertionError(error_msg)
+                        validation_suffix = f" [KORREKT: AN wegen Kälte]"
+                    elif mock_state.control.kompressor_ein:
+                        # Should be off unless was already running and min_run not met
+                        # Simplified for this specific test case
+                        pass
+
+                print(f"{time_str:<10} | {setpoints['modus']:<20} | {temp_str:<12} | {regel_str:<6} | {ein_str:<4} | {aus_str:<4} | {t_verd:<6.1f} | {solar_str:<8} | {comp_str:<10} | {desc}{validation_suffix}")
+    finally:
+        clock.reset_clock()
     print("-" * 140)
 
 @pytest.mark.asyncio
@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config_manager import AppConfig
+from control_params import compile_params
+from decision import ControllerState, Inputs, decide
+from planner import PlanStatus
+from reasons import Block
+from schedule import ScheduleFlags
+from simulation import heizungsdaten_generator as generator
+from simulation.replay import load_samples, parse_overrides, run_replay
+
+DAY = ScheduleFlags(night=False, transition=False, solar_window=False)
+PARAMS = compile_params(AppConfig())  # Ein 42, Aus 45, Mindestlaufzeit 15 min, Mindestpause 20 min
+
+
+def tick(now, t_mittig, t_oben=None, t_verd=10.0, batpower=0.0):
+    return Inputs(now, t_oben if t_oben is not None else t_mittig, t_mittig - 5, t_mittig, t_verd,
+                  batpower, 50.0, 0.0, DAY)
+
+
+def test_cycle_respects_min_runtime_and_pause():
+    start = datetime(2024, 3, 1, 12, 0)
+    state = ControllerState()
+
+    result, state = decide(tick(start, 41.0), PARAMS, state)
+    assert result.switched == 1 and result.setpoints.modus == "Normalmodus"
+
+    # Ziel erreicht, aber Mindestlaufzeit fehlt
+    result, state = decide(tick(start + timedelta(minutes=5), 45.5), PARAMS, state)
+    assert result.kompressor_ein and result.blocking.code == Block.MIN_RUNTIME
+
+    result, state = decide(tick(start + timedelta(minutes=15), 45.5), PARAMS, state)
+    assert result.switched == -1 and result.blocking is None
+
+    # wieder kalt, aber Mindestpause läuft noch
+    result, state = decide(tick(start + timedelta(minutes=20), 41.0), PARAMS, state)
+    assert not result.kompressor_ein and result.blocking.code == Block.MIN_PAUSE
+    assert result.blocking.remaining == timedelta(minutes=15)
+
+    result, state = decide(tick(start + timedelta(minutes=35), 41.0), PARAMS, state)
+    assert result.switched == 1
+
+
+def test_safety_and_evaporator_hysteresis():
+    now = datetime(2024, 3, 1, 12, 0)
+    state = ControllerState(kompressor_ein=True, last_on=now - timedelta(minutes=1))
+
+    result, state = decide(tick(now, 40.0, t_verd=PARAMS.verdampfertemperatur - 1), PARAMS, state)
+    assert result.switched == -1 and result.setpoints is None
+    assert result.blocking.code == Block.EVAPORATOR_COLD and state.verdampfer_blocked and state.last_off == now
+
+    # über dem Grenzwert, aber unter der Wiederanlauftemperatur: bleibt gesperrt
+    result, state = decide(tick(now + timedelta(minutes=1), 40.0, t_verd=PARAMS.verdampfer_restart_temp - 0.5), PARAMS, state)
+    assert result.blocking.waiting and not result.kompressor_ein
+
+    result, state = decide(tick(now + timedelta(minutes=2), 40.0, t_oben=PARAMS.sicherheits_temp), PARAMS, state)
+    assert result.blocking.code == Block.SAFETY_TEMP
+
+
+def test_boost_slot_needs_live_pv():
+    now = datetime(2024, 6, 7, 12, 30)
+    slot = PlanStatus(True, False, None)
+
+    # Prognose sonnig, tatsächlich bewölkt: Akku entlädt, keine Einspeisung -> normale Sollwerte
+    result, _ = decide(tick(now, 43.0, batpower=-300.0)._replace(plan=slot), PARAMS, ControllerState())
+    assert result.setpoints.modus == "Normalmodus"
+    assert result.setpoints.ausschaltpunkt == PARAMS.ausschaltpunkt and not result.kompressor_ein
+
+    result, _ = decide(tick(now, 43.0, batpower=200.0)._replace(plan=slot), PARAMS, ControllerState())
+    assert result.setpoints.modus == "PV-Planung"
+    assert result.setpoints.ausschaltpunkt == PARAMS.ausschaltpunkt_erhoeht
+
+
+def test_replay_evaluates_alternative_setpoints(tmp_path):
+    path = tmp_path / "heizungsdaten.csv"
+    generator.generate_csv(str(path), datetime(2024, 3, 1), datetime(2024, 3, 3), interval_s=60, seed=1)
+    samples = load_samples(str(path))
+    assert len(samples) == 2 * 1440
+
+    base = run_replay(samples, AppConfig())
+    assert base["logged_compressor_starts"] > 0 and base["compressor_starts"] > 0
+    assert 0.5 < base["agreement"] <= 1.0
+
+    config = AppConfig()
+    lower = config.model_copy(update={"Heizungssteuerung": config.Heizungssteuerung.model_copy(
+        update={"EINSCHALTPUNKT": 36, "AUSSCHALTPUNKT": 40})})
+    assert run_replay(samples, lower)["runtime_hours"] < base["runtime_hours"]
+
+
+def test_parse_overrides():
+    assert parse_overrides(["Heizungssteuerung.EINSCHALTPUNKT=40", "Solarueberschuss.SOC_THRESHOLD = 90"]) == {
+        "Heizungssteuerung": {"EINSCHALTPUNKT": "40"}, "Solarueberschuss": {"SOC_THRESHOLD": "90"}}
+    with pytest.raises(ValueError):
+        parse_overrides(["EINSCHALTPUNKT=40"])
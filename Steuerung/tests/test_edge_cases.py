@@ -211,27 +211,21 @@ class TestTimezoneEdgeCases:
         # Should be approximately 1 hour
         assert timedelta(minutes=50) < delta < timedelta(minutes=70)
     
-    def test_nighttime_calculation_across_midnight(self, mock_config):
+    def test_nighttime_calculation_across_midnight(self, mock_config, set_time):
         """Test is_nighttime works correctly across midnight."""
         # Night from 19:30 to 08:00
         
         # Test at 23:00 (should be night)
-        with patch('logic_utils.datetime') as mock_dt:
-            mock_dt.now.return_value.time.return_value = time(23, 0)
-            mock_dt.strptime.side_effect = datetime.strptime
-            assert control_logic.is_nighttime(mock_config) is True
-        
+        set_time(datetime(2024, 1, 1, 23, 0))
+        assert control_logic.is_nighttime(mock_config) is True
+
         # Test at 02:00 (should be night)
-        with patch('logic_utils.datetime') as mock_dt:
-            mock_dt.now.return_value.time.return_value = time(2, 0)
-            mock_dt.strptime.side_effect = datetime.strptime
-            assert control_logic.is_nighttime(mock_config) is True
-        
+        set_time(datetime(2024, 1, 2, 2, 0))
+        assert control_logic.is_nighttime(mock_config) is True
+
         # Test at 12:00 (should not be night)
-        with patch('logic_utils.datetime') as mock_dt:
-            mock_dt.now.return_value.time.return_value = time(12, 0)
-            mock_dt.strptime.side_effect = datetime.strptime
-            assert control_logic.is_nighttime(mock_config) is False
+        set_time(datetime(2024, 1, 2, 12, 0))
+        assert control_logic.is_nighttime(mock_config) is False
 
 
 class TestRuntimeCalculation:
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime, timedelta
 import pytz
 from safety_logic import check_sensors_and_safety
+from reasons import Block
 
 class MockState:
     def __init__(self):
@@ -55,14 +56,16 @@ async def test_evaporator_hysteresis():
     result = await check_sensors_and_safety(session, state, 40.0, 35.0, 38.0, t_verd, mock_set_status)
     assert result is False
     assert state.verdampfer_blocked is True
-    assert "niedrig" in state.ausschluss_grund
+    assert state.ausschluss_grund.code == Block.EVAPORATOR_COLD and not state.ausschluss_grund.waiting
+    assert str(state.ausschluss_grund) == "Verdampfer zu kalt (5.0°C < 6.0°C)"
 
     # Case 3: Temperature recovers slightly (7°C), but still below restart threshold (9°C) -> Still blocked
     t_verd = 7.0
     result = await check_sensors_and_safety(session, state, 40.0, 35.0, 38.0, t_verd, mock_set_status)
     assert result is False
     assert state.verdampfer_blocked is True
-    assert "Warten auf Erwärmung" in state.ausschluss_grund
+    assert state.ausschluss_grund.code == Block.EVAPORATOR_COLD and state.ausschluss_grund.waiting
+    assert str(state.ausschluss_grund) == "Verdampfer zu kalt (7.0°C, warte auf >9.0°C)"
 
     # Case 4: Temperature reaches restart threshold (9°C) -> Block removed
     t_verd = 9.0
@@ -0,0 +1,98 @@
+import pytest
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import events
+import main
+from events import (EventBus, CompressorStarted, CompressorStopped, ModeChanged, PressureFault, SensorFault,
+                    CompressorStuck, CompressorNotRunning)
+
+T0 = datetime(2026, 3, 1, 12, 0)
+
+
+async def test_typed_dispatch_inline_and_queued():
+    bus = EventBus()
+    inline, queued = [], []
+    bus.subscribe(ModeChanged, inline.append, inline=True)
+
+    async def slow(event):
+        await asyncio.sleep(0.01)
+        queued.append(event)
+    bus.subscribe((CompressorStarted, CompressorStopped), slow)
+
+    bus.emit(ModeChanged(T0, "Normalmodus", "Solarmodus"))
+    bus.emit(CompressorStarted(T0, 8.0, 40.0))
+    bus.emit(CompressorStopped(T0, timedelta(minutes=20)))
+    # emit() wartet nicht auf den langsamen Abonnenten
+    assert inline == [ModeChanged(T0, "Normalmodus", "Solarmodus")] and queued == []
+
+    await bus.drain()
+    assert [type(e) for e in queued] == [CompressorStarted, CompressorStopped]
+    assert bus.stats()["emitted"] == {"ModeChanged": 1, "CompressorStarted": 1, "CompressorStopped": 1}
+    await bus.stop()
+
+
+async def test_failing_and_overloaded_subscribers_are_isolated():
+    bus = EventBus(queue_size=2)
+    received = []
+
+    def broken(event):
+        raise RuntimeError("kaputt")
+    bus.subscribe(PressureFault, broken, inline=True)
+    bus.subscribe(PressureFault, received.append, name="empfaenger")
+
+    for i in range(4):
+        bus.emit(PressureFault(T0 + timedelta(seconds=i), i % 2 == 0))
+    await bus.drain()
+    # Die älteren Ereignisse wurden verworfen, die neuesten zugestellt
+    assert [e.at.second for e in received] == [2, 3]
+    assert bus.stats()["dropped"] == {"empfaenger": 2}
+    await bus.stop()
+
+
+async def test_compressor_edges_are_emitted_once(make_state):
+    bus = EventBus()
+    seen = []
+    bus.subscribe((CompressorStarted, CompressorStopped), seen.append, inline=True)
+    state = make_state()
+    ctx = MagicMock(now=state.local_tz.localize(T0))
+
+    with patch.object(events, "_bus", bus), patch.object(main, "hardware_manager", MagicMock()):
+        await main.set_kompressor_status(state, True, ctx=ctx)
+        await main.set_kompressor_status(state, True, force=True, ctx=ctx)  # bereits EIN: kein Wechsel
+        ctx.now = ctx.now + timedelta(minutes=15)
+        await main.set_kompressor_status(state, False, ctx=ctx)
+        await main.set_kompressor_status(state, False, force=True, ctx=ctx)
+
+    assert [type(e) for e in seen] == [CompressorStarted, CompressorStopped]
+    assert seen[1].runtime == timedelta(minutes=15)
+
+
+async def test_fault_subscribers_notify_count_and_show_on_lcd(make_state):
+    bus = EventBus()
+    state = make_state()
+    with patch.object(events, "_metrics", events.EventMetrics()), patch.dict(main.lcd_faults, clear=True), \
+         patch("telegram_queue.enqueue_telegram_message") as send:
+        main.register_event_subscribers(bus, state)
+        bus.emit(SensorFault(T0, True, "Oben: kein Wert"))
+        # Beginn meldet der Sperrgrund-Alarm, die LCD zeigt die Störung
+        assert send.call_count == 0 and main.lcd_faults == {"SensorFault": "Sensorfehler!"}
+        bus.emit(SensorFault(T0, False, ""))
+        assert "Sensoren wieder in Ordnung" in send.call_args[0][1] and main.lcd_faults == {}
+
+        bus.emit(CompressorStarted(T0, 8.0, 40.0))
+        bus.emit(CompressorNotRunning(T0, "Verdampfer: nur 0.0°C Abfall", 2))
+        assert "Fehler #2" in send.call_args[0][1]
+        bus.emit(CompressorStuck(T0, ""))
+        assert "KRITISCHER FEHLER" in send.call_args[0][1]
+        assert send.call_args[1]["priority"] == main.telegram_queue.PRIORITY_CRITICAL
+
+        report = events.get_metrics().report()
+    assert report["compressor_starts"] == 1
+    assert report["faults"] == {"SensorFault": 1, "CompressorNotRunning": 1, "CompressorStuck": 1}
+    assert report["active_faults"] == []
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from forecast_store import ForecastSeries, ForecastStore
+
+
+def make_series(issued=datetime(2024, 6, 7, 6, 5)):
+    start = datetime(2024, 6, 6, 23, 0)  # erster Open-Meteo-Zeitstempel 07.06. 00:00
+    values = [max(0.0, 600.0 * (1 - abs((h % 24) - 12) / 6)) for h in range(1, 73)]
+    sun = {"2024-06-07": ("05:10", "20:55"), "2024-06-08": ("05:10", "20:56")}
+    return ForecastSeries(issued, start, values, sun)
+
+
+def test_expected_radiation_matches_brute_force():
+    series = make_series()
+    now = datetime(2024, 6, 7, 9, 20)
+    # Minutenweise aufsummiert als Referenz
+    brute = sum(series.values[int((now + timedelta(minutes=m) - series.start) / timedelta(hours=1))] / 60.0
+                for m in range(5 * 60))
+    assert series.expected_radiation(now, 5) == pytest.approx(brute, rel=1e-6)
+    assert series.expected_radiation(datetime(2024, 6, 1), 1) == 0.0
+    assert series.expected_radiation(datetime(2024, 6, 20), 3) == 0.0
+
+
+def test_day_total_uses_open_meteo_labels():
+    series = make_series()
+    # Wert 0 ist die Stunde 23-24 Uhr am 06.06. und zählt wie bisher zum 07.06.
+    expected = float(sum(series.values[0:24])) / 1000.0
+    assert series.day_total(date(2024, 6, 7)) == pytest.approx(expected)
+    assert series.day_total(date(2024, 6, 12)) is None
+
+
+def test_store_persists_and_restores(tmp_path):
+    path = str(tmp_path / "prognose.npz")
+    store = ForecastStore(path, max_issues=2)
+    store.add(make_series(datetime(2024, 6, 7, 0, 5)))
+    store.add(make_series(datetime(2024, 6, 7, 12, 5)))
+    store.add(make_series(datetime(2024, 6, 7, 6, 5)))
+
+    restored = ForecastStore(path, max_issues=2)
+    assert [s.issued for s in restored.series] == [datetime(2024, 6, 7, 6, 5), datetime(2024, 6, 7, 12, 5)]
+    latest = restored.latest()
+    assert latest.sun["2024-06-07"] == ("05:10", "20:55")
+    assert latest.expected_radiation(datetime(2024, 6, 7, 10), 4) == pytest.approx(
+        store.latest().expected_radiation(datetime(2024, 6, 7, 10), 4))
+    assert restored.at(datetime(2024, 6, 7, 8, 0)).issued == datetime(2024, 6, 7, 6, 5)
+    assert restored.at(datetime(2024, 6, 7, 1, 0)) is None
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "prognose.npz"
+    path.write_bytes(b"kaputt")
+    assert ForecastStore(str(path)).latest() is None
+
+
+def test_cached_forecast_after_restart(tmp_path):
+    import forecast_store
+    import weather_forecast
+    store = ForecastStore(str(tmp_path / "prognose.npz"))
+    store.add(make_series(datetime(2024, 6, 7, 6, 5)))
+    old_store, forecast_store._store = forecast_store._store, ForecastStore(store.path)
+    try:
+        issued, forecast = weather_forecast.get_cached_forecast(datetime(2024, 6, 7, 10, 0))
+        assert issued == datetime(2024, 6, 7, 6, 5)
+        assert forecast[0] == pytest.approx(store.latest().day_total(date(2024, 6, 7)))
+        assert forecast[2:4] == ("05:10", "20:55")
+        assert weather_forecast.get_cached_forecast(datetime(2024, 6, 7, 12, 30)) is None
+    finally:
+        forecast_store._store = old_store
@@ -0,0 +1,75 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config_manager import AppConfig
+from simulation.heizungsdaten_generator import CorruptionSettings, generate_csv
+from utils import EXPECTED_CSV_HEADER
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def clean_csv(tmp_path):
+    path = tmp_path / "heizungsdaten.csv"
+    stats = generate_csv(str(path), START, START + timedelta(days=4), seed=1)
+    df = pd.read_csv(path, parse_dates=["Zeitstempel"])
+    return stats, df
+
+
+def test_header_and_row_count(clean_csv):
+    stats, df = clean_csv
+    assert list(df.columns) == EXPECTED_CSV_HEADER
+    assert len(df) == stats["rows"] == 4 * 24 * 360
+    assert df["Zeitstempel"].diff().dropna().eq(pd.Timedelta(seconds=10)).all()
+
+
+def test_min_runtime_and_pause_respected(clean_csv):
+    stats, df = clean_csv
+    cfg = AppConfig().Heizungssteuerung
+    on = df["Kompressor"].to_numpy().astype(bool)
+    switches = (on[1:] != on[:-1]).nonzero()[0] + 1
+    assert stats["compressor_starts"] > 0
+
+    # Innere Phasen (nicht am Dateianfang/-ende abgeschnitten) prüfen
+    for begin, end in zip(switches[:-1], switches[1:]):
+        minutes = (end - begin) * 10 / 60
+        if on[begin]:
+            assert minutes >= cfg.MIN_LAUFZEIT
+        else:
+            assert minutes >= cfg.MIN_PAUSE
+
+
+def test_setpoints_and_temperatures_plausible(clean_csv):
+    _, df = clean_csv
+    cfg = AppConfig().Heizungssteuerung
+    assert set(df["Ausschaltpunkt"].unique()) <= {cfg.AUSSCHALTPUNKT, cfg.AUSSCHALTPUNKT_ERHOEHT}
+    assert df["T_Oben"].max() < cfg.SICHERHEITS_TEMP + 1
+    assert df.loc[df["Kompressor"] == 1, "T_Verd"].min() > cfg.VERDAMPFERTEMPERATUR - 1
+    assert df["ConsumeEnergy"].is_monotonic_increasing
+    assert set(df["PowerSource"].unique()) <= {"Netz", "Solar", "Batterie"}
+
+
+def test_corruption_is_injected(tmp_path):
+    path = tmp_path / "heizungsdaten.csv"
+    corruption = CorruptionSettings(header_per_million_rows=100.0, legacy_days=1.0, na_per_million_rows=500.0)
+    stats = generate_csv(str(path), START, START + timedelta(days=3), seed=2, corruption=corruption)
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    header = ",".join(EXPECTED_CSV_HEADER)
+    data_lines = [line for line in lines[1:] if line != header]
+    field_counts = {len(line.split(",")) for line in data_lines}
+
+    assert stats["mid_file_headers"] > 0
+    assert lines.count(header) == stats["mid_file_headers"] + 1
+    assert field_counts == {19, 20}
+    assert sum(1 for line in data_lines if len(line.split(",")) == 19) == stats["legacy_rows"] == 24 * 360
+    assert stats["na_bursts"] > 0
+    assert any("N/A" in line for line in data_lines)
+    assert len(data_lines) == stats["rows"]
@@ -0,0 +1,54 @@
+import pytest
+import sys
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from http_clients import HttpClientRegistry
+
+
+async def ping(request):
+    return web.json_response({"ok": True})
+
+
+@pytest.fixture
+async def server():
+    app = web.Application()
+    app.router.add_get("/ping", ping)
+    srv = TestServer(app)
+    await srv.start_server()
+    yield srv
+    await srv.close()
+
+
+async def test_connections_are_reused_and_counted(server):
+    registry = HttpClientRegistry()
+    session = registry.get()
+    assert registry.get() is session
+    for _ in range(3):
+        async with session.get(server.make_url("/ping")) as response:
+            assert (await response.json())["ok"]
+
+    stats = registry.stats()["default"]
+    assert stats["requests"] == 3
+    assert stats["connections_new"] == 1 and stats["connections_reused"] == 2
+    assert stats["reuse_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+
+    await registry.close()
+    assert session.closed
+    # Nach dem Schließen wird bei Bedarf eine neue Session angelegt, die Zähler bleiben erhalten
+    assert not registry.get().closed
+    assert registry.stats()["default"]["requests"] == 3
+    await registry.close()
+
+
+async def test_profiles_get_separate_pools():
+    registry = HttpClientRegistry()
+    default, poll = registry.get(), registry.get("telegram_poll")
+    assert default is not poll
+    assert poll.connector.limit_per_host == 1
+    assert default.connector.limit_per_host == 4
+    await registry.close()
@@ -0,0 +1,85 @@
+import pytest
+import instrumentation
+from instrumentation import LatencyReservoir, instrument
+
+
+@pytest.fixture(autouse=True)
+def clean_reservoirs():
+    instrumentation.reset()
+    instrumentation.set_enabled(True)
+    yield
+    instrumentation.reset()
+    instrumentation.set_enabled(True)
+
+
+def test_reservoir_percentiles():
+    reservoir = LatencyReservoir(size=100)
+    for ms in range(1, 101):
+        reservoir.add(ms * 1_000_000)
+
+    summary = reservoir.summary()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == pytest.approx(50, abs=1)
+    assert summary["p95_ms"] == pytest.approx(95, abs=1)
+    assert summary["p99_ms"] == pytest.approx(99, abs=1)
+    assert summary["max_ms"] == 100
+
+
+def test_reservoir_is_fixed_size():
+    reservoir = LatencyReservoir(size=10)
+    for ms in range(1, 21):
+        reservoir.add(ms * 1_000_000)
+
+    # Nur die letzten 10 Werte (11..20 ms) bleiben im Fenster
+    assert len(reservoir.values()) == 10
+    assert min(reservoir.values()) == 11_000_000
+    assert reservoir.summary()["count"] == 20
+
+
+@pytest.mark.asyncio
+async def test_instrument_async_and_sync():
+    @instrument("async_span")
+    async def async_func(x):
+        return x * 2
+
+    @instrument()
+    def sync_func(x):
+        return x + 1
+
+    assert await async_func(2) == 4
+    assert sync_func(2) == 3
+
+    report = instrumentation.get_latency_report()
+    assert report["async_span"]["count"] == 1
+    assert report["sync_func"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_instrument_counts_errors():
+    @instrument("failing")
+    async def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await failing()
+
+    assert instrumentation.get_latency_report()["failing"]["errors"] == 1
+
+
+def test_instrument_disabled_records_nothing():
+    instrumentation.set_enabled(False)
+
+    @instrument("disabled_span")
+    def func():
+        return 42
+
+    assert func() == 42
+    assert "disabled_span" not in instrumentation.get_latency_report()
+
+
+def test_format_latency_report():
+    assert "Noch keine Messwerte" in instrumentation.format_latency_report()
+    instrumentation.record("run_logic_step", 5_000_000)
+    text = instrumentation.format_latency_report()
+    assert "run_logic_step" in text
+    assert "5.0" in text
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from inverter_sources import (
+    CloudSource, FallbackChain, InverterDataSource, ModbusTcpSource, decode_registers, encode_registers,
+)
+from simulation.modbus_simulator import ModbusSimulator
+
+VALUES = {"acpower": -150, "powerdc1": 3200, "powerdc2": 900, "batPower": -420, "soc": 96,
+          "feedinpower": -70000, "consumeenergy": 1234.56}
+
+
+def make_state():
+    return SimpleNamespace(solar=SimpleNamespace(last_api_call=None, last_api_data=None))
+
+
+def test_register_roundtrip_keeps_signs():
+    assert decode_registers(encode_registers(VALUES)) == VALUES
+
+
+@pytest.fixture
+async def simulator():
+    sim = ModbusSimulator(VALUES)
+    sim.port = await sim.start()
+    yield sim
+    await sim.stop()
+
+
+async def test_modbus_source_reads_simulator(simulator):
+    source = ModbusTcpSource("127.0.0.1", simulator.port)
+    state = make_state()
+    assert await source.read(None, state) == VALUES
+    simulator.set_values(dict(VALUES, batPower=800))
+    assert (await source.read(None, state))["batPower"] == 800
+    assert state.solar.last_api_data["batPower"] == 800
+    assert simulator.requests == 2  # Verbindung wird wiederverwendet
+    await source.client.close()
+
+
+async def test_fallback_to_cloud_and_back(simulator):
+    cloud_calls = []
+
+    async def cloud(session, state):
+        cloud_calls.append(1)
+        state.solar.last_api_data = {"batPower": 1}
+        return state.solar.last_api_data
+
+    modbus = ModbusTcpSource("127.0.0.1", simulator.port, timeout=0.5)
+    chain = FallbackChain([modbus, CloudSource(cloud)], retry_after=0.0)
+    state = make_state()
+
+    assert (await chain.read(None, state))["soc"] == 96
+    assert chain.active is modbus and chain.max_age.total_seconds() == 5
+
+    simulator.online = False
+    assert await chain.read(None, state) == {"batPower": 1}
+    assert chain.active.name == "cloud" and len(cloud_calls) == 1
+
+    simulator.online = True
+    assert (await chain.read(None, state))["soc"] == 96
+    assert chain.active is modbus
+    await modbus.client.close()
+
+
+async def test_failed_source_is_skipped_during_backoff():
+    async def cloud(session, state):
+        return {"soc": 50}
+
+    modbus = ModbusTcpSource("127.0.0.1", 1, timeout=0.2)  # Port 1: Verbindung wird abgelehnt
+    chain = FallbackChain([modbus, CloudSource(cloud)], retry_after=60.0)
+    for _ in range(3):
+        assert await chain.read(None, make_state()) == {"soc": 50}
+    assert chain._down_until["modbus"] > 0
+
+
+def test_incomplete_source_fails_on_creation():
+    class Incomplete(InverterDataSource):
+        name = "unvollstaendig"
+
+    with pytest.raises(TypeError):
+        Incomplete()
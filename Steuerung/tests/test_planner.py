@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import schedule
+import control_logic
+from config_manager import AppConfig
+from planner import HeatingPlanner, PlanStatus
+from state import State
+
+
+class MockConfigManager:
+    def __init__(self, config):
+        self.config = config
+
+    def get(self):
+        return self.config
+
+
+def day_forecast(day, peak=800.0):
+    """Glockenkurve mit Maximum um 12:00."""
+    return [(day + timedelta(hours=h), max(0.0, peak * (1 - abs(h - 12) / 6))) for h in range(48)]
+
+
+def test_learns_heat_and_loss_rates():
+    planner = HeatingPlanner()
+    t0 = datetime(2024, 6, 7, 10, 0)
+    planner.observe(t0, False, 40.0)
+    planner.observe(t0 + timedelta(hours=2), True, 38.0)   # Pause: 1 K/h Verlust
+    planner.observe(t0 + timedelta(hours=3), False, 48.0)  # Lauf: 10 K/h
+    assert planner.loss_rate_kph == pytest.approx(0.8 + 0.2 * (1.0 - 0.8))
+    assert planner.heat_rate_kph == pytest.approx(6.0 + 0.2 * (10.0 - 6.0))
+    assert planner.cycles_observed == 1
+
+
+def test_plan_picks_sunniest_slots_within_horizon():
+    planner = HeatingPlanner()
+    day = datetime(2024, 6, 7)
+    slots = planner.plan(day.replace(hour=6), day_forecast(day), t_mittig=44.0, target_temp=48.0, min_radiation=200.0)
+    # Bedarf: 0.8 K/h * 24 + 4 K = 23.2 K -> 4 Stunden bei 6 K/h
+    # Gleichstand 10/14 Uhr: die frühere Stunde gewinnt
+    assert slots == [day.replace(hour=h) for h in (10, 11, 12, 13)]
+
+
+def test_status_boost_and_defer():
+    planner = HeatingPlanner()
+    day = datetime(2024, 6, 7)
+    planner.slots = [day.replace(hour=12), day.replace(hour=13)]
+    assert planner.status(day.replace(hour=12, minute=30), 4) == PlanStatus(True, False, day.replace(hour=13))
+    assert planner.status(day.replace(hour=9), 4) == PlanStatus(False, True, day.replace(hour=12))
+    assert planner.status(day.replace(hour=6), 4).defer is False
+    assert planner.status(day.replace(hour=15), 4) == PlanStatus(False, False, None)
+
+
+def test_no_slots_without_sun():
+    planner = HeatingPlanner()
+    day = datetime(2024, 12, 7)
+    assert planner.plan(day.replace(hour=6), day_forecast(day, peak=150.0), 40.0, 48.0, 200.0) == []
+    assert planner.status(day.replace(hour=12), 4).boost is False
+
+
+@pytest.mark.asyncio
+async def test_plan_drives_setpoints():
+    config = AppConfig()
+    state = State(MockConfigManager(config))
+    state.solar.batpower = state.solar.soc = state.solar.feedinpower = 0.0
+    state.solar.batpower = 200.0  # Akku lädt, aber unter der Überschuss-Schwelle
+    now = datetime(2024, 6, 7, 12, 30)
+    ctx = schedule.tick_context(None, config)
+    ctx.now, ctx.flags = now, ctx.flags._replace(night=False, transition=False, solar_window=False)
+
+    ctx.plan = PlanStatus(True, False, None)
+    res = await control_logic.determine_mode_and_setpoints(state, 44.0, 44.0, ctx=ctx)
+    assert res["modus"] == "PV-Planung"
+    assert res["ausschaltpunkt"] == config.Heizungssteuerung.AUSSCHALTPUNKT_ERHOEHT
+
+    ctx.plan = PlanStatus(False, True, now.replace(hour=14, minute=0))
+    res = await control_logic.determine_mode_and_setpoints(state, 44.0, 44.0, ctx=ctx)
+    assert res["einschaltpunkt"] == config.Heizungssteuerung.EINSCHALTPUNKT - config.Planung.VERSCHIEBUNG_ABSENKUNG
+    assert res["modus"].startswith("Normalmodus (PV-Slot ab 14:00")
@@ -0,0 +1,27 @@
+import pytest
+import sys
+import os
+from datetime import timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from reasons import Block, Reason, ALERTS, LABELS, code_of, render
+
+
+def test_texts_are_rendered_on_demand():
+    assert str(Reason(Block.MIN_PAUSE, remaining=timedelta(minutes=3, seconds=12))) == "Min. Pause (noch 3m 12s)"
+    assert str(Reason(Block.MIN_RUNTIME, remaining=timedelta(minutes=4, seconds=59))) == "Warte auf Mindestlaufzeit (noch 4m)"
+    assert str(Reason(Block.SAFETY_TEMP, limit=60.0)) == "Sicherheitstemp (>= 60.0°C)"
+    assert str(Reason(Block.SENSOR, detail="T_Oben invalid: None")) == "Sensorfehler: T_Oben invalid: None"
+    assert str(Reason(Block.SOLAR_WINDOW)) == "Solarfenster (kein Überschuss)"
+    assert render(None) is None
+
+
+def test_codes_are_stable_and_complete():
+    # Zahlenwerte gehen über die API nach außen und dürfen sich nicht verschieben
+    assert (Block.PRESSURE, Block.MIN_PAUSE, Block.VERIFICATION_FAILED) == (1, 8, 10)
+    assert set(LABELS) == set(Block)
+    assert Block.SOLAR_WINDOW not in ALERTS and Block.TARGET_REACHED not in ALERTS
+    assert code_of(None) == Block.NONE
+    # Gleicher Code mit anderen Parametern ist derselbe Sperrgrund
+    assert code_of(Reason(Block.EVAPORATOR_COLD, 5.0, 6.0)) == code_of(Reason(Block.EVAPORATOR_COLD, 7.0, 9.0, waiting=True))
@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import aiohttp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import resilience
+import solax
+import upstream_cache
+from resilience import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def breakers():
+    resilience.reset()
+    yield
+    resilience.reset()
+
+
+def test_backoff_is_exponential_capped_and_jittered():
+    delays = [resilience.backoff_delay(a, 2.0, 30.0, jitter=0.0) for a in range(1, 7)]
+    assert delays == [2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+    for _ in range(100):
+        assert 1.6 <= resilience.backoff_delay(1, 2.0, 30.0, jitter=0.2) <= 2.4
+
+
+def test_breaker_state_machine(virtual_clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, base_delay=10.0, jitter=0.0)
+    breaker.record_failure(TimeoutError())
+    assert breaker.allow() and breaker.state == resilience.CLOSED
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == resilience.OPEN and not breaker.allow()
+    assert breaker.snapshot()["last_error"] == "TimeoutError"
+
+    virtual_clock.advance(10)
+    assert breaker.allow() and breaker.state == resilience.HALF_OPEN
+    assert not breaker.allow()  # nur ein Probe-Aufruf
+    breaker.record_failure("weiterhin offline")
+    assert breaker.state == resilience.OPEN
+    assert breaker.snapshot()["retry_in_s"] == 20.0  # Wartezeit verdoppelt
+
+    virtual_clock.advance(20)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED and breaker.failures == 0
+    assert breaker.rejected == 2
+
+
+async def test_cancelled_probe_does_not_block_forever(virtual_clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, base_delay=10.0, jitter=0.0, probe_timeout=120.0)
+    breaker.record_failure(TimeoutError())
+    virtual_clock.advance(10)
+
+    async def probe():
+        assert breaker.allow()
+        await asyncio.sleep(3600)  # z.B. Long-Poll, beim Herunterfahren abgebrochen
+        breaker.record_success()
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.state == resilience.HALF_OPEN and not breaker.allow()
+
+    virtual_clock.advance(120)
+    assert breaker.allow()  # neue Probe nach Ablauf der Frist
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED
+
+
+async def test_solax_fails_fast_while_open(virtual_clock, tmp_path):
+    calls = []
+
+    async def offline(self, *args, **kwargs):
+        calls.append(1)
+        raise aiohttp.ClientConnectionError("offline")
+
+    config = SimpleNamespace(SolaxCloud=SimpleNamespace(TOKEN_ID="t", SN="s"))
+    state = SimpleNamespace(config=config, solar=SimpleNamespace(last_api_call=None, last_api_data=None))
+    with patch.object(upstream_cache.UpstreamCache, "fetch_json", offline), \
+            patch.object(solax, "RETRY_BASE_DELAY", 0.0):
+        assert await solax.fetch_solax_cloud(None, state) is None
+        assert len(calls) == 3
+        assert resilience.status_report()["solax"]["state"] == resilience.OPEN
+        # Weitere Abrufe kehren ohne Netzwerkzugriff sofort zurück
+        assert await solax.fetch_solax_cloud(None, state) is None
+        assert len(calls) == 3
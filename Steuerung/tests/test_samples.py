@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from samples import TickSample, RECORD_SIZE
+from solax import compact_result
+from utils import EXPECTED_CSV_HEADER
+
+
+@pytest.fixture
+def state(make_state):
+    state = make_state()
+    state.sensors.t_oben, state.sensors.t_unten, state.sensors.t_mittig, state.sensors.t_verd = 48.5, 38.0, 44.25, 9.0
+    state.control.kompressor_ein = True
+    state.solar.last_api_data = {"acpower": 2100, "powerdc1": 1200, "powerdc2": 900, "consumeenergy": 4512.3}
+    state.solar.feedinpower, state.solar.batpower, state.solar.soc = 850, -200, 73
+    state.solar.forecast_tomorrow = 4.2
+    return state
+
+
+def test_state_classes_have_no_instance_dict(state):
+    for obj in (state, state.sensors, state.solar, state.control, state.stats):
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        state.t_obn = 50.0  # Tippfehler fällt sofort auf
+    # Zeitstempel für check_log_throttle sind deklariert
+    assert state.log_min_laufzeit_off is None and state.log_mode_switch_min_laufzeit is None
+
+
+def test_csv_line_matches_header(state):
+    sample = TickSample.from_state(state, datetime(2026, 3, 1, 12, 0, 5, 123456), nacht=False)
+    fields = sample.csv_line().split(",")
+    assert len(fields) == len(EXPECTED_CSV_HEADER)
+    assert fields[:8] == ["2026-03-01 12:00:05", "48.5", "38.0", "44.25", "N/A", "9.0", "1", "2100"]
+    assert fields[-3:] == ["0", "Solar", "4.2"]
+
+
+def test_binary_roundtrip(state):
+    sample = TickSample.from_state(state, datetime(2026, 3, 1, 12, 0, 5), nacht=True)
+    data = sample.pack()
+    assert len(data) == RECORD_SIZE
+    restored = TickSample.unpack(data)
+    assert restored.timestamp == sample.timestamp
+    assert restored.t_boiler is None
+    assert restored.t_mittig == 44.25
+    assert restored.kompressor and restored.nacht and not restored.solar_ueberschuss
+    assert restored.power_source == "Solar"
+    assert restored.consumeenergy == pytest.approx(4512.3, rel=1e-6)
+
+
+def test_solax_result_is_compacted():
+    result = {"acpower": 1, "feedinpower": 2, "batPower": 3, "soc": 4, "yieldtoday": 5, "inverterSN": "X", "utcDateTime": "t"}
+    assert compact_result(result) == {"acpower": 1, "feedinpower": 2, "batPower": 3, "soc": 4, "utcDateTime": "t"}
+    assert compact_result(None) is None
@@ -0,0 +1,101 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import schedule
+from config_manager import AppConfig
+
+
+def make_config(**overrides):
+    config = AppConfig()
+    for key, value in overrides.items():
+        setattr(config.Heizungssteuerung, key, value)
+    return config
+
+
+def test_default_timeline():
+    engine = schedule.get_engine(make_config())
+    # Freitag, 07.06.2024
+    assert engine.lookup(datetime(2024, 6, 7, 3, 0)) == (True, False, False)
+    assert engine.lookup(datetime(2024, 6, 7, 8, 0)) == (True, True, True)  # Ende inklusive
+    assert engine.lookup(datetime(2024, 6, 7, 8, 0, 1)) == (False, True, True)
+    assert engine.lookup(datetime(2024, 6, 7, 10, 30)) == (False, False, False)
+    assert engine.lookup(datetime(2024, 6, 7, 18, 0)) == (False, True, False)
+    assert engine.lookup(datetime(2024, 6, 7, 21, 0)) == (True, False, False)
+
+
+def test_engine_recompiles_only_on_change():
+    config = make_config()
+    engine = schedule.get_engine(config)
+    assert schedule.get_engine(config) is engine
+    config.Heizungssteuerung.NACHTABSENKUNG_START = "21:00"
+    changed = schedule.get_engine(config)
+    assert changed is not engine
+    assert changed.lookup(datetime(2024, 6, 7, 20, 0)).night is False
+
+
+def test_midnight_rollover():
+    engine = schedule.get_engine(make_config())
+    engine.lookup(datetime(2024, 6, 7, 23, 59))
+    assert engine.lookup(datetime(2024, 6, 8, 0, 1)).night is True
+    assert engine.lookup(datetime(2024, 6, 10, 12, 0)).night is False
+
+
+def test_extra_windows_and_weekend_profile():
+    config = make_config(
+        WOCHENENDE_NACHTABSENKUNG_START="21:00", WOCHENENDE_NACHTABSENKUNG_END="09:30",
+        ZUSAETZLICHE_ABSENKUNGEN="12:00-13:30; Mo-Fr 14:00-15:00; So 16:00-16:30",
+    )
+    engine = schedule.get_engine(config)
+    friday, saturday, sunday = datetime(2024, 6, 7), datetime(2024, 6, 8), datetime(2024, 6, 9)
+
+    assert engine.lookup(friday.replace(hour=9)).night is False
+    assert engine.lookup(saturday.replace(hour=9)).night is True          # Wochenendprofil
+    assert engine.lookup(saturday.replace(hour=9, minute=45)).solar_window is True
+    assert engine.lookup(saturday.replace(hour=20)).night is False
+    assert engine.lookup(friday.replace(hour=12, minute=30)).night is True  # täglich
+    assert engine.lookup(friday.replace(hour=14, minute=30)).night is True  # Mo-Fr
+    assert engine.lookup(saturday.replace(hour=14, minute=30)).night is False
+    assert engine.lookup(sunday.replace(hour=16, minute=15)).night is True
+    assert engine.lookup(saturday.replace(hour=16, minute=15)).night is False
+
+
+def test_invalid_extra_window_is_ignored(caplog):
+    engine = schedule.get_engine(make_config(ZUSAETZLICHE_ABSENKUNGEN="Xy 12:00-13:00; 14:00-15:00"))
+    assert len(engine.extra_windows) == 1
+    assert "Ungültiges Zeitfenster" in caplog.text
+
+
+def test_lookup_matches_brute_force():
+    engine = schedule.get_engine(make_config(ZUSAETZLICHE_ABSENKUNGEN="11:15-11:45"))
+    moment = datetime(2024, 6, 7)
+    while moment < datetime(2024, 6, 9):
+        assert engine.lookup(moment) == engine._flags_at(moment)
+        moment += timedelta(minutes=7, seconds=30)
+
+
+def test_invalid_times_fall_back_to_defaults(caplog):
+    # z.B. von Hand gesetzt, an der Validierung vorbei
+    engine = schedule.get_engine(make_config(NACHTABSENKUNG_START="22.00", WOCHENENDE_NACHTABSENKUNG_START="21:00",
+                                             WOCHENENDE_NACHTABSENKUNG_END="9"))
+    assert engine.weekday_profile.nacht_start.strftime("%H:%M") == "19:30"
+    assert engine.weekend_profile is engine.weekday_profile
+    assert engine.lookup(datetime(2024, 6, 7, 21, 0)).night is True
+    assert "NACHTABSENKUNG_START='22.00'" in caplog.text
+    assert "Wochenend-Nachtabsenkung" in caplog.text
+
+
+def test_config_rejects_malformed_times():
+    from config_manager import HeizungssteuerungConfig
+    from pydantic import ValidationError
+
+    for value in ("22.00", "24:00", "7", "abc"):
+        with pytest.raises(ValidationError):
+            HeizungssteuerungConfig(NACHTABSENKUNG_START=value)
+    with pytest.raises(ValidationError):
+        HeizungssteuerungConfig(WOCHENENDE_NACHTABSENKUNG_END="9.30")
+    cfg = HeizungssteuerungConfig(UEBERGANGSMODUS_MORGENS_ENDE=" 9:15", WOCHENENDE_NACHTABSENKUNG_START="")
+    assert cfg.UEBERGANGSMODUS_MORGENS_ENDE == "9:15" and cfg.WOCHENENDE_NACHTABSENKUNG_START == ""
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytz
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import api
+import snapshots
+from snapshots import SnapshotPublisher, changes
+
+TZ = pytz.timezone("Europe/Berlin")
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    publisher = SnapshotPublisher()
+    monkeypatch.setattr(snapshots, "_publisher", publisher)
+    return publisher
+
+
+@pytest.fixture
+def state(make_state):
+    state = make_state()
+    state.sensors.t_oben, state.sensors.t_mittig = 47.0, 43.0
+    state.control.previous_modus = "Normalmodus"
+    state.stats.total_runtime_today = timedelta(minutes=90)
+    return state
+
+
+def test_snapshot_is_decoupled_from_live_state(publisher, state):
+    now = TZ.localize(datetime(2026, 3, 1, 12, 0))
+    first = publisher.update(state, now, nacht=False)
+    state.sensors.t_oben = 20.0
+    state.control.previous_modus = "Solarmodus"
+    assert publisher.latest() is first
+    assert first.sample.t_oben == 47.0 and first.modus == "Normalmodus"
+    with pytest.raises(AttributeError):
+        first.modus = "x"
+
+    second = publisher.update(state, now + timedelta(seconds=10), nacht=False)
+    assert (first.seq, second.seq) == (1, 2)
+    assert changes(first, second) == {"modus": ("Normalmodus", "Solarmodus"), "t_oben": (47.0, 20.0)}
+    assert changes(second, second) == {}
+
+
+def test_status_endpoint_reads_published_snapshot(publisher, monkeypatch, state):
+    monkeypatch.setattr(api, "shared_state", state)
+    client = TestClient(api.app)
+    assert client.get("/status").status_code == 503  # noch kein Tick
+
+    publisher.update(state, TZ.localize(datetime(2026, 3, 1, 12, 0, 30)), nacht=False)
+    state.sensors.t_oben = 99.0  # Änderung nach dem Tick ist nicht sichtbar
+    body = client.get("/status").json()
+    assert body["temperatures"]["oben"] == 47.0
+    assert body["mode"]["current"] == "Normalmodus"
+    assert body["compressor"]["runtime_today"] == "1:30:00"
+    assert body["blocking"] == {"code": 0, "reason": None}
+    assert body["system"] == {"exclusion_code": 0, "exclusion_reason": None, "last_update": "12:00:30", "tick": 1}
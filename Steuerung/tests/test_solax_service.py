@@ -0,0 +1,66 @@
+import pytest
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytz
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import solax
+from solax import SolaxDataService
+
+
+def make_state(age_minutes=None):
+    state = SimpleNamespace(solar=SimpleNamespace(last_api_call=None, last_api_data=None))
+    if age_minutes is not None:
+        state.solar.last_api_call = datetime.now(pytz.timezone("Europe/Berlin")) - timedelta(minutes=age_minutes)
+        state.solar.last_api_data = {"acpower": 100}
+    return state
+
+
+class SlowCloud:
+    def __init__(self, delay=0.05):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self, session, state):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        state.solar.last_api_data = {"acpower": 2000}
+        state.solar.last_api_call = datetime.now(pytz.timezone("Europe/Berlin"))
+        return state.solar.last_api_data
+
+
+async def test_concurrent_callers_share_one_fetch():
+    service, state, cloud = SolaxDataService(), make_state(), SlowCloud()
+    with patch.object(solax, "fetch_solax_cloud", cloud):
+        results = await asyncio.gather(*[service.get(None, state, control=i % 2 == 0) for i in range(4)])
+        assert await service.get(None, state) == {"acpower": 2000}
+    assert cloud.calls == 1
+    assert all(r == {"acpower": 2000} for r in results)
+    assert service.stats == {"hits": 1, "misses": 1, "coalesced": 3, "stale": 0}
+
+
+async def test_non_control_caller_gets_stale_data_without_waiting():
+    service, state, cloud = SolaxDataService(), make_state(age_minutes=10), SlowCloud(delay=1.0)
+    with patch.object(solax, "fetch_solax_cloud", cloud):
+        started = asyncio.get_running_loop().time()
+        assert await service.get(None, state, control=False) == {"acpower": 100}
+        assert asyncio.get_running_loop().time() - started < 0.1
+        # Die Steuerung wartet auf die bereits laufende Aktualisierung
+        assert await service.get(None, state, control=True) == {"acpower": 2000}
+    assert cloud.calls == 1
+    assert service.stats["stale"] == 1 and service.stats["coalesced"] == 1
+
+
+async def test_fetch_errors_return_none():
+    async def failing(session, state):
+        raise asyncio.TimeoutError()
+
+    service, state = SolaxDataService(), make_state()
+    with patch.object(solax, "fetch_solax_cloud", failing):
+        assert await service.get(None, state) is None
@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from state_checkpoint import StateCheckpoint, SCHEMA_VERSION
+
+TZ = pytz.timezone("Europe/Berlin")
+
+
+def test_restart_resumes_runtime_modes_and_forecast(tmp_path, make_state):
+    path = str(tmp_path / "wp_state.json")
+    now = TZ.localize(datetime.now().replace(hour=14, minute=0, second=0, microsecond=0))
+    state = make_state()
+    state.stats.total_runtime_today = timedelta(minutes=90)
+    state.stats.last_compressor_off_time = now - timedelta(minutes=5)
+    state.urlaubsmodus_aktiv = True
+    state.urlaubsmodus_ende = now + timedelta(days=3)
+    state.bademodus_aktiv = True
+    state.verdampfer_blocked = True
+    state.solar.forecast_today = 12.5
+    state.last_forecast_update = now - timedelta(hours=1)
+    state.planner.heat_rate_kph = 7.5
+
+    checkpoint = StateCheckpoint(path)
+    assert checkpoint.maybe_save(state, now)
+    assert not checkpoint.maybe_save(state, now)  # unverändert: kein erneutes Schreiben
+    state.bademodus_aktiv = False
+    assert checkpoint.maybe_save(state, now)
+    assert not os.path.exists(path + ".tmp")
+
+    restored = make_state()
+    assert StateCheckpoint(path).load(restored, now + timedelta(minutes=1))
+    assert restored.stats.total_runtime_today == timedelta(minutes=90)
+    assert restored.stats.last_compressor_off_time == now - timedelta(minutes=5)
+    assert restored.urlaubsmodus_aktiv and restored.urlaubsmodus_ende == now + timedelta(days=3)
+    assert restored.bademodus_aktiv is False
+    assert restored.verdampfer_blocked is True
+    assert restored.solar.forecast_today == 12.5 and restored.last_forecast_update == now - timedelta(hours=1)
+    assert restored.planner.heat_rate_kph == 7.5
+
+
+def test_running_compressor_counts_runtime_and_starts_min_pause(tmp_path, make_state):
+    path = str(tmp_path / "wp_state.json")
+    now = TZ.localize(datetime.now().replace(hour=14, minute=0, second=0, microsecond=0))
+    state = make_state()
+    state.control.kompressor_ein = True
+    state.stats.last_compressor_on_time = now - timedelta(minutes=20)
+    StateCheckpoint(path).maybe_save(state, now)
+
+    restart = now + timedelta(minutes=2)
+    restored = make_state()
+    StateCheckpoint(path).load(restored, restart)
+    assert restored.control.kompressor_ein is False
+    assert restored.stats.total_runtime_today == timedelta(minutes=20)
+    assert restored.stats.last_compressor_off_time == restart
+
+
+def test_other_day_and_unknown_version_are_not_restored(tmp_path, make_state):
+    path = str(tmp_path / "wp_state.json")
+    now = TZ.localize(datetime.now().replace(hour=14, minute=0, second=0, microsecond=0))
+    state = make_state()
+    state.stats.total_runtime_today = timedelta(hours=2)
+    StateCheckpoint(path).maybe_save(state, now)
+
+    restored = make_state()
+    StateCheckpoint(path).load(restored, now + timedelta(days=1))
+    assert restored.stats.total_runtime_today == timedelta()
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["version"] = SCHEMA_VERSION + 1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert not StateCheckpoint(path).load(make_state(), now)
@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import asyncio
+import logging
+import threading
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import telegram_api
+from logging_config import TelegramHandler
+from telegram_queue import (
+    OutboundQueue, PRIORITY_CRITICAL, PRIORITY_ALERT, PRIORITY_NORMAL, PRIORITY_LOG,
+)
+
+
+async def drain(queue):
+    while await queue.drain_once() == 0.0:
+        pass
+
+
+async def test_priority_order_and_bounded_queue(virtual_clock):
+    queue = OutboundQueue(max_size=3, chat_interval=0)
+    for i in range(3):
+        assert queue.enqueue("1", f"log {i}", "tok", PRIORITY_LOG)
+    assert queue.enqueue("1", "Alarm", "tok", PRIORITY_CRITICAL)
+    assert not queue.enqueue("1", "noch ein Log", "tok", PRIORITY_LOG)
+    assert len(queue) == 3 and queue.stats["dropped"] == 2
+
+    with patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=True)) as send:
+        await drain(queue)
+    assert [c.args[2] for c in send.call_args_list] == ["Alarm", "log 0", "log 1"]
+
+
+async def test_identical_messages_are_deduplicated(virtual_clock):
+    queue = OutboundQueue(dedupe_window=600)
+    assert queue.enqueue("1", "Sensorfehler", "tok")
+    assert not queue.enqueue("1", "Sensorfehler", "tok")
+    assert queue.enqueue("2", "Sensorfehler", "tok")
+    virtual_clock.advance(601)
+    assert queue.enqueue("1", "Sensorfehler", "tok")
+    assert queue.stats["deduped"] == 1
+
+
+async def test_warnings_are_coalesced_into_one_digest(virtual_clock):
+    queue = OutboundQueue(digest_delay=30)
+    for text in ["Netzwerkfehler", "Netzwerkfehler", "Solax-Timeout"]:
+        queue.add_log("1", text, "tok")
+    with patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=True)) as send:
+        assert await queue.drain_once() == pytest.approx(30)
+        virtual_clock.advance(30)
+        await drain(queue)
+    assert send.call_count == 1
+    text = send.call_args.args[2]
+    assert text.startswith("⚠️ 3 Warnungen") and "Netzwerkfehler (×2)" in text and "Solax-Timeout" in text
+
+
+async def test_per_chat_rate_limit(virtual_clock):
+    queue = OutboundQueue(chat_interval=1.0)
+    queue.enqueue("1", "a", "tok", PRIORITY_ALERT)
+    queue.enqueue("1", "b", "tok", PRIORITY_ALERT)
+    queue.enqueue("2", "c", "tok", PRIORITY_NORMAL)
+    with patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=True)) as send:
+        await drain(queue)
+        # Chat 2 muss nicht auf Chat 1 warten
+        assert [c.args[2] for c in send.call_args_list] == ["a", "c"]
+        assert await queue.drain_once() == pytest.approx(1.0)
+        virtual_clock.advance(1.0)
+        await drain(queue)
+    assert send.call_args.args[2] == "b"
+
+
+async def test_critical_alerts_survive_restart(virtual_clock, tmp_path):
+    path = str(tmp_path / "outbox.json")
+    queue = OutboundQueue(persist_path=path)
+    queue.enqueue("1", "🚨 Kompressor bleibt eingeschaltet", "tok", PRIORITY_CRITICAL)
+    queue.enqueue("1", "nur Info", "tok", PRIORITY_NORMAL)
+    with patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=False)):
+        await queue.drain_once()
+    assert len(queue) == 2 and queue.stats["retried"] == 1
+    assert os.path.exists(path)
+
+    restarted = OutboundQueue(persist_path=path)
+    restarted.default_token = "tok"
+    restarted._load()
+    assert len(restarted) == 1
+    with patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=True)) as send:
+        await drain(restarted)
+    assert send.call_args.args[2:4] == ("🚨 Kompressor bleibt eingeschaltet", "tok")
+    assert not os.path.exists(path)
+
+
+async def test_log_from_worker_thread_is_handed_to_the_loop():
+    queue = OutboundQueue(digest_delay=0.05, chat_interval=0)
+    with patch("logging_config.get_outbox", return_value=queue), \
+            patch.object(telegram_api, "send_telegram_message", AsyncMock(return_value=True)) as send:
+        queue.start(session=None, default_token="tok", persist_path=None)
+        handler = TelegramHandler("tok", "1")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        record = logging.LogRecord("api", logging.WARNING, __file__, 0, "Webhook abgelehnt", None, None)
+        worker = threading.Thread(target=handler.emit, args=(record,))
+        worker.start()
+        worker.join()
+        assert queue._digest == {}  # erst der Event-Loop übernimmt die Meldung
+        try:
+            for _ in range(100):
+                if send.called:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+    assert send.call_args.args[1:3] == ("1", "Webhook abgelehnt")
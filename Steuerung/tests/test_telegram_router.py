@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telegram_router import TelegramRouter, Command, normalize_command
+
+
+def update(text, update_id=1, user_id=42):
+    return {"update_id": update_id, "message": {"text": text, "from": {"id": user_id}, "chat": {"id": 1}}}
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.loads = []
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+
+    def providers(self):
+        async def temperatures(session):
+            self.loads.append("temperatures")
+            return (50.0, 40.0, 45.0, 10.0)
+
+        async def solax(session):
+            self.loads.append("solax")
+            return {"acpower": 1000}
+        return {"temperatures": temperatures, "solax": solax}
+
+    def handler(self, name):
+        async def run(ctx):
+            self.calls.append((name, dict(ctx.data)))
+        return run
+
+    def chart(self, name):
+        async def run(ctx):
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await self.release.wait()
+            self.running -= 1
+            self.calls.append((name, {}))
+        return run
+
+
+def make_router(rec, **kwargs):
+    router = TelegramRouter(rec.providers(), fallback=Command(rec.handler("unbekannt")), **kwargs)
+    router.register("temperaturen", rec.handler("temperaturen"), needs=("temperatures",))
+    router.register("status", rec.handler("status"), needs=("temperatures", "solax"))
+    router.register("verlauf 24h", rec.chart("verlauf 24h"), heavy=True)
+    router.register("laufzeiten", rec.chart("laufzeiten"), heavy=True)
+    return router
+
+
+def test_normalization():
+    assert normalize_command("📊 Status") == "status"
+    assert normalize_command("  🌴 Urlaub   Ende ") == "urlaub ende"
+    assert normalize_command("/start@WPBot") == "start"
+    assert normalize_command("⏱️ Laufzeiten") == "laufzeiten"
+
+
+async def test_exact_matching_and_lazy_data():
+    rec = Recorder()
+    router = make_router(rec)
+    await router.dispatch_updates(None, [update("🌡️ Temperaturen", 1), update("Statusbericht bitte", 2)], None)
+    assert [c[0] for c in rec.calls] == ["temperaturen", "unbekannt"]
+    assert rec.loads == ["temperatures"]  # keine Solax-Abfrage für 'Temperaturen'
+
+    assert await router.dispatch_updates(None, [update("📊 Status", 7)], None) == 8
+    assert rec.calls[-1] == ("status", {"temperatures": (50.0, 40.0, 45.0, 10.0), "solax": {"acpower": 1000}})
+
+
+async def test_heavy_commands_do_not_block_and_are_deduplicated():
+    rec = Recorder()
+    router = make_router(rec)
+    await router.dispatch_updates(None, [
+        update("📉 Verlauf 24h", 1), update("📉 Verlauf 24h", 2, user_id=7), update("⏱️ Laufzeiten", 3), update("📊 Status", 4),
+    ], None)
+    # Status ist fertig, obwohl das Diagramm noch läuft
+    assert [c[0] for c in rec.calls] == ["status"]
+    assert router.stats["deduplicated"] == 1
+
+    rec.release.set()
+    await router.wait_idle()
+    assert sorted(c[0] for c in rec.calls) == ["laufzeiten", "status", "verlauf 24h"]
+    assert rec.max_running == 1  # höchstens ein schwerer Befehl je Nutzer
+
+
+async def test_dialog_has_priority_and_errors_are_reported():
+    rec = Recorder()
+    errors = []
+
+    async def in_dialog(ctx):
+        return ctx.text == "5"
+
+    async def on_error(ctx, e):
+        errors.append(str(e))
+
+    router = make_router(rec, pre_dispatch=in_dialog, on_error=on_error)
+
+    async def broken(ctx):
+        raise RuntimeError("kaputt")
+    router.register("latenz", broken)
+
+    await router.dispatch_updates(None, [update("5", 1), update("Latenz", 2)], None)
+    assert rec.calls == []
+    assert errors == ["kaputt"]
+    with pytest.raises(ValueError):
+        router.register("📊 STATUS", rec.handler("doppelt"))
@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+import asyncio
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import telegram_webhook
+from api import app
+from telegram_webhook import WebhookInbox, SECRET_HEADER, WEBHOOK_PATH, valid_secret, webhook_unhealthy
+
+
+@pytest.fixture
+def inbox(monkeypatch):
+    inbox = WebhookInbox()
+    monkeypatch.setattr(telegram_webhook, "_inbox", inbox)
+    yield inbox
+    inbox.deactivate()
+
+
+def post_updates(requests):
+    """Sendet Requests aus einem eigenen Thread (wie uvicorn im Betrieb)."""
+    with TestClient(app) as client:
+        return [client.post(WEBHOOK_PATH, json=body, headers=headers).status_code for body, headers in requests]
+
+
+async def test_webhook_pushes_verified_updates_to_task_loop(inbox):
+    update = {"update_id": 7, "message": {"text": "Status"}}
+    assert await asyncio.to_thread(post_updates, [(update, {SECRET_HEADER: "geheim"})]) == [404]
+
+    inbox.activate("geheim")
+    statuses = await asyncio.to_thread(post_updates, [
+        (update, {SECRET_HEADER: "geheim"}),
+        (update, {SECRET_HEADER: "geheim"}),          # Wiederholung durch Telegram
+        ({"update_id": 8}, {SECRET_HEADER: "falsch"}),
+        ({"update_id": 9}, {}),
+        ({"foo": 1}, {SECRET_HEADER: "geheim"}),
+    ])
+    assert statuses == [200, 200, 403, 403, 400]
+    assert await inbox.get_batch(timeout=1.0) == [update]
+    assert inbox.rejected == 2
+    assert await inbox.get_batch(timeout=0.05) == []
+
+
+def test_secret_validation():
+    assert valid_secret("abc_DEF-123")
+    assert not valid_secret("")
+    assert not valid_secret(None)
+    assert not valid_secret("mit leerzeichen")
+
+
+def test_webhook_health():
+    now = 1_700_000_000
+    assert not webhook_unhealthy(None, now)
+    assert webhook_unhealthy({"url": ""}, now)
+    assert not webhook_unhealthy({"url": "https://x", "pending_update_count": 0}, now)
+    assert webhook_unhealthy({"url": "https://x", "pending_update_count": 3, "last_error_date": now - 60}, now)
+    assert not webhook_unhealthy({"url": "https://x", "pending_update_count": 3, "last_error_date": now - 3600}, now)
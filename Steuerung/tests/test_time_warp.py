@@ -0,0 +1,36 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import clock
+from config_manager import AppConfig
+from simulation.time_warp import run_simulation
+
+
+@pytest.mark.asyncio
+async def test_one_day_simulation(tmp_path):
+    result = await run_simulation(datetime(2024, 5, 1), 1, config_path=str(tmp_path / "missing.ini"), tick_s=30)
+    cfg = AppConfig().Heizungssteuerung
+
+    assert result["ticks"] == 24 * 120
+    assert result["compressor_starts"] > 0
+    assert 0 < result["runtime_hours"] < 24
+    # Regelung hält den Speicher im Bereich der Sollwerte
+    assert result["t_mittig_min"] > cfg.EINSCHALTPUNKT - 3
+    assert result["t_mittig_max"] < cfg.SICHERHEITS_TEMP
+    assert "Nachtmodus" in result["mode_share"]
+    # Virtuelle Uhr wird nach der Simulation wieder entfernt
+    assert isinstance(clock.get_clock(), clock.SystemClock)
+
+
+@pytest.mark.asyncio
+async def test_simulation_writes_csv_log(tmp_path):
+    log = tmp_path / "sim.csv"
+    await run_simulation(datetime(2024, 5, 1), 0.1, config_path=str(tmp_path / "missing.ini"), tick_s=60, csv_log=str(log))
+    lines = log.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("Zeitstempel,")
+    assert lines[1].startswith("2024-05-01 00:00:00")
+    assert len(lines) == 1 + 144
@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from upstream_cache import UpstreamCache
+
+
+class Upstream:
+    """Testserver mit ETag-Unterstützung und Zähler."""
+
+    def __init__(self, delay=0.0, payload=None):
+        self.requests = 0
+        self.conditional = 0
+        self.delay = delay
+        self.payload = payload or {"success": True, "result": {"acpower": 1200}}
+
+    async def handler(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if request.headers.get("If-None-Match") == '"v1"':
+            self.conditional += 1
+            return web.Response(status=304)
+        return web.json_response(self.payload, headers={"ETag": '"v1"'})
+
+
+@pytest.fixture
+async def upstream():
+    backend = Upstream(delay=0.05)
+    app = web.Application()
+    app.router.add_get("/api", backend.handler)
+    server = TestServer(app)
+    await server.start_server()
+    backend.url = str(server.make_url("/api"))
+    yield backend
+    await server.close()
+
+
+async def test_concurrent_callers_share_one_request(upstream, tmp_path, virtual_clock):
+    cache = UpstreamCache(str(tmp_path))
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*[cache.fetch_json(session, "solax", upstream.url, {"sn": "x"}) for _ in range(5)])
+    assert upstream.requests == 1
+    assert cache.stats["coalesced"] == 4
+    assert all(r.data["result"]["acpower"] == 1200 for r in results)
+
+
+async def test_ttl_revalidation_and_restart(upstream, tmp_path, virtual_clock):
+    cache = UpstreamCache(str(tmp_path))
+    async with aiohttp.ClientSession() as session:
+        first = await cache.fetch_json(session, "solax", upstream.url)
+        assert first.fresh
+        virtual_clock.advance(60)
+        assert (await cache.fetch_json(session, "solax", upstream.url)).fresh is False
+        assert upstream.requests == 1
+
+        # Neustart: Eintrag kommt von der Platte, noch innerhalb der TTL
+        restarted = UpstreamCache(str(tmp_path))
+        await restarted.fetch_json(session, "solax", upstream.url)
+        assert upstream.requests == 1 and restarted.stats["hits"] == 1
+
+        # Nach Ablauf der TTL: bedingter Request, 304 verlängert den Eintrag
+        virtual_clock.advance(301)
+        entry = await restarted.fetch_json(session, "solax", upstream.url)
+        assert upstream.conditional == 1 and restarted.stats["revalidated"] == 1
+        assert entry.data == first.data and not entry.fresh
+
+
+async def test_invalid_responses_are_not_cached(upstream, tmp_path, virtual_clock):
+    upstream.payload = {"success": False, "exception": "Token ungültig"}
+    cache = UpstreamCache(str(tmp_path))
+    async with aiohttp.ClientSession() as session:
+        for _ in range(2):
+            entry = await cache.fetch_json(session, "solax", upstream.url, validate=lambda d: d.get("success"))
+            assert entry.data["success"] is False
+    assert upstream.requests == 2
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import timezone
+from typing import Callable, Dict, Optional
+
+import aiohttp
+
+import clock
+
+UPSTREAM_CACHE_DIR = "upstream_cache"
+
+# Gültigkeit je Endpunkt in Sekunden
+ENDPOINT_TTLS = {
+    "solax": 5 * 60,
+    "open_meteo": 6 * 3600 - 60,  # knapp unter dem 6h-Abrufintervall in main
+}
+
+
+class CacheEntry:
+    """Antwort eines Upstream-Aufrufs inkl. Validatoren für bedingte Requests."""
+
+    __slots__ = ("data", "fetched_at", "etag", "last_modified", "fresh")
+
+    def __init__(self, data, fetched_at: float, etag: Optional[str] = None, last_modified: Optional[str] = None, fresh: bool = False):
+        self.data = data
+        self.fetched_at = fetched_at          # Unix-Zeit (übersteht Neustarts)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = fresh                    # True nur, wenn der Inhalt gerade neu geladen wurde (HTTP 200)
+
+    def to_json(self) -> Dict:
+        return {"data": self.data, "fetched_at": self.fetched_at, "etag": self.etag, "last_modified": self.last_modified}
+
+
+class UpstreamCache:
+    """
+    Gemeinsame Abrufschicht für Cloud-APIs (Solax, Open-Meteo):
+    - Antworten werden im Speicher und auf der Platte gehalten (TTL je Endpunkt),
+    - abgelaufene Einträge werden per If-None-Match / If-Modified-Since revalidiert,
+    - gleichzeitige Aufrufer desselben Requests teilen sich einen laufenden Abruf.
+    Fehler werden an die Aufrufer weitergereicht; deren Retry-/Fallback-Logik bleibt unverändert.
+    """
+
+    def __init__(self, cache_dir: str = UPSTREAM_CACHE_DIR, ttls: Optional[Dict[str, float]] = None):
+        self.cache_dir = cache_dir
+        self.ttls = dict(ENDPOINT_TTLS, **(ttls or {}))
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "coalesced": 0}
+
+    @staticmethod
+    def _key(endpoint: str, url: str, params: Optional[Dict]) -> str:
+        raw = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        # Hash statt Klartext, da die Parameter Tokens enthalten können
+        return f"{endpoint}-{hashlib.sha1(raw.encode()).hexdigest()[:16]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None or not os.path.exists(self._path(key)):
+            return entry
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            entry = CacheEntry(raw["data"], float(raw["fetched_at"]), raw.get("etag"), raw.get("last_modified"))
+            self._entries[key] = entry
+        except Exception as e:
+            logging.error(f"Fehler beim Lesen des Upstream-Caches {self._path(key)}: {e}")
+        return entry
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry.to_json(), f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logging.error(f"Fehler beim Schreiben des Upstream-Caches {self._path(key)}: {e}")
+
+    @staticmethod
+    def _now() -> float:
+        return clock.now(timezone.utc).timestamp()
+
+    def peek(self, endpoint: str, url: str, params: Optional[Dict] = None) -> Optional[CacheEntry]:
+        """Letzter bekannter Eintrag ohne Netzwerkzugriff (auch wenn abgelaufen)."""
+        return self._load(self._key(endpoint, url, params))
+
+    async def fetch_json(self, session: aiohttp.ClientSession, endpoint: str, url: str, params: Optional[Dict] = None,
+                         validate: Optional[Callable[[Dict], bool]] = None, timeout: float = 30) -> CacheEntry:
+        """
+        Liefert die (ggf. gecachte) JSON-Antwort.
+
+        Args:
+            validate: Nur Antworten, für die validate(data) True ergibt, werden gecacht
+                (z.B. Solax meldet Fehler mit HTTP 200 und success=False).
+        """
+        key = self._key(endpoint, url, params)
+        entry = self._load(key)
+        if entry is not None and self._now() - entry.fetched_at < self.ttls.get(endpoint, 0):
+            self.stats["hits"] += 1
+            return entry
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._request(session, key, url, params, entry, validate, timeout)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # verhindert "exception was never retrieved", wenn niemand wartet
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _request(self, session, key, url, params, entry, validate, timeout) -> CacheEntry:
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 304 and entry is not None:
+                self.stats["revalidated"] += 1
+                entry = CacheEntry(entry.data, self._now(), entry.etag, entry.last_modified)
+                self._store(key, entry)
+                return entry
+            response.raise_for_status()
+            data = await response.json()
+            self.stats["misses"] += 1
+            cached = CacheEntry(data, self._now(), response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            if validate is None or validate(data):
+                self._store(key, cached)
+            return CacheEntry(cached.data, cached.fetched_at, cached.etag, cached.last_modified, fresh=True)
+
+
+_cache: Optional[UpstreamCache] = None
+
+
+def get_cache() -> UpstreamCache:
+    """Gemeinsamer Upstream-Cache für Hauptschleife, Telegram und API."""
+    global _cache
+    if _cache is None:
+        _cache = UpstreamCache()
+    return _cache
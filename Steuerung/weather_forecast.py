@@ -4,7 +4,43 @@ import os
 import aiofiles
 from datetime import datetime, timedelta
 import pytz
+from instrumentation import instrument
+import clock
+import forecast_store
+import upstream_cache
 
+
+def get_hourly_forecast():
+    """Stündliche Strahlungsprognose des letzten Abrufs (für die Heizplanung)."""
+    latest = forecast_store.get_store().latest()
+    return latest.hourly() if latest else []
+
+
+def get_cached_forecast(now, max_age_hours=6):
+    """
+    Liefert (Abrufzeit, Werte wie get_solar_forecast) aus dem Prognose-Speicher, falls der letzte
+    Abruf jünger als max_age_hours ist - z.B. nach einem Neustart. Sonst None.
+    """
+    latest = forecast_store.get_store().latest()
+    now_naive = now.replace(tzinfo=None)
+    if latest is None or now_naive - latest.issued >= timedelta(hours=max_age_hours):
+        return None
+    today, tomorrow = now_naive.date(), now_naive.date() + timedelta(days=1)
+    sr_today, ss_today = latest.sun.get(today.isoformat(), (None, None))
+    sr_tomorrow, ss_tomorrow = latest.sun.get(tomorrow.isoformat(), (None, None))
+    return latest.issued, (latest.day_total(today), latest.day_total(tomorrow), sr_today, ss_today, sr_tomorrow, ss_tomorrow)
+
+
+def _store_hourly(times, total_radiation, sun_data):
+    # Open-Meteo liefert je Zeitstempel den Mittelwert der vorangegangenen Stunde
+    start = datetime.fromisoformat(times[0]) - timedelta(hours=1)
+    values = [0.0 if rad is None else rad for rad in total_radiation]
+    sun = {day: (d["sunrise"], d["sunset"]) for day, d in sun_data.items()}
+    issued = clock.now(pytz.timezone("Europe/Berlin")).replace(tzinfo=None)
+    forecast_store.get_store().add(forecast_store.ForecastSeries(issued, start, values, sun))
+
+
+@instrument("open_meteo_api")
 async def get_solar_forecast(session: aiohttp.ClientSession, config=None):
     """
     Fetches solar radiation forecast from Open-Meteo.
@@ -28,65 +64,68 @@ async def get_solar_forecast(session: aiohttp.ClientSession, config=None):
     }
     
     try:
-        async with session.get(url, params=params, timeout=10) as response:
-            if response.status == 200:
-                data = await response.json()
-                
-                # Extract Hourly Data (Radiation)
-                hourly = data.get("hourly", {})
-                times = hourly.get("time", [])
-                direct = hourly.get("direct_radiation", [])
-                diffuse = hourly.get("diffuse_radiation", [])
-                
-                if not times or not direct or not diffuse:
-                    logging.warning("Open-Meteo API returned empty hourly data.")
-                    return None, None, None, None, None, None
-                
-                total_radiation = [dir + diff for dir, diff in zip(direct, diffuse)]
-                daily_totals = {}
-                for t_str, rad in zip(times, total_radiation):
-                    date_str = t_str.split("T")[0]
-                    daily_totals[date_str] = daily_totals.get(date_str, 0) + rad
-                
-                for date in daily_totals:
-                    daily_totals[date] = daily_totals[date] / 1000.0
-                
-                # Extract Daily Data (Sunrise/Sunset)
-                daily = data.get("daily", {})
-                daily_times = daily.get("time", [])
-                sunrises = daily.get("sunrise", [])
-                sunsets = daily.get("sunset", [])
-                
-                sun_data = {}
-                for d_str, sr, ss in zip(daily_times, sunrises, sunsets):
-                    sun_data[d_str] = {
-                        "sunrise": sr.split("T")[1] if "T" in sr else None,
-                        "sunset": ss.split("T")[1] if "T" in ss else None
-                    }
-                
-                tz = pytz.timezone("Europe/Berlin")
-                now = datetime.now(tz)
-                today_str = now.strftime("%Y-%m-%d")
-                tomorrow_str = (now + timedelta(days=1)).strftime("%Y-%m-%d")
-                
-                rad_today = daily_totals.get(today_str)
-                rad_tomorrow = daily_totals.get(tomorrow_str)
-                
-                sunrise_today = sun_data.get(today_str, {}).get("sunrise")
-                sunset_today = sun_data.get(today_str, {}).get("sunset")
-                sunrise_tomorrow = sun_data.get(tomorrow_str, {}).get("sunrise")
-                sunset_tomorrow = sun_data.get(tomorrow_str, {}).get("sunset")
-                
-                logging.info(f"Solar forecast updated: Today={rad_today:.2f} kWh/m² ({sunrise_today}-{sunset_today}), Tomorrow={rad_tomorrow:.2f} kWh/m²")
-                
-                # Log to dedicated CSV
-                await log_forecast_to_csv(rad_today, rad_tomorrow, sunrise_today, sunset_today, sunrise_tomorrow, sunset_tomorrow)
-                
-                return rad_today, rad_tomorrow, sunrise_today, sunset_today, sunrise_tomorrow, sunset_tomorrow
-            else:
-                error_text = await response.text()
-                logging.error(f"Error fetching solar forecast: Status {response.status}, Details: {error_text}")
-                return None, None, None, None, None, None
+        entry = await upstream_cache.get_cache().fetch_json(
+            session, "open_meteo", url, params, validate=lambda d: bool(d.get("hourly")), timeout=10)
+        data = entry.data
+
+        # Extract Hourly Data (Radiation)
+        hourly = data.get("hourly", {})
+        times = hourly.get("time", [])
+        direct = hourly.get("direct_radiation", [])
+        diffuse = hourly.get("diffuse_radiation", [])
+
+        if not times or not direct or not diffuse:
+            logging.warning("Open-Meteo API returned empty hourly data.")
+            return None, None, None, None, None, None
+
+        total_radiation = [dir + diff for dir, diff in zip(direct, diffuse)]
+        daily_totals = {}
+        for t_str, rad in zip(times, total_radiation):
+            date_str = t_str.split("T")[0]
+            daily_totals[date_str] = daily_totals.get(date_str, 0) + rad
+
+        for date in daily_totals:
+            daily_totals[date] = daily_totals[date] / 1000.0
+
+        # Extract Daily Data (Sunrise/Sunset)
+        daily = data.get("daily", {})
+        daily_times = daily.get("time", [])
+        sunrises = daily.get("sunrise", [])
+        sunsets = daily.get("sunset", [])
+
+        sun_data = {}
+        for d_str, sr, ss in zip(daily_times, sunrises, sunsets):
+            sun_data[d_str] = {
+                "sunrise": sr.split("T")[1] if "T" in sr else None,
+                "sunset": ss.split("T")[1] if "T" in ss else None
+            }
+
+        if entry.fresh:
+            _store_hourly(times, total_radiation, sun_data)
+
+        tz = pytz.timezone("Europe/Berlin")
+        now = clock.now(tz)
+        today_str = now.strftime("%Y-%m-%d")
+        tomorrow_str = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+
+        rad_today = daily_totals.get(today_str)
+        rad_tomorrow = daily_totals.get(tomorrow_str)
+
+        sunrise_today = sun_data.get(today_str, {}).get("sunrise")
+        sunset_today = sun_data.get(today_str, {}).get("sunset")
+        sunrise_tomorrow = sun_data.get(tomorrow_str, {}).get("sunrise")
+        sunset_tomorrow = sun_data.get(tomorrow_str, {}).get("sunset")
+
+        logging.info(f"Solar forecast updated: Today={rad_today:.2f} kWh/m² ({sunrise_today}-{sunset_today}), Tomorrow={rad_tomorrow:.2f} kWh/m²")
+
+        # Log to dedicated CSV (nur neue Abrufe, nicht Antworten aus dem Cache)
+        if entry.fresh:
+            await log_forecast_to_csv(rad_today, rad_tomorrow, sunrise_today, sunset_today, sunrise_tomorrow, sunset_tomorrow)
+
+        return rad_today, rad_tomorrow, sunrise_today, sunset_today, sunrise_tomorrow, sunset_tomorrow
+    except aiohttp.ClientResponseError as e:
+        logging.error(f"Error fetching solar forecast: Status {e.status}, Details: {e.message}")
+        return None, None, None, None, None, None
     except Exception as e:
         logging.error(f"Unexpected error in get_solar_forecast: {e}")
         return None, None, None, None, None, None